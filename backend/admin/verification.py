@@ -1,7 +1,6 @@
-import os
-import boto3
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from storage import get_storage
 
 def list_verification_requests(cur, filter_type='pending'):
     schema = 't_p19021063_social_connect_platf'
@@ -77,18 +76,11 @@ def process_verification_decision(cur, conn, request_id, decision, admin_comment
             WHERE id = %s
         """, (user_id,))
         
-        s3 = boto3.client('s3',
-            endpoint_url='https://bucket.poehali.dev',
-            aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
-            aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY']
-        )
-        
         try:
             selfie_key = request_data['selfie_photo_url'].split('/bucket/')[-1]
             document_key = request_data['document_photo_url'].split('/bucket/')[-1]
             
-            s3.delete_object(Bucket='files', Key=selfie_key)
-            s3.delete_object(Bucket='files', Key=document_key)
+            get_storage().delete_many([selfie_key, document_key])
         except Exception as e:
             print(f"Failed to delete photos: {e}")
     
@@ -1,8 +1,10 @@
 import json
 import os
+import base64
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import jwt as pyjwt
+from placeholders import compute_placeholder
 
 def verify_token(token: str) -> dict | None:
     if not token:
@@ -14,6 +16,19 @@ def verify_token(token: str) -> dict | None:
     except Exception:
         return None
 
+def photo_placeholders(photos: list) -> list:
+    '''Плейсхолдер на каждое фото: форма присылает data URL (base64); для внешних URL — None'''
+    result = []
+    for photo in photos:
+        placeholder = None
+        if isinstance(photo, str) and photo.startswith('data:image') and ',' in photo:
+            try:
+                placeholder = compute_placeholder(base64.b64decode(photo.split(',', 1)[1]))
+            except Exception as e:
+                print(f'Placeholder error: {e}')
+        result.append(placeholder)
+    return result
+
 def handler(event: dict, context) -> dict:
     '''API для управления объявлениями пользователей'''
     method = event.get('httpMethod', 'GET')
@@ -66,8 +81,8 @@ def handler(event: dict, context) -> dict:
                     
                     cur.execute('''
                         SELECT a.id, a.user_id, a.action, a.schedule, a.status, 
-                               a.created_at, a.updated_at, a.photos,
-                               u.name, u.nickname, u.avatar_url, u.gender, u.city, u.birth_date,
+                               a.created_at, a.updated_at, a.photos, a.photo_placeholders,
+                               u.name, u.nickname, u.avatar_url, u.avatar_blurhash, u.avatar_color, u.gender, u.city, u.birth_date,
                                EXTRACT(YEAR FROM AGE(CURRENT_DATE, u.birth_date))::int as age
                         FROM t_p19021063_social_connect_platf.ads_favorites af
                         JOIN t_p19021063_social_connect_platf.ads a ON af.ad_id = a.id
@@ -95,8 +110,8 @@ def handler(event: dict, context) -> dict:
                 if user_id:
                     cur.execute('''
                         SELECT a.id, a.user_id, a.action, a.schedule, a.status, 
-                               a.created_at, a.updated_at, a.photos,
-                               u.name, u.nickname, u.avatar_url, u.gender, u.city, u.birth_date,
+                               a.created_at, a.updated_at, a.photos, a.photo_placeholders,
+                               u.name, u.nickname, u.avatar_url, u.avatar_blurhash, u.avatar_color, u.gender, u.city, u.birth_date,
                                EXTRACT(YEAR FROM AGE(CURRENT_DATE, u.birth_date))::int as age
                         FROM t_p19021063_social_connect_platf.ads a
                         JOIN t_p19021063_social_connect_platf.users u ON a.user_id = u.id
@@ -113,8 +128,8 @@ def handler(event: dict, context) -> dict:
                     if user_id_from_token:
                         cur.execute('''
                             SELECT a.id, a.user_id, a.action, a.schedule, a.status, 
-                                   a.created_at, a.updated_at, a.photos,
-                                   u.name, u.nickname, u.avatar_url, u.gender, u.city, u.birth_date,
+                                   a.created_at, a.updated_at, a.photos, a.photo_placeholders,
+                                   u.name, u.nickname, u.avatar_url, u.avatar_blurhash, u.avatar_color, u.gender, u.city, u.birth_date,
                                    EXTRACT(YEAR FROM AGE(CURRENT_DATE, u.birth_date))::int as age,
                                    EXISTS(SELECT 1 FROM t_p19021063_social_connect_platf.ads_favorites af WHERE af.user_id = %s AND af.ad_id = a.id) as is_favorite
                             FROM t_p19021063_social_connect_platf.ads a
@@ -125,8 +140,8 @@ def handler(event: dict, context) -> dict:
                     else:
                         cur.execute('''
                             SELECT a.id, a.user_id, a.action, a.schedule, a.status, 
-                                   a.created_at, a.updated_at, a.photos,
-                                   u.name, u.nickname, u.avatar_url, u.gender, u.city, u.birth_date,
+                                   a.created_at, a.updated_at, a.photos, a.photo_placeholders,
+                                   u.name, u.nickname, u.avatar_url, u.avatar_blurhash, u.avatar_color, u.gender, u.city, u.birth_date,
                                    EXTRACT(YEAR FROM AGE(CURRENT_DATE, u.birth_date))::int as age,
                                    FALSE as is_favorite
                             FROM t_p19021063_social_connect_platf.ads a
@@ -144,8 +159,8 @@ def handler(event: dict, context) -> dict:
                     if user_id_from_token:
                         cur.execute('''
                             SELECT a.id, a.user_id, a.action, a.schedule, a.status, 
-                                   a.created_at, a.updated_at, a.photos,
-                                   u.name, u.nickname, u.avatar_url, u.gender, u.city, u.birth_date,
+                                   a.created_at, a.updated_at, a.photos, a.photo_placeholders,
+                                   u.name, u.nickname, u.avatar_url, u.avatar_blurhash, u.avatar_color, u.gender, u.city, u.birth_date,
                                    EXTRACT(YEAR FROM AGE(CURRENT_DATE, u.birth_date))::int as age,
                                    EXISTS(SELECT 1 FROM t_p19021063_social_connect_platf.ads_favorites af WHERE af.user_id = %s AND af.ad_id = a.id) as is_favorite
                             FROM t_p19021063_social_connect_platf.ads a
@@ -156,8 +171,8 @@ def handler(event: dict, context) -> dict:
                     else:
                         cur.execute('''
                             SELECT a.id, a.user_id, a.action, a.schedule, a.status, 
-                                   a.created_at, a.updated_at, a.photos,
-                                   u.name, u.nickname, u.avatar_url, u.gender, u.city, u.birth_date,
+                                   a.created_at, a.updated_at, a.photos, a.photo_placeholders,
+                                   u.name, u.nickname, u.avatar_url, u.avatar_blurhash, u.avatar_color, u.gender, u.city, u.birth_date,
                                    EXTRACT(YEAR FROM AGE(CURRENT_DATE, u.birth_date))::int as age,
                                    FALSE as is_favorite
                             FROM t_p19021063_social_connect_platf.ads a
@@ -262,10 +277,10 @@ def handler(event: dict, context) -> dict:
             
             with conn.cursor() as cur:
                 cur.execute('''
-                    INSERT INTO t_p19021063_social_connect_platf.ads (user_id, action, schedule, status, photos)
-                    VALUES (%s, %s, %s, 'active', %s)
+                    INSERT INTO t_p19021063_social_connect_platf.ads (user_id, action, schedule, status, photos, photo_placeholders)
+                    VALUES (%s, %s, %s, 'active', %s, %s)
                     RETURNING id
-                ''', (user_id, action, schedule, photos))
+                ''', (user_id, action, schedule, photos, json.dumps(photo_placeholders(photos))))
                 ad_id = cur.fetchone()[0]
                 
                 for event in events:
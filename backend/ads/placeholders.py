@@ -0,0 +1,95 @@
+"""Плейсхолдеры изображений: BlurHash и доминантный цвет, считаются векторно на NumPy.
+
+Копия модуля лежит в upload-avatar, photo-gallery и ads: функции деплоятся по отдельности."""
+
+import io
+import numpy as np
+from PIL import Image, ImageOps
+
+SAMPLE_SIZE = 32
+X_COMPONENTS = 4
+Y_COMPONENTS = 3
+BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+# sRGB (0..255) -> линейный свет, таблицей на все 256 значений
+_SRGB_TO_LINEAR = np.array([
+    v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+    for v in (np.arange(256) / 255.0)
+])
+
+
+def _linear_to_srgb(linear):
+    v = np.clip(linear, 0.0, 1.0)
+    srgb = np.where(v <= 0.0031308, v * 12.92, 1.055 * v ** (1 / 2.4) - 0.055)
+    return (srgb * 255 + 0.5).astype(int)
+
+
+def _base83(value, length):
+    return ''.join(BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+
+def _sign_pow(value, exp):
+    return np.sign(value) * np.abs(value) ** exp
+
+
+def _area_downsample(pixels, size):
+    """Усреднение по блокам (box filter) до size×size через np.add.reduceat, без циклов по пикселям"""
+    h, w = pixels.shape[:2]
+    rows = np.linspace(0, h, min(size, h) + 1).astype(int)[:-1]
+    cols = np.linspace(0, w, min(size, w) + 1).astype(int)[:-1]
+    summed = np.add.reduceat(np.add.reduceat(pixels, rows, axis=0), cols, axis=1)
+    counts = np.outer(np.diff(np.append(rows, h)), np.diff(np.append(cols, w)))[..., None]
+    return summed / counts
+
+
+def sample_pixels(data):
+    """Декодирует изображение в маленькую копию и переводит в линейный RGB (float, H×W×3)"""
+    img = Image.open(io.BytesIO(data))
+    img.draft('RGB', (SAMPLE_SIZE * 4, SAMPLE_SIZE * 4))
+    img = ImageOps.exif_transpose(img).convert('RGB')
+    img.thumbnail((SAMPLE_SIZE * 4, SAMPLE_SIZE * 4), Image.BILINEAR)
+    return _area_downsample(_SRGB_TO_LINEAR[np.asarray(img)], SAMPLE_SIZE)
+
+
+def blurhash(linear, x_components=X_COMPONENTS, y_components=Y_COMPONENTS):
+    """BlurHash по алгоритму Wolt: DCT-коэффициенты считаются одним einsum"""
+    h, w = linear.shape[:2]
+    cos_x = np.cos(np.pi * np.outer(np.arange(x_components), np.arange(w)) / w)
+    cos_y = np.cos(np.pi * np.outer(np.arange(y_components), np.arange(h)) / h)
+    factors = np.einsum('jy,ix,yxc->jic', cos_y, cos_x, linear).reshape(-1, 3) * (2 / (w * h))
+    factors[0] /= 2
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+    if len(ac):
+        actual_max = float(np.abs(ac).max())
+        quantised_max = int(max(0, min(82, np.floor(actual_max * 166 - 0.5))))
+        max_value = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        max_value = 1
+        result += _base83(0, 1)
+
+    r, g, b = _linear_to_srgb(dc)
+    result += _base83((r << 16) + (g << 8) + b, 4)
+
+    quant = np.clip(np.floor(_sign_pow(ac / max_value, 0.5) * 9 + 9.5), 0, 18).astype(int)
+    for qr, qg, qb in quant:
+        result += _base83(qr * 19 * 19 + qg * 19 + qb, 2)
+    return result
+
+
+def dominant_color(linear):
+    """Самый частый цвет: гистограмма по 4 бита на канал (bincount), затем среднее внутри лидирующей ячейки"""
+    pixels = linear.reshape(-1, 3)
+    bins = _linear_to_srgb(pixels) >> 4
+    codes = (bins[:, 0] << 8) | (bins[:, 1] << 4) | bins[:, 2]
+    top = np.bincount(codes, minlength=4096).argmax()
+    r, g, b = _linear_to_srgb(pixels[codes == top].mean(axis=0))
+    return f'#{r:02x}{g:02x}{b:02x}'
+
+
+def compute_placeholder(data):
+    """{'blurhash': ..., 'color': '#rrggbb'} для байтов изображения"""
+    linear = sample_pixels(data)
+    return {'blurhash': blurhash(linear), 'color': dominant_color(linear)}
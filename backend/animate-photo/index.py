@@ -1,192 +1,358 @@
+"""Оживление фотографий через D-ID как асинхронные задания: submit создаёт задание и сразу отвечает,
+готовность приходит webhook'ом от D-ID или находится сборщиком sweep; клиент опрашивает status."""
+
 import json
 import os
+import hmac
+import hashlib
+import uuid
 import requests
-import time
+import jwt as pyjwt
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+SCHEMA = os.environ.get('MAIN_DB_SCHEMA', 't_p19021063_social_connect_platf')
+DID_API_URL = os.environ.get('DID_API_URL') or 'https://api.d-id.com'
+# Публичный URL этой функции: D-ID вызовет его по готовности ролика; без него остаются sweep и status
+WEBHOOK_URL = os.environ.get('ANIMATE_WEBHOOK_URL')
+
+DEFAULT_TEXT = 'Hello! Nice to meet you!'
+DEFAULT_VOICE = 'en-US-JennyNeural'
+DEFAULT_DRIVER = 'bank://lively'
+JOB_TIMEOUT_SECONDS = 600
+MAX_CHECK_INTERVAL = 30
+STATUS_TIMEOUT = 10
+SWEEP_BATCH = 20
+# Аренда заданий, забранных sweep: запросы к D-ID идут без открытой транзакции, чужой sweep их не трогает
+SWEEP_LEASE_SECONDS = SWEEP_BATCH * STATUS_TIMEOUT
+# Задание в 'submitting', чей автор не дошёл до D-ID за это время, можно перезапустить
+SUBMIT_TIMEOUT_SECONDS = 60
+# Готовый ролик по тем же входным данным отдаётся повторно, пока ссылка D-ID ещё жива
+REUSE_HOURS = 12
+FAILED_STATUSES = ('error', 'rejected')
+
+HEADERS = {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+
+
+def resp(status_code, body):
+    return {
+        'statusCode': status_code,
+        'headers': HEADERS,
+        'body': json.dumps(body, default=str),
+        'isBase64Encoded': False
+    }
+
+
+def did_headers():
+    return {'Authorization': f"Basic {os.environ['DID_API_KEY']}", 'Content-Type': 'application/json'}
+
+
+def get_user_id(event):
+    """user_id из JWT в X-Authorization или Authorization; 0 для анонимного запроса"""
+    headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+    auth = headers.get('x-authorization') or headers.get('authorization') or ''
+    if not auth.startswith('Bearer '):
+        return 0
+    try:
+        payload = pyjwt.decode(auth.replace('Bearer ', ''), os.environ.get('JWT_SECRET', ''), algorithms=['HS256'])
+    except Exception:
+        return 0
+    return int(payload.get('user_id') or 0)
+
+
+def is_scheduler(event):
+    """Вызов планировщика: заголовок X-Cron-Secret совпадает с CRON_SECRET"""
+    secret = os.environ.get('CRON_SECRET', '')
+    headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+    return bool(secret) and hmac.compare_digest(headers.get('x-cron-secret') or '', secret)
+
+
+def webhook_token(job_id):
+    secret = os.environ.get('ANIMATE_WEBHOOK_SECRET') or os.environ.get('DID_API_KEY', '')
+    return hmac.new(secret.encode(), job_id.encode(), hashlib.sha256).hexdigest()
+
+
+def input_hash(image_url, text, voice, driver):
+    return hashlib.sha256('\n'.join((image_url, text, voice, driver)).encode()).hexdigest()
+
+
+def job_body(job):
+    # 'submitting' — ролик ещё заказывается в D-ID; клиенту это то же ожидание
+    body = {'jobId': job['id'], 'status': 'processing' if job['status'] == 'submitting' else job['status']}
+    if job['status'] == 'done':
+        body['videoUrl'] = job['result_url']
+        body['talkId'] = job['talk_id']
+    elif job['status'] == 'error':
+        body['error'] = job['error'] or 'Animation processing failed'
+    return body
+
+
+def create_talk(job_id, image_url, text, voice, driver):
+    """Создаёт ролик в D-ID и не ждёт его; возвращает (talk_id, None) или (None, ошибка)"""
+    payload = {
+        'source_url': image_url,
+        'script': {
+            'type': 'text',
+            'input': text,
+            'provider': {
+                'type': 'microsoft',
+                'voice_id': voice
+            },
+            'ssml': False
+        },
+        'config': {
+            'stitch': True,
+            'fluent': True,
+            'result_format': 'mp4',
+            'audio_optimization': 1
+        }
+    }
+    if driver and driver != DEFAULT_DRIVER:
+        payload['driver_url'] = driver
+    if WEBHOOK_URL:
+        sep = '&' if '?' in WEBHOOK_URL else '?'
+        payload['webhook'] = f'{WEBHOOK_URL}{sep}action=webhook&id={job_id}&token={webhook_token(job_id)}'
+
+    print(f'D-ID Request: text="{text}", voice={voice}, driver={driver}')
+    response = requests.post(f'{DID_API_URL}/talks', headers=did_headers(), json=payload, timeout=30)
+    if response.status_code != 201:
+        print(f'D-ID API Error: Status {response.status_code}, Response: {response.text}')
+        return None, f'Failed to create animation (status {response.status_code})'
+    talk_id = response.json().get('id')
+    if not talk_id:
+        return None, 'No talk ID in response'
+    return talk_id, None
+
+
+def apply_talk(cur, job_id, talk):
+    """Переносит состояние ролика D-ID в задание; незавершённое откладывает следующую проверку с растущим шагом"""
+    status = talk.get('status')
+    if status == 'done' and talk.get('result_url'):
+        cur.execute(f"""
+            UPDATE {SCHEMA}.animation_jobs
+            SET status = 'done', result_url = %s, completed_at = NOW(), updated_at = NOW()
+            WHERE id = %s AND status = 'processing'
+            RETURNING *
+        """, (talk['result_url'], job_id))
+    elif status in FAILED_STATUSES:
+        error = (talk.get('error') or {}).get('description') or 'Animation processing failed'
+        cur.execute(f"""
+            UPDATE {SCHEMA}.animation_jobs
+            SET status = 'error', error = %s, completed_at = NOW(), updated_at = NOW()
+            WHERE id = %s AND status = 'processing'
+            RETURNING *
+        """, (error, job_id))
+    else:
+        cur.execute(f"""
+            UPDATE {SCHEMA}.animation_jobs
+            SET status = CASE WHEN created_at < NOW() - make_interval(secs => %s) THEN 'error' ELSE status END,
+                error = CASE WHEN created_at < NOW() - make_interval(secs => %s) THEN 'Animation processing timeout' ELSE error END,
+                completed_at = CASE WHEN created_at < NOW() - make_interval(secs => %s) THEN NOW() END,
+                checks = checks + 1,
+                next_check_at = NOW() + make_interval(secs => LEAST(POWER(2, checks), %s)),
+                updated_at = NOW()
+            WHERE id = %s AND status = 'processing'
+            RETURNING *
+        """, (JOB_TIMEOUT_SECONDS, JOB_TIMEOUT_SECONDS, JOB_TIMEOUT_SECONDS, MAX_CHECK_INTERVAL, job_id))
+    return cur.fetchone()
+
+
+def fetch_talk(job):
+    """Один запрос к D-ID без ожидания; при сетевой ошибке {} — задание просто ждёт следующей проверки"""
+    try:
+        response = requests.get(f"{DID_API_URL}/talks/{job['talk_id']}", headers=did_headers(), timeout=STATUS_TIMEOUT)
+        return response.json() if response.status_code == 200 else {}
+    except requests.RequestException as e:
+        print(f"D-ID status error for job {job['id']}: {e}")
+        return {}
+
+
+def check_job(cur, job):
+    """Проверка уже забранного задания: транзакция с арендой коммитится до запроса к D-ID"""
+    cur.connection.commit()
+    talk = fetch_talk(job)
+    job = apply_talk(cur, job['id'], talk) or job
+    cur.connection.commit()
+    return job
+
+
+def validate_submit(body):
+    """Ответ с ошибкой или None; проверяется до подключения к БД"""
+    if not body.get('imageUrl'):
+        return resp(400, {'error': 'imageUrl is required'})
+    if len((body.get('text') or DEFAULT_TEXT).strip()) < 3:
+        return resp(400, {'error': 'text must be at least 3 characters'})
+    if not os.environ.get('DID_API_KEY'):
+        return resp(500, {'error': 'DID_API_KEY not configured'})
+    return None
+
+
+def claim_submission(cur, user_id, digest, image_url, text, voice, driver):
+    """Атомарно занимает пару (user_id, input_hash): новая строка или перезапуск ошибочной, устаревшей
+    или брошенной; при живом задании возвращает (его строку, False)"""
+    cur.execute(f"""
+        INSERT INTO {SCHEMA}.animation_jobs AS j
+            (id, user_id, input_hash, status, image_url, text, voice, driver)
+        VALUES (%s, %s, %s, 'submitting', %s, %s, %s, %s)
+        ON CONFLICT (user_id, input_hash) DO UPDATE
+        SET id = EXCLUDED.id, status = 'submitting', talk_id = NULL, result_url = NULL, error = NULL,
+            checks = 0, next_check_at = NOW(), created_at = NOW(), updated_at = NOW(), completed_at = NULL
+        WHERE j.status = 'error'
+           OR (j.status = 'done' AND j.completed_at < NOW() - make_interval(hours => %s))
+           OR (j.status = 'submitting' AND j.updated_at < NOW() - make_interval(secs => %s))
+        RETURNING *
+    """, (uuid.uuid4().hex, user_id, digest, image_url, text, voice, driver, REUSE_HOURS, SUBMIT_TIMEOUT_SECONDS))
+    job = cur.fetchone()
+    if job:
+        return job, True
+    cur.execute(f"SELECT * FROM {SCHEMA}.animation_jobs WHERE user_id = %s AND input_hash = %s",
+                (user_id, digest))
+    return cur.fetchone(), False
+
+
+def submit(cur, user_id, body):
+    image_url = body['imageUrl']
+    text = body.get('text') or DEFAULT_TEXT
+    voice = body.get('voice') or DEFAULT_VOICE
+    driver = body.get('driver') or DEFAULT_DRIVER
+
+    # Тот же ролик уже готов или рендерится — второй раз в D-ID не идём
+    digest = input_hash(image_url, text, voice, driver)
+    job, claimed = claim_submission(cur, user_id, digest, image_url, text, voice, driver)
+    if not claimed:
+        return resp(200 if job['status'] == 'done' else 202, job_body(job))
+
+    # Занятая строка видна другим до запроса к D-ID, который может идти до 30 секунд
+    cur.connection.commit()
+    talk_id, error = create_talk(job['id'], image_url, text, voice, driver)
+    cur.execute(f"""
+        UPDATE {SCHEMA}.animation_jobs
+        SET talk_id = %s, status = %s, error = %s, next_check_at = NOW() + INTERVAL '2 seconds',
+            completed_at = CASE WHEN %s THEN NOW() END, updated_at = NOW()
+        WHERE id = %s AND status = 'submitting'
+        RETURNING *
+    """, (talk_id, 'error' if error else 'processing', error, bool(error), job['id']))
+    job = cur.fetchone() or job
+    if error:
+        return resp(502, job_body(job))
+    return resp(202, job_body(job))
+
+
+def get_job(cur, job_id):
+    """Задание по id; если подошло время проверки, забирает её себе (next_check_at сдвигается атомарно)"""
+    cur.execute(f"SELECT * FROM {SCHEMA}.animation_jobs WHERE id = %s", (job_id,))
+    job = cur.fetchone()
+    if not job or job['status'] != 'processing':
+        return job
+    cur.execute(f"""
+        UPDATE {SCHEMA}.animation_jobs
+        SET next_check_at = NOW() + make_interval(secs => %s)
+        WHERE id = %s AND status = 'processing' AND next_check_at <= NOW()
+        RETURNING *
+    """, (STATUS_TIMEOUT, job_id))
+    claimed = cur.fetchone()
+    return check_job(cur, claimed) if claimed else job
+
+
+def sweep(cur):
+    """Проверяет задания, у которых подошло время, по одному запросу к D-ID на задание.
+
+    Задания забираются арендой next_check_at и коммитятся до первого запроса к D-ID, так что
+    строки не остаются заблокированными на время сетевых вызовов; каждый итог пишется своей транзакцией."""
+    cur.execute(f"""
+        UPDATE {SCHEMA}.animation_jobs
+        SET status = 'error', error = 'Animation submission was interrupted', completed_at = NOW(), updated_at = NOW()
+        WHERE status = 'submitting' AND updated_at < NOW() - make_interval(secs => %s)
+    """, (SUBMIT_TIMEOUT_SECONDS,))
+    cur.execute(f"""
+        UPDATE {SCHEMA}.animation_jobs
+        SET next_check_at = NOW() + make_interval(secs => %s)
+        WHERE id IN (
+            SELECT id FROM {SCHEMA}.animation_jobs
+            WHERE status = 'processing' AND next_check_at <= NOW()
+            ORDER BY next_check_at
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING *
+    """, (SWEEP_LEASE_SECONDS, SWEEP_BATCH))
+    jobs = cur.fetchall()
+    finished = 0
+    for job in jobs:
+        if check_job(cur, job)['status'] != 'processing':
+            finished += 1
+    return len(jobs), finished
+
 
 def handler(event: dict, context) -> dict:
-    '''API для оживления фотографий с помощью D-ID'''
-    
+    '''API для оживления фотографий с помощью D-ID: ?action=submit (по умолчанию) ставит задание, ?action=status и ?action=result отдают его состояние,
+    ?action=webhook принимает уведомление D-ID, ?action=sweep проверяет незавершённые задания (запускается по расписанию с X-Cron-Secret)'''
+
     method = event.get('httpMethod', 'POST')
-    
+
     if method == 'OPTIONS':
         return {
             'statusCode': 200,
             'headers': {
                 'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Authorization, X-Cron-Secret'
             },
             'body': ''
         }
-    
-    if method != 'POST':
-        return {
-            'statusCode': 405,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Method not allowed'})
-        }
-    
+
+    params = event.get('queryStringParameters') or {}
+    action = params.get('action') or ('submit' if method == 'POST' else 'status')
+
+    if action == 'submit' and method != 'POST':
+        return resp(405, {'error': 'Method not allowed'})
+    if action in ('status', 'result') and not params.get('id'):
+        return resp(400, {'error': 'id is required'})
+    if action not in ('submit', 'status', 'result', 'webhook', 'sweep'):
+        return resp(400, {'error': 'Unknown action'})
+    if action == 'sweep' and not is_scheduler(event):
+        return resp(403, {'error': 'Forbidden'})
+
     try:
-        body = json.loads(event.get('body', '{}'))
-        image_url = body.get('imageUrl')
-        text = body.get('text', 'Hello! Nice to meet you!')
-        voice = body.get('voice', 'en-US-JennyNeural')
-        driver = body.get('driver', 'bank://lively')
-        
-        if not image_url:
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'imageUrl is required'})
-            }
-        
-        if len(text.strip()) < 3:
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'text must be at least 3 characters'})
-            }
-        
-        api_key = os.environ.get('DID_API_KEY')
-        if not api_key:
-            return {
-                'statusCode': 500,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'DID_API_KEY not configured'})
-            }
-        
-        payload = {
-            'source_url': image_url,
-            'script': {
-                'type': 'text',
-                'input': text,
-                'provider': {
-                    'type': 'microsoft',
-                    'voice_id': voice
-                },
-                'ssml': False
-            },
-            'config': {
-                'stitch': True,
-                'fluent': True,
-                'result_format': 'mp4',
-                'audio_optimization': 1
-            }
-        }
-        
-        if driver and driver != 'bank://lively':
-            payload['driver_url'] = driver
-        
-        print(f'D-ID Request: text="{text}", voice={voice}, driver={driver}')
-        
-        create_response = requests.post(
-            'https://api.d-id.com/talks',
-            headers={
-                'Authorization': f'Basic {api_key}',
-                'Content-Type': 'application/json'
-            },
-            json=payload,
-            timeout=30
-        )
-        
-        if create_response.status_code != 201:
-            error_details = create_response.text
-            print(f'D-ID API Error: Status {create_response.status_code}, Response: {error_details}')
-            return {
-                'statusCode': 500,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'error': 'Failed to create animation',
-                    'status_code': create_response.status_code,
-                    'details': error_details
-                })
-            }
-        
-        result = create_response.json()
-        talk_id = result.get('id')
-        
-        if not talk_id:
-            return {
-                'statusCode': 500,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'No talk ID in response'})
-            }
-        
-        max_attempts = 60
-        for attempt in range(max_attempts):
-            check_response = requests.get(
-                f'https://api.d-id.com/talks/{talk_id}',
-                headers={'Authorization': f'Basic {api_key}'},
-                timeout=10
-            )
-            
-            if check_response.status_code == 200:
-                status_data = check_response.json()
-                status = status_data.get('status')
-                
-                if status == 'done':
-                    video_url = status_data.get('result_url')
-                    if video_url:
-                        return {
-                            'statusCode': 200,
-                            'headers': {
-                                'Content-Type': 'application/json',
-                                'Access-Control-Allow-Origin': '*'
-                            },
-                            'body': json.dumps({
-                                'videoUrl': video_url,
-                                'talkId': talk_id
-                            })
-                        }
-                elif status == 'error':
-                    error_msg = status_data.get('error', {}).get('description', 'Unknown error')
-                    return {
-                        'statusCode': 500,
-                        'headers': {
-                            'Content-Type': 'application/json',
-                            'Access-Control-Allow-Origin': '*'
-                        },
-                        'body': json.dumps({
-                            'error': 'Animation processing failed',
-                            'details': error_msg
-                        })
-                    }
-            
-            time.sleep(1)
-        
-        return {
-            'statusCode': 408,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Animation processing timeout'})
-        }
-        
+        body = json.loads(event.get('body') or '{}')
+
+        if action == 'submit':
+            invalid = validate_submit(body)
+            if invalid:
+                return invalid
+        elif action == 'webhook':
+            job_id = params.get('id') or ''
+            if not hmac.compare_digest(params.get('token') or '', webhook_token(job_id)):
+                return resp(403, {'error': 'Invalid token'})
+
+        conn = psycopg2.connect(os.environ['DATABASE_URL'])
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            if action == 'submit':
+                result = submit(cur, get_user_id(event), body)
+            elif action == 'webhook':
+                job = apply_talk(cur, params['id'], body)
+                result = resp(200, {'success': True, 'status': job['status'] if job else None})
+            elif action == 'sweep':
+                checked, finished = sweep(cur)
+                result = resp(200, {'success': True, 'checked': checked, 'finished': finished})
+            else:
+                job = get_job(cur, params['id'])
+                if not job:
+                    result = resp(404, {'error': 'Job not found'})
+                elif action == 'status':
+                    result = resp(200, job_body(job))
+                elif job['status'] == 'done':
+                    result = resp(200, {'videoUrl': job['result_url'], 'talkId': job['talk_id']})
+                elif job['status'] == 'error':
+                    result = resp(500, {'error': 'Animation processing failed', 'details': job['error']})
+                else:
+                    result = resp(202, job_body(job))
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+        return result
+
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': str(e)})
-        }
\ No newline at end of file
+        return resp(500, {'error': str(e)})
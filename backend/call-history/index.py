@@ -168,7 +168,9 @@ def handler(event: dict, context) -> dict:
                         ch.id, ch.caller_id, ch.recipient_id, ch.call_type, ch.status,
                         ch.duration_seconds, ch.started_at, ch.ended_at, ch.created_at,
                         u1.name as caller_name, u1.avatar_url as caller_avatar,
-                        u2.name as recipient_name, u2.avatar_url as recipient_avatar
+                        u1.avatar_blurhash as caller_avatar_blurhash, u1.avatar_color as caller_avatar_color,
+                        u2.name as recipient_name, u2.avatar_url as recipient_avatar,
+                        u2.avatar_blurhash as recipient_avatar_blurhash, u2.avatar_color as recipient_avatar_color
                     FROM {S}call_history ch
                     JOIN {S}users u1 ON ch.caller_id = u1.id
                     JOIN {S}users u2 ON ch.recipient_id = u2.id
@@ -5,6 +5,8 @@ import psycopg2
 import jwt
 import requests
 
+OPENROUTER_API_URL = os.environ.get('OPENROUTER_API_URL') or 'https://openrouter.ai/api/v1'
+
 CORS_HEADERS = {
     'Access-Control-Allow-Origin': '*',
     'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
@@ -157,7 +159,7 @@ def generate_compatibility_analysis(sign1, sign2, scores):
     )
 
     resp = requests.post(
-        'https://openrouter.ai/api/v1/chat/completions',
+        f'{OPENROUTER_API_URL}/chat/completions',
         headers={
             'Authorization': f'Bearer {api_key}',
             'Content-Type': 'application/json'
@@ -301,7 +303,7 @@ def handler(event, context):
             cur = conn.cursor()
             cur.execute(
                 f"SELECT cr.target_user_id, cr.overall_score, cr.love_score, "
-                f"u.first_name, u.avatar_url, u.zodiac_sign, u.nickname "
+                f"u.first_name, u.avatar_url, u.zodiac_sign, u.nickname, u.avatar_blurhash, u.avatar_color "
                 f"FROM {SCHEMA}.compatibility_results cr "
                 f"JOIN {SCHEMA}.users u ON u.id = cr.target_user_id "
                 f"WHERE cr.user_id = {user_id} "
@@ -315,7 +317,9 @@ def handler(event, context):
                 'name': r[3],
                 'avatar_url': r[4],
                 'zodiac_sign': r[5],
-                'nickname': r[6]
+                'nickname': r[6],
+                'avatar_blurhash': r[7],
+                'avatar_color': r[8]
             } for r in rows]
 
             return {
@@ -5,6 +5,8 @@ import psycopg2
 from datetime import date, datetime
 import requests
 
+OPENROUTER_API_URL = os.environ.get('OPENROUTER_API_URL') or 'https://openrouter.ai/api/v1'
+
 CORS_HEADERS = {
     'Access-Control-Allow-Origin': '*',
     'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
@@ -92,7 +94,7 @@ def generate_horoscope_ai(sign, htype, target_date):
     )
 
     resp = requests.post(
-        'https://openrouter.ai/api/v1/chat/completions',
+        f'{OPENROUTER_API_URL}/chat/completions',
         headers={
             'Authorization': f'Bearer {api_key}',
             'Content-Type': 'application/json'
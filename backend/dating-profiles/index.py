@@ -172,6 +172,9 @@ def handler(event: dict, context) -> dict:
                         COALESCE(u.interests, dp.interests) as interests,
                         COALESCE(u.bio, dp.bio) as bio,
                         COALESCE(u.avatar_url, dp.avatar_url) as avatar_url,
+                        COALESCE(u.avatar_variants->'256'->>'webp', u.avatar_url, dp.avatar_url) as avatar_thumb_url,
+                        u.avatar_blurhash,
+                        u.avatar_color,
                         u.height,
                         u.body_type,
                         u.gender,
@@ -206,6 +209,9 @@ def handler(event: dict, context) -> dict:
                         u.interests,
                         u.bio,
                         u.avatar_url,
+                        COALESCE(u.avatar_variants->'256'->>'webp', u.avatar_url) as avatar_thumb_url,
+                        u.avatar_blurhash,
+                        u.avatar_color,
                         u.height,
                         u.body_type,
                         u.gender,
@@ -252,6 +258,8 @@ def handler(event: dict, context) -> dict:
                     COALESCE(u.interests, dp.interests) as interests,
                     COALESCE(u.bio, dp.bio) as bio,
                     COALESCE(u.avatar_url, dp.avatar_url) as image,
+                    u.avatar_blurhash,
+                    u.avatar_color,
                     u.height,
                     u.body_type,
                     u.gender,
@@ -356,6 +364,8 @@ def handler(event: dict, context) -> dict:
                     COALESCE(u.interests, dp.interests) as interests,
                     COALESCE(u.bio, dp.bio) as bio,
                     u.avatar_url as image,
+                    u.avatar_blurhash,
+                    u.avatar_color,
                     COALESCE(u.height, dp.height) as height,
                     COALESCE(u.body_type, dp.body_type) as bodyType,
                     COALESCE(u.gender, dp.gender) as gender,
@@ -521,6 +531,8 @@ def handler(event: dict, context) -> dict:
                         EXTRACT(YEAR FROM AGE(u.birth_date)) as age,
                         u.city,
                         u.avatar_url,
+                        u.avatar_blurhash,
+                        u.avatar_color,
                         u.gender,
                         CASE 
                             WHEN u.last_login_at > NOW() - INTERVAL '15 minutes' THEN TRUE
@@ -545,6 +557,8 @@ def handler(event: dict, context) -> dict:
                         EXTRACT(YEAR FROM AGE(u.birth_date)) as age,
                         u.city,
                         u.avatar_url,
+                        u.avatar_blurhash,
+                        u.avatar_color,
                         u.gender,
                         CASE 
                             WHEN u.last_login_at > NOW() - INTERVAL '15 minutes' THEN TRUE
@@ -573,6 +587,8 @@ def handler(event: dict, context) -> dict:
                     EXTRACT(YEAR FROM AGE(u.birth_date)) as age,
                     u.city,
                     u.avatar_url,
+                    u.avatar_blurhash,
+                    u.avatar_color,
                     u.gender,
                     CASE 
                         WHEN u.last_login_at > NOW() - INTERVAL '15 minutes' THEN TRUE
@@ -590,6 +606,8 @@ def handler(event: dict, context) -> dict:
                     EXTRACT(YEAR FROM AGE(u.birth_date)) as age,
                     u.city,
                     u.avatar_url,
+                    u.avatar_blurhash,
+                    u.avatar_color,
                     u.gender,
                     CASE 
                         WHEN u.last_login_at > NOW() - INTERVAL '15 minutes' THEN TRUE
@@ -706,7 +724,7 @@ def handler(event: dict, context) -> dict:
             cur.execute(f"""
                 SELECT 
                     mc.id, mc.user_id, mc.total_votes, mc.joined_at,
-                    u.first_name, u.nickname, u.avatar_url, u.city, u.birth_date,
+                    u.first_name, u.nickname, u.avatar_url, u.avatar_blurhash, u.avatar_color, u.city, u.birth_date,
                     u.is_verified, u.is_vip,
                     ROW_NUMBER() OVER (ORDER BY mc.total_votes DESC, mc.joined_at ASC) AS rank
                 FROM {S}miss_loveis_contestants mc
@@ -726,6 +744,8 @@ def handler(event: dict, context) -> dict:
                     'name': row.get('first_name') or row.get('nickname') or 'Участница',
                     'nickname': row.get('nickname'),
                     'avatar_url': row.get('avatar_url'),
+                    'avatar_blurhash': row.get('avatar_blurhash'),
+                    'avatar_color': row.get('avatar_color'),
                     'city': row.get('city'),
                     'age': age,
                     'total_votes': row['total_votes'],
@@ -4,6 +4,8 @@ import json
 import os
 import requests
 
+OPENROUTER_API_URL = os.environ.get('OPENROUTER_API_URL') or 'https://openrouter.ai/api/v1'
+
 DIMA_SYSTEM_PROMPT = """Ты — Дима, 35 лет. Ты живой, настоящий мужчина, а не робот и не ИИ. Никогда не признавайся что ты ИИ или программа.
 
 ТВОЯ ЛИЧНОСТЬ:
@@ -165,7 +167,7 @@ def handler(event: dict, context) -> dict:
     api_key = os.environ.get('OPENROUTER_API_KEY', '')
 
     response = requests.post(
-        'https://openrouter.ai/api/v1/chat/completions',
+        f'{OPENROUTER_API_URL}/chat/completions',
         headers={
             'Authorization': f'Bearer {api_key}',
             'Content-Type': 'application/json',
@@ -97,7 +97,9 @@ def handler(event: dict, context) -> dict:
                 ai.message,
                 ai.status,
                 ai.created_at,
-                a.action as ad_title
+                a.action as ad_title,
+                u.avatar_blurhash as inviter_avatar_blurhash,
+                u.avatar_color as inviter_avatar_color
             FROM t_p19021063_social_connect_platf.ad_invitations ai
             JOIN t_p19021063_social_connect_platf.users u ON ai.inviter_id = u.id
             JOIN t_p19021063_social_connect_platf.ads a ON ai.ad_id = a.id
@@ -118,7 +120,9 @@ def handler(event: dict, context) -> dict:
                 'message': row[5] or '',
                 'status': row[6],
                 'created_at': row[7].isoformat() if row[7] else '',
-                'ad_title': row[8]
+                'ad_title': row[8],
+                'inviter_avatar_blurhash': row[9],
+                'inviter_avatar_color': row[10]
             })
         
         return {
@@ -82,6 +82,8 @@ def handler(event: dict, context) -> dict:
                         g.sender_id,
                         u.first_name || ' ' || COALESCE(u.last_name, '') as sender_name,
                         u.avatar_url as sender_avatar,
+                        u.avatar_blurhash as sender_avatar_blurhash,
+                        u.avatar_color as sender_avatar_color,
                         g.gift_name,
                         g.gift_emoji,
                         g.price,
@@ -100,6 +102,8 @@ def handler(event: dict, context) -> dict:
                         g.sender_id,
                         u.first_name || ' ' || COALESCE(u.last_name, '') as sender_name,
                         u.avatar_url as sender_avatar,
+                        u.avatar_blurhash as sender_avatar_blurhash,
+                        u.avatar_color as sender_avatar_color,
                         g.gift_name,
                         g.gift_emoji,
                         g.price,
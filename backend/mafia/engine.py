@@ -0,0 +1,253 @@
+"""Правила Мафии без SQL: движок применяет старт, ход роли или смену фазы к загруженному состоянию
+комнаты и возвращает изменения (игроки, ходы, сообщения, поля комнаты), которые обработчик сохраняет разом.
+
+Роли раздаются генератором, переданным в движок, поэтому одинаковое зерно даёт одинаковую партию —
+для симуляций и проверки правил. Часов у движка нет: длительность новой фазы он только называет
+(Changes.phase_seconds), срок ставит обработчик."""
+
+import random
+
+NIGHT_SECONDS = 60
+DAY_SECONDS = 90
+MIN_PLAYERS = 4
+
+ROLES_CONFIG = {
+    4: {'mafia': 1, 'doctor': 1, 'detective': 0, 'civilian': 2},
+    5: {'mafia': 1, 'doctor': 1, 'detective': 1, 'civilian': 2},
+    6: {'mafia': 2, 'doctor': 1, 'detective': 1, 'civilian': 2},
+    7: {'mafia': 2, 'doctor': 1, 'detective': 1, 'civilian': 3},
+    8: {'mafia': 2, 'doctor': 1, 'detective': 1, 'civilian': 4},
+    9: {'mafia': 3, 'doctor': 1, 'detective': 1, 'civilian': 4},
+    10: {'mafia': 3, 'doctor': 1, 'detective': 1, 'civilian': 5},
+}
+
+ROLE_NAMES = {'mafia': 'Мафия', 'doctor': 'Доктор', 'detective': 'Детектив', 'civilian': 'Мирный'}
+
+# какое ночное действие доступно роли
+NIGHT_ACTIONS = {'mafia': 'kill', 'doctor': 'heal', 'detective': 'check'}
+
+
+class ActionError(Exception):
+    """Действие не по правилам; status — HTTP-код ответа"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class PlayerState:
+    __slots__ = ('user_id', 'role', 'is_alive', 'is_ready', 'name')
+
+    def __init__(self, user_id, role=None, is_alive=True, is_ready=False, name=None):
+        self.user_id = user_id
+        self.role = role
+        self.is_alive = is_alive
+        self.is_ready = is_ready
+        self.name = name
+
+
+class RoomState:
+    """Комната, её игроки в порядке входа и ходы текущей фазы: actions — список
+    (actor_id, action_type, target_id), у каждого игрока не больше одного хода каждого типа"""
+    __slots__ = ('room_id', 'host_id', 'status', 'phase', 'day_number', 'winner', 'players', 'actions')
+
+    def __init__(self, room_id, host_id, status, players, phase=None, day_number=0, winner=None, actions=None):
+        self.room_id = room_id
+        self.host_id = host_id
+        self.status = status
+        self.phase = phase
+        self.day_number = day_number
+        self.winner = winner
+        self.players = list(players)
+        self.actions = list(actions or [])
+
+    def player(self, user_id):
+        return next((p for p in self.players if str(p.user_id) == str(user_id)), None)
+
+
+class Changes:
+    """Что сохранить: изменённые игроки (user_id), записанные ходы (actor_id, action_type, target_id),
+    сообщения (текст, фаза), изменилась ли комната и на сколько секунд новая фаза; result — что вернуть клиенту"""
+    __slots__ = ('players', 'actions', 'messages', 'room', 'phase_seconds', 'result')
+
+    def __init__(self):
+        self.players = set()
+        self.actions = []
+        self.messages = []
+        self.room = False
+        self.phase_seconds = None
+        self.result = {}
+
+    def touch(self, *players):
+        for p in players:
+            self.players.add(p.user_id)
+
+    def say(self, text, phase=None):
+        self.messages.append((text, phase))
+
+
+class MafiaEngine:
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+
+    def assign_roles(self, player_count):
+        config = ROLES_CONFIG.get(player_count)
+        if not config:
+            closest = min(ROLES_CONFIG.keys(), key=lambda x: abs(x - player_count))
+            config = ROLES_CONFIG[closest]
+        roles = []
+        for role, count in config.items():
+            roles.extend([role] * count)
+        while len(roles) < player_count:
+            roles.append('civilian')
+        roles = roles[:player_count]
+        self.rng.shuffle(roles)
+        return roles
+
+    def start(self, room, user_id):
+        """Хозяин начинает игру: роли раздаются случайно, наступает первая ночь"""
+        if str(room.host_id) != str(user_id) or room.status != 'waiting':
+            raise ActionError('Not host or already started', 403)
+        if len(room.players) < MIN_PLAYERS:
+            raise ActionError('Minimum 4 players required')
+        if any(not p.is_ready and str(p.user_id) != str(user_id) for p in room.players):
+            raise ActionError('Not all players are ready')
+
+        changes = Changes()
+        for player, role in zip(room.players, self.assign_roles(len(room.players))):
+            player.role = role
+            changes.touch(player)
+        room.status = 'playing'
+        self._set_phase(room, changes, 'night', 1, NIGHT_SECONDS)
+        changes.say('Игра началась! Город засыпает... Мафия просыпается.', 'night')
+        return changes
+
+    def act(self, room, user_id, action_type, target_id=None):
+        """Ночной ход роли или дневной голос; повторный ход того же типа заменяет цель"""
+        if room.status != 'playing':
+            raise ActionError('Game not found', 404)
+        player = room.player(user_id)
+        if not player or not player.is_alive:
+            raise ActionError('Not in game or dead', 403)
+        if room.phase == 'night':
+            if NIGHT_ACTIONS.get(player.role) != action_type:
+                raise ActionError('Invalid action for your role', 403)
+        elif room.phase == 'day':
+            if action_type != 'vote':
+                raise ActionError('Only voting during day', 403)
+        else:
+            raise ActionError('Invalid phase')
+        if target_id is not None:
+            target = room.player(target_id)
+            if not target or not target.is_alive:
+                raise ActionError('Invalid target')
+            target_id = target.user_id
+
+        changes = Changes()
+        entry = (player.user_id, action_type, target_id)
+        for i, (actor_id, kind, _) in enumerate(room.actions):
+            if actor_id == player.user_id and kind == action_type:
+                room.actions[i] = entry
+                break
+        else:
+            room.actions.append(entry)
+        changes.actions.append(entry)
+        return changes
+
+    def next_phase(self, room):
+        """Итог фазы: ночью — убийство, лечение и проверка детектива, днём — казнь по голосам;
+        затем победа одной из сторон или следующая фаза"""
+        if room.status != 'playing':
+            raise ActionError('Game not found', 404)
+        changes = Changes()
+        if room.phase == 'night':
+            changes.result['detective_result'] = self._resolve_night(room, changes)
+            if not self._check_end(room, changes):
+                self._set_phase(room, changes, 'day', room.day_number, DAY_SECONDS)
+                changes.say('Наступил день. Обсуждайте и голосуйте!', 'day')
+        elif room.phase == 'day':
+            self._resolve_day(room, changes)
+            if not self._check_end(room, changes):
+                day = room.day_number + 1
+                self._set_phase(room, changes, 'night', day, NIGHT_SECONDS)
+                changes.say(f'Наступила ночь {day}. Город засыпает...', 'night')
+        else:
+            raise ActionError('Invalid phase')
+        return changes
+
+    def winner(self, room):
+        """'town', 'mafia' или None, пока игра не решена"""
+        alive_mafia = sum(1 for p in room.players if p.is_alive and p.role == 'mafia')
+        alive_town = sum(1 for p in room.players if p.is_alive and p.role != 'mafia')
+        if alive_mafia == 0:
+            return 'town'
+        if alive_mafia >= alive_town:
+            return 'mafia'
+        return None
+
+    def _live_actions(self, room, action_type):
+        """Цели ходов action_type живых игроков в порядке ходов"""
+        alive = {p.user_id for p in room.players if p.is_alive}
+        return [target_id for actor_id, kind, target_id in room.actions
+                if kind == action_type and target_id is not None and actor_id in alive]
+
+    def _tally(self, targets):
+        """Цель с наибольшим числом голосов; при равенстве — та, за которую проголосовали раньше"""
+        votes = {}
+        for target_id in targets:
+            votes[target_id] = votes.get(target_id, 0) + 1
+        return max(votes, key=votes.get) if votes else None
+
+    def _resolve_night(self, room, changes):
+        kills = self._live_actions(room, 'kill')
+        heals = self._live_actions(room, 'heal')
+        checks = self._live_actions(room, 'check')
+
+        killed_id = self._tally(kills)
+        if killed_id is not None and heals and killed_id == heals[-1]:
+            changes.say('Доктор спас жителя этой ночью!', 'night')
+            killed_id = None
+        if killed_id is not None:
+            victim = room.player(killed_id)
+            victim.is_alive = False
+            changes.touch(victim)
+            changes.say(f'Этой ночью был убит {victim.name or "Игрок"}', 'night')
+        elif not kills:
+            changes.say('Ночь прошла спокойно. Никто не пострадал.', 'night')
+
+        if not checks:
+            return None
+        checked = room.player(checks[-1])
+        return {'target_id': checked.user_id, 'is_mafia': checked.role == 'mafia'}
+
+    def _resolve_day(self, room, changes):
+        voted_out = self._tally(self._live_actions(room, 'vote'))
+        if voted_out is None:
+            changes.say('Город не пришёл к решению. Никто не казнён.', 'day')
+            return
+        player = room.player(voted_out)
+        player.is_alive = False
+        changes.touch(player)
+        role_name = ROLE_NAMES.get(player.role, 'Неизвестный')
+        changes.say(f'Город решил казнить {player.name or "игрока"}. Роль: {role_name}', 'day')
+
+    def _check_end(self, room, changes):
+        winner = self.winner(room)
+        if not winner:
+            return False
+        room.status = 'finished'
+        room.winner = winner
+        room.phase = None
+        room.actions = []
+        changes.room = True
+        changes.result['winner'] = winner
+        changes.say('Мирные жители победили!' if winner == 'town' else 'Мафия победила!')
+        return True
+
+    def _set_phase(self, room, changes, phase, day_number, seconds):
+        room.phase = phase
+        room.day_number = day_number
+        room.actions = []
+        changes.room = True
+        changes.phase_seconds = seconds
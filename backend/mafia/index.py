@@ -1,13 +1,24 @@
+import hashlib
 import json
 import os
 import random
 import string
+import threading
+import time
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import jwt as pyjwt
 from datetime import datetime, timedelta
+from engine import MafiaEngine, ActionError, RoomState, PlayerState
 
 SCHEMA = 't_p19021063_social_connect_platf'
+# столько секунд инстанс отдаёт лобби из памяти, не обращаясь к базе
+LOBBY_TTL = 2
+
+_lobby = {'expires': 0.0, 'etag': None, 'body': None}
+_lobby_lock = threading.Lock()
+# роли раздаются системным генератором: по прошлым партиям их не угадать
+_engine = MafiaEngine(random.SystemRandom())
 
 def verify_token(token: str) -> dict | None:
     if not token:
@@ -31,30 +42,6 @@ def escape_sql(value):
 def generate_code():
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
 
-ROLES_CONFIG = {
-    4: {'mafia': 1, 'doctor': 1, 'detective': 0, 'civilian': 2},
-    5: {'mafia': 1, 'doctor': 1, 'detective': 1, 'civilian': 2},
-    6: {'mafia': 2, 'doctor': 1, 'detective': 1, 'civilian': 2},
-    7: {'mafia': 2, 'doctor': 1, 'detective': 1, 'civilian': 3},
-    8: {'mafia': 2, 'doctor': 1, 'detective': 1, 'civilian': 4},
-    9: {'mafia': 3, 'doctor': 1, 'detective': 1, 'civilian': 4},
-    10: {'mafia': 3, 'doctor': 1, 'detective': 1, 'civilian': 5},
-}
-
-def assign_roles(player_count):
-    config = ROLES_CONFIG.get(player_count)
-    if not config:
-        closest = min(ROLES_CONFIG.keys(), key=lambda x: abs(x - player_count))
-        config = ROLES_CONFIG[closest]
-    roles = []
-    for role, count in config.items():
-        roles.extend([role] * count)
-    while len(roles) < player_count:
-        roles.append('civilian')
-    roles = roles[:player_count]
-    random.shuffle(roles)
-    return roles
-
 def get_auth(event):
     headers = event.get('headers', {}) or {}
     auth = (headers.get('X-Authorization') or headers.get('x-authorization')
@@ -67,6 +54,10 @@ def get_user_id(payload):
         return None
     return payload.get('user_id') or payload.get('sub') or payload.get('id')
 
+def get_header(event, name):
+    headers = event.get('headers', {}) or {}
+    return headers.get(name) or headers.get(name.lower())
+
 def json_response(status, body):
     return {
         'statusCode': status,
@@ -78,74 +69,143 @@ def json_response(status, body):
 def T(table):
     return f"{SCHEMA}.{table}"
 
-def check_game_end(cursor, room_id):
-    cursor.execute(f"SELECT role, is_alive FROM {T('mafia_players')} WHERE room_id = {room_id}")
-    players = cursor.fetchall()
-    alive_mafia = sum(1 for p in players if p['is_alive'] and p['role'] == 'mafia')
-    alive_town = sum(1 for p in players if p['is_alive'] and p['role'] != 'mafia')
-    if alive_mafia == 0:
-        return 'town'
-    if alive_mafia >= alive_town:
-        return 'mafia'
-    return None
-
-def process_night(cursor, room_id, day_number):
+def insert_player(cursor, room_id, user_id):
+    """Добавляет игрока в комнату с копией имени и аватара из users → имя для системных сообщений"""
     cursor.execute(f"""
-        SELECT ma.action_type, ma.actor_id, ma.target_id, mp.role as actor_role
-        FROM {T('mafia_actions')} ma
-        JOIN {T('mafia_players')} mp ON mp.room_id = ma.room_id AND mp.user_id = ma.actor_id
-        WHERE ma.room_id = {room_id} AND ma.day_number = {day_number} AND ma.phase = 'night'
+        INSERT INTO {T('mafia_players')} (room_id, user_id, display_name, avatar_url, avatar_blurhash, avatar_color)
+        SELECT {room_id}, u.id, COALESCE(NULLIF(u.first_name, ''), u.nickname, 'Игрок'),
+               u.avatar_url, u.avatar_blurhash, u.avatar_color
+        FROM {T('users')} u
+        WHERE u.id = {escape_sql(user_id)}
+        RETURNING display_name
     """)
-    actions = cursor.fetchall()
-
-    mafia_targets = {}
-    doctor_target = None
-    detective_target = None
-
-    for a in actions:
-        if a['action_type'] == 'kill' and a['target_id']:
-            tid = a['target_id']
-            mafia_targets[tid] = mafia_targets.get(tid, 0) + 1
-        elif a['action_type'] == 'heal' and a['target_id']:
-            doctor_target = a['target_id']
-        elif a['action_type'] == 'check' and a['target_id']:
-            detective_target = a['target_id']
-
-    killed_id = None
-    if mafia_targets:
-        killed_id = max(mafia_targets, key=mafia_targets.get)
-        if killed_id == doctor_target:
-            cursor.execute(f"""
-                INSERT INTO {T('mafia_messages')} (room_id, message, is_system, phase)
-                VALUES ({room_id}, 'Доктор спас жителя этой ночью!', TRUE, 'night')
-            """)
-            killed_id = None
-
-    if killed_id:
-        cursor.execute(f"UPDATE {T('mafia_players')} SET is_alive = FALSE WHERE room_id = {room_id} AND user_id = {killed_id}")
-        cursor.execute(f"SELECT first_name FROM {T('users')} WHERE id = {killed_id}")
-        victim = cursor.fetchone()
-        name = victim['first_name'] if victim else 'Игрок'
-        cursor.execute(f"""
+    row = cursor.fetchone()
+    return row['display_name'] if row else 'Игрок'
+
+def load_game(cursor, room_id):
+    """Комната, её игроки и ходы текущей фазы одним запросом → RoomState или None"""
+    cursor.execute(f"""
+        SELECT r.id, r.host_id, r.status, r.phase, r.day_number, r.winner,
+               (SELECT json_agg(json_build_object(
+                    'user_id', mp.user_id, 'role', mp.role, 'is_alive', mp.is_alive,
+                    'is_ready', mp.is_ready, 'name', mp.display_name) ORDER BY mp.joined_at, mp.id)
+                FROM {T('mafia_players')} mp WHERE mp.room_id = r.id) AS players,
+               (SELECT json_agg(json_build_array(ma.actor_id, ma.action_type, ma.target_id) ORDER BY ma.id)
+                FROM {T('mafia_actions')} ma
+                WHERE ma.room_id = r.id AND ma.day_number = r.day_number AND ma.phase = r.phase) AS actions
+        FROM {T('mafia_rooms')} r
+        WHERE r.id = {escape_sql(room_id)}
+    """)
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return RoomState(
+        row['id'], row['host_id'], row['status'], [PlayerState(**p) for p in row['players'] or []],
+        row['phase'], row['day_number'], row['winner'], [tuple(a) for a in row['actions'] or []],
+    )
+
+def save_game(cursor, room, before, changes):
+    """Одна запись: поля комнаты, игроки, ходы и сообщения пишутся, только если комната всё ещё
+    в той фазе, в которой её загрузили (before — status, phase, day_number); иначе ActionError 409"""
+    room_id = escape_sql(room.room_id)
+    status, phase, day_number = before
+    guard = (f"id = {room_id} AND status = {escape_sql(status)} "
+             f"AND phase IS NOT DISTINCT FROM {escape_sql(phase)} AND day_number = {escape_sql(day_number)}")
+    if changes.room:
+        fields = [f"status = {escape_sql(room.status)}", f"phase = {escape_sql(room.phase)}",
+                  f"day_number = {escape_sql(room.day_number)}", f"winner = {escape_sql(room.winner)}",
+                  "updated_at = CURRENT_TIMESTAMP"]
+        if changes.phase_seconds:
+            phase_end = datetime.utcnow() + timedelta(seconds=changes.phase_seconds)
+            fields.append(f"phase_end_at = {escape_sql(phase_end.isoformat())}")
+        ctes = [f"g AS (UPDATE {T('mafia_rooms')} SET {', '.join(fields)} WHERE {guard} RETURNING id)"]
+    else:
+        ctes = [f"g AS (SELECT id FROM {T('mafia_rooms')} WHERE {guard} FOR UPDATE)"]
+    if changes.players:
+        values = ', '.join(
+            f"({escape_sql(p.user_id)}, {escape_sql(p.role)}, {escape_sql(p.is_alive)})"
+            for p in room.players if p.user_id in changes.players
+        )
+        ctes.append(f"""p AS (
+            UPDATE {T('mafia_players')} mp SET role = v.role, is_alive = v.is_alive
+            FROM g, (VALUES {values}) AS v(user_id, role, is_alive)
+            WHERE mp.room_id = {room_id} AND mp.user_id = v.user_id
+        )""")
+    if changes.actions:
+        values = ', '.join(
+            f"({escape_sql(actor_id)}, {escape_sql(target_id)}, {escape_sql(action_type)})"
+            for actor_id, action_type, target_id in changes.actions
+        )
+        ctes.append(f"""a AS (
+            INSERT INTO {T('mafia_actions')} (room_id, day_number, phase, actor_id, target_id, action_type)
+            SELECT {room_id}, {escape_sql(day_number)}, {escape_sql(phase)}, v.actor_id::integer, v.target_id::integer, v.action_type
+            FROM g, (VALUES {values}) AS v(actor_id, target_id, action_type)
+            ON CONFLICT (room_id, day_number, phase, actor_id, action_type) DO UPDATE SET target_id = EXCLUDED.target_id
+        )""")
+    if changes.messages:
+        values = ', '.join(f"({escape_sql(text)}, {escape_sql(msg_phase)})" for text, msg_phase in changes.messages)
+        ctes.append(f"""m AS (
             INSERT INTO {T('mafia_messages')} (room_id, message, is_system, phase)
-            VALUES ({room_id}, {escape_sql(f'Этой ночью был убит {name}')}, TRUE, 'night')
+            SELECT {room_id}, v.message, TRUE, v.phase FROM g, (VALUES {values}) AS v(message, phase)
+        )""")
+    cursor.execute('WITH ' + ', '.join(ctes) + ' SELECT id FROM g')
+    if not cursor.fetchone():
+        raise ActionError('Phase already changed', 409)
+
+def run_game(conn, cursor, room_id, apply):
+    """Загружает комнату, применяет apply(room) → Changes и сохраняет изменения одной записью"""
+    room = load_game(cursor, room_id)
+    if not room:
+        return json_response(404, {'error': 'Game not found'})
+    before = (room.status, room.phase, room.day_number)
+    try:
+        changes = apply(room)
+        save_game(cursor, room, before, changes)
+    except ActionError as e:
+        conn.rollback()
+        return json_response(e.status, {'error': e.message})
+    conn.commit()
+    return json_response(200, {'ok': True, **changes.result})
+
+def lobby_snapshot():
+    """Список открытых комнат (тело ответа, ETag); в пределах LOBBY_TTL — из памяти инстанса"""
+    with _lobby_lock:
+        if _lobby['expires'] > time.monotonic():
+            return _lobby['body'], _lobby['etag']
+    conn = psycopg2.connect(os.environ.get('DATABASE_URL'))
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cursor.execute(f"""
+            SELECT r.*, u.first_name as host_name, u.avatar_url as host_avatar,
+                   u.avatar_blurhash as host_avatar_blurhash, u.avatar_color as host_avatar_color
+            FROM {T('mafia_rooms')} r
+            JOIN {T('users')} u ON r.host_id = u.id
+            WHERE r.status IN ('waiting', 'playing')
+            ORDER BY r.created_at DESC
+            LIMIT 50
         """)
-    else:
-        if not mafia_targets:
-            cursor.execute(f"""
-                INSERT INTO {T('mafia_messages')} (room_id, message, is_system, phase)
-                VALUES ({room_id}, 'Ночь прошла спокойно. Никто не пострадал.', TRUE, 'night')
-            """)
-
-    detective_result = None
-    if detective_target:
-        cursor.execute(f"SELECT role FROM {T('mafia_players')} WHERE room_id = {room_id} AND user_id = {detective_target}")
-        checked = cursor.fetchone()
-        if checked:
-            is_mafia = checked['role'] == 'mafia'
-            detective_result = {'target_id': detective_target, 'is_mafia': is_mafia}
-
-    return killed_id, detective_result
+        rooms = [dict(r) for r in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+    body = json.dumps(rooms, default=str)
+    etag = '"' + hashlib.sha1(body.encode()).hexdigest()[:16] + '"'
+    with _lobby_lock:
+        _lobby.update(expires=time.monotonic() + LOBBY_TTL, etag=etag, body=body)
+    return body, etag
+
+def handle_rooms(event):
+    """Лобби без подключения к базе, пока жив снимок; клиент с тем же If-None-Match получает 304"""
+    body, etag = lobby_snapshot()
+    headers = {'Access-Control-Allow-Origin': '*', 'ETag': etag, 'Cache-Control': f'public, max-age={LOBBY_TTL}'}
+    if get_header(event, 'If-None-Match') == etag:
+        return {'statusCode': 304, 'headers': headers, 'body': '', 'isBase64Encoded': False}
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', **headers},
+        'body': body,
+        'isBase64Encoded': False
+    }
 
 def handler(event: dict, context) -> dict:
     '''API для онлайн-игры Мафия: лобби, комнаты, игровая логика'''
@@ -163,28 +223,18 @@ def handler(event: dict, context) -> dict:
             'isBase64Encoded': False
         }
 
+    query_params = event.get('queryStringParameters', {}) or {}
+    action = query_params.get('action', '')
+
+    if method == 'GET' and action == 'rooms':
+        return handle_rooms(event)
+
     dsn = os.environ.get('DATABASE_URL')
     conn = psycopg2.connect(dsn)
     cursor = conn.cursor(cursor_factory=RealDictCursor)
 
     try:
-        query_params = event.get('queryStringParameters', {}) or {}
-        action = query_params.get('action', '')
-
         if method == 'GET':
-            if action == 'rooms':
-                cursor.execute(f"""
-                    SELECT r.*, u.first_name as host_name, u.avatar_url as host_avatar,
-                           (SELECT COUNT(*) FROM {T('mafia_players')} WHERE room_id = r.id) as player_count
-                    FROM {T('mafia_rooms')} r
-                    JOIN {T('users')} u ON r.host_id = u.id
-                    WHERE r.status IN ('waiting', 'playing')
-                    ORDER BY r.created_at DESC
-                    LIMIT 50
-                """)
-                rooms = cursor.fetchall()
-                return json_response(200, [dict(r) for r in rooms])
-
             if action == 'room':
                 room_id = query_params.get('room_id')
                 if not room_id:
@@ -204,9 +254,8 @@ def handler(event: dict, context) -> dict:
                     return json_response(404, {'error': 'Room not found'})
 
                 cursor.execute(f"""
-                    SELECT mp.*, u.first_name, u.last_name, u.avatar_url, u.nickname
+                    SELECT mp.*
                     FROM {T('mafia_players')} mp
-                    JOIN {T('users')} u ON mp.user_id = u.id
                     WHERE mp.room_id = {escape_sql(room_id)}
                     ORDER BY mp.joined_at
                 """)
@@ -222,7 +271,8 @@ def handler(event: dict, context) -> dict:
                     players[players.index(p)] = p_dict
 
                 cursor.execute(f"""
-                    SELECT mm.*, u.first_name as author_name, u.avatar_url as author_avatar
+                    SELECT mm.*, u.first_name as author_name, u.avatar_url as author_avatar,
+                           u.avatar_blurhash as author_avatar_blurhash, u.avatar_color as author_avatar_color
                     FROM {T('mafia_messages')} mm
                     LEFT JOIN {T('users')} u ON mm.user_id = u.id
                     WHERE mm.room_id = {escape_sql(room_id)}
@@ -255,7 +305,7 @@ def handler(event: dict, context) -> dict:
                     return json_response(401, {'error': 'Unauthorized'})
                 user_id = get_user_id(payload)
                 cursor.execute(f"""
-                    SELECT r.*, (SELECT COUNT(*) FROM {T('mafia_players')} WHERE room_id = r.id) as player_count
+                    SELECT r.*
                     FROM {T('mafia_rooms')} r
                     JOIN {T('mafia_players')} mp ON mp.room_id = r.id
                     WHERE mp.user_id = {escape_sql(user_id)}
@@ -280,22 +330,16 @@ def handler(event: dict, context) -> dict:
                 code = generate_code()
 
                 cursor.execute(f"""
-                    INSERT INTO {T('mafia_rooms')} (code, host_id, name, max_players)
-                    VALUES ({escape_sql(code)}, {escape_sql(user_id)}, {escape_sql(name)}, {max_players})
+                    INSERT INTO {T('mafia_rooms')} (code, host_id, name, max_players, player_count)
+                    VALUES ({escape_sql(code)}, {escape_sql(user_id)}, {escape_sql(name)}, {max_players}, 1)
                     RETURNING id
                 """)
                 room_id = cursor.fetchone()['id']
 
-                cursor.execute(f"""
-                    INSERT INTO {T('mafia_players')} (room_id, user_id, is_ready)
-                    VALUES ({room_id}, {escape_sql(user_id)}, FALSE)
-                """)
-
-                cursor.execute(f"SELECT first_name FROM {T('users')} WHERE id = {escape_sql(user_id)}")
-                u = cursor.fetchone()
+                player_name = insert_player(cursor, room_id, user_id)
                 cursor.execute(f"""
                     INSERT INTO {T('mafia_messages')} (room_id, message, is_system)
-                    VALUES ({room_id}, {escape_sql(f"{u['first_name'] if u else 'Игрок'} создал комнату")}, TRUE)
+                    VALUES ({room_id}, {escape_sql(f"{player_name} создал комнату")}, TRUE)
                 """)
 
                 conn.commit()
@@ -316,24 +360,24 @@ def handler(event: dict, context) -> dict:
                 if not room:
                     return json_response(404, {'error': 'Room not found or already started'})
 
-                cursor.execute(f"SELECT COUNT(*) as cnt FROM {T('mafia_players')} WHERE room_id = {room['id']}")
-                count = cursor.fetchone()['cnt']
-                if count >= room['max_players']:
-                    return json_response(400, {'error': 'Room is full'})
-
                 cursor.execute(f"SELECT id FROM {T('mafia_players')} WHERE room_id = {room['id']} AND user_id = {escape_sql(user_id)}")
                 if cursor.fetchone():
                     return json_response(200, {'id': room['id'], 'already_joined': True})
 
+                # место занимается тем же UPDATE, что проверяет заполненность: два входа не превысят max_players
                 cursor.execute(f"""
-                    INSERT INTO {T('mafia_players')} (room_id, user_id) VALUES ({room['id']}, {escape_sql(user_id)})
+                    UPDATE {T('mafia_rooms')} SET player_count = player_count + 1
+                    WHERE id = {room['id']} AND player_count < max_players
+                    RETURNING id
                 """)
+                if not cursor.fetchone():
+                    conn.rollback()
+                    return json_response(400, {'error': 'Room is full'})
 
-                cursor.execute(f"SELECT first_name FROM {T('users')} WHERE id = {escape_sql(user_id)}")
-                u = cursor.fetchone()
+                player_name = insert_player(cursor, room['id'], user_id)
                 cursor.execute(f"""
                     INSERT INTO {T('mafia_messages')} (room_id, message, is_system)
-                    VALUES ({room['id']}, {escape_sql(f"{u['first_name'] if u else 'Игрок'} присоединился")}, TRUE)
+                    VALUES ({room['id']}, {escape_sql(f"{player_name} присоединился")}, TRUE)
                 """)
 
                 conn.commit()
@@ -355,43 +399,7 @@ def handler(event: dict, context) -> dict:
                 room_id = body.get('room_id')
                 if not room_id:
                     return json_response(400, {'error': 'room_id required'})
-
-                cursor.execute(f"SELECT * FROM {T('mafia_rooms')} WHERE id = {escape_sql(room_id)} AND host_id = {escape_sql(user_id)} AND status = 'waiting'")
-                room = cursor.fetchone()
-                if not room:
-                    return json_response(403, {'error': 'Not host or already started'})
-
-                cursor.execute(f"SELECT * FROM {T('mafia_players')} WHERE room_id = {room_id}")
-                players = cursor.fetchall()
-                if len(players) < 4:
-                    return json_response(400, {'error': 'Minimum 4 players required'})
-
-                not_ready = [p for p in players if not p['is_ready'] and str(p['user_id']) != str(user_id)]
-                if not_ready:
-                    return json_response(400, {'error': 'Not all players are ready'})
-
-                roles = assign_roles(len(players))
-                for i, p in enumerate(players):
-                    cursor.execute(f"""
-                        UPDATE {T('mafia_players')} SET role = {escape_sql(roles[i])}
-                        WHERE id = {p['id']}
-                    """)
-
-                phase_end = datetime.utcnow() + timedelta(seconds=60)
-                cursor.execute(f"""
-                    UPDATE {T('mafia_rooms')} SET status = 'playing', phase = 'night', day_number = 1,
-                           phase_end_at = {escape_sql(phase_end.isoformat())},
-                           updated_at = CURRENT_TIMESTAMP
-                    WHERE id = {room_id}
-                """)
-
-                cursor.execute(f"""
-                    INSERT INTO {T('mafia_messages')} (room_id, message, is_system, phase)
-                    VALUES ({room_id}, 'Игра началась! Город засыпает... Мафия просыпается.', TRUE, 'night')
-                """)
-
-                conn.commit()
-                return json_response(200, {'ok': True})
+                return run_game(conn, cursor, room_id, lambda room: _engine.start(room, user_id))
 
             if action == 'action':
                 room_id = body.get('room_id')
@@ -400,158 +408,13 @@ def handler(event: dict, context) -> dict:
 
                 if not room_id or not action_type:
                     return json_response(400, {'error': 'room_id and action_type required'})
-
-                cursor.execute(f"SELECT * FROM {T('mafia_rooms')} WHERE id = {escape_sql(room_id)} AND status = 'playing'")
-                room = cursor.fetchone()
-                if not room:
-                    return json_response(404, {'error': 'Game not found'})
-
-                cursor.execute(f"SELECT * FROM {T('mafia_players')} WHERE room_id = {room_id} AND user_id = {escape_sql(user_id)} AND is_alive = TRUE")
-                player = cursor.fetchone()
-                if not player:
-                    return json_response(403, {'error': 'Not in game or dead'})
-
-                phase = room['phase']
-                day_num = room['day_number']
-
-                if phase == 'night':
-                    if player['role'] == 'mafia' and action_type == 'kill':
-                        pass
-                    elif player['role'] == 'doctor' and action_type == 'heal':
-                        pass
-                    elif player['role'] == 'detective' and action_type == 'check':
-                        pass
-                    else:
-                        return json_response(403, {'error': 'Invalid action for your role'})
-
-                elif phase == 'day':
-                    if action_type != 'vote':
-                        return json_response(403, {'error': 'Only voting during day'})
-                else:
-                    return json_response(400, {'error': 'Invalid phase'})
-
-                cursor.execute(f"""
-                    SELECT id FROM {T('mafia_actions')}
-                    WHERE room_id = {room_id} AND actor_id = {escape_sql(user_id)}
-                      AND day_number = {day_num} AND phase = {escape_sql(phase)} AND action_type = {escape_sql(action_type)}
-                """)
-                existing = cursor.fetchone()
-                if existing:
-                    cursor.execute(f"""
-                        UPDATE {T('mafia_actions')} SET target_id = {escape_sql(target_id)}
-                        WHERE id = {existing['id']}
-                    """)
-                else:
-                    cursor.execute(f"""
-                        INSERT INTO {T('mafia_actions')} (room_id, day_number, phase, actor_id, target_id, action_type)
-                        VALUES ({room_id}, {day_num}, {escape_sql(phase)}, {escape_sql(user_id)}, {escape_sql(target_id)}, {escape_sql(action_type)})
-                    """)
-
-                conn.commit()
-                return json_response(200, {'ok': True})
+                return run_game(conn, cursor, room_id, lambda room: _engine.act(room, user_id, action_type, target_id))
 
             if action == 'next_phase':
                 room_id = body.get('room_id')
                 if not room_id:
                     return json_response(400, {'error': 'room_id required'})
-
-                cursor.execute(f"SELECT * FROM {T('mafia_rooms')} WHERE id = {escape_sql(room_id)} AND status = 'playing'")
-                room = cursor.fetchone()
-                if not room:
-                    return json_response(404, {'error': 'Game not found'})
-
-                phase = room['phase']
-                day_num = room['day_number']
-
-                if phase == 'night':
-                    killed_id, detective_result = process_night(cursor, room_id, day_num)
-
-                    winner = check_game_end(cursor, room_id)
-                    if winner:
-                        w_text = 'Мирные жители победили!' if winner == 'town' else 'Мафия победила!'
-                        cursor.execute(f"""
-                            UPDATE {T('mafia_rooms')} SET status = 'finished', winner = {escape_sql(winner)},
-                                   phase = NULL, updated_at = CURRENT_TIMESTAMP
-                            WHERE id = {room_id}
-                        """)
-                        cursor.execute(f"""
-                            INSERT INTO {T('mafia_messages')} (room_id, message, is_system)
-                            VALUES ({room_id}, {escape_sql(w_text)}, TRUE)
-                        """)
-                        conn.commit()
-                        return json_response(200, {'ok': True, 'winner': winner, 'detective_result': detective_result})
-
-                    phase_end = datetime.utcnow() + timedelta(seconds=90)
-                    cursor.execute(f"""
-                        UPDATE {T('mafia_rooms')} SET phase = 'day', phase_end_at = {escape_sql(phase_end.isoformat())},
-                               updated_at = CURRENT_TIMESTAMP
-                        WHERE id = {room_id}
-                    """)
-                    cursor.execute(f"""
-                        INSERT INTO {T('mafia_messages')} (room_id, message, is_system, phase)
-                        VALUES ({room_id}, 'Наступил день. Обсуждайте и голосуйте!', TRUE, 'day')
-                    """)
-
-                    conn.commit()
-                    return json_response(200, {'ok': True, 'detective_result': detective_result})
-
-                elif phase == 'day':
-                    cursor.execute(f"""
-                        SELECT target_id, COUNT(*) as votes FROM {T('mafia_actions')}
-                        WHERE room_id = {room_id} AND day_number = {day_num} AND phase = 'day' AND action_type = 'vote'
-                          AND target_id IS NOT NULL
-                        GROUP BY target_id ORDER BY votes DESC LIMIT 1
-                    """)
-                    result = cursor.fetchone()
-
-                    if result and result['votes'] > 0:
-                        voted_out = result['target_id']
-                        cursor.execute(f"UPDATE {T('mafia_players')} SET is_alive = FALSE WHERE room_id = {room_id} AND user_id = {voted_out}")
-                        cursor.execute(f"SELECT first_name FROM {T('users')} WHERE id = {voted_out}")
-                        v = cursor.fetchone()
-                        cursor.execute(f"SELECT role FROM {T('mafia_players')} WHERE room_id = {room_id} AND user_id = {voted_out}")
-                        role_data = cursor.fetchone()
-                        role_name = {'mafia': 'Мафия', 'doctor': 'Доктор', 'detective': 'Детектив', 'civilian': 'Мирный'}.get(role_data['role'], 'Неизвестный') if role_data else '?'
-                        cursor.execute(f"""
-                            INSERT INTO {T('mafia_messages')} (room_id, message, is_system, phase)
-                            VALUES ({room_id}, {escape_sql(f"Город решил казнить {v['first_name'] if v else 'игрока'}. Роль: {role_name}")}, TRUE, 'day')
-                        """)
-                    else:
-                        cursor.execute(f"""
-                            INSERT INTO {T('mafia_messages')} (room_id, message, is_system, phase)
-                            VALUES ({room_id}, 'Город не пришёл к решению. Никто не казнён.', TRUE, 'day')
-                        """)
-
-                    winner = check_game_end(cursor, room_id)
-                    if winner:
-                        w_text = 'Мирные жители победили!' if winner == 'town' else 'Мафия победила!'
-                        cursor.execute(f"""
-                            UPDATE {T('mafia_rooms')} SET status = 'finished', winner = {escape_sql(winner)},
-                                   phase = NULL, updated_at = CURRENT_TIMESTAMP
-                            WHERE id = {room_id}
-                        """)
-                        cursor.execute(f"""
-                            INSERT INTO {T('mafia_messages')} (room_id, message, is_system)
-                            VALUES ({room_id}, {escape_sql(w_text)}, TRUE)
-                        """)
-                        conn.commit()
-                        return json_response(200, {'ok': True, 'winner': winner})
-
-                    new_day = day_num + 1
-                    phase_end = datetime.utcnow() + timedelta(seconds=60)
-                    cursor.execute(f"""
-                        UPDATE {T('mafia_rooms')} SET phase = 'night', day_number = {new_day},
-                               phase_end_at = {escape_sql(phase_end.isoformat())},
-                               updated_at = CURRENT_TIMESTAMP
-                        WHERE id = {room_id}
-                    """)
-                    cursor.execute(f"""
-                        INSERT INTO {T('mafia_messages')} (room_id, message, is_system, phase)
-                        VALUES ({room_id}, {escape_sql(f'Наступила ночь {new_day}. Город засыпает...')}, TRUE, 'night')
-                    """)
-
-                    conn.commit()
-                    return json_response(200, {'ok': True})
+                return run_game(conn, cursor, room_id, _engine.next_phase)
 
             if action == 'chat':
                 room_id = body.get('room_id')
@@ -595,11 +458,14 @@ def handler(event: dict, context) -> dict:
                 if room['status'] == 'playing':
                     cursor.execute(f"UPDATE {T('mafia_players')} SET is_alive = FALSE WHERE room_id = {room_id} AND user_id = {escape_sql(user_id)}")
                 else:
-                    cursor.execute(f"DELETE FROM {T('mafia_players')} WHERE room_id = {room_id} AND user_id = {escape_sql(user_id)}")
-                    cursor.execute(f"SELECT COUNT(*) as cnt FROM {T('mafia_players')} WHERE room_id = {room_id}")
-                    cnt = cursor.fetchone()['cnt']
-                    if cnt == 0:
-                        cursor.execute(f"UPDATE {T('mafia_rooms')} SET status = 'finished' WHERE id = {room_id}")
+                    cursor.execute(f"DELETE FROM {T('mafia_players')} WHERE room_id = {room_id} AND user_id = {escape_sql(user_id)} RETURNING id")
+                    if cursor.fetchone():
+                        cursor.execute(f"""
+                            UPDATE {T('mafia_rooms')}
+                            SET player_count = GREATEST(player_count - 1, 0),
+                                status = CASE WHEN player_count <= 1 THEN 'finished' ELSE status END
+                            WHERE id = {room_id}
+                        """)
 
                 conn.commit()
                 return json_response(200, {'ok': True})
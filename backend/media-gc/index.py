@@ -0,0 +1,132 @@
+import hmac
+import json
+import os
+from datetime import datetime, timedelta, timezone
+import psycopg2
+from storage import get_storage
+
+SCHEMA = os.environ.get('MAIN_DB_SCHEMA', 't_p19021063_social_connect_platf')
+UPLOAD_PREFIX = 'uploads/'
+GRACE_PERIOD = timedelta(days=1)
+# Записи голосового поиска живут минуты: ссылка на загрузку действует 5 минут, распознавание сразу удаляет объект
+VOICE_UPLOAD_PREFIX = 'voice-uploads/'
+VOICE_GRACE_PERIOD = timedelta(hours=1)
+BATCH_SIZE = 100
+
+
+def collect_media(conn, storage):
+    """Удаляет объекты без ссылок старше периода ожидания.
+    Строки держатся под FOR UPDATE, пока удаляются файлы: параллельная загрузка тех же байтов
+    ждёт блокировку и после удаления строки заново создаёт объект, а не ссылается на удалённый."""
+    cur = conn.cursor()
+    cur.execute(f'''
+        SELECT sha256, object_keys
+        FROM {SCHEMA}.media_objects
+        WHERE ref_count <= 0 AND released_at < NOW() - %s
+        ORDER BY released_at
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    ''', (GRACE_PERIOD, BATCH_SIZE))
+    rows = cur.fetchall()
+    if rows:
+        storage.delete_many(key for _, keys in rows for key in keys)
+        cur.execute(f'''
+            DELETE FROM {SCHEMA}.media_objects
+            WHERE sha256 = ANY(%s)
+        ''', ([sha for sha, _ in rows],))
+    conn.commit()
+    cur.close()
+    return len(rows)
+
+
+def collect_uploads(storage):
+    """Удаляет брошенные presigned-загрузки: confirm или распознавание так и не вызвали"""
+    now = datetime.now(timezone.utc)
+    stale = []
+    for prefix, grace in ((UPLOAD_PREFIX, GRACE_PERIOD), (VOICE_UPLOAD_PREFIX, VOICE_GRACE_PERIOD)):
+        stale.extend(key for key, modified in storage.list(prefix) if modified < now - grace)
+    storage.delete_many(stale)
+    return len(stale)
+
+
+def collect_voice_uploads(conn):
+    """Удаляет записи о выданных голосовых загрузках старше суток: лимит считается по последним минутам"""
+    cur = conn.cursor()
+    cur.execute(f"DELETE FROM {SCHEMA}.voice_uploads WHERE created_at < NOW() - %s", (GRACE_PERIOD,))
+    deleted = cur.rowcount
+    conn.commit()
+    cur.close()
+    return deleted
+
+
+def is_scheduler(event):
+    """Вызов планировщика: заголовок X-Cron-Secret совпадает с CRON_SECRET"""
+    secret = os.environ.get('CRON_SECRET', '')
+    headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+    return bool(secret) and hmac.compare_digest(headers.get('x-cron-secret') or '', secret)
+
+
+def handler(event: dict, context) -> dict:
+    '''Сборщик мусора медиа: удаляет объекты без ссылок и брошенные загрузки (запускается по расписанию с X-Cron-Secret)'''
+    
+    if event.get('httpMethod') == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type, X-Cron-Secret'
+            },
+            'body': '',
+            'isBase64Encoded': False
+        }
+    
+    if not is_scheduler(event):
+        return {
+            'statusCode': 403,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'error': 'Forbidden'}),
+            'isBase64Encoded': False
+        }
+    
+    try:
+        storage = get_storage()
+        conn = psycopg2.connect(os.environ['DATABASE_URL'])
+        try:
+            media_deleted = collect_media(conn, storage)
+            collect_voice_uploads(conn)
+        finally:
+            conn.close()
+        uploads_deleted = collect_uploads(storage)
+        
+        print(f"[INFO] media-gc: удалено медиа {media_deleted}, брошенных загрузок {uploads_deleted}")
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({
+                'success': True,
+                'media_deleted': media_deleted,
+                'uploads_deleted': uploads_deleted
+            }),
+            'isBase64Encoded': False
+        }
+        
+    except Exception as e:
+        print(f"[ERROR] Media GC failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return {
+            'statusCode': 500,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'error': str(e)}),
+            'isBase64Encoded': False
+        }
@@ -123,7 +123,11 @@ def handler(event: dict, context) -> dict:
                    (SELECT u.avatar_url FROM {schema}.users u
                     JOIN {schema}.conversation_participants cp2 ON u.id = cp2.user_id
                     WHERE cp2.conversation_id = c.id AND cp2.user_id != %s
-                    LIMIT 1) as other_user_avatar
+                    LIMIT 1) as other_user_avatar,
+                   (SELECT json_build_object('blurhash', u.avatar_blurhash, 'color', u.avatar_color) FROM {schema}.users u
+                    JOIN {schema}.conversation_participants cp2 ON u.id = cp2.user_id
+                    WHERE cp2.conversation_id = c.id AND cp2.user_id != %s
+                    LIMIT 1) as other_user_placeholder
             FROM {schema}.conversations c
             JOIN {schema}.conversation_participants cp ON c.id = cp.conversation_id
             WHERE cp.user_id = %s
@@ -134,7 +138,7 @@ def handler(event: dict, context) -> dict:
         
         query += " ORDER BY last_message_time DESC NULLS LAST"
         
-        cursor.execute(query, (user_id, user_id, user_id, user_id, user_id, user_id))
+        cursor.execute(query, (user_id, user_id, user_id, user_id, user_id, user_id, user_id))
         conversations = cursor.fetchall()
         
         result = []
@@ -142,12 +146,15 @@ def handler(event: dict, context) -> dict:
             # Для personal чатов берём имя и аватар из users, для остальных — из conversations
             display_name = conv.get('other_user_name') or conv['name']
             display_avatar = conv.get('other_user_avatar') or conv['avatar_url']
+            placeholder = conv.get('other_user_placeholder') if conv.get('other_user_avatar') else None
             
             result.append({
                 'id': conv['id'],
                 'type': conv['type'],
                 'name': display_name,
                 'avatar': display_avatar,
+                'avatarBlurhash': placeholder['blurhash'] if placeholder else None,
+                'avatarColor': placeholder['color'] if placeholder else None,
                 'lastMessage': conv['last_message'] or '',
                 'time': format_time(conv['last_message_time']) if conv['last_message_time'] else '',
                 'unread': conv['unread_count'] or 0,
@@ -182,7 +189,8 @@ def handler(event: dict, context) -> dict:
         
         cursor.execute(f'''
             SELECT m.id, m.content, m.sender_id, m.created_at, m.is_read,
-                   u.name as sender_name, u.avatar_url as sender_avatar
+                   u.name as sender_name, u.avatar_url as sender_avatar,
+                   u.avatar_blurhash as sender_avatar_blurhash, u.avatar_color as sender_avatar_color
             FROM {schema}.messages m
             JOIN {schema}.users u ON m.sender_id = u.id
             WHERE m.conversation_id = %s
@@ -206,6 +214,8 @@ def handler(event: dict, context) -> dict:
                 'senderId': msg['sender_id'],
                 'senderName': msg['sender_name'],
                 'senderAvatar': msg['sender_avatar'],
+                'senderAvatarBlurhash': msg['sender_avatar_blurhash'],
+                'senderAvatarColor': msg['sender_avatar_color'],
                 'createdAt': msg['created_at'].isoformat() if msg['created_at'] else None,
                 'isRead': msg['is_read']
             })
@@ -1,12 +1,238 @@
+import hashlib
 import json
 import os
-import urllib.request
-import urllib.parse
+import time
+import threading
+from collections import OrderedDict
+import psycopg2
+import requests
+from requests.adapters import HTTPAdapter
+
+SCHEMA = os.environ.get('MAIN_DB_SCHEMA', 't_p19021063_social_connect_platf')
+JAMENDO_API_URL = os.environ.get('JAMENDO_API_URL') or 'https://api.jamendo.com/v3.0'
+CONNECT_TIMEOUT = 2
+READ_TIMEOUT = 5
+MAX_LIMIT = 200
+# Свежесть ответа по действию; после неё ответ ещё STALE_SECONDS отдаётся как есть, пока его обновляет
+# один запрос, взявший блокировку claim_refresh
+FRESH_SECONDS = {'popular': 3600, 'search': 600}
+STALE_SECONDS = 24 * 3600
+REFRESH_LOCK_SECONDS = 30
+# Запись старше этого не отдаётся даже устаревшей: удаляется при очередной записи в кеш
+EXPIRE_SECONDS = max(FRESH_SECONDS.values()) + STALE_SECONDS
+LRU_SIZE = 256
+
+HEADERS = {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+
+_session = None
+_lru = OrderedDict()
+_lru_lock = threading.Lock()
+
+
+def resp(status_code, body, max_age=0):
+    headers = dict(HEADERS)
+    if max_age:
+        headers['Cache-Control'] = f'public, max-age={max_age}'
+    return {
+        'statusCode': status_code,
+        'headers': headers,
+        'body': json.dumps(body),
+        'isBase64Encoded': False
+    }
+
+
+def get_session():
+    """Одна keep-alive сессия на инстанс: повторные запросы к Jamendo идут без нового TLS-рукопожатия"""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        _session = session
+    return _session
+
+
+def lru_get(key):
+    with _lru_lock:
+        entry = _lru.get(key)
+        if entry:
+            _lru.move_to_end(key)
+        return entry
+
+
+def lru_put(key, entry):
+    with _lru_lock:
+        _lru[key] = entry
+        _lru.move_to_end(key)
+        while len(_lru) > LRU_SIZE:
+            _lru.popitem(last=False)
+
+
+def db_get(key):
+    """(payload, fetched_at epoch) из общего кеша или None"""
+    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    try:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT payload, EXTRACT(EPOCH FROM fetched_at) FROM {SCHEMA}.jamendo_cache
+            WHERE cache_key = %s
+        """, (key,))
+        row = cur.fetchone()
+        cur.close()
+        return (row[0], float(row[1])) if row else None
+    finally:
+        conn.close()
+
+
+def db_put(key, payload, fetched_at):
+    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    try:
+        cur = conn.cursor()
+        cur.execute(f"""
+            INSERT INTO {SCHEMA}.jamendo_cache (cache_key, payload, fetched_at, refreshing_until)
+            VALUES (%s, %s, TO_TIMESTAMP(%s), NULL)
+            ON CONFLICT (cache_key) DO UPDATE
+            SET payload = EXCLUDED.payload, fetched_at = EXCLUDED.fetched_at, refreshing_until = NULL
+        """, (key, json.dumps(payload), fetched_at))
+        # Ключ — любой поисковый запрос, поэтому таблица растёт; просроченные записи вычищает каждая запись
+        cur.execute(f"""
+            DELETE FROM {SCHEMA}.jamendo_cache
+            WHERE fetched_at < NOW() - make_interval(secs => %s)
+        """, (EXPIRE_SECONDS,))
+        conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+
+
+def claim_refresh(key):
+    """Обновлять устаревший ключ берётся только один инстанс за REFRESH_LOCK_SECONDS;
+    ключа нет в БД (запись не удалась) — блокировать нечего, обновляет любой"""
+    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    try:
+        cur = conn.cursor()
+        cur.execute(f"""
+            WITH claimed AS (
+                UPDATE {SCHEMA}.jamendo_cache
+                SET refreshing_until = NOW() + make_interval(secs => %s)
+                WHERE cache_key = %s AND (refreshing_until IS NULL OR refreshing_until < NOW())
+                RETURNING cache_key
+            )
+            SELECT EXISTS (SELECT 1 FROM claimed)
+                OR NOT EXISTS (SELECT 1 FROM {SCHEMA}.jamendo_cache WHERE cache_key = %s)
+        """, (REFRESH_LOCK_SECONDS, key, key))
+        claimed = cur.fetchone()[0]
+        conn.commit()
+        cur.close()
+        return claimed
+    finally:
+        conn.close()
+
+
+def fetch_tracks(client_id, action, query, limit, offset):
+    params = {
+        'client_id': client_id,
+        'format': 'json',
+        'limit': limit,
+        'offset': offset,
+        'fullcount': 'true',
+        'include': 'musicinfo',
+        'audiodownload': 'false',
+    }
+    if action == 'popular':
+        params['order'] = 'popularity_total'
+    else:
+        params['search'] = query
+
+    response = get_session().get(f'{JAMENDO_API_URL}/tracks/', params=params, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    response.raise_for_status()
+    data = response.json()
+
+    tracks = []
+    for track in data.get('results', []):
+        tracks.append({
+            'id': track.get('id'),
+            'name': track.get('name'),
+            'artist': track.get('artist_name'),
+            'album': track.get('album_name'),
+            'duration': track.get('duration'),
+            'image': track.get('album_image'),
+            'audio': track.get('audio'),
+            'audiodownload': track.get('audiodownload')
+        })
+    total = (data.get('headers') or {}).get('results_fullcount')
+    return {'tracks': tracks, 'limit': limit, 'offset': offset, 'total': total}
+
+
+def refresh(key, fetch):
+    """Запрос к Jamendo и запись в оба кеша; возвращает payload"""
+    payload = fetch()
+    fetched_at = time.time()
+    lru_put(key, (payload, fetched_at))
+    try:
+        db_put(key, payload, fetched_at)
+    except Exception as e:
+        print(f'Jamendo cache write error for {key}: {e}')
+    return payload
+
+
+def try_claim_refresh(key):
+    try:
+        return claim_refresh(key)
+    except Exception as e:
+        print(f'Jamendo refresh claim error for {key}: {e}')
+        return False
+
+
+def cache_key(action, query, limit, offset):
+    """Ключ фиксированной длины: запрос пользователя может быть любой длины, а cache_key — VARCHAR(255)"""
+    raw = f'{action}:{query}:{limit}:{offset}'
+    return f'{action}:{hashlib.sha256(raw.encode()).hexdigest()}'
+
+
+def get_tracks(client_id, action, query, limit, offset):
+    """Кеш в памяти → общий кеш в БД → Jamendo. Устаревшую запись в памяти сначала сверяем с БД:
+    её мог уже обновить другой инстанс. Устаревший ответ обновляет один запрос — тот, что взял
+    блокировку, и делает это до ответа: фоновый поток после ответа функции может не выполниться.
+    Остальные запросы сразу получают устаревший ответ. Возвращает (payload, возраст ответа в секундах)"""
+    key = cache_key(action, query, limit, offset)
+    fresh_for = FRESH_SECONDS[action]
+
+    def fetch():
+        return fetch_tracks(client_id, action, query, limit, offset)
+
+    entry = lru_get(key)
+    if entry is None or time.time() - entry[1] >= fresh_for:
+        stored = None
+        try:
+            stored = db_get(key)
+        except Exception as e:
+            print(f'Jamendo cache read error for {key}: {e}')
+        if stored and (entry is None or stored[1] > entry[1]):
+            entry = stored
+            lru_put(key, entry)
+
+    if entry:
+        payload, fetched_at = entry
+        age = time.time() - fetched_at
+        if age < fresh_for:
+            return payload, age
+        if age < fresh_for + STALE_SECONDS and not try_claim_refresh(key):
+            return payload, age
+
+    try:
+        return refresh(key, fetch), 0
+    except Exception:
+        # Jamendo недоступен — лучше сильно устаревший список, чем ошибка
+        if entry:
+            return entry[0], time.time() - entry[1]
+        raise
+
 
 def handler(event: dict, context) -> dict:
-    '''API для работы с музыкой Jamendo: поиск треков, получение плейлистов'''
+    '''API для работы с музыкой Jamendo: поиск треков, получение плейлистов. Ответы кешируются (память инстанса + БД),
+    устаревший ответ обновляет один запрос, остальные получают его как есть; limit и offset передаются в Jamendo для постраничной загрузки'''
     method = event.get('httpMethod', 'GET')
-    
+
     if method == 'OPTIONS':
         return {
             'statusCode': 200,
@@ -18,124 +244,31 @@ def handler(event: dict, context) -> dict:
             'body': '',
             'isBase64Encoded': False
         }
-    
+
     if method != 'GET':
-        return {
-            'statusCode': 405,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Method not allowed'}),
-            'isBase64Encoded': False
-        }
-    
+        return resp(405, {'error': 'Method not allowed'})
+
     client_id = os.environ.get('JAMENDO_CLIENT_ID')
     if not client_id:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Jamendo API not configured'}),
-            'isBase64Encoded': False
-        }
-    
+        return resp(500, {'error': 'Jamendo API not configured'})
+
     params = event.get('queryStringParameters') or {}
     action = params.get('action', 'search')
-    
-    if action == 'search':
-        query = params.get('query', 'popular')
-        limit = params.get('limit', '20')
-        
-        url = f'https://api.jamendo.com/v3.0/tracks/?client_id={client_id}&format=json&limit={limit}&search={urllib.parse.quote(query)}&include=musicinfo&audiodownload=false'
-        
-        try:
-            with urllib.request.urlopen(url) as response:
-                data = json.loads(response.read().decode())
-                
-                tracks = []
-                for track in data.get('results', []):
-                    tracks.append({
-                        'id': track.get('id'),
-                        'name': track.get('name'),
-                        'artist': track.get('artist_name'),
-                        'album': track.get('album_name'),
-                        'duration': track.get('duration'),
-                        'image': track.get('album_image'),
-                        'audio': track.get('audio'),
-                        'audiodownload': track.get('audiodownload')
-                    })
-                
-                return {
-                    'statusCode': 200,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({'tracks': tracks}),
-                    'isBase64Encoded': False
-                }
-        except Exception as e:
-            return {
-                'statusCode': 500,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': str(e)}),
-                'isBase64Encoded': False
-            }
-    
-    if action == 'popular':
-        limit = params.get('limit', '20')
-        
-        url = f'https://api.jamendo.com/v3.0/tracks/?client_id={client_id}&format=json&limit={limit}&order=popularity_total&include=musicinfo&audiodownload=false'
-        
-        try:
-            with urllib.request.urlopen(url) as response:
-                data = json.loads(response.read().decode())
-                
-                tracks = []
-                for track in data.get('results', []):
-                    tracks.append({
-                        'id': track.get('id'),
-                        'name': track.get('name'),
-                        'artist': track.get('artist_name'),
-                        'album': track.get('album_name'),
-                        'duration': track.get('duration'),
-                        'image': track.get('album_image'),
-                        'audio': track.get('audio'),
-                        'audiodownload': track.get('audiodownload')
-                    })
-                
-                return {
-                    'statusCode': 200,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({'tracks': tracks}),
-                    'isBase64Encoded': False
-                }
-        except Exception as e:
-            return {
-                'statusCode': 500,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': str(e)}),
-                'isBase64Encoded': False
-            }
-    
-    return {
-        'statusCode': 400,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps({'error': 'Invalid action'}),
-        'isBase64Encoded': False
-    }
+
+    if action not in FRESH_SECONDS:
+        return resp(400, {'error': 'Invalid action'})
+
+    try:
+        limit = min(max(int(params.get('limit', 20)), 1), MAX_LIMIT)
+        offset = max(int(params.get('offset', 0)), 0)
+    except ValueError:
+        return resp(400, {'error': 'limit и offset должны быть числами'})
+    query = ' '.join((params.get('query') or 'popular').lower().split()) if action == 'search' else ''
+
+    try:
+        payload, age = get_tracks(client_id, action, query, limit, offset)
+    except Exception as e:
+        print(f'Jamendo error: {e}')
+        return resp(502, {'error': 'Jamendo API unavailable'})
+
+    return resp(200, payload, max_age=max(int(FRESH_SECONDS[action] - age), 0))
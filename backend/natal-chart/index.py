@@ -6,6 +6,8 @@ import jwt
 import requests
 from datetime import datetime
 
+OPENROUTER_API_URL = os.environ.get('OPENROUTER_API_URL') or 'https://openrouter.ai/api/v1'
+
 CORS_HEADERS = {
     'Access-Control-Allow-Origin': '*',
     'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
@@ -113,7 +115,7 @@ def generate_natal_interpretation(chart_data):
     )
 
     resp = requests.post(
-        'https://openrouter.ai/api/v1/chat/completions',
+        f'{OPENROUTER_API_URL}/chat/completions',
         headers={
             'Authorization': f'Bearer {api_key}',
             'Content-Type': 'application/json'
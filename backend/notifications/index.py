@@ -101,7 +101,9 @@ def handler(event: dict, context) -> dict:
                         n.related_entity_id,
                         u.first_name as related_user_first_name,
                         u.last_name as related_user_last_name,
-                        u.avatar_url as related_user_avatar
+                        u.avatar_url as related_user_avatar,
+                        u.avatar_blurhash as related_user_avatar_blurhash,
+                        u.avatar_color as related_user_avatar_color
                     FROM t_p19021063_social_connect_platf.notifications n
                     LEFT JOIN t_p19021063_social_connect_platf.users u ON n.related_user_id = u.id
                     WHERE n.user_id = {user_id}
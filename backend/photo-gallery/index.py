@@ -1,16 +1,31 @@
 import json
 import os
 import base64
-import boto3
-from datetime import datetime
+import hmac
+import time
+import uuid
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from images import sniff_image_type, pick_variant
+from media import acquire_media, release_media
+from storage import get_storage
 
 HEADERS = {
     'Content-Type': 'application/json',
     'Access-Control-Allow-Origin': '*'
 }
 
+# Временные объекты presigned-загрузки; после confirm байты переезжают в media/ по хешу
+UPLOAD_PREFIX = 'uploads/photos/'
+MAX_PHOTO_BYTES = 15 * 1024 * 1024
+UPLOAD_URL_TTL = 600
+DEFAULT_THUMB_SIZE = 256
+# Больше, чем фото в открытом и закрытом альбомах вместе: без limit клиент получает всю галерею
+MAX_PAGE_SIZE = 50
+# Токен доступа к альбомам живёт недолго: отзыв доступа и смена ключа вступают в силу не позже чем через TTL
+ACCESS_TOKEN_TTL = 300
+IMAGE_EXTENSIONS = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/webp': 'webp'}
+
 def resp(status_code, body):
     return {
         'statusCode': status_code,
@@ -19,6 +34,125 @@ def resp(status_code, body):
         'isBase64Encoded': False
     }
 
+def load_uploaded_image(storage, key):
+    """Проверяет загруженный объект по размеру (HEAD) и сигнатуре, затем читает его; невалидный удаляется.
+    Возвращает (bytes, None) или (None, ошибка)"""
+    size = storage.size(key)
+    if size is None:
+        return None, 'Файл не загружен'
+
+    data, error = None, None
+    if size > MAX_PHOTO_BYTES:
+        error = f'Файл больше {MAX_PHOTO_BYTES // (1024 * 1024)} МБ'
+    elif size == 0:
+        error = 'Пустой файл'
+    else:
+        data = storage.get(key)
+        if not sniff_image_type(data[:16]):
+            error = 'Файл не является изображением JPEG, PNG или WebP'
+
+    if error:
+        storage.delete(key)
+        return None, error
+    return data, None
+
+def check_photo_slot(cursor, schema, user_id, album_id, is_private):
+    """Проверяет альбом и лимит фото; возвращает (is_private, (код, ошибка) или None)"""
+    if album_id:
+        cursor.execute(f"""
+            SELECT id, type FROM {schema}.photo_albums
+            WHERE id = %s AND user_id = %s
+        """, (album_id, user_id))
+        album = cursor.fetchone()
+        if not album:
+            return is_private, (404, 'Альбом не найден')
+        is_private = album['type'] == 'private'
+    
+    cursor.execute(f"""
+        SELECT COUNT(*) as count FROM {schema}.user_photos
+        WHERE user_id = %s AND is_private = %s
+    """, (user_id, is_private))
+    count = cursor.fetchone()['count']
+    
+    max_photos = 30 if is_private else 9
+    if count >= max_photos:
+        return is_private, (400, f'Максимум {max_photos} фотографий в {"закрытом" if is_private else "открытом"} альбоме')
+    return is_private, None
+
+def insert_photo(cursor, schema, user_id, media, position, is_private, album_id):
+    """Ставит фото на позицию; фото, которое там было, теряет ссылку на своё медиа"""
+    cursor.execute(f"""
+        SELECT media_sha256 FROM {schema}.user_photos
+        WHERE user_id = %s AND position = %s
+        FOR UPDATE
+    """, (user_id, position))
+    replaced = cursor.fetchone()
+    
+    cursor.execute(f"""
+        INSERT INTO {schema}.user_photos (user_id, photo_url, position, is_private, album_id, media_sha256, variants, blurhash, color)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (user_id, position) DO UPDATE 
+        SET photo_url = EXCLUDED.photo_url, is_private = EXCLUDED.is_private, album_id = EXCLUDED.album_id,
+            media_sha256 = EXCLUDED.media_sha256, variants = EXCLUDED.variants,
+            blurhash = EXCLUDED.blurhash, color = EXCLUDED.color
+        RETURNING id, photo_url, position, is_private, album_id, variants, blurhash, color, created_at
+    """, (user_id, media['url'], position, is_private, album_id, media['sha256'],
+          json.dumps(media['variants']) if media['variants'] else None, media['blurhash'], media['color']))
+    photo = dict(cursor.fetchone())
+    if replaced:
+        release_media(cursor, schema, replaced['media_sha256'])
+    return photo
+
+def resolve_access(cursor, schema, owner_id, viewer_id, keyed_albums=()):
+    """Одним запросом: всё, что зритель может видеть у владельца.
+    own/granted открывают все закрытые фото, albums — видимые альбомы (открытые, выданные, открытые ключом)"""
+    cursor.execute(f"""
+        WITH viewer AS (
+            SELECT %(viewer)s::int = %(owner)s::int AS own,
+                   EXISTS(
+                       SELECT 1 FROM {schema}.photo_access
+                       WHERE user_id = %(owner)s AND granted_to_user_id = %(viewer)s
+                   ) AS granted
+        )
+        SELECT v.own, v.granted,
+               COALESCE(array_agg(a.id ORDER BY a.id) FILTER (
+                   WHERE a.type <> 'private' OR v.own OR v.granted OR a.id = ANY(%(keyed)s)
+               ), '{{}}') AS albums,
+               COALESCE(array_agg(a.id ORDER BY a.id) FILTER (
+                   WHERE a.type = 'private' AND a.id = ANY(%(keyed)s)
+               ), '{{}}') AS keyed
+        FROM viewer v
+        LEFT JOIN {schema}.photo_albums a ON a.user_id = %(owner)s
+        GROUP BY v.own, v.granted
+    """, {'owner': owner_id, 'viewer': viewer_id, 'keyed': list(keyed_albums)})
+    row = cursor.fetchone()
+    return {
+        'owner': int(owner_id),
+        'viewer': viewer_id,
+        'own': bool(row['own']),
+        'granted': bool(row['granted']),
+        'albums': list(row['albums']),
+        'keyed': list(row['keyed']),
+    }
+
+def make_access_token(access):
+    import jwt as pyjwt
+    claims = {**access, 'typ': 'album_access', 'exp': int(time.time()) + ACCESS_TOKEN_TTL}
+    return pyjwt.encode(claims, os.environ.get('JWT_SECRET', ''), algorithm='HS256')
+
+def read_access_token(token, owner_id, viewer_id):
+    """Права из токена, если он подписан нами, не истёк и выдан этому зрителю на этого владельца"""
+    if not token or not os.environ.get('JWT_SECRET'):
+        return None
+    try:
+        import jwt as pyjwt
+        claims = pyjwt.decode(token, os.environ['JWT_SECRET'], algorithms=['HS256'])
+    except Exception:
+        return None
+    if claims.get('typ') != 'album_access' or claims.get('owner') != int(owner_id) or claims.get('viewer') != viewer_id:
+        return None
+    return claims
+
 def handler(event: dict, context) -> dict:
     """API для управления галереей фотографий и альбомами пользователя"""
     
@@ -217,20 +351,49 @@ def handler(event: dict, context) -> dict:
                 return resp(400, {'error': 'album_id и key обязательны'})
             
             cursor.execute(f"""
-                SELECT access_key FROM {schema}.photo_albums
+                SELECT user_id, access_key FROM {schema}.photo_albums
                 WHERE id = %s AND type = 'private'
             """, (album_id,))
             
             album = cursor.fetchone()
-            cursor.close()
-            conn.close()
             
             if not album:
+                cursor.close()
+                conn.close()
                 return resp(404, {'error': 'Альбом не найден'})
             
-            if album['access_key'] == key:
-                return resp(200, {'success': True, 'access': True})
-            return resp(200, {'success': True, 'access': False})
+            if not album['access_key'] or not hmac.compare_digest(album['access_key'], key):
+                cursor.close()
+                conn.close()
+                return resp(200, {'success': True, 'access': False})
+            
+            # Открытый ключом альбом добавляется к уже открытым из прежнего токена
+            previous = read_access_token(body.get('access_token'), album['user_id'], user_id)
+            keyed = set(previous['keyed'] if previous else []) | {int(album_id)}
+            access = resolve_access(cursor, schema, album['user_id'], user_id, keyed)
+            cursor.close()
+            conn.close()
+            return resp(200, {
+                'success': True, 'access': True,
+                'albums': access['albums'], 'access_token': make_access_token(access),
+                'expires_in': ACCESS_TOKEN_TTL
+            })
+        
+        elif method == 'GET' and action == 'access':
+            target_user_id = params.get('user_id') or user_id
+            if not target_user_id or not str(target_user_id).isdigit():
+                cursor.close()
+                conn.close()
+                return resp(400, {'error': 'user_id обязателен'})
+            
+            previous = read_access_token(params.get('access_token'), target_user_id, user_id)
+            access = resolve_access(cursor, schema, target_user_id, user_id, previous['keyed'] if previous else [])
+            cursor.close()
+            conn.close()
+            return resp(200, {
+                'albums': access['albums'], 'all_private': access['own'] or access['granted'],
+                'access_token': make_access_token(access), 'expires_in': ACCESS_TOKEN_TTL
+            })
         
         # ===== ФОТО =====
         
@@ -243,51 +406,121 @@ def handler(event: dict, context) -> dict:
                 conn.close()
                 return resp(400, {'error': 'user_id обязателен'})
             
-            is_owner = user_id and int(target_user_id) == int(user_id)
-            
-            has_access = False
-            if user_id and not is_owner:
-                cursor.execute(f"""
-                    SELECT COUNT(*) as cnt FROM {schema}.photo_access
-                    WHERE user_id = %s AND granted_to_user_id = %s
-                """, (target_user_id, user_id))
-                has_access = cursor.fetchone()['cnt'] > 0
+            # Права берутся из токена прошлого ответа; без него — один запрос resolve_access и новый токен
+            access_token = params.get('access_token')
+            access = read_access_token(access_token, target_user_id, user_id)
+            if not access:
+                access = resolve_access(cursor, schema, target_user_id, user_id)
+                access_token = make_access_token(access)
+            sees_private = access['own'] or access['granted']
             
             where_extra = ""
             extra_params = []
             
             if album_id:
-                if not is_owner and not has_access:
-                    cursor.execute(f"""
-                        SELECT type FROM {schema}.photo_albums WHERE id = %s
-                    """, (album_id,))
-                    album_row = cursor.fetchone()
-                    if album_row and album_row['type'] == 'private':
-                        cursor.close()
-                        conn.close()
-                        return resp(200, {'photos': [], 'locked': True})
+                if not str(album_id).isdigit() or int(album_id) not in access['albums']:
+                    cursor.close()
+                    conn.close()
+                    return resp(200, {'photos': [], 'locked': True, 'access_token': access_token})
                 
                 where_extra = " AND p.album_id = %s"
-                extra_params = [album_id]
+                extra_params = [int(album_id)]
+            
+            # Keyset-пагинация: after=<position>:<id> последнего фото предыдущей страницы
+            limit = min(int(params['limit']), MAX_PAGE_SIZE) if str(params.get('limit', '')).isdigit() else MAX_PAGE_SIZE
+            after = str(params.get('after') or '').split(':')
+            if len(after) == 2 and all(part.lstrip('-').isdigit() for part in after):
+                where_extra += " AND (p.position, p.id) > (%s, %s)"
+                extra_params += [int(after[0]), int(after[1])]
             
             cursor.execute(f"""
-                SELECT 
-                    p.id, p.photo_url, p.position, p.created_at, p.is_private, p.album_id,
-                    COUNT(DISTINCT pl.id) as likes_count,
-                    CASE WHEN %s IS NOT NULL THEN 
-                        EXISTS(SELECT 1 FROM {schema}.photo_likes WHERE photo_id = p.id AND user_id = %s)
-                    ELSE FALSE END as is_liked
+                SELECT p.id, p.photo_url, p.position, p.created_at, p.is_private, p.album_id,
+                       p.variants, p.blurhash, p.color, p.likes_count
                 FROM {schema}.user_photos p
-                LEFT JOIN {schema}.photo_likes pl ON pl.photo_id = p.id
-                WHERE p.user_id = %s AND (%s OR NOT p.is_private OR %s){where_extra}
-                GROUP BY p.id, p.photo_url, p.position, p.created_at, p.is_private, p.album_id
-                ORDER BY p.position ASC
-            """, [user_id, user_id, target_user_id, is_owner, has_access] + extra_params)
+                WHERE p.user_id = %s AND (%s OR NOT p.is_private OR p.album_id = ANY(%s)){where_extra}
+                ORDER BY p.position, p.id
+                LIMIT %s
+            """, [target_user_id, sees_private, access['keyed']] + extra_params + [max(limit, 1) + 1])
+            rows = cursor.fetchall()
+            has_more = len(rows) > max(limit, 1)
+            rows = rows[:max(limit, 1)]
+            
+            # Лайки зрителя для всей страницы — одним запросом по уникальному индексу (photo_id, user_id)
+            liked = set()
+            if user_id and rows:
+                cursor.execute(f"""
+                    SELECT photo_id FROM {schema}.photo_likes
+                    WHERE user_id = %s AND photo_id = ANY(%s)
+                """, (user_id, [row['id'] for row in rows]))
+                liked = {row['photo_id'] for row in cursor.fetchall()}
+            
+            # Клиент передаёт нужный размер превью в px; отдаём наименьшую подходящую производную
+            thumb_size = int(params['size']) if str(params.get('size', '')).isdigit() else DEFAULT_THUMB_SIZE
+            thumb_format = 'jpeg' if params.get('format') == 'jpeg' else 'webp'
+            photos = []
+            for row in rows:
+                photo = dict(row)
+                photo['is_liked'] = photo['id'] in liked
+                photo['thumb_url'] = pick_variant(photo['variants'], thumb_size, thumb_format) or photo['photo_url']
+                photos.append(photo)
+            cursor.close()
+            conn.close()
+            next_cursor = f"{rows[-1]['position']}:{rows[-1]['id']}" if has_more else None
+            return resp(200, {'photos': photos, 'next_cursor': next_cursor, 'access_token': access_token})
+        
+        elif method == 'POST' and action == 'upload-url':
+            body = json.loads(event.get('body') or '{}')
+            content_type = (body.get('content_type') or 'image/jpeg').split(';')[0].strip().lower()
             
-            photos = [dict(p) for p in cursor.fetchall()]
+            if content_type not in IMAGE_EXTENSIONS:
+                cursor.close()
+                conn.close()
+                return resp(400, {'error': f'Допустимые типы: {", ".join(IMAGE_EXTENSIONS)}'})
+            
+            _, error = check_photo_slot(cursor, schema, user_id, body.get('album_id'), body.get('is_private', False))
+            cursor.close()
+            conn.close()
+            if error:
+                return resp(error[0], {'error': error[1]})
+            
+            file_key = f'{UPLOAD_PREFIX}user_{user_id}_{uuid.uuid4().hex}.{IMAGE_EXTENSIONS[content_type]}'
+            upload_url = get_storage().upload_url(file_key, content_type, UPLOAD_URL_TTL)
+            return resp(200, {'uploadUrl': upload_url, 'key': file_key, 'contentType': content_type, 'expiresIn': UPLOAD_URL_TTL})
+        
+        elif method == 'POST' and action == 'confirm':
+            body = json.loads(event.get('body') or '{}')
+            file_key = body.get('key') or ''
+            
+            if not file_key.startswith(f'{UPLOAD_PREFIX}user_{user_id}_') or '..' in file_key:
+                cursor.close()
+                conn.close()
+                return resp(400, {'error': 'Неверный ключ файла'})
+            
+            is_private, error = check_photo_slot(cursor, schema, user_id, body.get('album_id'), body.get('is_private', False))
+            media = None
+            if not error:
+                storage = get_storage()
+                image_data, invalid = load_uploaded_image(storage, file_key)
+                if not invalid:
+                    try:
+                        media = acquire_media(cursor, schema, storage, image_data)
+                    finally:
+                        storage.delete(file_key)
+                    if not media:
+                        invalid = 'Не удалось обработать изображение'
+                if invalid:
+                    error = (400, invalid)
+            if error:
+                conn.rollback()
+                cursor.close()
+                conn.close()
+                return resp(error[0], {'error': error[1]})
+            
+            new_photo = insert_photo(cursor, schema, user_id, media, body.get('position', 0), is_private, body.get('album_id'))
+            conn.commit()
             cursor.close()
             conn.close()
-            return resp(200, {'photos': photos})
+            return resp(200, {'photo': new_photo})
         
         elif method == 'POST' and action == 'upload':
             body = json.loads(event.get('body', '{}'))
@@ -301,53 +534,26 @@ def handler(event: dict, context) -> dict:
                 conn.close()
                 return resp(400, {'error': 'Изображение не предоставлено'})
             
-            if album_id:
-                cursor.execute(f"""
-                    SELECT id, type FROM {schema}.photo_albums
-                    WHERE id = %s AND user_id = %s
-                """, (album_id, user_id))
-                album = cursor.fetchone()
-                if not album:
-                    cursor.close()
-                    conn.close()
-                    return resp(404, {'error': 'Альбом не найден'})
-                is_private = album['type'] == 'private'
-            
-            cursor.execute(f"""
-                SELECT COUNT(*) as count FROM {schema}.user_photos
-                WHERE user_id = %s AND is_private = %s
-            """, (user_id, is_private))
-            count = cursor.fetchone()['count']
-            
-            max_photos = 30 if is_private else 9
-            if count >= max_photos:
+            image_data = base64.b64decode(image_base64)
+            if not sniff_image_type(image_data[:16]):
                 cursor.close()
                 conn.close()
-                return resp(400, {'error': f'Максимум {max_photos} фотографий в {"закрытом" if is_private else "открытом"} альбоме'})
+                return resp(400, {'error': 'Файл не является изображением JPEG, PNG или WebP'})
             
-            s3 = boto3.client('s3',
-                endpoint_url='https://bucket.poehali.dev',
-                aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
-                aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY']
-            )
-            
-            image_data = base64.b64decode(image_base64)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
-            file_key = f'photos/user_{user_id}_{timestamp}.jpg'
-            
-            s3.put_object(Bucket='files', Key=file_key, Body=image_data, ContentType='image/jpeg')
+            is_private, error = check_photo_slot(cursor, schema, user_id, album_id, is_private)
+            if error:
+                cursor.close()
+                conn.close()
+                return resp(error[0], {'error': error[1]})
             
-            photo_url = f"https://cdn.poehali.dev/projects/{os.environ['AWS_ACCESS_KEY_ID']}/bucket/{file_key}"
+            media = acquire_media(cursor, schema, get_storage(), image_data)
+            if not media:
+                conn.rollback()
+                cursor.close()
+                conn.close()
+                return resp(400, {'error': 'Не удалось обработать изображение'})
             
-            cursor.execute(f"""
-                INSERT INTO {schema}.user_photos (user_id, photo_url, position, is_private, album_id)
-                VALUES (%s, %s, %s, %s, %s)
-                ON CONFLICT (user_id, position) DO UPDATE 
-                SET photo_url = EXCLUDED.photo_url, is_private = EXCLUDED.is_private, album_id = EXCLUDED.album_id
-                RETURNING id, photo_url, position, is_private, album_id, created_at
-            """, (user_id, photo_url, position, is_private, album_id))
-            
-            new_photo = dict(cursor.fetchone())
+            new_photo = insert_photo(cursor, schema, user_id, media, position, is_private, album_id)
             conn.commit()
             cursor.close()
             conn.close()
@@ -362,21 +568,28 @@ def handler(event: dict, context) -> dict:
                 conn.close()
                 return resp(400, {'error': 'ID фото не указан'})
             
+            # Лайк и счётчик меняются одним запросом: повторный лайк ничего не вставляет и счётчик не трогает
             cursor.execute(f"""
-                INSERT INTO {schema}.photo_likes (photo_id, user_id)
-                VALUES (%s, %s)
-                ON CONFLICT (photo_id, user_id) DO NOTHING
-                RETURNING id
-            """, (photo_id, user_id))
+                WITH liked AS (
+                    INSERT INTO {schema}.photo_likes (photo_id, user_id)
+                    SELECT id, %s FROM {schema}.user_photos WHERE id = %s
+                    ON CONFLICT (photo_id, user_id) DO NOTHING
+                    RETURNING photo_id
+                )
+                UPDATE {schema}.user_photos p
+                SET likes_count = p.likes_count + 1
+                FROM liked
+                WHERE p.id = liked.photo_id
+                RETURNING p.user_id, p.likes_count
+            """, (user_id, photo_id))
             
             result = cursor.fetchone()
             
             if result:
-                cursor.execute(f"SELECT user_id FROM {schema}.user_photos WHERE id = %s", (photo_id,))
-                photo_owner = cursor.fetchone()
+                likes_count = result['likes_count']
                 
-                if photo_owner and photo_owner['user_id'] != user_id:
-                    owner_id = photo_owner['user_id']
+                if result['user_id'] != user_id:
+                    owner_id = result['user_id']
                     cursor.execute(f"SELECT first_name, last_name FROM {schema}.users WHERE id = %s", (user_id,))
                     user_info = cursor.fetchone()
                     user_name = f"{user_info['first_name'] or ''} {user_info['last_name'] or ''}".strip() if user_info else 'Пользователь'
@@ -385,11 +598,17 @@ def handler(event: dict, context) -> dict:
                         INSERT INTO {schema}.notifications (user_id, type, title, content, related_user_id, related_entity_type, related_entity_id)
                         VALUES (%s, %s, %s, %s, %s, %s, %s)
                     """, (owner_id, 'photo_like', 'Лайк на фото', f'{user_name} оценил ваше фото', user_id, 'photo', photo_id))
+            else:
+                cursor.execute(f"SELECT likes_count FROM {schema}.user_photos WHERE id = %s", (photo_id,))
+                photo = cursor.fetchone()
+                if not photo:
+                    conn.rollback()
+                    cursor.close()
+                    conn.close()
+                    return resp(404, {'error': 'Фото не найдено'})
+                likes_count = photo['likes_count']
             
             conn.commit()
-            
-            cursor.execute(f"SELECT COUNT(*) as likes_count FROM {schema}.photo_likes WHERE photo_id = %s", (photo_id,))
-            likes_count = cursor.fetchone()['likes_count']
             cursor.close()
             conn.close()
             return resp(200, {'success': True, 'likes_count': likes_count, 'liked': result is not None})
@@ -404,14 +623,22 @@ def handler(event: dict, context) -> dict:
                 return resp(400, {'error': 'ID фото не указан'})
             
             cursor.execute(f"""
-                DELETE FROM {schema}.photo_likes
-                WHERE photo_id = %s AND user_id = %s
+                WITH unliked AS (
+                    DELETE FROM {schema}.photo_likes
+                    WHERE photo_id = %s AND user_id = %s
+                    RETURNING photo_id
+                )
+                UPDATE {schema}.user_photos p
+                SET likes_count = GREATEST(p.likes_count - 1, 0)
+                FROM unliked
+                WHERE p.id = unliked.photo_id
+                RETURNING p.likes_count
             """, (photo_id, user_id))
-            
-            cursor.execute(f"""
-                SELECT COUNT(*) as likes_count FROM {schema}.photo_likes WHERE photo_id = %s
-            """, (photo_id,))
-            likes_count = cursor.fetchone()['likes_count']
+            result = cursor.fetchone()
+            if not result:
+                cursor.execute(f"SELECT likes_count FROM {schema}.user_photos WHERE id = %s", (photo_id,))
+                result = cursor.fetchone()
+            likes_count = result['likes_count'] if result else 0
             
             conn.commit()
             cursor.close()
@@ -484,7 +711,7 @@ def handler(event: dict, context) -> dict:
         
         elif method == 'GET' and action == 'access-list':
             cursor.execute(f"""
-                SELECT pa.granted_to_user_id, u.first_name, u.last_name, u.nickname, u.avatar_url
+                SELECT pa.granted_to_user_id, u.first_name, u.last_name, u.nickname, u.avatar_url, u.avatar_blurhash, u.avatar_color
                 FROM {schema}.photo_access pa
                 JOIN {schema}.users u ON pa.granted_to_user_id = u.id
                 WHERE pa.user_id = %s
@@ -503,16 +730,19 @@ def handler(event: dict, context) -> dict:
                 conn.close()
                 return resp(400, {'error': 'ID фото не указан'})
             
-            cursor.execute(f"""
-                DELETE FROM {schema}.photo_likes WHERE photo_id = %s
-            """, (photo_id,))
             cursor.execute(f"""
                 DELETE FROM {schema}.user_photos
                 WHERE id = %s AND user_id = %s
-                RETURNING id
+                RETURNING id, media_sha256
             """, (photo_id, user_id))
             
             result = cursor.fetchone()
+            if result:
+                # Лайки удаляются только вместе со своим фото, а не по любому photo_id из запроса
+                cursor.execute(f"""
+                    DELETE FROM {schema}.photo_likes WHERE photo_id = %s
+                """, (result['id'],))
+                release_media(cursor, schema, result['media_sha256'])
             conn.commit()
             cursor.close()
             conn.close()
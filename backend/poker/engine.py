@@ -0,0 +1,480 @@
+"""Правила Texas Hold'em без SQL: движок применяет действие к загруженному состоянию стола
+и возвращает изменения (игроки, раздачи, сообщения, выплаты), которые обработчик сохраняет разом.
+
+Карты — целые 0..51 (см. evaluator). Колода тасуется генератором, переданным в движок,
+поэтому одинаковое зерно даёт одинаковую раздачу — для симуляций и проверки правил."""
+
+import random
+
+from evaluator import evaluate, hand_name, int_to_card
+
+TURN_SECONDS = 30
+
+# коды действий в журнале раздачи (HandState.actions) и в записи истории
+FOLD, CHECK, CALL, RAISE, ALLIN, PASS, LEAVE = range(7)
+ACTION_NAMES = ('fold', 'check', 'call', 'raise', 'allin', 'pass', 'leave')
+ACTION_CODES = {name: code for code, name in enumerate(ACTION_NAMES)}
+
+
+class ActionError(Exception):
+    """Действие не по правилам; status — HTTP-код ответа"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class PlayerState:
+    __slots__ = ('user_id', 'seat', 'chips', 'current_bet', 'is_folded', 'is_active', 'is_ready', 'hole_cards', 'name')
+
+    def __init__(self, user_id, seat, chips, current_bet=0, is_folded=False, is_active=True,
+                 is_ready=False, hole_cards=None, name=None):
+        self.user_id = user_id
+        self.seat = seat
+        self.chips = chips
+        self.current_bet = current_bet
+        self.is_folded = is_folded
+        self.is_active = is_active
+        self.is_ready = is_ready
+        self.hole_cards = hole_cards
+        self.name = name
+
+
+class HandState:
+    """Одна раздача; no — её номер в комнате (poker_games.hand_no). turn_end_at — срок хода (ISO, UTC),
+    его ставит обработчик: у движка нет часов. Для истории раздача помнит участников при раздаче
+    (start: место, user_id, фишки до блайндов, две карты — по пять целых на игрока) и журнал
+    действий (actions: место, код, сумма рейза — по три целых)."""
+    __slots__ = ('no', 'dealer_seat', 'current_turn_seat', 'phase', 'community', 'pot', 'current_bet', 'deck',
+                 'winner_id', 'winner_hand', 'finished', 'turn_end_at', 'start', 'actions', 'turn_reset')
+
+    def __init__(self, no=0, dealer_seat=0, current_turn_seat=None, phase='preflop', community=None, pot=0,
+                 current_bet=0, deck=None, winner_id=None, winner_hand=None, finished=False, turn_end_at=None,
+                 start=None, actions=None):
+        self.no = no
+        self.dealer_seat = dealer_seat
+        self.current_turn_seat = current_turn_seat
+        self.phase = phase
+        self.community = community or []
+        self.pot = pot
+        self.current_bet = current_bet
+        self.deck = deck or []
+        self.winner_id = winner_id
+        self.winner_hand = winner_hand
+        self.finished = finished
+        self.turn_end_at = turn_end_at
+        self.start = start or []
+        self.actions = actions or []
+        # ход перешёл к другому игроку: таймер хода начинается заново
+        self.turn_reset = False
+
+
+class TableState:
+    """Комната, её игроки (по местам) и последняя раздача. last_dealer — наибольшее место дилера
+    среди прошлых раздач комнаты (-1, если раздач не было), hand_count — сколько раздач было.
+    versions — в какой версии снимка менялись игроки, поля раздачи и статус; ведёт обработчик
+    (для дельт опроса), движок их не трогает."""
+    __slots__ = ('room_id', 'host_id', 'status', 'small_blind', 'big_blind', 'last_dealer', 'hand_count',
+                 'players', 'hand', 'versions')
+
+    def __init__(self, room_id, host_id, status, small_blind, big_blind, players, hand=None, last_dealer=-1,
+                 hand_count=0, versions=None):
+        self.room_id = room_id
+        self.host_id = host_id
+        self.status = status
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.players = sorted(players, key=lambda p: p.seat)
+        self.hand = hand
+        self.last_dealer = last_dealer
+        self.hand_count = hand_count
+        self.versions = versions or {'room': 0, 'players': {}, 'hand': {}}
+
+    def player(self, user_id):
+        return next((p for p in self.players if str(p.user_id) == str(user_id)), None)
+
+    def to_dict(self):
+        """Снимок для poker_state.state: только JSON-типы, карты — целые"""
+        hand = self.hand
+        return {
+            'room_id': self.room_id, 'host_id': self.host_id, 'status': self.status,
+            'small_blind': self.small_blind, 'big_blind': self.big_blind,
+            'last_dealer': self.last_dealer, 'hand_count': self.hand_count,
+            'players': [{name: getattr(p, name) for name in PlayerState.__slots__} for p in self.players],
+            'hand': None if hand is None else {
+                name: getattr(hand, name) for name in HandState.__slots__ if name != 'turn_reset'
+            },
+            'versions': self.versions,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        hand = data.get('hand')
+        return cls(
+            data['room_id'], data['host_id'], data['status'], data['small_blind'], data['big_blind'],
+            [PlayerState(**p) for p in data['players']],
+            HandState(**hand) if hand else None,
+            data.get('last_dealer', -1), data.get('hand_count', 0), data.get('versions'),
+        )
+
+
+class Changes:
+    """Что сохранить после действия: изменённые игроки (user_id), затронутые раздачи по порядку,
+    сообщения (user_id | None, текст), выплаты LOVE (user_id, сумма) и статус комнаты"""
+    __slots__ = ('players', 'hands', 'messages', 'credits', 'room_status')
+
+    def __init__(self):
+        self.players = set()
+        self.hands = []
+        self.messages = []
+        self.credits = []
+        self.room_status = None
+
+    def touch(self, *players):
+        for p in players:
+            self.players.add(p.user_id)
+
+    def touch_hand(self, hand):
+        if hand not in self.hands:
+            self.hands.append(hand)
+
+    def say(self, text, user_id=None):
+        self.messages.append((user_id, text))
+
+
+def format_cards(cards):
+    return ','.join(int_to_card(c) for c in cards)
+
+
+class PokerEngine:
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+
+    def new_deck(self):
+        # сортировка по случайным ключам — та же равномерная перестановка, что и shuffle,
+        # но без 51 вызова randbelow на Python
+        rand = self.rng.random
+        keys = [rand() for _ in range(52)]
+        return sorted(range(52), key=keys.__getitem__)
+
+    def start(self, table, user_id):
+        """Хост начинает игру: проверки handle_start и первая раздача"""
+        if str(table.host_id) != str(user_id):
+            raise ActionError('Только хост может начать', 403)
+        if table.status != 'waiting':
+            raise ActionError('Игра уже начата')
+        if len([p for p in table.players if p.is_active]) < 2:
+            raise ActionError('Нужно минимум 2 игрока')
+        changes = Changes()
+        self._set_status(table, changes, 'playing')
+        self.start_hand(table, changes)
+        changes.say('Игра началась! Раздаём карты...')
+        return changes
+
+    def seat(self, table, player):
+        """Новый игрок за столом; в идущей игре он вступит со следующей раздачи"""
+        changes = Changes()
+        if table.player(player.user_id) is None:
+            if table.status == 'playing':
+                # карт у него нет: до следующей раздачи он не участвует в очереди ходов
+                player.is_folded = True
+            table.players = sorted(table.players + [player], key=lambda p: p.seat)
+            changes.touch(player)
+        return changes
+
+    def toggle_ready(self, table, user_id):
+        changes = Changes()
+        player = table.player(user_id)
+        if player:
+            player.is_ready = not player.is_ready
+            changes.touch(player)
+        return changes
+
+    def leave(self, table, user_id):
+        """Игрок уходит и забирает фишки в LOVE; в идущей раздаче это как фолд: остался один —
+        он забирает банк, ушёл тот, чей ход, — ход переходит дальше. Последний ушедший закрывает комнату."""
+        changes = Changes()
+        player = table.player(user_id)
+        hand = table.hand
+        in_hand = (player is not None and table.status == 'playing' and hand is not None and not hand.finished
+                   and player.is_active and not player.is_folded)
+        cashout_msg = ''
+        if player:
+            if in_hand:
+                hand.actions.extend((player.seat, LEAVE, 0))
+            if player.chips > 0:
+                changes.credits.append((player.user_id, player.chips))
+                cashout_msg = f' (вывел {int(player.chips)} LOVE)'
+            player.is_active = False
+            player.is_folded = True
+            player.chips = 0
+            changes.touch(player)
+        changes.say(((player.name if player else None) or 'Игрок') + ' покинул стол' + cashout_msg)
+        if in_hand:
+            remaining = [p for p in table.players if p.is_active and not p.is_folded]
+            if len(remaining) == 1:
+                self._award_pot(table, changes, remaining[0])
+            elif hand.current_turn_seat == player.seat:
+                self._pass_turn(table, changes, player.seat)
+        if table.status != 'finished' and not any(p.is_active for p in table.players):
+            self._set_status(table, changes, 'finished')
+        return changes
+
+    def act(self, table, user_id, action_type, amount=0):
+        """Ход игрока: fold / call / check / raise / allin"""
+        hand = table.hand
+        if table.status != 'playing':
+            raise ActionError('Комната не в игре')
+        if hand is None:
+            raise ActionError('Нет активной раздачи')
+        player = table.player(user_id)
+        if player is None:
+            raise ActionError('Вы не в игре')
+        if player.seat != hand.current_turn_seat:
+            raise ActionError('Не ваш ход')
+        if player.is_folded:
+            raise ActionError('Вы сбросили карты')
+        if action_type not in ('fold', 'call', 'check', 'raise', 'allin'):
+            raise ActionError('Неизвестное действие')
+        if action_type == 'check' and player.current_bet < hand.current_bet:
+            raise ActionError('Нельзя чекнуть, нужно уравнять')
+        hand.actions.extend((player.seat, ACTION_CODES[action_type], max(amount, 0) if action_type == 'raise' else 0))
+
+        changes = Changes()
+        name = player.name or 'Игрок'
+        active_seats = [p.seat for p in table.players if p.is_active and not p.is_folded]
+
+        if action_type == 'fold':
+            player.is_folded = True
+            changes.touch(player)
+            changes.say(name + ' сбросил карты', player.user_id)
+            remaining = [s for s in active_seats if s != player.seat]
+            if len(remaining) == 1:
+                self._award_pot(table, changes, next(p for p in table.players if p.seat == remaining[0]))
+                return changes
+            self._advance_turn(table, changes, player.seat)
+
+        elif action_type == 'call':
+            call_amount = min(hand.current_bet - player.current_bet, player.chips)
+            player.chips -= call_amount
+            player.current_bet += call_amount
+            hand.pot += call_amount
+            changes.touch(player)
+            changes.touch_hand(hand)
+            changes.say(name + ' уравнял ' + str(call_amount), player.user_id)
+            self._advance_turn(table, changes, player.seat)
+
+        elif action_type == 'check':
+            changes.say(name + ' чек', player.user_id)
+            self._advance_turn(table, changes, player.seat)
+
+        elif action_type == 'raise':
+            raise_to = max(amount, hand.current_bet * 2)
+            raise_cost = min(raise_to - player.current_bet, player.chips)
+            actual_bet = player.current_bet + raise_cost
+            player.chips -= raise_cost
+            player.current_bet = actual_bet
+            hand.pot += raise_cost
+            hand.current_bet = actual_bet
+            changes.touch(player)
+            changes.touch_hand(hand)
+            changes.say(name + ' повысил до ' + str(actual_bet), player.user_id)
+            self._advance_turn(table, changes, player.seat, raised=True)
+
+        elif action_type == 'allin':
+            allin_amount = player.chips
+            new_bet = player.current_bet + allin_amount
+            raised = new_bet > hand.current_bet
+            player.chips = 0
+            player.current_bet = new_bet
+            hand.pot += allin_amount
+            if raised:
+                hand.current_bet = new_bet
+            changes.touch(player)
+            changes.touch_hand(hand)
+            changes.say(name + ' ва-банк! ' + str(allin_amount), player.user_id)
+            self._advance_turn(table, changes, player.seat, raised=raised)
+
+        return changes
+
+    def timeout(self, table):
+        """Время хода вышло: чек, если можно, иначе фолд — через act, как ход самого игрока.
+        Если ход завис на ушедшем или сбросившем игроке, он просто передаётся дальше."""
+        hand = table.hand
+        if table.status != 'playing' or hand is None or hand.finished:
+            raise ActionError('Нет активной раздачи')
+        player = next((p for p in table.players if p.seat == hand.current_turn_seat), None)
+        if player is None or player.is_folded or not player.is_active:
+            changes = Changes()
+            hand.actions.extend((hand.current_turn_seat, PASS, 0))
+            self._pass_turn(table, changes, hand.current_turn_seat)
+            return changes
+        action_type = 'check' if player.current_bet >= hand.current_bet else 'fold'
+        changes = self.act(table, player.user_id, action_type)
+        changes.messages.insert(0, (None, (player.name or 'Игрок') + ': время хода вышло'))
+        return changes
+
+    def _award_pot(self, table, changes, winner):
+        """Все остальные сбросили: банк последнему, следующая раздача"""
+        hand = table.hand
+        winner.chips += hand.pot
+        changes.touch(winner)
+        hand.finished = True
+        hand.winner_id = winner.user_id
+        changes.touch_hand(hand)
+        changes.say((winner.name or 'Игрок') + ' забирает банк ' + str(hand.pot) + ' фишек!')
+        self.start_hand(table, changes)
+
+    def _pass_turn(self, table, changes, seat):
+        hand = table.hand
+        remaining = [p for p in table.players if p.is_active and not p.is_folded]
+        if len(remaining) == 1:
+            self._award_pot(table, changes, remaining[0])
+            return
+        if not remaining:
+            return
+        later = [p.seat for p in remaining if p.seat > seat]
+        hand.current_turn_seat = later[0] if later else remaining[0].seat
+        hand.turn_reset = True
+        changes.touch_hand(hand)
+
+    def start_hand(self, table, changes):
+        """Новая раздача среди активных игроков с фишками; если таких меньше двух — конец турнира"""
+        deck = self.new_deck()
+        active = [p for p in table.players if p.is_active and p.chips > 0]
+        if len(active) < 2:
+            self._set_status(table, changes, 'finished')
+            winner = active[0] if active else None
+            if winner:
+                changes.credits.append((winner.user_id, winner.chips))
+                changes.say((winner.name or 'Игрок') + ' победил в турнире! Выигрыш: ' + str(int(winner.chips)) + ' LOVE')
+            for p in table.players:
+                if p.is_active and p is not winner and p.chips > 0:
+                    changes.credits.append((p.user_id, p.chips))
+            return
+
+        seats = [p.seat for p in active]
+        dealer_idx = next((i for i, s in enumerate(seats) if s > table.last_dealer), 0)
+        dealer_seat = seats[dealer_idx]
+        sb_seat = seats[(dealer_idx + 1) % len(seats)]
+        bb_seat = seats[(dealer_idx + 2) % len(seats)]
+
+        pot = 0
+        start = []
+        for p in active:
+            p.hole_cards = [deck.pop(), deck.pop()]
+            start.extend((p.seat, p.user_id, p.chips, p.hole_cards[0], p.hole_cards[1]))
+            bet = 0
+            if p.seat == sb_seat:
+                bet = min(table.small_blind, p.chips)
+            elif p.seat == bb_seat:
+                bet = min(table.big_blind, p.chips)
+            p.is_folded = False
+            p.current_bet = bet
+            p.chips -= bet
+            pot += bet
+            changes.touch(p)
+
+        table.hand_count += 1
+        hand = HandState(
+            no=table.hand_count,
+            dealer_seat=dealer_seat,
+            current_turn_seat=seats[(dealer_idx + 3) % len(seats)],
+            pot=pot,
+            current_bet=table.big_blind,
+            deck=deck,
+            start=start,
+        )
+        hand.turn_reset = True
+        table.hand = hand
+        table.last_dealer = max(table.last_dealer, dealer_seat)
+        changes.touch_hand(hand)
+
+    def _set_status(self, table, changes, status):
+        table.status = status
+        changes.room_status = status
+
+    def _advance_turn(self, table, changes, current_seat, raised=False):
+        hand = table.hand
+        remaining = [p for p in table.players if p.is_active and not p.is_folded]
+        seats = [p.seat for p in remaining]
+        if len(seats) <= 1:
+            return
+
+        idx = seats.index(current_seat) if current_seat in seats else 0
+        next_seat = seats[(idx + 1) % len(seats)]
+        all_equal = all(p.current_bet == hand.current_bet or p.chips == 0 for p in remaining)
+
+        if all_equal and not raised:
+            self._advance_phase(table, changes, remaining)
+        else:
+            hand.current_turn_seat = next_seat
+            hand.turn_reset = True
+            changes.touch_hand(hand)
+
+    def _advance_phase(self, table, changes, remaining):
+        hand = table.hand
+        for p in table.players:
+            if p.current_bet:
+                p.current_bet = 0
+                changes.touch(p)
+        changes.touch_hand(hand)
+
+        deck = hand.deck
+        if hand.phase == 'preflop':
+            if len(deck) >= 3:
+                hand.community.extend([deck.pop(0), deck.pop(0), deck.pop(0)])
+            hand.phase = 'flop'
+        elif hand.phase == 'flop':
+            if deck:
+                hand.community.append(deck.pop(0))
+            hand.phase = 'turn'
+        elif hand.phase == 'turn':
+            if deck:
+                hand.community.append(deck.pop(0))
+            hand.phase = 'river'
+        else:
+            self._showdown(table, changes, remaining)
+            return
+
+        hand.current_bet = 0
+        hand.current_turn_seat = remaining[0].seat
+        hand.turn_reset = True
+
+        if len([p for p in remaining if p.chips > 0]) <= 1:
+            # ставить больше некому — докладываем борд до ривера и вскрываемся
+            while hand.phase != 'river' and deck:
+                hand.community.append(deck.pop(0))
+                hand.phase = 'turn' if hand.phase == 'flop' else 'river'
+            hand.phase = 'river'
+            self._showdown(table, changes, remaining)
+
+    def _showdown(self, table, changes, remaining):
+        hand = table.hand
+        best = None
+        winner = None
+        for p in remaining:
+            score = evaluate((p.hole_cards or []) + hand.community)
+            if best is None or score > best:
+                best = score
+                winner = p
+
+        if winner:
+            winner.chips += hand.pot
+            changes.touch(winner)
+            shown = [f"{p.name or '?'}: {format_cards(p.hole_cards or [])}" for p in remaining]
+            changes.say('Вскрытие: ' + ' | '.join(shown))
+            winner_hand = hand_name(best)
+            changes.say((winner.name or 'Игрок') + ' выиграл ' + str(hand.pot) + ' фишек! (' + winner_hand + ')')
+            hand.finished = True
+            hand.winner_id = winner.user_id
+            hand.winner_hand = winner_hand
+            changes.touch_hand(hand)
+
+        for p in table.players:
+            if p.chips <= 0 and p.is_active:
+                p.is_active = False
+                changes.touch(p)
+
+        self.start_hand(table, changes)
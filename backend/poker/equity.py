@@ -0,0 +1,75 @@
+"""Шансы игроков на победу: доски дополняются все сразу массивами NumPy и оцениваются пакетом.
+Когда досдать осталось мало карт (тёрн, флоп), перебираются все варианты; иначе — случайная выборка."""
+
+from itertools import combinations
+from math import comb
+
+from evaluator import evaluate_batch
+
+DEFAULT_SAMPLES = 20000
+EXACT_LIMIT = 20000
+BOARD_SIZE = 5
+
+
+def _remaining_deck(known):
+    known = set(known)
+    return [c for c in range(52) if c not in known]
+
+
+def _draw(np, rng, deck, count, samples):
+    """samples строк по count различных карт из deck"""
+    keys = rng.random((samples, len(deck)))
+    picks = np.argpartition(keys, count - 1, axis=1)[:, :count] if count < len(deck) else np.argsort(keys, axis=1)
+    return np.asarray(deck, dtype=np.int64)[picks]
+
+
+def _tally(np, scores):
+    """scores (игроки, доски) → [(win, tie, equity)]: доля досок с единоличной победой, с дележом и доля банка"""
+    best = scores.max(axis=0)
+    winners = scores == best
+    n_winners = winners.sum(axis=0)
+    alone = n_winners == 1
+    share = winners / n_winners
+    return [
+        (float((winners[i] & alone).mean()), float((winners[i] & ~alone).mean()), float(share[i].mean()))
+        for i in range(scores.shape[0])
+    ]
+
+
+def showdown_equity(holes, board, samples=DEFAULT_SAMPLES, rng=None):
+    """Открытые карты всех игроков (списки из двух целых) и борд → ([(win, tie, equity)], перебраны ли все доски)"""
+    import numpy as np
+    rng = rng or np.random.default_rng()
+    missing = BOARD_SIZE - len(board)
+    deck = _remaining_deck([c for hole in holes for c in hole] + list(board))
+
+    exact = comb(len(deck), missing) <= EXACT_LIMIT
+    if missing == 0:
+        drawn = np.zeros((1, 0), dtype=np.int64)
+    elif exact:
+        drawn = np.array(list(combinations(deck, missing)), dtype=np.int64)
+    else:
+        drawn = _draw(np, rng, deck, missing, samples)
+
+    boards = np.hstack([np.broadcast_to(np.asarray(board, dtype=np.int64), (len(drawn), len(board))), drawn])
+    scores = np.stack([
+        evaluate_batch(np.hstack([np.broadcast_to(np.asarray(hole, dtype=np.int64), (len(boards), 2)), boards]))
+        for hole in holes
+    ])
+    return _tally(np, scores), exact
+
+
+def hidden_equity(hole, board, opponents, samples=DEFAULT_SAMPLES, rng=None):
+    """Шансы одной руки против opponents неизвестных рук: карты соперников и борд выбираются случайно.
+    Карты соперников не используются, поэтому ответ ничего о них не раскрывает. → (win, tie, equity)"""
+    import numpy as np
+    rng = rng or np.random.default_rng()
+    missing = BOARD_SIZE - len(board)
+    deck = _remaining_deck(list(hole) + list(board))
+    drawn = _draw(np, rng, deck, missing + 2 * opponents, samples)
+
+    boards = np.hstack([np.broadcast_to(np.asarray(board, dtype=np.int64), (samples, len(board))), drawn[:, :missing]])
+    hands = [np.broadcast_to(np.asarray(hole, dtype=np.int64), (samples, 2))]
+    hands += [drawn[:, missing + 2 * i:missing + 2 * i + 2] for i in range(opponents)]
+    scores = np.stack([evaluate_batch(np.hstack([h, boards])) for h in hands])
+    return _tally(np, scores)[0]
@@ -0,0 +1,186 @@
+"""Оценка покерных рук по таблицам: карта — целое 0..51 (ранг * 4 + масть), рука из 5–7 карт
+оценивается сразу, без перебора 21 пятёрки.
+
+Сила руки — одно целое, больше — сильнее: категория в старших битах, ранги для сравнения
+по 4 бита ниже (та же упорядоченность, что у кортежей (категория, ранги…)).
+Не-флеши ищутся по произведению простых чисел рангов (Cactus Kev), флеши — по 13-битной маске
+рангов масти. Таблицы строятся один раз при первом обращении."""
+
+import threading
+
+SUITS = 'hdcs'
+RANKS = '23456789TJQKA'
+PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+HAND_NAMES = (
+    'High Card', 'One Pair', 'Two Pair', 'Three of a Kind', 'Straight',
+    'Flush', 'Full House', 'Four of a Kind', 'Straight Flush', 'Royal Flush',
+)
+HIGH_CARD, ONE_PAIR, TWO_PAIR, TRIPS, STRAIGHT, FLUSH, FULL_HOUSE, QUADS, STRAIGHT_FLUSH, ROYAL_FLUSH = range(10)
+CATEGORY_SHIFT = 20
+WHEEL_MASK = 0b1000000001111  # A-2-3-4-5
+
+CARD_PRIME = tuple(PRIMES[c >> 2] for c in range(52))
+# бит ранга в 13-битном поле своей масти: сумма по руке даёт маски всех четырёх мастей разом
+CARD_BIT = tuple(1 << ((c >> 2) + 13 * (c & 3)) for c in range(52))
+
+_tables = None
+_arrays = None
+_lock = threading.Lock()
+
+
+def card_to_int(card):
+    """'Th' → 34"""
+    return RANKS.index(card[0]) * 4 + SUITS.index(card[1])
+
+
+def int_to_card(value):
+    return RANKS[value >> 2] + SUITS[value & 3]
+
+
+def cards_to_ints(cards):
+    return [c if isinstance(c, int) else card_to_int(c) for c in cards]
+
+
+def pack(category, *ranks):
+    value = category
+    for i in range(5):
+        value = (value << 4) | (ranks[i] if i < len(ranks) else 0)
+    return value
+
+
+def category(value):
+    return value >> CATEGORY_SHIFT
+
+
+def hand_name(value):
+    return HAND_NAMES[category(value)]
+
+
+def _ranks_desc(mask):
+    return [r for r in range(12, -1, -1) if mask >> r & 1]
+
+
+def _straight_high(mask):
+    """Старшая карта лучшего стрита в маске рангов или -1; колесо A-2-3-4-5 — стрит до пятёрки"""
+    for high in range(12, 3, -1):
+        window = 0b11111 << (high - 4)
+        if mask & window == window:
+            return high
+    return 3 if mask & WHEEL_MASK == WHEEL_MASK else -1
+
+
+def _flush_value(mask):
+    high = _straight_high(mask)
+    if high == 12:
+        return pack(ROYAL_FLUSH, 12)
+    if high >= 0:
+        return pack(STRAIGHT_FLUSH, high)
+    return pack(FLUSH, *_ranks_desc(mask)[:5])
+
+
+def _rank_value(counts):
+    """Лучшая не-флеш пятёрка из мультимножества рангов (counts[r] — сколько карт ранга r)"""
+    desc = [r for r in range(12, -1, -1) if counts[r]]
+    quads = [r for r in desc if counts[r] >= 4]
+    trips = [r for r in desc if counts[r] >= 3]
+    pairs = [r for r in desc if counts[r] >= 2]
+
+    if quads:
+        kicker = next(r for r in desc if r != quads[0])
+        return pack(QUADS, quads[0], kicker)
+    if trips:
+        other = [r for r in pairs if r != trips[0]]
+        if other:
+            return pack(FULL_HOUSE, trips[0], other[0])
+    mask = sum(1 << r for r in desc)
+    high = _straight_high(mask)
+    if high >= 0:
+        return pack(STRAIGHT, high)
+    if trips:
+        return pack(TRIPS, trips[0], *[r for r in desc if r != trips[0]][:2])
+    if len(pairs) >= 2:
+        kicker = next((r for r in desc if r not in pairs[:2]), 0)
+        return pack(TWO_PAIR, pairs[0], pairs[1], kicker)
+    if pairs:
+        return pack(ONE_PAIR, pairs[0], *[r for r in desc if r != pairs[0]][:3])
+    return pack(HIGH_CARD, *desc[:5])
+
+
+def _build_tables():
+    flush = [0] * 8192
+    for mask in range(8192):
+        if bin(mask).count('1') >= 5:
+            flush[mask] = _flush_value(mask)
+
+    rank_table = {}
+    counts = [0] * 13
+
+    def walk(rank, left, product, size):
+        if rank == 13 or left == 0:
+            if size >= 5:
+                rank_table[product] = _rank_value(counts)
+            return
+        for n in range(min(4, left) + 1):
+            counts[rank] = n
+            walk(rank + 1, left - n, product * PRIMES[rank] ** n, size + n)
+        counts[rank] = 0
+
+    walk(0, 7, 1, 0)
+    return flush, rank_table
+
+
+def tables():
+    """(таблица флешей по маске, таблица не-флешей по произведению простых)"""
+    global _tables
+    if _tables is None:
+        with _lock:
+            if _tables is None:
+                _tables = _build_tables()
+    return _tables
+
+
+def evaluate(cards):
+    """Сила лучшей пятёрки из 5–7 карт (целые 0..51); меньше пяти карт — 0"""
+    if len(cards) < 5:
+        return 0
+    flush, rank_table = tables()
+    product = 1
+    bits = 0
+    for c in cards:
+        product *= CARD_PRIME[c]
+        bits |= CARD_BIT[c]
+    value = rank_table[product]
+    for shift in (0, 13, 26, 39):
+        suited = flush[bits >> shift & 8191]
+        if suited > value:
+            value = suited
+    return value
+
+
+def _numpy_tables():
+    global _arrays
+    if _arrays is None:
+        import numpy as np
+        flush, rank_table = tables()
+        keys = np.array(sorted(rank_table), dtype=np.int64)
+        _arrays = (
+            np,
+            np.array(flush, dtype=np.int64),
+            keys,
+            np.array([rank_table[k] for k in keys.tolist()], dtype=np.int64),
+            np.array(CARD_PRIME, dtype=np.int64),
+            np.array(CARD_BIT, dtype=np.int64),
+        )
+    return _arrays
+
+
+def evaluate_batch(cards):
+    """Силы рук для массива формы (N, k), k = 5..7, целые карты 0..51; возвращает int64[N]"""
+    np, flush, keys, values, card_prime, card_bit = _numpy_tables()
+    cards = np.asarray(cards, dtype=np.int64)
+    result = values[np.searchsorted(keys, card_prime[cards].prod(axis=1))]
+    # карты в руке различны, поэтому сумма битов равна их OR
+    bits = card_bit[cards].sum(axis=1)
+    for shift in (0, 13, 26, 39):
+        np.maximum(result, flush[(bits >> shift) & 8191], out=result)
+    return result
@@ -0,0 +1,180 @@
+"""История раздач: каждая завершённая раздача — одна компактная двоичная запись (~70–100 байт на 6 игроков).
+
+Запись хранит не состояния, а исходные данные: блайнды, дилера, игроков с фишками до блайндов и их
+карты, борд и последовательность действий. Всё остальное (банк, улицы, победитель, сообщения)
+получается повторным прогоном тех же правил PokerEngine, поэтому replay совпадает с живой игрой.
+
+Формат (целые без знака; varint — 7 бит на байт, старший бит — «дальше ещё байт»):
+    версия формата (байт), small_blind, big_blind (varint), место дилера (байт)
+    число игроков (байт), на каждого: место (байт), user_id, фишки (varint), две карты (байты)
+    число карт борда (байт), карты (байты)
+    число действий (varint), на каждое: место << 3 | код (байт), у рейза — ещё сумма (varint)"""
+
+from engine import PokerEngine, TableState, PlayerState, Changes, ACTION_NAMES, RAISE
+from evaluator import int_to_card
+
+FORMAT_VERSION = 1
+
+
+def _put_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode(small_blind, big_blind, hand):
+    """Завершённая раздача (HandState с start и actions) → bytes"""
+    out = bytearray([FORMAT_VERSION])
+    _put_varint(out, small_blind)
+    _put_varint(out, big_blind)
+    out.append(hand.dealer_seat)
+    start = hand.start
+    out.append(len(start) // 5)
+    for i in range(0, len(start), 5):
+        seat, user_id, chips, first, second = start[i:i + 5]
+        out.append(seat)
+        _put_varint(out, user_id)
+        _put_varint(out, chips)
+        out.append(first)
+        out.append(second)
+    out.append(len(hand.community))
+    out.extend(hand.community)
+    actions = hand.actions
+    _put_varint(out, len(actions) // 3)
+    for i in range(0, len(actions), 3):
+        seat, code, amount = actions[i:i + 3]
+        out.append(seat << 3 | code)
+        if code == RAISE:
+            _put_varint(out, amount)
+    return bytes(out)
+
+
+def decode(data):
+    """bytes → словарь с исходными данными раздачи (карты — целые)"""
+    data = bytes(data)
+    if data[0] != FORMAT_VERSION:
+        raise ValueError(f'Unknown hand record format {data[0]}')
+    small_blind, pos = _get_varint(data, 1)
+    big_blind, pos = _get_varint(data, pos)
+    dealer_seat = data[pos]
+    count = data[pos + 1]
+    pos += 2
+    players = []
+    for _ in range(count):
+        seat = data[pos]
+        user_id, pos = _get_varint(data, pos + 1)
+        chips, pos = _get_varint(data, pos)
+        players.append({'seat': seat, 'user_id': user_id, 'chips': chips, 'hole_cards': [data[pos], data[pos + 1]]})
+        pos += 2
+    board = list(data[pos + 1:pos + 1 + data[pos]])
+    pos += 1 + len(board)
+    n_actions, pos = _get_varint(data, pos)
+    actions = []
+    for _ in range(n_actions):
+        seat, code = data[pos] >> 3, data[pos] & 7
+        pos += 1
+        amount = 0
+        if code == RAISE:
+            amount, pos = _get_varint(data, pos)
+        actions.append((seat, ACTION_NAMES[code], amount))
+    return {'small_blind': small_blind, 'big_blind': big_blind, 'dealer_seat': dealer_seat,
+            'players': players, 'board': board, 'actions': actions}
+
+
+class _ReplayEngine(PokerEngine):
+    """Раздаёт заранее собранную колоду и не начинает следующую раздачу: стол остаётся таким,
+    каким он был в конце записанной"""
+
+    def __init__(self, deck):
+        super().__init__()
+        self._deck = deck
+
+    def new_deck(self):
+        return self._deck
+
+    def start_hand(self, table, changes):
+        if self._deck is not None:
+            super().start_hand(table, changes)
+            self._deck = None
+
+
+def _replay_deck(players, board):
+    """Колода, из которой start_hand раздаст записанные карты: карманные снимаются с конца (pop()),
+    борд — с начала (pop(0))"""
+    holes = [c for p in players for c in p['hole_cards']]
+    used = set(holes) | set(board)
+    return list(board) + [c for c in range(52) if c not in used] + holes[::-1]
+
+
+def _snapshot(table, hand):
+    return {
+        'phase': hand.phase,
+        'board': [int_to_card(c) for c in hand.community],
+        'pot': hand.pot,
+        'current_bet': hand.current_bet,
+        'turn_seat': None if hand.finished else hand.current_turn_seat,
+        'players': [{'seat': p.seat, 'chips': p.chips, 'bet': p.current_bet, 'folded': p.is_folded} for p in table.players],
+    }
+
+
+def replay(record, names=None):
+    """Раздача по шагам: раздача с блайндами, затем каждое действие с сообщениями и состоянием стола после него.
+    names — {user_id: имя} для текста сообщений"""
+    hand_data = decode(record) if isinstance(record, (bytes, bytearray, memoryview)) else record
+    players = hand_data['players']
+    table = TableState(
+        0, None, 'playing', hand_data['small_blind'], hand_data['big_blind'],
+        [PlayerState(p['user_id'], p['seat'], p['chips'], name=(names or {}).get(p['user_id'])) for p in players],
+        last_dealer=hand_data['dealer_seat'] - 1,
+    )
+    engine = _ReplayEngine(_replay_deck(players, hand_data['board']))
+    changes = Changes()
+    engine.start_hand(table, changes)
+    hand = table.hand
+    steps = [dict(_snapshot(table, hand), action='deal')]
+
+    for seat, action, amount in hand_data['actions']:
+        if hand.finished:
+            break
+        by_seat = {p.seat: p for p in table.players}
+        if action == 'leave':
+            changes = engine.leave(table, by_seat[seat].user_id)
+        elif action == 'pass':
+            changes = engine.timeout(table)
+        else:
+            changes = engine.act(table, by_seat[seat].user_id, action, amount)
+        step = _snapshot(table, hand)
+        step.update({'action': action, 'seat': seat, 'amount': amount,
+                     'messages': [text for _, text in changes.messages]})
+        steps.append(step)
+
+    # Карты открываются только на вскрытии; победа после сбросов соперников их не раскрывает
+    unfolded = {p.seat for p in table.players if not p.is_folded}
+    in_showdown = unfolded if hand.winner_hand is not None and len(unfolded) > 1 else set()
+    return {
+        'dealer_seat': hand.dealer_seat,
+        'small_blind': hand_data['small_blind'],
+        'big_blind': hand_data['big_blind'],
+        'players': [
+            {'seat': p['seat'], 'user_id': p['user_id'], 'chips': p['chips'],
+             'hole_cards': [int_to_card(c) for c in p['hole_cards']], 'showdown': p['seat'] in in_showdown}
+            for p in players
+        ],
+        'board': [int_to_card(c) for c in hand.community],
+        'winner_id': hand.winner_id,
+        'winner_hand': hand.winner_hand,
+        'pot': hand.pot,
+        'steps': steps,
+    }
@@ -1,92 +1,46 @@
+import base64
+import hashlib
+import hmac
 import json
 import os
 import random
 import string
+import threading
+import time
+from collections import OrderedDict
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import jwt as pyjwt
 from datetime import datetime, timedelta
+from evaluator import cards_to_ints
+from engine import PokerEngine, ActionError, TableState, PlayerState, HandState, TURN_SECONDS, format_cards
+from equity import showdown_equity, hidden_equity
+from history import encode as encode_hand, replay
 
 SCHEMA = 't_p19021063_social_connect_platf'
 
-SUITS = ['h', 'd', 'c', 's']
-RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
-RANK_VALUES = {r: i for i, r in enumerate(RANKS)}
-HAND_RANKINGS = {
-    'Royal Flush': 9, 'Straight Flush': 8, 'Four of a Kind': 7,
-    'Full House': 6, 'Flush': 5, 'Straight': 4, 'Three of a Kind': 3,
-    'Two Pair': 2, 'One Pair': 1, 'High Card': 0
-}
-
-def make_deck():
-    deck = [r + s for s in SUITS for r in RANKS]
-    random.shuffle(deck)
-    return deck
+EQUITY_CACHE_SIZE = 512
+# столько раз ход перечитывает снимок, если между чтением и записью стол изменил кто-то другой
+CAS_ATTEMPTS = 5
+SYNC_BATCH = 50
+# столько столов с истёкшим ходом обрабатывает один вызов sweep
+SWEEP_BATCH = 100
+EXPORT_PAGE = 5000
+# столько секунд инстанс отдаёт лобби из памяти, не обращаясь к базе
+LOBBY_TTL = 2
+
+_equity_cache = OrderedDict()
+_equity_lock = threading.Lock()
+_lobby = {'expires': 0.0, 'etag': None, 'body': None}
+_lobby_lock = threading.Lock()
+# колода тасуется системным генератором: порядок карт нельзя восстановить по прошлым раздачам
+_engine = PokerEngine(random.SystemRandom())
 
 def parse_cards(s):
     if not s:
         return []
     return s.split(',')
 
-def cards_to_str(cards):
-    return ','.join(cards)
-
-def evaluate_hand(cards):
-    if len(cards) < 5:
-        return ('High Card', (0,))
-    best = None
-    from itertools import combinations
-    for combo in combinations(cards, 5):
-        result = _eval_five(list(combo))
-        if best is None or result[1] > best[1]:
-            best = result
-    return best
-
-def _eval_five(cards):
-    ranks = sorted([RANK_VALUES[c[0]] for c in cards], reverse=True)
-    suits = [c[1] for c in cards]
-    is_flush = len(set(suits)) == 1
-    is_straight = False
-    straight_high = 0
-
-    unique_ranks = sorted(set(ranks), reverse=True)
-    if len(unique_ranks) == 5:
-        if unique_ranks[0] - unique_ranks[4] == 4:
-            is_straight = True
-            straight_high = unique_ranks[0]
-        if unique_ranks == [12, 3, 2, 1, 0]:
-            is_straight = True
-            straight_high = 3
-
-    counts = {}
-    for r in ranks:
-        counts[r] = counts.get(r, 0) + 1
-    groups = sorted(counts.items(), key=lambda x: (x[1], x[0]), reverse=True)
-
-    if is_flush and is_straight:
-        if straight_high == 12:
-            return ('Royal Flush', (9, 12))
-        return ('Straight Flush', (8, straight_high))
-    if groups[0][1] == 4:
-        return ('Four of a Kind', (7, groups[0][0], groups[1][0]))
-    if groups[0][1] == 3 and groups[1][1] == 2:
-        return ('Full House', (6, groups[0][0], groups[1][0]))
-    if is_flush:
-        return ('Flush', (5,) + tuple(ranks))
-    if is_straight:
-        return ('Straight', (4, straight_high))
-    if groups[0][1] == 3:
-        kickers = sorted([g[0] for g in groups[1:]], reverse=True)
-        return ('Three of a Kind', (3, groups[0][0]) + tuple(kickers))
-    if groups[0][1] == 2 and groups[1][1] == 2:
-        pairs = sorted([groups[0][0], groups[1][0]], reverse=True)
-        kicker = [g[0] for g in groups if g[1] == 1]
-        return ('Two Pair', (2, pairs[0], pairs[1], kicker[0] if kicker else 0))
-    if groups[0][1] == 2:
-        kickers = sorted([g[0] for g in groups[1:]], reverse=True)
-        return ('One Pair', (1, groups[0][0]) + tuple(kickers))
-    return ('High Card', (0,) + tuple(ranks))
-
 
 def verify_token(token):
     if not token:
@@ -117,6 +71,15 @@ def get_auth(event):
     token = auth.replace('Bearer ', '') if auth else ''
     return verify_token(token)
 
+def get_header(event, name):
+    headers = event.get('headers', {}) or {}
+    return headers.get(name) or headers.get(name.lower())
+
+def is_scheduler(event):
+    """Вызов планировщика: заголовок X-Cron-Secret совпадает с CRON_SECRET"""
+    secret = os.environ.get('CRON_SECRET', '')
+    return bool(secret) and hmac.compare_digest(get_header(event, 'X-Cron-Secret') or '', secret)
+
 def json_response(status, body):
     return {
         'statusCode': status,
@@ -179,7 +142,7 @@ def handler(event, context):
             'headers': {
                 'Access-Control-Allow-Origin': '*',
                 'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, Authorization',
+                'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Cron-Secret',
                 'Access-Control-Max-Age': '86400'
             },
             'body': ''
@@ -189,7 +152,7 @@ def handler(event, context):
     action = qs.get('action', '')
 
     if action == 'rooms':
-        return handle_rooms()
+        return handle_rooms(event)
     elif action == 'create':
         return handle_create(event)
     elif action == 'join':
@@ -208,8 +171,18 @@ def handler(event, context):
         return handle_leave(event)
     elif action == 'balance':
         return handle_balance(event)
-
-    return json_response(200, {'status': 'poker-api', 'actions': ['rooms', 'create', 'join', 'room', 'ready', 'start', 'action', 'chat', 'leave', 'balance']})
+    elif action == 'equity':
+        return handle_equity(event, qs)
+    elif action == 'sync':
+        return handle_sync(event)
+    elif action == 'sweep':
+        return handle_sweep(event)
+    elif action == 'replay':
+        return handle_replay(event, qs)
+    elif action == 'export':
+        return handle_export(event, qs)
+
+    return json_response(200, {'status': 'poker-api', 'actions': ['rooms', 'create', 'join', 'room', 'ready', 'start', 'action', 'chat', 'leave', 'balance', 'equity', 'sync', 'sweep', 'replay', 'export']})
 
 def handle_balance(event):
     auth = get_auth(event)
@@ -229,15 +202,35 @@ def handle_balance(event):
         'total': float(row['balance']) + float(row['bonus_balance'])
     })
 
-def handle_rooms():
+DISPLAY_NAME = "COALESCE(NULLIF(u.first_name, ''), u.nickname, 'Игрок')"
+
+def insert_player(cur, room_id, user_id, seat, chips, love_invested):
+    """Сажает игрока за стол вместе с копией имени и аватара из users → имя для сообщений"""
+    cur.execute(f"""
+        INSERT INTO {SCHEMA}.poker_players (room_id, user_id, seat, chips, love_invested,
+                                            display_name, avatar_url, avatar_blurhash, avatar_color)
+        SELECT {escape_sql(room_id)}, u.id, {escape_sql(seat)}, {escape_sql(chips)}, {escape_sql(love_invested)},
+               {DISPLAY_NAME}, u.avatar_url, u.avatar_blurhash, u.avatar_color
+        FROM {SCHEMA}.users u
+        WHERE u.id = {escape_sql(user_id)}
+        RETURNING display_name
+    """)
+    row = cur.fetchone()
+    return row['display_name'] if row else 'Игрок'
+
+def lobby_snapshot():
+    """Список открытых комнат (тело ответа, ETag); в пределах LOBBY_TTL — из памяти инстанса"""
+    with _lobby_lock:
+        if _lobby['expires'] > time.monotonic():
+            return _lobby['body'], _lobby['etag']
     conn = get_conn()
     cur = conn.cursor()
     cur.execute(f"""
         SELECT r.id, r.code, r.name, r.max_players, r.small_blind, r.big_blind,
-               r.start_chips, r.buy_in, r.status, r.created_at,
+               r.start_chips, r.buy_in, r.status, r.created_at, r.player_count,
                u.first_name || ' ' || COALESCE(u.last_name, '') AS host_name,
                u.avatar_url AS host_avatar,
-               (SELECT COUNT(*) FROM {SCHEMA}.poker_players pp WHERE pp.room_id = r.id AND pp.is_active = TRUE) AS player_count
+               u.avatar_blurhash AS host_avatar_blurhash, u.avatar_color AS host_avatar_color
         FROM {SCHEMA}.poker_rooms r
         JOIN {SCHEMA}.users u ON u.id = r.host_id
         WHERE r.status IN ('waiting', 'playing')
@@ -246,7 +239,24 @@ def handle_rooms():
     """)
     rooms = cur.fetchall()
     conn.close()
-    return json_response(200, rooms)
+    body = json.dumps(rooms, default=str)
+    etag = '"' + hashlib.sha1(body.encode()).hexdigest()[:16] + '"'
+    with _lobby_lock:
+        _lobby.update(expires=time.monotonic() + LOBBY_TTL, etag=etag, body=body)
+    return body, etag
+
+def handle_rooms(event):
+    """Лобби. Клиент с тем же If-None-Match получает 304 без тела"""
+    body, etag = lobby_snapshot()
+    headers = {'ETag': etag, 'Cache-Control': f'public, max-age={LOBBY_TTL}'}
+    if get_header(event, 'If-None-Match') == etag:
+        return not_modified(headers)
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', **headers},
+        'body': body,
+        'isBase64Encoded': False
+    }
 
 def handle_create(event):
     auth = get_auth(event)
@@ -275,16 +285,19 @@ def handle_create(event):
         return json_response(400, {'error': 'Не удалось списать LOVE токены'})
 
     cur.execute(f"""
-        INSERT INTO {SCHEMA}.poker_rooms (code, host_id, name, max_players, small_blind, big_blind, start_chips, buy_in)
+        INSERT INTO {SCHEMA}.poker_rooms (code, host_id, name, max_players, small_blind, big_blind, start_chips, buy_in, player_count)
         VALUES ({escape_sql(code)}, {escape_sql(user_id)}, {escape_sql(name)},
                 {escape_sql(max_players)}, {escape_sql(small_blind)}, {escape_sql(big_blind)}, 
-                {escape_sql(start_chips)}, {escape_sql(buy_in)})
+                {escape_sql(start_chips)}, {escape_sql(buy_in)}, 1)
         RETURNING id
     """)
     room_id = cur.fetchone()['id']
+    player_name = insert_player(cur, room_id, user_id, 0, start_chips, buy_in)
+    table = TableState(room_id, user_id, 'waiting', small_blind, big_blind,
+                       [PlayerState(user_id, 0, start_chips, name=player_name)])
     cur.execute(f"""
-        INSERT INTO {SCHEMA}.poker_players (room_id, user_id, seat, chips, love_invested)
-        VALUES ({escape_sql(room_id)}, {escape_sql(user_id)}, 0, {escape_sql(start_chips)}, {escape_sql(buy_in)})
+        INSERT INTO {SCHEMA}.poker_state (room_id, state)
+        VALUES ({escape_sql(room_id)}, {escape_sql(json.dumps(table.to_dict()))}::jsonb)
     """)
     cur.execute(f"""
         INSERT INTO {SCHEMA}.poker_messages (room_id, message, is_system)
@@ -321,8 +334,8 @@ def handle_join(event):
         conn.close()
         return json_response(200, {'id': room['id']})
 
-    cur.execute(f"SELECT COUNT(*) AS cnt FROM {SCHEMA}.poker_players WHERE room_id = {escape_sql(room['id'])} AND is_active = TRUE")
-    count = cur.fetchone()['cnt']
+    table, _ = load_state(cur, room['id'])
+    count = active_count(table)
     if count >= room['max_players']:
         conn.close()
         return json_response(400, {'error': 'Комната заполнена'})
@@ -345,23 +358,126 @@ def handle_join(event):
             next_seat = i
             break
 
-    cur.execute(f"SELECT first_name FROM {SCHEMA}.users WHERE id = {escape_sql(user_id)}")
-    user = cur.fetchone()
-    player_name = user['first_name'] if user else 'Игрок'
+    player_name = insert_player(cur, room['id'], user_id, next_seat, room['start_chips'], buy_in)
+    newcomer = PlayerState(user_id, next_seat, room['start_chips'], name=player_name)
+
+    def seat(table):
+        changes = _engine.seat(table, newcomer)
+        changes.say(player_name + ' присоединился (buy-in: ' + str(buy_in) + ' LOVE)')
+        return changes
 
+    try:
+        update_table(cur, room['id'], seat)
+    except ActionError as e:
+        conn.close()
+        return json_response(e.status, {'error': e.message})
+    conn.commit()
+    conn.close()
+    return json_response(200, {'id': room['id']})
+
+GAME_FIELDS = {
+    'no': 'hand_no', 'dealer_seat': 'dealer_seat', 'current_turn_seat': 'current_turn_seat', 'phase': 'phase',
+    'community': 'community_cards', 'pot': 'pot', 'current_bet': 'current_bet', 'turn_end_at': 'turn_end_at',
+    'winner_id': 'winner_id', 'winner_hand': 'winner_hand', 'finished': 'finished',
+}
+
+def game_view(hand, fields=GAME_FIELDS):
+    """Раздача для клиента — без колоды; fields — какие поля HandState отдать"""
+    if hand is None:
+        return None
+    view = {'hand_no': hand.no}
+    for field in fields:
+        value = getattr(hand, field)
+        view[GAME_FIELDS[field]] = format_cards(value) if field == 'community' else value
+    return view
+
+def player_view(player, profile, user_id):
+    """Профиль из users и игровые поля из снимка; чужие карты скрыты. → (для всех, для самого игрока или None)"""
+    view = dict(profile or {})
+    view.update({
+        'user_id': player.user_id, 'seat': player.seat, 'chips': player.chips, 'current_bet': player.current_bet,
+        'is_folded': player.is_folded, 'is_active': player.is_active, 'is_ready': player.is_ready,
+        'hole_cards': format_cards(player.hole_cards) if player.hole_cards else None,
+    })
+    if str(player.user_id) != str(user_id):
+        view['hole_cards'] = None
+        return view, None
+    return view, dict(view)
+
+def room_payload(room, table, version, profiles, messages, user_id):
+    """Полное состояние комнаты — первый опрос или клиент без версии"""
+    room = dict(room, status=table.status)
+    players = []
+    my_player = None
+    for p in table.players:
+        view, mine = player_view(p, profiles.get(str(p.user_id)), user_id)
+        players.append(view)
+        my_player = mine or my_player
+    return {
+        'state_version': version,
+        'room': room,
+        'players': players,
+        'my_player': my_player,
+        'game': game_view(table.hand),
+        'messages': messages,
+    }
+
+def delta_payload(table, version, since, profiles, messages, user_id):
+    """Что изменилось после версии since: статус, изменившиеся игроки, новые сообщения и поля раздачи"""
+    versions = table.versions
+    payload = {'state_version': version, 'since': since, 'delta': True, 'players': [], 'messages': messages}
+    if versions['room'] > since:
+        payload['room'] = {'status': table.status}
+    for p in table.players:
+        if versions['players'].get(str(p.user_id), 0) > since:
+            view, mine = player_view(p, profiles.get(str(p.user_id)), user_id)
+            payload['players'].append(view)
+            if mine:
+                payload['my_player'] = mine
+    changed = [field for field in GAME_FIELDS if versions['hand'].get(field, 0) > since]
+    if table.hand is None or changed:
+        payload['game'] = game_view(table.hand, changed)
+    return payload
+
+def load_profiles(cur, room_id, user_ids=None):
+    """Профили игроков комнаты (все или только user_ids) из копий в poker_players → {str(user_id): строка}"""
+    only = ''
+    if user_ids is not None:
+        only = f"AND pp.user_id = ANY(ARRAY[{', '.join(escape_sql(int(u)) for u in user_ids)}]::integer[])"
     cur.execute(f"""
-        INSERT INTO {SCHEMA}.poker_players (room_id, user_id, seat, chips, love_invested)
-        VALUES ({escape_sql(room['id'])}, {escape_sql(user_id)}, {escape_sql(next_seat)}, {escape_sql(room['start_chips'])}, {escape_sql(buy_in)})
+        SELECT pp.id, pp.room_id, pp.user_id, pp.love_invested, pp.joined_at,
+               pp.display_name, pp.avatar_url, pp.avatar_blurhash, pp.avatar_color
+        FROM {SCHEMA}.poker_players pp
+        WHERE pp.room_id = {escape_sql(room_id)} {only}
     """)
+    return {str(p['user_id']): p for p in cur.fetchall()}
+
+def load_messages(cur, room_id, since=None):
+    """Последние 100 сообщений или все, записанные после версии since"""
+    where = f"pm.room_id = {escape_sql(room_id)}"
+    if since is not None:
+        where += f" AND pm.state_version > {escape_sql(since)}"
     cur.execute(f"""
-        INSERT INTO {SCHEMA}.poker_messages (room_id, message, is_system)
-        VALUES ({escape_sql(room['id'])}, {escape_sql(player_name + ' присоединился (buy-in: ' + str(buy_in) + ' LOVE)')}, TRUE)
+        SELECT pm.*, u.first_name AS author_name, u.avatar_url AS author_avatar,
+               u.avatar_blurhash AS author_avatar_blurhash, u.avatar_color AS author_avatar_color
+        FROM {SCHEMA}.poker_messages pm
+        LEFT JOIN {SCHEMA}.users u ON u.id = pm.user_id
+        WHERE {where}
+        ORDER BY pm.id DESC LIMIT 100
     """)
-    conn.commit()
-    conn.close()
-    return json_response(200, {'id': room['id']})
+    return list(reversed(cur.fetchall()))
+
+def not_modified(headers=None):
+    return {
+        'statusCode': 304,
+        'headers': {'Access-Control-Allow-Origin': '*', **(headers or {})},
+        'body': '',
+        'isBase64Encoded': False
+    }
 
 def handle_room(event, qs):
+    """Состояние комнаты. С since=<state_version> — 304, если стол не менялся, иначе только изменения:
+    один запрос на пустой опрос, два-три на изменившийся; без since — полное состояние"""
     auth = get_auth(event)
     if not auth:
         return json_response(401, {'error': 'Требуется авторизация'})
@@ -369,90 +485,143 @@ def handle_room(event, qs):
     room_id = qs.get('room_id')
     if not room_id:
         return json_response(400, {'error': 'room_id required'})
+    since = qs.get('since')
+    since = int(since) if since and since.isdigit() else None
 
     conn = get_conn()
     cur = conn.cursor()
 
+    if since is not None:
+        cur.execute(f"""
+            SELECT version, CASE WHEN version > {escape_sql(since)} THEN state END AS state
+            FROM {SCHEMA}.poker_state WHERE room_id = {escape_sql(room_id)}
+        """)
+        row = cur.fetchone()
+        if row and row['version'] == since:
+            conn.close()
+            return not_modified()
+        if row and row['version'] > since:
+            table = TableState.from_dict(row['state'])
+            changed = [p.user_id for p in table.players if table.versions['players'].get(str(p.user_id), 0) > since]
+            profiles = load_profiles(cur, room_id, changed) if changed else {}
+            messages = load_messages(cur, room_id, since)
+            conn.close()
+            return json_response(200, delta_payload(table, row['version'], since, profiles, messages, user_id))
+        # версия клиента из будущего (или снимка нет) — отдаём всё
+
     cur.execute(f"""
-        SELECT r.*, u.first_name || ' ' || COALESCE(u.last_name, '') AS host_name
+        SELECT r.*, u.first_name || ' ' || COALESCE(u.last_name, '') AS host_name,
+               s.version AS state_version, s.state
         FROM {SCHEMA}.poker_rooms r
         JOIN {SCHEMA}.users u ON u.id = r.host_id
+        LEFT JOIN {SCHEMA}.poker_state s ON s.room_id = r.id
         WHERE r.id = {escape_sql(room_id)}
     """)
     room = cur.fetchone()
     if not room:
         conn.close()
         return json_response(404, {'error': 'Комната не найдена'})
+    room = dict(room)
+    state = room.pop('state')
+    version = room.pop('state_version')
+    if state is None:
+        table, version = load_state(cur, room_id)
+        conn.commit()
+    else:
+        table = TableState.from_dict(state)
 
-    cur.execute(f"""
-        SELECT pp.*, u.first_name, u.last_name, u.avatar_url, u.nickname
-        FROM {SCHEMA}.poker_players pp
-        JOIN {SCHEMA}.users u ON u.id = pp.user_id
-        WHERE pp.room_id = {escape_sql(room_id)}
-        ORDER BY pp.seat
-    """)
-    players = cur.fetchall()
-
-    my_player = None
-    for p in players:
-        if str(p['user_id']) == str(user_id):
-            my_player = dict(p)
-
-    players_out = []
-    for p in players:
-        pd = dict(p)
-        if str(p['user_id']) != str(user_id):
-            pd['hole_cards'] = None
-        players_out.append(pd)
-
-    game = None
-    cur.execute(f"""
-        SELECT * FROM {SCHEMA}.poker_games
-        WHERE room_id = {escape_sql(room_id)}
-        ORDER BY id DESC LIMIT 1
-    """)
-    game_row = cur.fetchone()
-    if game_row:
-        game = dict(game_row)
-
-    cur.execute(f"""
-        SELECT pm.*, u.first_name AS author_name, u.avatar_url AS author_avatar
-        FROM {SCHEMA}.poker_messages pm
-        LEFT JOIN {SCHEMA}.users u ON u.id = pm.user_id
-        WHERE pm.room_id = {escape_sql(room_id)}
-        ORDER BY pm.id DESC LIMIT 100
-    """)
-    messages = list(reversed(cur.fetchall()))
-
+    profiles = load_profiles(cur, room_id)
+    messages = load_messages(cur, room_id)
     conn.close()
-    return json_response(200, {
-        'room': room,
-        'players': players_out,
-        'my_player': my_player,
-        'game': game,
-        'messages': messages,
-    })
-
-def handle_ready(event):
+    return json_response(200, room_payload(room, table, version, profiles, messages, user_id))
+
+def cached_equity(key, compute):
+    """Шансы не меняются до следующей улицы или сброса, поэтому считаются один раз на инстанс"""
+    with _equity_lock:
+        if key in _equity_cache:
+            _equity_cache.move_to_end(key)
+            return _equity_cache[key]
+    result = compute()
+    with _equity_lock:
+        _equity_cache[key] = result
+        while len(_equity_cache) > EQUITY_CACHE_SIZE:
+            _equity_cache.popitem(last=False)
+    return result
+
+def betting_closed(hand, players):
+    """Ставок в раздаче больше не будет: у каждого живого игрока ставка уравнена или он ва-банк,
+    и фишки остались не больше чем у одного — ходить некому, карты можно открыть"""
+    if any(p.chips > 0 and p.current_bet != hand.current_bet for p in players):
+        return False
+    return sum(1 for p in players if p.chips > 0) <= 1
+
+def equity_view(table, user_id):
+    """Шансы для user_id по снимку стола → (HTTP-статус, тело). Открытые карты — только после вскрытия
+    или когда торговля окончена; раздача, выигранная сбросом, не открывается никогда."""
+    hand = table.hand if table else None
+    if not hand:
+        return 400, {'error': 'Нет активной раздачи'}
+    if not table.player(user_id):
+        return 403, {'error': 'Вы не за этим столом'}
+    # в раздаче — те, кому сдали карты (hand.start) и кто не сбросил; у прежних раздач без start — активные
+    dealt = set(hand.start[0::5])
+    players = [p for p in table.players
+               if not p.is_folded and p.hole_cards and (p.seat in dealt if dealt else p.is_active)]
+
+    board = hand.community
+    street = hand.phase
+    seats = tuple(p.seat for p in players)
+    if hand.finished:
+        face_up = hand.winner_hand is not None
+    else:
+        face_up = len(players) > 1 and betting_closed(hand, players)
+    result = {'hand_no': hand.no, 'street': street, 'board': format_cards(board)}
+
+    if face_up:
+        odds, exact = cached_equity(
+            (table.room_id, hand.no, street, seats, None),
+            lambda: showdown_equity([p.hole_cards for p in players], board),
+        )
+        result.update({'mode': 'showdown', 'exact': exact, 'players': [
+            {'seat': p.seat, 'user_id': p.user_id, 'hole_cards': format_cards(p.hole_cards),
+             'win': round(win, 4), 'tie': round(tie, 4), 'equity': round(share, 4)}
+            for p, (win, tie, share) in zip(players, odds)
+        ]})
+        return 200, result
+
+    me = next((p for p in players if str(p.user_id) == str(user_id)), None)
+    if not me or hand.finished:
+        return 400, {'error': 'Вы не участвуете в раздаче'}
+    win, tie, share = cached_equity(
+        (table.room_id, hand.no, street, seats, me.seat),
+        lambda: hidden_equity(me.hole_cards, board, len(players) - 1),
+    )
+    result.update({'mode': 'hidden', 'exact': False, 'opponents': len(players) - 1, 'players': [
+        {'seat': me.seat, 'user_id': me.user_id, 'win': round(win, 4), 'tie': round(tie, 4), 'equity': round(share, 4)}
+    ]})
+    return 200, result
+
+def handle_equity(event, qs):
+    """Шансы на победу в текущей раздаче — только для игроков стола. Пока идёт торговля, игрок видит
+    только свои шансы против неизвестных рук соперников; когда ставок больше не будет, считаются
+    шансы всех по открытым картам."""
     auth = get_auth(event)
     if not auth:
         return json_response(401, {'error': 'Требуется авторизация'})
     user_id = get_user_id(auth)
-    body = json.loads(event.get('body', '{}') or '{}')
-    room_id = body.get('room_id')
+    room_id = qs.get('room_id')
+    if not room_id:
+        return json_response(400, {'error': 'room_id required'})
 
     conn = get_conn()
     cur = conn.cursor()
-    cur.execute(f"""
-        UPDATE {SCHEMA}.poker_players
-        SET is_ready = NOT is_ready
-        WHERE room_id = {escape_sql(room_id)} AND user_id = {escape_sql(user_id)}
-    """)
+    table, _ = load_state(cur, room_id)
     conn.commit()
     conn.close()
-    return json_response(200, {'ok': True})
+    status, body = equity_view(table, user_id)
+    return json_response(status, body)
 
-def handle_start(event):
+def handle_ready(event):
     auth = get_auth(event)
     if not auth:
         return json_response(401, {'error': 'Требуется авторизация'})
@@ -462,426 +631,405 @@ def handle_start(event):
 
     conn = get_conn()
     cur = conn.cursor()
-    cur.execute(f"SELECT * FROM {SCHEMA}.poker_rooms WHERE id = {escape_sql(room_id)}")
-    room = cur.fetchone()
-    if not room or str(room['host_id']) != str(user_id):
-        conn.close()
-        return json_response(403, {'error': 'Только хост может начать'})
-    if room['status'] != 'waiting':
-        conn.close()
-        return json_response(400, {'error': 'Игра уже начата'})
-
-    cur.execute(f"SELECT * FROM {SCHEMA}.poker_players WHERE room_id = {escape_sql(room_id)} AND is_active = TRUE ORDER BY seat")
-    players = cur.fetchall()
-    if len(players) < 2:
+    try:
+        update_table(cur, room_id, lambda t: _engine.toggle_ready(t, user_id))
+    except ActionError as e:
         conn.close()
-        return json_response(400, {'error': 'Нужно минимум 2 игрока'})
+        return json_response(e.status, {'error': e.message})
+    conn.commit()
+    conn.close()
+    return json_response(200, {'ok': True})
 
-    cur.execute(f"UPDATE {SCHEMA}.poker_rooms SET status = 'playing' WHERE id = {escape_sql(room_id)}")
-    start_new_hand(cur, room_id, room, players)
+def load_relational(cur, room_id):
+    """Стол по реляционным таблицам — для комнат, у которых ещё нет снимка; None, если комнаты нет"""
     cur.execute(f"""
-        INSERT INTO {SCHEMA}.poker_messages (room_id, message, is_system)
-        VALUES ({escape_sql(room_id)}, 'Игра началась! Раздаём карты...', TRUE)
+        SELECT r.id, r.host_id, r.status, r.small_blind, r.big_blind,
+               (SELECT row_to_json(g) FROM {SCHEMA}.poker_games g
+                WHERE g.room_id = r.id ORDER BY g.id DESC LIMIT 1) AS game,
+               (SELECT COALESCE(MAX(dealer_seat), -1) FROM {SCHEMA}.poker_games WHERE room_id = r.id) AS last_dealer,
+               (SELECT COALESCE(MAX(hand_no), COUNT(*)) FROM {SCHEMA}.poker_games WHERE room_id = r.id) AS hand_count,
+               (SELECT json_agg(json_build_object(
+                    'user_id', pp.user_id, 'seat', pp.seat, 'chips', pp.chips, 'current_bet', pp.current_bet,
+                    'is_folded', pp.is_folded, 'is_active', pp.is_active, 'is_ready', pp.is_ready,
+                    'hole_cards', pp.hole_cards, 'name', pp.display_name))
+                FROM {SCHEMA}.poker_players pp
+                WHERE pp.room_id = r.id) AS players
+        FROM {SCHEMA}.poker_rooms r
+        WHERE r.id = {escape_sql(room_id)}
+    """)
+    row = cur.fetchone()
+    if not row:
+        return None
+    players = [
+        PlayerState(p['user_id'], p['seat'], p['chips'], p['current_bet'], p['is_folded'], p['is_active'],
+                    p['is_ready'], cards_to_ints(parse_cards(p['hole_cards'])) or None, p['name'])
+        for p in row['players'] or []
+    ]
+    game = row['game']
+    hand = None
+    if game:
+        hand = HandState(
+            no=game['hand_no'] or row['hand_count'], dealer_seat=game['dealer_seat'],
+            current_turn_seat=game['current_turn_seat'], phase=game['phase'],
+            community=cards_to_ints(parse_cards(game['community_cards'])), pot=game['pot'],
+            current_bet=game['current_bet'], deck=cards_to_ints(parse_cards(game['deck'])),
+            winner_id=game['winner_id'], winner_hand=game['winner_hand'], finished=game['finished_at'] is not None,
+            turn_end_at=game['turn_end_at'],
+        )
+    return TableState(row['id'], row['host_id'], row['status'], row['small_blind'], row['big_blind'],
+                      players, hand, row['last_dealer'], row['hand_count'])
+
+def load_state(cur, room_id):
+    """Снимок стола и его версия одним чтением → (TableState, version) или (None, None).
+    Комнате без снимка он создаётся из реляционных таблиц."""
+    cur.execute(f"SELECT version, state FROM {SCHEMA}.poker_state WHERE room_id = {escape_sql(room_id)}")
+    row = cur.fetchone()
+    if row:
+        return TableState.from_dict(row['state']), row['version']
+    table = load_relational(cur, room_id)
+    if not table:
+        return None, None
+    cur.execute(f"""
+        INSERT INTO {SCHEMA}.poker_state (room_id, state, turn_deadline)
+        VALUES ({escape_sql(table.room_id)}, {escape_sql(json.dumps(table.to_dict()))}::jsonb,
+                {escape_sql(turn_deadline(table))}::timestamp)
+        ON CONFLICT (room_id) DO NOTHING
     """)
+    cur.execute(f"SELECT version, state FROM {SCHEMA}.poker_state WHERE room_id = {escape_sql(room_id)}")
+    row = cur.fetchone()
+    return TableState.from_dict(row['state']), row['version']
+
+def stamp_turn(table):
+    """Срок хода ставится здесь, а не в движке: у него нет часов"""
+    hand = table.hand
+    if hand and hand.turn_reset:
+        hand.turn_end_at = (datetime.utcnow() + timedelta(seconds=TURN_SECONDS)).isoformat(timespec='seconds')
+        hand.turn_reset = False
+
+def turn_deadline(table):
+    """Срок текущего хода для очереди sweep; None, если ждать некого"""
+    hand = table.hand
+    if table.status != 'playing' or hand is None or hand.finished:
+        return None
+    return hand.turn_end_at
+
+def stamp_versions(before, table, version):
+    """Отмечает версией снимка всё, что изменилось относительно before: по этим отметкам опрос
+    с since отдаёт только изменившихся игроков и поля раздачи"""
+    after = table.to_dict()
+    versions = table.versions
+    if before['status'] != after['status']:
+        versions['room'] = version
+    old_players = {str(p['user_id']): p for p in before['players']}
+    for p in after['players']:
+        if old_players.get(str(p['user_id'])) != p:
+            versions['players'][str(p['user_id'])] = version
+    old_hand = before['hand'] or {}
+    new_hand = after['hand'] or {}
+    if old_hand.get('no') != new_hand.get('no'):
+        versions['hand'] = {field: version for field in new_hand}
+    else:
+        for field, value in new_hand.items():
+            if old_hand.get(field) != value:
+                versions['hand'][field] = version
+
+def hand_values(room_id, hand):
+    """Строка VALUES для poker_games; типы приведены явно, чтобы NULL во всех строках не становился text.
+    У завершённой раздачи колода не хранится: раздачу целиком восстанавливает poker_hand_history"""
+    return (
+        f"({escape_sql(room_id)}, {escape_sql(hand.no)}, {escape_sql(hand.dealer_seat)}, "
+        f"{escape_sql(hand.current_turn_seat)}::integer, {escape_sql(hand.phase)}, {escape_sql(format_cards(hand.community))}, "
+        f"{escape_sql(hand.pot)}, {escape_sql(hand.current_bet)}, {escape_sql('' if hand.finished else format_cards(hand.deck))}, "
+        f"{escape_sql(hand.turn_end_at)}::timestamp, {escape_sql(hand.winner_id)}::integer, "
+        f"{escape_sql(hand.winner_hand)}::varchar, {'NOW()' if hand.finished else 'NULL::timestamp'})"
+    )
+
+GAME_COLUMNS = ('room_id, hand_no, dealer_seat, current_turn_seat, phase, community_cards, pot, current_bet, deck, '
+                'turn_end_at, winner_id, winner_hand, finished_at')
+
+GAME_UPSERT = """
+    ON CONFLICT (room_id, hand_no) DO UPDATE SET
+        current_turn_seat = EXCLUDED.current_turn_seat, phase = EXCLUDED.phase,
+        community_cards = EXCLUDED.community_cards, pot = EXCLUDED.pot, current_bet = EXCLUDED.current_bet,
+        deck = EXCLUDED.deck, turn_end_at = EXCLUDED.turn_end_at, winner_id = EXCLUDED.winner_id,
+        winner_hand = EXCLUDED.winner_hand,
+        finished_at = COALESCE(poker_games.finished_at, EXCLUDED.finished_at)
+"""
+
+def save_state(cur, table, version, changes, player_count=None):
+    """Одна запись: снимок обновляется, только если его версия всё ещё version (compare-and-swap);
+    в том же запросе и только при успехе пишутся сообщения, статус и число игроков комнаты и завершённые раздачи.
+    → новая версия или None, если стол успели изменить"""
+    room_id = escape_sql(table.room_id)
+    ctes = [f"""s AS (
+        UPDATE {SCHEMA}.poker_state
+        SET state = {escape_sql(json.dumps(table.to_dict()))}::jsonb, version = version + 1, updated_at = NOW(),
+            turn_deadline = {escape_sql(turn_deadline(table))}::timestamp
+        WHERE room_id = {room_id} AND version = {escape_sql(version)}
+        RETURNING version
+    )"""]
+    if changes.messages:
+        values = ', '.join(f"({escape_sql(user_id)}, {escape_sql(text)})" for user_id, text in changes.messages)
+        ctes.append(f"""m AS (
+        INSERT INTO {SCHEMA}.poker_messages (room_id, user_id, message, is_system, state_version)
+        SELECT {room_id}, v.user_id::integer, v.message, TRUE, s.version FROM s, (VALUES {values}) AS v(user_id, message)
+    )""")
+    room_set = []
+    if changes.room_status:
+        room_set.append(f"status = {escape_sql(changes.room_status)}")
+    if player_count is not None:
+        room_set.append(f"player_count = {escape_sql(player_count)}")
+    if room_set:
+        ctes.append(f"""r AS (
+        UPDATE {SCHEMA}.poker_rooms SET {', '.join(room_set)}
+        WHERE id = {room_id} AND EXISTS (SELECT 1 FROM s)
+    )""")
+    finished = [hand for hand in changes.hands if hand.finished]
+    if finished:
+        values = ', '.join(hand_values(table.room_id, hand) for hand in finished)
+        ctes.append(f"""h AS (
+        INSERT INTO {SCHEMA}.poker_games ({GAME_COLUMNS})
+        SELECT v.* FROM s, (VALUES {values}) AS v({GAME_COLUMNS})
+        {GAME_UPSERT}
+    )""")
+    # история дописывается только сюда и никогда не меняется; раздачи, начатые до неё, без записи
+    recorded = [hand for hand in finished if hand.start]
+    if recorded:
+        values = ', '.join(
+            f"({escape_sql(hand.no)}, {escape_sql(encode_hand(table.small_blind, table.big_blind, hand).hex())})"
+            for hand in recorded
+        )
+        ctes.append(f"""hh AS (
+        INSERT INTO {SCHEMA}.poker_hand_history (room_id, hand_no, record)
+        SELECT {room_id}, v.hand_no, decode(v.record, 'hex') FROM s, (VALUES {values}) AS v(hand_no, record)
+        ON CONFLICT (room_id, hand_no) DO NOTHING
+    )""")
+    cur.execute('WITH ' + ', '.join(ctes) + ' SELECT version FROM s')
+    row = cur.fetchone()
+    return row['version'] if row else None
+
+def active_count(table):
+    return sum(1 for p in table.players if p.is_active)
+
+def apply_and_save(cur, table, version, apply):
+    """apply(table) → Changes, отметки сроков и версий, запись с проверкой версии и выплаты LOVE.
+    → (changes, новая версия) или (None, None), если стол успели изменить"""
+    before = table.to_dict()
+    seated = active_count(table)
+    changes = apply(table)
+    stamp_turn(table)
+    stamp_versions(before, table, version + 1)
+    player_count = active_count(table)
+    new_version = save_state(cur, table, version, changes, player_count if player_count != seated else None)
+    if new_version is None:
+        return None, None
+    for user_id, amount in changes.credits:
+        credit_love(cur, user_id, amount)
+    return changes, new_version
+
+def update_table(cur, room_id, apply):
+    """Читает снимок, применяет apply и пишет с проверкой версии; при конфликте перечитывает
+    и применяет заново. → (table, changes, version) или (None, None, None), если комнаты нет"""
+    for _ in range(CAS_ATTEMPTS):
+        table, version = load_state(cur, room_id)
+        if not table:
+            return None, None, None
+        changes, new_version = apply_and_save(cur, table, version, apply)
+        if new_version is not None:
+            return table, changes, new_version
+    raise ActionError('Стол занят, попробуйте ещё раз', 409)
+
+def sweep_turns(cur):
+    """Столы с истёкшим сроком хода: ход за игрока (чек или фолд) тем же путём, что и handle_action.
+    Строки заблокированы, поэтому параллельный sweep берёт другие столы, а запись по версии проходит."""
+    cur.execute(f"""
+        SELECT room_id, version, state FROM {SCHEMA}.poker_state
+        WHERE turn_deadline <= NOW() AT TIME ZONE 'UTC'
+        ORDER BY turn_deadline
+        LIMIT {SWEEP_BATCH}
+        FOR UPDATE SKIP LOCKED
+    """)
+    rows = cur.fetchall()
+    moved = 0
+    for row in rows:
+        table = TableState.from_dict(row['state'])
+        try:
+            _, new_version = apply_and_save(cur, table, row['version'], _engine.timeout)
+        except ActionError:
+            # ходить некому — срок снимается, чтобы стол не занимал очередь
+            cur.execute(f"UPDATE {SCHEMA}.poker_state SET turn_deadline = NULL WHERE room_id = {escape_sql(row['room_id'])}")
+            continue
+        if new_version is not None:
+            moved += 1
+    return len(rows), moved
+
+def handle_sweep(event):
+    """Ходы с истёкшим сроком; только для планировщика: блокирует столы и начисляет LOVE"""
+    if not is_scheduler(event):
+        return json_response(403, {'error': 'Доступно только планировщику'})
+    conn = get_conn()
+    cur = conn.cursor()
+    checked, moved = sweep_turns(cur)
     conn.commit()
     conn.close()
-    return json_response(200, {'ok': True})
-
-def start_new_hand(cur, room_id, room, players):
-    deck = make_deck()
-    active_players = [p for p in players if p['is_active'] and p['chips'] > 0]
-    if len(active_players) < 2:
-        cur.execute(f"UPDATE {SCHEMA}.poker_rooms SET status = 'finished' WHERE id = {escape_sql(room_id)}")
-        winner = active_players[0] if active_players else None
-        if winner:
-            cur.execute(f"SELECT first_name FROM {SCHEMA}.users WHERE id = {escape_sql(winner['user_id'])}")
-            w = cur.fetchone()
-            cashout_amount = winner['chips']
-            credit_love(cur, winner['user_id'], cashout_amount)
-            cur.execute(f"""
-                INSERT INTO {SCHEMA}.poker_messages (room_id, message, is_system)
-                VALUES ({escape_sql(room_id)}, {escape_sql((w['first_name'] if w else 'Игрок') + ' победил в турнире! Выигрыш: ' + str(int(cashout_amount)) + ' LOVE')}, TRUE)
-            """)
-        for p in players:
-            if p['is_active'] and p != winner and p['chips'] > 0:
-                credit_love(cur, p['user_id'], p['chips'])
-        return
+    return json_response(200, {'success': True, 'checked': checked, 'moved': moved})
 
+def sync_states(cur):
+    """Переносит свежие снимки в poker_players и текущую раздачу в poker_games (для истории и отчётов)"""
     cur.execute(f"""
-        SELECT COALESCE(MAX(dealer_seat), -1) AS ds FROM {SCHEMA}.poker_games WHERE room_id = {escape_sql(room_id)}
+        SELECT room_id, version, state FROM {SCHEMA}.poker_state
+        WHERE synced_version < version
+        ORDER BY updated_at
+        LIMIT {SYNC_BATCH}
+        FOR UPDATE SKIP LOCKED
     """)
-    last_dealer = cur.fetchone()['ds']
-    seats = sorted([p['seat'] for p in active_players])
-    dealer_idx = 0
-    for i, s in enumerate(seats):
-        if s > last_dealer:
-            dealer_idx = i
-            break
-
-    dealer_seat = seats[dealer_idx]
-    sb_seat = seats[(dealer_idx + 1) % len(seats)]
-    bb_seat = seats[(dealer_idx + 2) % len(seats)]
-
-    sb = room['small_blind']
-    bb = room['big_blind']
-
-    for p in active_players:
-        cards = deck.pop() + ',' + deck.pop()
-        bet = 0
-        if p['seat'] == sb_seat:
-            bet = min(sb, p['chips'])
-        elif p['seat'] == bb_seat:
-            bet = min(bb, p['chips'])
+    rows = cur.fetchall()
+    for row in rows:
+        table = TableState.from_dict(row['state'])
+        if table.players:
+            values = ', '.join(
+                f"({escape_sql(p.user_id)}, {escape_sql(p.chips)}, {escape_sql(p.current_bet)}, {escape_sql(p.is_folded)}, "
+                f"{escape_sql(p.is_active)}, {escape_sql(p.is_ready)}, "
+                f"{escape_sql(format_cards(p.hole_cards) if p.hole_cards else None)}::text)"
+                for p in table.players
+            )
+            cur.execute(f"""
+                UPDATE {SCHEMA}.poker_players AS pp
+                SET chips = v.chips, current_bet = v.current_bet, is_folded = v.is_folded,
+                    is_active = v.is_active, is_ready = v.is_ready, hole_cards = v.hole_cards
+                FROM (VALUES {values}) AS v(user_id, chips, current_bet, is_folded, is_active, is_ready, hole_cards)
+                WHERE pp.room_id = {escape_sql(table.room_id)} AND pp.user_id = v.user_id
+            """)
+        if table.hand:
+            cur.execute(f"INSERT INTO {SCHEMA}.poker_games ({GAME_COLUMNS}) VALUES {hand_values(table.room_id, table.hand)} {GAME_UPSERT}")
         cur.execute(f"""
-            UPDATE {SCHEMA}.poker_players
-            SET hole_cards = {escape_sql(cards)}, is_folded = FALSE, current_bet = {escape_sql(bet)},
-                chips = chips - {escape_sql(bet)}
-            WHERE room_id = {escape_sql(room_id)} AND user_id = {escape_sql(p['user_id'])}
+            UPDATE {SCHEMA}.poker_state SET synced_version = {escape_sql(row['version'])}
+            WHERE room_id = {escape_sql(table.room_id)}
         """)
+    return len(rows)
 
-    pot = 0
-    for p in active_players:
-        if p['seat'] == sb_seat:
-            pot += min(sb, p['chips'])
-        elif p['seat'] == bb_seat:
-            pot += min(bb, p['chips'])
-
-    first_turn_idx = (dealer_idx + 3) % len(seats)
-    first_turn = seats[first_turn_idx]
-
-    cur.execute(f"""
-        INSERT INTO {SCHEMA}.poker_games (room_id, dealer_seat, current_turn_seat, phase, community_cards, pot, current_bet, deck, turn_end_at)
-        VALUES ({escape_sql(room_id)}, {escape_sql(dealer_seat)}, {escape_sql(first_turn)}, 'preflop',
-                '', {escape_sql(pot)}, {escape_sql(bb)}, {escape_sql(cards_to_str(deck))},
-                NOW() + INTERVAL '30 seconds')
-    """)
+def handle_sync(event):
+    """Перенос снимков в реляционные таблицы; только для планировщика: пачка берёт блокировки строк"""
+    if not is_scheduler(event):
+        return json_response(403, {'error': 'Доступно только планировщику'})
+    conn = get_conn()
+    cur = conn.cursor()
+    synced = sync_states(cur)
+    conn.commit()
+    conn.close()
+    return json_response(200, {'success': True, 'synced': synced})
 
-def handle_action(event):
+def handle_replay(event, qs):
+    """Завершённая раздача по шагам — для её участников. Карты сбросивших соперников не показываются."""
     auth = get_auth(event)
     if not auth:
         return json_response(401, {'error': 'Требуется авторизация'})
     user_id = get_user_id(auth)
-    body = json.loads(event.get('body', '{}') or '{}')
-    room_id = body.get('room_id')
-    action_type = body.get('action_type', '')
-    amount = int(body.get('amount', 0))
+    room_id = qs.get('room_id')
+    hand_no = qs.get('hand_no')
+    if not room_id or not hand_no:
+        return json_response(400, {'error': 'room_id and hand_no required'})
 
     conn = get_conn()
     cur = conn.cursor()
-
-    cur.execute(f"SELECT * FROM {SCHEMA}.poker_rooms WHERE id = {escape_sql(room_id)} AND status = 'playing'")
-    room = cur.fetchone()
-    if not room:
-        conn.close()
-        return json_response(400, {'error': 'Комната не в игре'})
-
     cur.execute(f"""
-        SELECT * FROM {SCHEMA}.poker_games WHERE room_id = {escape_sql(room_id)} ORDER BY id DESC LIMIT 1
+        SELECT h.record, h.finished_at,
+               (SELECT json_object_agg(pp.user_id, pp.display_name)
+                FROM {SCHEMA}.poker_players pp
+                WHERE pp.room_id = h.room_id) AS names
+        FROM {SCHEMA}.poker_hand_history h
+        WHERE h.room_id = {escape_sql(room_id)} AND h.hand_no = {escape_sql(hand_no)}
     """)
-    game = cur.fetchone()
-    if not game:
-        conn.close()
-        return json_response(400, {'error': 'Нет активной раздачи'})
+    row = cur.fetchone()
+    conn.close()
+    if not row:
+        return json_response(404, {'error': 'Раздача не найдена'})
+
+    names = {int(k): v for k, v in (row['names'] or {}).items()}
+    result = replay(bytes(row['record']), names)
+    if not any(str(p['user_id']) == str(user_id) for p in result['players']):
+        return json_response(403, {'error': 'Раздача доступна только её участникам'})
+    for p in result['players']:
+        p['name'] = names.get(p['user_id'])
+        if not p['showdown'] and str(p['user_id']) != str(user_id):
+            p['hole_cards'] = None
+    result.update({'room_id': int(room_id), 'hand_no': int(hand_no), 'finished_at': row['finished_at']})
+    return json_response(200, result)
+
+def handle_export(event, qs):
+    """Выгрузка истории для аналитики страницами по (room_id, hand_no): записи в base64,
+    разбираются history.decode / history.replay. Только для токена администратора."""
+    auth = get_auth(event)
+    if not auth or not auth.get('admin_id'):
+        return json_response(403, {'error': 'Доступно только администратору'})
+    after_room, _, after_hand = (qs.get('after') or '0:0').partition(':')
+    limit = min(max(int(qs.get('limit', EXPORT_PAGE)), 1), EXPORT_PAGE)
 
+    conn = get_conn()
+    cur = conn.cursor()
     cur.execute(f"""
-        SELECT * FROM {SCHEMA}.poker_players
-        WHERE room_id = {escape_sql(room_id)} AND user_id = {escape_sql(user_id)}
+        SELECT room_id, hand_no, finished_at, record
+        FROM {SCHEMA}.poker_hand_history
+        WHERE (room_id, hand_no) > ({escape_sql(int(after_room))}, {escape_sql(int(after_hand or 0))})
+        ORDER BY room_id, hand_no
+        LIMIT {limit}
     """)
-    player = cur.fetchone()
-    if not player:
-        conn.close()
-        return json_response(400, {'error': 'Вы не в игре'})
+    rows = cur.fetchall()
+    conn.close()
+    hands = [
+        {'room_id': r['room_id'], 'hand_no': r['hand_no'], 'finished_at': r['finished_at'],
+         'record': base64.b64encode(bytes(r['record'])).decode()}
+        for r in rows
+    ]
+    next_cursor = f"{rows[-1]['room_id']}:{rows[-1]['hand_no']}" if len(rows) == limit else None
+    return json_response(200, {'hands': hands, 'next': next_cursor})
 
-    if player['seat'] != game['current_turn_seat']:
-        conn.close()
-        return json_response(400, {'error': 'Не ваш ход'})
+def handle_start(event):
+    auth = get_auth(event)
+    if not auth:
+        return json_response(401, {'error': 'Требуется авторизация'})
+    user_id = get_user_id(auth)
+    body = json.loads(event.get('body', '{}') or '{}')
+    room_id = body.get('room_id')
 
-    if player['is_folded']:
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        table, _, _ = update_table(cur, room_id, lambda t: _engine.start(t, user_id))
+    except ActionError as e:
         conn.close()
-        return json_response(400, {'error': 'Вы сбросили карты'})
-
-    cur.execute(f"SELECT first_name FROM {SCHEMA}.users WHERE id = {escape_sql(user_id)}")
-    user_row = cur.fetchone()
-    player_name = user_row['first_name'] if user_row else 'Игрок'
-
-    cur.execute(f"""
-        SELECT * FROM {SCHEMA}.poker_players
-        WHERE room_id = {escape_sql(room_id)} AND is_active = TRUE AND is_folded = FALSE
-        ORDER BY seat
-    """)
-    active_players = cur.fetchall()
-    active_seats = [p['seat'] for p in active_players]
-
-    if action_type == 'fold':
-        cur.execute(f"""
-            UPDATE {SCHEMA}.poker_players SET is_folded = TRUE
-            WHERE room_id = {escape_sql(room_id)} AND user_id = {escape_sql(user_id)}
-        """)
-        cur.execute(f"""
-            INSERT INTO {SCHEMA}.poker_messages (room_id, user_id, message, is_system)
-            VALUES ({escape_sql(room_id)}, {escape_sql(user_id)}, {escape_sql(player_name + ' сбросил карты')}, TRUE)
-        """)
-        remaining = [s for s in active_seats if s != player['seat']]
-        if len(remaining) == 1:
-            winner_seat = remaining[0]
-            winner_player = next(p for p in active_players if p['seat'] == winner_seat)
-            cur.execute(f"""
-                UPDATE {SCHEMA}.poker_players SET chips = chips + {escape_sql(game['pot'])}
-                WHERE room_id = {escape_sql(room_id)} AND seat = {escape_sql(winner_seat)}
-            """)
-            cur.execute(f"SELECT first_name FROM {SCHEMA}.users WHERE id = {escape_sql(winner_player['user_id'])}")
-            wn = cur.fetchone()
-            cur.execute(f"""
-                UPDATE {SCHEMA}.poker_games SET finished_at = NOW(), winner_id = {escape_sql(winner_player['user_id'])}
-                WHERE id = {escape_sql(game['id'])}
-            """)
-            cur.execute(f"""
-                INSERT INTO {SCHEMA}.poker_messages (room_id, message, is_system)
-                VALUES ({escape_sql(room_id)}, {escape_sql((wn['first_name'] if wn else 'Игрок') + ' забирает банк ' + str(game['pot']) + ' фишек!')}, TRUE)
-            """)
-            cur.execute(f"SELECT * FROM {SCHEMA}.poker_players WHERE room_id = {escape_sql(room_id)} AND is_active = TRUE ORDER BY seat")
-            all_p = cur.fetchall()
-            start_new_hand(cur, room_id, room, all_p)
-            conn.commit()
-            conn.close()
-            return json_response(200, {'ok': True})
-        else:
-            advance_turn(cur, room_id, game, player['seat'], active_seats)
-
-    elif action_type == 'call':
-        call_amount = game['current_bet'] - player['current_bet']
-        call_amount = min(call_amount, player['chips'])
-        cur.execute(f"""
-            UPDATE {SCHEMA}.poker_players
-            SET chips = chips - {escape_sql(call_amount)}, current_bet = current_bet + {escape_sql(call_amount)}
-            WHERE room_id = {escape_sql(room_id)} AND user_id = {escape_sql(user_id)}
-        """)
-        cur.execute(f"""
-            UPDATE {SCHEMA}.poker_games SET pot = pot + {escape_sql(call_amount)} WHERE id = {escape_sql(game['id'])}
-        """)
-        cur.execute(f"""
-            INSERT INTO {SCHEMA}.poker_messages (room_id, user_id, message, is_system)
-            VALUES ({escape_sql(room_id)}, {escape_sql(user_id)}, {escape_sql(player_name + ' уравнял ' + str(call_amount))}, TRUE)
-        """)
-        advance_turn(cur, room_id, game, player['seat'], active_seats)
-
-    elif action_type == 'check':
-        if player['current_bet'] < game['current_bet']:
-            conn.close()
-            return json_response(400, {'error': 'Нельзя чекнуть, нужно уравнять'})
-        cur.execute(f"""
-            INSERT INTO {SCHEMA}.poker_messages (room_id, user_id, message, is_system)
-            VALUES ({escape_sql(room_id)}, {escape_sql(user_id)}, {escape_sql(player_name + ' чек')}, TRUE)
-        """)
-        advance_turn(cur, room_id, game, player['seat'], active_seats)
-
-    elif action_type == 'raise':
-        min_raise = game['current_bet'] * 2
-        raise_to = max(amount, min_raise)
-        raise_cost = raise_to - player['current_bet']
-        raise_cost = min(raise_cost, player['chips'])
-        actual_bet = player['current_bet'] + raise_cost
-        cur.execute(f"""
-            UPDATE {SCHEMA}.poker_players
-            SET chips = chips - {escape_sql(raise_cost)}, current_bet = {escape_sql(actual_bet)}
-            WHERE room_id = {escape_sql(room_id)} AND user_id = {escape_sql(user_id)}
-        """)
-        cur.execute(f"""
-            UPDATE {SCHEMA}.poker_games SET pot = pot + {escape_sql(raise_cost)}, current_bet = {escape_sql(actual_bet)}
-            WHERE id = {escape_sql(game['id'])}
-        """)
-        cur.execute(f"""
-            INSERT INTO {SCHEMA}.poker_messages (room_id, user_id, message, is_system)
-            VALUES ({escape_sql(room_id)}, {escape_sql(user_id)}, {escape_sql(player_name + ' повысил до ' + str(actual_bet))}, TRUE)
-        """)
-        advance_turn(cur, room_id, game, player['seat'], active_seats, raised=True)
-
-    elif action_type == 'allin':
-        allin_amount = player['chips']
-        new_bet = player['current_bet'] + allin_amount
-        cur.execute(f"""
-            UPDATE {SCHEMA}.poker_players
-            SET chips = 0, current_bet = {escape_sql(new_bet)}
-            WHERE room_id = {escape_sql(room_id)} AND user_id = {escape_sql(user_id)}
-        """)
-        if new_bet > game['current_bet']:
-            cur.execute(f"""
-                UPDATE {SCHEMA}.poker_games SET pot = pot + {escape_sql(allin_amount)}, current_bet = {escape_sql(new_bet)}
-                WHERE id = {escape_sql(game['id'])}
-            """)
-        else:
-            cur.execute(f"""
-                UPDATE {SCHEMA}.poker_games SET pot = pot + {escape_sql(allin_amount)}
-                WHERE id = {escape_sql(game['id'])}
-            """)
-        cur.execute(f"""
-            INSERT INTO {SCHEMA}.poker_messages (room_id, user_id, message, is_system)
-            VALUES ({escape_sql(room_id)}, {escape_sql(user_id)}, {escape_sql(player_name + ' ва-банк! ' + str(allin_amount))}, TRUE)
-        """)
-        advance_turn(cur, room_id, game, player['seat'], active_seats, raised=(new_bet > game['current_bet']))
-    else:
+        return json_response(e.status, {'error': e.message})
+    if not table:
         conn.close()
-        return json_response(400, {'error': 'Неизвестное действие'})
-
+        return json_response(403, {'error': 'Только хост может начать'})
     conn.commit()
     conn.close()
     return json_response(200, {'ok': True})
 
-def advance_turn(cur, room_id, game, current_seat, active_seats, raised=False):
-    cur.execute(f"""
-        SELECT * FROM {SCHEMA}.poker_players
-        WHERE room_id = {escape_sql(room_id)} AND is_active = TRUE AND is_folded = FALSE
-        ORDER BY seat
-    """)
-    remaining = cur.fetchall()
-    remaining_seats = [p['seat'] for p in remaining]
-
-    if len(remaining_seats) <= 1:
-        return
-
-    cur.execute(f"SELECT * FROM {SCHEMA}.poker_games WHERE room_id = {escape_sql(room_id)} ORDER BY id DESC LIMIT 1")
-    game = cur.fetchone()
-
-    idx = remaining_seats.index(current_seat) if current_seat in remaining_seats else 0
-    next_idx = (idx + 1) % len(remaining_seats)
-    next_seat = remaining_seats[next_idx]
-
-    all_equal = all(p['current_bet'] == game['current_bet'] or p['chips'] == 0 for p in remaining)
-    round_complete = all_equal and not raised
-
-    if round_complete and next_seat == remaining_seats[0]:
-        advance_phase(cur, room_id, game, remaining)
-    elif round_complete:
-        check_all = True
-        for p in remaining:
-            if p['current_bet'] != game['current_bet'] and p['chips'] > 0:
-                check_all = False
-                break
-        if check_all:
-            advance_phase(cur, room_id, game, remaining)
-        else:
-            cur.execute(f"""
-                UPDATE {SCHEMA}.poker_games SET current_turn_seat = {escape_sql(next_seat)},
-                turn_end_at = NOW() + INTERVAL '30 seconds'
-                WHERE id = {escape_sql(game['id'])}
-            """)
-    else:
-        cur.execute(f"""
-            UPDATE {SCHEMA}.poker_games SET current_turn_seat = {escape_sql(next_seat)},
-            turn_end_at = NOW() + INTERVAL '30 seconds'
-            WHERE id = {escape_sql(game['id'])}
-        """)
-
-def advance_phase(cur, room_id, game, remaining):
-    cur.execute(f"""
-        UPDATE {SCHEMA}.poker_players SET current_bet = 0
-        WHERE room_id = {escape_sql(room_id)}
-    """)
-
-    deck = parse_cards(game['deck'])
-    community = parse_cards(game['community_cards'])
-    phase = game['phase']
-
-    if phase == 'preflop':
-        if len(deck) >= 3:
-            community.extend([deck.pop(0), deck.pop(0), deck.pop(0)])
-        new_phase = 'flop'
-    elif phase == 'flop':
-        if deck:
-            community.append(deck.pop(0))
-        new_phase = 'turn'
-    elif phase == 'turn':
-        if deck:
-            community.append(deck.pop(0))
-        new_phase = 'river'
-    else:
-        showdown(cur, room_id, game, remaining, community)
-        return
-
-    remaining_seats = [p['seat'] for p in remaining]
-    first_seat = remaining_seats[0]
-
-    cur.execute(f"""
-        UPDATE {SCHEMA}.poker_games
-        SET phase = {escape_sql(new_phase)}, community_cards = {escape_sql(cards_to_str(community))},
-            deck = {escape_sql(cards_to_str(deck))}, current_bet = 0, current_turn_seat = {escape_sql(first_seat)},
-            turn_end_at = NOW() + INTERVAL '30 seconds'
-        WHERE id = {escape_sql(game['id'])}
-    """)
-
-    can_act = [p for p in remaining if p['chips'] > 0]
-    if len(can_act) <= 1:
-        while new_phase != 'river':
-            if new_phase == 'flop' and len(deck) >= 1:
-                community.append(deck.pop(0))
-                new_phase = 'turn'
-            elif new_phase == 'turn' and len(deck) >= 1:
-                community.append(deck.pop(0))
-                new_phase = 'river'
-            else:
-                break
-        cur.execute(f"""
-            UPDATE {SCHEMA}.poker_games
-            SET phase = 'river', community_cards = {escape_sql(cards_to_str(community))},
-                deck = {escape_sql(cards_to_str(deck))}
-            WHERE id = {escape_sql(game['id'])}
-        """)
-        showdown(cur, room_id, game, remaining, community)
-
-def showdown(cur, room_id, game, remaining, community):
-    cur.execute(f"SELECT * FROM {SCHEMA}.poker_rooms WHERE id = {escape_sql(room_id)}")
-    room = cur.fetchone()
-
-    cur.execute(f"SELECT * FROM {SCHEMA}.poker_games WHERE id = {escape_sql(game['id'])}")
-    game = cur.fetchone()
-
-    best_hand = None
-    winner = None
-    for p in remaining:
-        hole = parse_cards(p['hole_cards']) if p['hole_cards'] else []
-        all_cards = hole + community
-        hand_name, score = evaluate_hand(all_cards)
-        if best_hand is None or score > best_hand:
-            best_hand = score
-            winner = p
-            winner_hand_name = hand_name
-
-    if winner:
-        cur.execute(f"""
-            UPDATE {SCHEMA}.poker_players SET chips = chips + {escape_sql(game['pot'])}
-            WHERE room_id = {escape_sql(room_id)} AND user_id = {escape_sql(winner['user_id'])}
-        """)
-        cur.execute(f"SELECT first_name FROM {SCHEMA}.users WHERE id = {escape_sql(winner['user_id'])}")
-        wn = cur.fetchone()
-
-        cards_shown = []
-        for p in remaining:
-            cur.execute(f"SELECT first_name FROM {SCHEMA}.users WHERE id = {escape_sql(p['user_id'])}")
-            pn = cur.fetchone()
-            cards_shown.append(f"{pn['first_name'] if pn else '?'}: {p['hole_cards']}")
-
-        cur.execute(f"""
-            INSERT INTO {SCHEMA}.poker_messages (room_id, message, is_system)
-            VALUES ({escape_sql(room_id)}, {escape_sql('Вскрытие: ' + ' | '.join(cards_shown))}, TRUE)
-        """)
-        cur.execute(f"""
-            INSERT INTO {SCHEMA}.poker_messages (room_id, message, is_system)
-            VALUES ({escape_sql(room_id)}, {escape_sql((wn['first_name'] if wn else 'Игрок') + ' выиграл ' + str(game['pot']) + ' фишек! (' + winner_hand_name + ')')}, TRUE)
-        """)
-        cur.execute(f"""
-            UPDATE {SCHEMA}.poker_games SET finished_at = NOW(), winner_id = {escape_sql(winner['user_id'])},
-            winner_hand = {escape_sql(winner_hand_name)}
-            WHERE id = {escape_sql(game['id'])}
-        """)
-
-    cur.execute(f"""
-        UPDATE {SCHEMA}.poker_players SET is_active = FALSE
-        WHERE room_id = {escape_sql(room_id)} AND chips <= 0
-    """)
+def handle_action(event):
+    """Ход игрока: одно чтение снимка, правила в PokerEngine, одна запись с проверкой версии"""
+    auth = get_auth(event)
+    if not auth:
+        return json_response(401, {'error': 'Требуется авторизация'})
+    user_id = get_user_id(auth)
+    body = json.loads(event.get('body', '{}') or '{}')
+    room_id = body.get('room_id')
+    action_type = body.get('action_type', '')
+    amount = int(body.get('amount', 0))
 
-    cur.execute(f"SELECT * FROM {SCHEMA}.poker_players WHERE room_id = {escape_sql(room_id)} AND is_active = TRUE ORDER BY seat")
-    all_p = cur.fetchall()
-    start_new_hand(cur, room_id, room, all_p)
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        table, _, version = update_table(cur, room_id, lambda t: _engine.act(t, user_id, action_type, amount))
+    except ActionError as e:
+        conn.close()
+        return json_response(e.status, {'error': e.message})
+    if not table:
+        conn.close()
+        return json_response(400, {'error': 'Комната не в игре'})
+    conn.commit()
+    conn.close()
+    return json_response(200, {'ok': True, 'state_version': version})
 
 def handle_chat(event):
     auth = get_auth(event)
@@ -896,9 +1044,18 @@ def handle_chat(event):
 
     conn = get_conn()
     cur = conn.cursor()
+    # сообщение поднимает версию стола, чтобы его увидел опрос с since; снимок от этого не меняется,
+    # поэтому уже синхронизированный стол остаётся синхронизированным
     cur.execute(f"""
-        INSERT INTO {SCHEMA}.poker_messages (room_id, user_id, message)
-        VALUES ({escape_sql(room_id)}, {escape_sql(user_id)}, {escape_sql(message)})
+        WITH s AS (
+            UPDATE {SCHEMA}.poker_state
+            SET version = version + 1,
+                synced_version = CASE WHEN synced_version = version THEN version + 1 ELSE synced_version END
+            WHERE room_id = {escape_sql(room_id)}
+            RETURNING version
+        )
+        INSERT INTO {SCHEMA}.poker_messages (room_id, user_id, message, state_version)
+        VALUES ({escape_sql(room_id)}, {escape_sql(user_id)}, {escape_sql(message)}, (SELECT version FROM s))
     """)
     conn.commit()
     conn.close()
@@ -914,30 +1071,14 @@ def handle_leave(event):
 
     conn = get_conn()
     cur = conn.cursor()
-
-    cur.execute(f"SELECT chips FROM {SCHEMA}.poker_players WHERE room_id = {escape_sql(room_id)} AND user_id = {escape_sql(user_id)}")
-    player = cur.fetchone()
-    if player and player['chips'] > 0:
-        credit_love(cur, user_id, player['chips'])
-
-    cur.execute(f"""
-        UPDATE {SCHEMA}.poker_players SET is_active = FALSE, is_folded = TRUE, chips = 0
-        WHERE room_id = {escape_sql(room_id)} AND user_id = {escape_sql(user_id)}
-    """)
-    cur.execute(f"SELECT first_name FROM {SCHEMA}.users WHERE id = {escape_sql(user_id)}")
-    user = cur.fetchone()
-    cashout_msg = ''
-    if player and player['chips'] > 0:
-        cashout_msg = f" (вывел {int(player['chips'])} LOVE)"
-    cur.execute(f"""
-        INSERT INTO {SCHEMA}.poker_messages (room_id, message, is_system)
-        VALUES ({escape_sql(room_id)}, {escape_sql((user['first_name'] if user else 'Игрок') + ' покинул стол' + cashout_msg)}, TRUE)
-    """)
-    cur.execute(f"SELECT COUNT(*) AS cnt FROM {SCHEMA}.poker_players WHERE room_id = {escape_sql(room_id)} AND is_active = TRUE")
-    remaining = cur.fetchone()['cnt']
-    if remaining == 0:
-        cur.execute(f"UPDATE {SCHEMA}.poker_rooms SET status = 'finished' WHERE id = {escape_sql(room_id)}")
-
+    try:
+        table, _, _ = update_table(cur, room_id, lambda t: _engine.leave(t, user_id))
+    except ActionError as e:
+        conn.close()
+        return json_response(e.status, {'error': e.message})
+    if not table:
+        conn.close()
+        return json_response(404, {'error': 'Комната не найдена'})
     conn.commit()
     conn.close()
     return json_response(200, {'ok': True})
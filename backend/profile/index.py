@@ -88,7 +88,7 @@ def handler(event: dict, context) -> dict:
 
                 query = f'''
                     SELECT id, email, first_name, last_name, nickname, bio, avatar_url,
-                           gender, birth_date, city, district, height,
+                           avatar_blurhash, avatar_color, gender, birth_date, city, district, height,
                            body_type, marital_status, children, financial_status,
                            has_car, has_housing, dating_goal, interests, profession,
                            zodiac_sign, status_text, phone, telegram, instagram,
@@ -239,6 +239,14 @@ def handler(event: dict, context) -> dict:
                 }
             
             with conn.cursor() as cur:
+                previous_avatar = None
+                previous_media = None
+                if 'avatar_url' in data:
+                    cur.execute(f"SELECT avatar_url, avatar_media FROM t_p19021063_social_connect_platf.users WHERE id = {user_id} FOR UPDATE")
+                    row = cur.fetchone()
+                    if row:
+                        previous_avatar, previous_media = row
+                
                 query = f'''
                     UPDATE t_p19021063_social_connect_platf.users 
                     SET {', '.join(updates)}, updated_at = CURRENT_TIMESTAMP
@@ -246,6 +254,65 @@ def handler(event: dict, context) -> dict:
                 '''
                 cur.execute(query)
                 
+                # Новый аватар: медиа, производные и плейсхолдер берём из фото галереи с тем же URL, иначе сбрасываем
+                if 'avatar_url' in data and data['avatar_url'] != previous_avatar:
+                    cur.execute('''
+                        UPDATE t_p19021063_social_connect_platf.users
+                        SET (avatar_media, avatar_variants, avatar_blurhash, avatar_color) = (
+                            SELECT p.media_sha256, p.variants, p.blurhash, p.color
+                            FROM t_p19021063_social_connect_platf.user_photos p
+                            WHERE p.user_id = %s AND p.photo_url = %s
+                            LIMIT 1
+                        )
+                        WHERE id = %s
+                        RETURNING avatar_media
+                    ''', (user_id, data['avatar_url'], user_id))
+                    new_media = cur.fetchone()[0]
+                    # Аватар — отдельная ссылка на медиа: удаление фото из галереи его не затронет
+                    if new_media:
+                        cur.execute('''
+                            UPDATE t_p19021063_social_connect_platf.media_objects
+                            SET ref_count = ref_count + 1, released_at = NULL
+                            WHERE sha256 = %s
+                        ''', (new_media,))
+                    if previous_media:
+                        cur.execute('''
+                            UPDATE t_p19021063_social_connect_platf.media_objects
+                            SET ref_count = GREATEST(ref_count - 1, 0),
+                                released_at = CASE WHEN ref_count <= 1 THEN NOW() ELSE released_at END
+                            WHERE sha256 = %s
+                        ''', (previous_media,))
+                
+                # Обновляем копии имени и аватара у игрока в незавершённых комнатах покера и мафии
+                if 'first_name' in data or 'nickname' in data or 'avatar_url' in data:
+                    for players, rooms in (('poker_players', 'poker_rooms'), ('mafia_players', 'mafia_rooms')):
+                        cur.execute(f'''
+                            UPDATE t_p19021063_social_connect_platf.{players} gp
+                            SET display_name = COALESCE(NULLIF(u.first_name, ''), u.nickname, 'Игрок'),
+                                avatar_url = u.avatar_url, avatar_blurhash = u.avatar_blurhash, avatar_color = u.avatar_color
+                            FROM t_p19021063_social_connect_platf.users u, t_p19021063_social_connect_platf.{rooms} r
+                            WHERE u.id = %s AND gp.user_id = u.id
+                            AND r.id = gp.room_id AND r.status != 'finished'
+                        ''', (user_id,))
+                    # Снимок стола покера: новое имя в PlayerState и версия игрока, чтобы опрос с since его отдал
+                    cur.execute('''
+                        UPDATE t_p19021063_social_connect_platf.poker_state s
+                        SET version = s.version + 1, updated_at = NOW(),
+                            state = jsonb_set(
+                                jsonb_set(s.state, '{players}', (
+                                    SELECT jsonb_agg(CASE WHEN e.p->>'user_id' = gp.user_id::text
+                                                          THEN jsonb_set(e.p, '{name}', to_jsonb(gp.display_name))
+                                                          ELSE e.p END ORDER BY e.ord)
+                                    FROM jsonb_array_elements(s.state->'players') WITH ORDINALITY AS e(p, ord)
+                                )),
+                                ARRAY['versions', 'players', gp.user_id::text], to_jsonb(s.version + 1))
+                        FROM t_p19021063_social_connect_platf.poker_players gp, t_p19021063_social_connect_platf.poker_rooms r
+                        WHERE gp.user_id = %s AND gp.room_id = s.room_id
+                        AND r.id = s.room_id AND r.status != 'finished'
+                        AND EXISTS (SELECT 1 FROM jsonb_array_elements(s.state->'players') e(p)
+                                    WHERE e.p->>'user_id' = gp.user_id::text)
+                    ''', (user_id,))
+
                 # Обновляем имена в диалогах, если изменилось first_name или last_name
                 if 'first_name' in data or 'last_name' in data:
                     # Получаем актуальные данные пользователя
@@ -68,7 +68,7 @@ def handler(event: dict, context) -> dict:
         # Ищем по first_name, last_name, nickname
         escaped_query = search_query.replace("'", "''")
         cursor.execute(f"""
-            SELECT id, first_name, last_name, nickname, avatar_url
+            SELECT id, first_name, last_name, nickname, avatar_url, avatar_blurhash, avatar_color
             FROM t_p19021063_social_connect_platf.users
             WHERE 
                 LOWER(first_name) LIKE LOWER('%{escaped_query}%')
@@ -93,7 +93,7 @@ def handler(event: dict, context) -> dict:
     
     if profile_id:
         cursor.execute(
-            "SELECT id, name, nickname, gender, age_from as age, city, district, interests, bio, avatar_url, height, body_type, marital_status, children, profession, financial_status, has_car, has_housing, dating_goal, status_text, created_at, last_login_at, CASE WHEN last_login_at > NOW() - INTERVAL '5 minutes' THEN true ELSE false END as is_online FROM t_p19021063_social_connect_platf.users WHERE id = %s",
+            "SELECT id, name, nickname, gender, age_from as age, city, district, interests, bio, avatar_url, avatar_blurhash, avatar_color, height, body_type, marital_status, children, profession, financial_status, has_car, has_housing, dating_goal, status_text, created_at, last_login_at, CASE WHEN last_login_at > NOW() - INTERVAL '5 minutes' THEN true ELSE false END as is_online FROM t_p19021063_social_connect_platf.users WHERE id = %s",
             (profile_id,)
         )
         profile = cursor.fetchone()
@@ -130,6 +130,8 @@ def handler(event: dict, context) -> dict:
                     'interests': profile['interests'] or [],
                     'bio': profile['bio'],
                     'image': profile['avatar_url'],
+                    'imageBlurhash': profile['avatar_blurhash'],
+                    'imageColor': profile['avatar_color'],
                     'height': profile['height'],
                     'bodyType': profile['body_type'],
                     'maritalStatus': profile['marital_status'],
@@ -167,7 +169,7 @@ def handler(event: dict, context) -> dict:
     dating_goal = params.get('datingGoal', '')
     with_photo = params.get('withPhoto', '')
     
-    query = "SELECT id, name, nickname, gender, age_from as age, city, district, interests, bio, avatar_url, height, body_type, marital_status, children, profession, financial_status, has_car, has_housing, dating_goal, status_text, created_at, last_login_at, CASE WHEN last_login_at > NOW() - INTERVAL '5 minutes' THEN true ELSE false END as is_online FROM t_p19021063_social_connect_platf.users WHERE nickname IS NOT NULL"
+    query = "SELECT id, name, nickname, gender, age_from as age, city, district, interests, bio, avatar_url, COALESCE(avatar_variants->'256'->>'webp', avatar_url) as avatar_thumb_url, avatar_blurhash, avatar_color, height, body_type, marital_status, children, profession, financial_status, has_car, has_housing, dating_goal, status_text, created_at, last_login_at, CASE WHEN last_login_at > NOW() - INTERVAL '5 minutes' THEN true ELSE false END as is_online FROM t_p19021063_social_connect_platf.users WHERE nickname IS NOT NULL"
     
     if with_photo:
         query += " AND avatar_url IS NOT NULL AND avatar_url != ''"
@@ -222,6 +224,9 @@ def handler(event: dict, context) -> dict:
             'interests': profile['interests'] or [],
             'bio': profile['bio'],
             'image': profile['avatar_url'],
+            'imageThumb': profile['avatar_thumb_url'],
+            'imageBlurhash': profile['avatar_blurhash'],
+            'imageColor': profile['avatar_color'],
             'height': profile['height'],
             'bodyType': profile['body_type'],
             'maritalStatus': profile['marital_status'],
@@ -104,7 +104,7 @@ def handler(event: dict, context) -> dict:
             elif path == 'referrals':
                 # Получение списка приглашенных пользователей
                 cur.execute("""
-                    SELECT id, first_name, last_name, email, created_at, avatar_url
+                    SELECT id, first_name, last_name, email, created_at, avatar_url, avatar_blurhash, avatar_color
                     FROM t_p19021063_social_connect_platf.users 
                     WHERE referred_by = %s
                     ORDER BY created_at DESC
@@ -147,7 +147,7 @@ def handler(event: dict, context) -> dict:
             elif path == 'mentor':
                 # Получение информации о наставнике
                 cur.execute("""
-                    SELECT u2.id, u2.first_name, u2.last_name, u2.email, u2.avatar_url
+                    SELECT u2.id, u2.first_name, u2.last_name, u2.email, u2.avatar_url, u2.avatar_blurhash, u2.avatar_color
                     FROM t_p19021063_social_connect_platf.users u1
                     LEFT JOIN t_p19021063_social_connect_platf.users u2 ON u1.referred_by = u2.id
                     WHERE u1.id = %s
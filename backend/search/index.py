@@ -0,0 +1,294 @@
+"""Единый полнотекстовый поиск по людям, мероприятиям, услугам и объявлениям с фасетами по типам."""
+
+import hmac
+import json
+import os
+from datetime import timedelta
+import jwt as pyjwt
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+SCHEMA = os.environ.get('MAIN_DB_SCHEMA', 't_p19021063_social_connect_platf')
+
+DOC_TYPES = ('people', 'events', 'services', 'ads')
+MAX_LIMIT = 50
+# Окно перекрытия: транзакция, начатая до прошлого прогона и закоммиченная после, несёт
+# updated_at раньше водяного знака — такие строки забираются повторно (upsert идемпотентен)
+SYNC_OVERLAP = timedelta(minutes=5)
+
+# Для каждого типа: исходная таблица, выражение updated_at и SELECT, который
+# собирает строку search_documents. updated_at ставит триггер search_touch на любом
+# UPDATE (V0101), а не каждое место записи. Веса: A — заголовок/имя, B — категория,
+# C — описание, D — город и место.
+SOURCES = {
+    'people': {
+        'table': 'dating_profiles',
+        'updated_at': "COALESCE(dp.updated_at, dp.created_at, 'epoch'::timestamp)",
+        'select': f"""
+            SELECT 'people', dp.id, dp.user_id, dp.city, dp.gender, dp.age, TRUE,
+                   setweight(to_tsvector('russian', COALESCE(dp.name, '')), 'A') ||
+                   setweight(to_tsvector('russian', COALESCE(array_to_string(dp.interests, ' '), '')), 'B') ||
+                   setweight(to_tsvector('russian', COALESCE(dp.bio, '')), 'C') ||
+                   setweight(to_tsvector('russian', COALESCE(dp.city, '')), 'D'),
+                   jsonb_build_object(
+                       'id', dp.id, 'user_id', dp.user_id, 'name', dp.name, 'age', dp.age,
+                       'city', dp.city, 'gender', dp.gender, 'avatar_url', dp.avatar_url,
+                       'bio', dp.bio, 'interests', dp.interests
+                   ),
+                   {{updated_at}}
+            FROM {SCHEMA}.dating_profiles dp
+        """,
+    },
+    'events': {
+        'table': 'events',
+        'updated_at': "COALESCE(e.updated_at, e.created_at, 'epoch'::timestamp)",
+        'select': f"""
+            SELECT 'events', e.id, e.user_id, e.city, NULL, NULL, COALESCE(e.is_active, FALSE),
+                   setweight(to_tsvector('russian', COALESCE(e.title, '')), 'A') ||
+                   setweight(to_tsvector('russian', COALESCE(e.category, '')), 'B') ||
+                   setweight(to_tsvector('russian', COALESCE(e.description, '')), 'C') ||
+                   setweight(to_tsvector('russian', COALESCE(e.location, '') || ' ' || COALESCE(e.city, '')), 'D'),
+                   jsonb_build_object(
+                       'id', e.id, 'title', e.title, 'description', e.description, 'city', e.city,
+                       'category', e.category, 'event_date', e.event_date::text,
+                       'event_time', e.event_time::text, 'price', e.price, 'location', e.location,
+                       'author_name', e.author_name, 'image_url', e.image_url,
+                       'participants', e.participants
+                   ),
+                   {{updated_at}}
+            FROM {SCHEMA}.events e
+        """,
+    },
+    'services': {
+        'table': 'services',
+        'updated_at': "COALESCE(s.updated_at, s.created_at, 'epoch'::timestamp)",
+        'select': f"""
+            SELECT 'services', s.id, s.user_id, s.city, NULL, s.age, COALESCE(s.is_active, FALSE),
+                   setweight(to_tsvector('russian', COALESCE(s.title, '') || ' ' || COALESCE(s.name, '')), 'A') ||
+                   setweight(to_tsvector('russian', COALESCE(s.service_type, '')), 'B') ||
+                   setweight(to_tsvector('russian', COALESCE(s.description, '')), 'C') ||
+                   setweight(to_tsvector('russian', COALESCE(s.city, '')), 'D'),
+                   jsonb_build_object(
+                       'id', s.id, 'title', s.title, 'name', s.name, 'city', s.city,
+                       'service_type', s.service_type, 'description', s.description,
+                       'price', s.price, 'rating', s.rating, 'is_online', s.is_online,
+                       'avatar_url', s.avatar_url
+                   ),
+                   {{updated_at}}
+            FROM {SCHEMA}.services s
+        """,
+    },
+    'ads': {
+        'table': 'ads',
+        'updated_at': "GREATEST(COALESCE(a.updated_at, a.created_at, 'epoch'::timestamp), COALESCE(u.updated_at, 'epoch'::timestamp))",
+        'select': f"""
+            SELECT 'ads', a.id, a.user_id, u.city, NULL,
+                   EXTRACT(YEAR FROM AGE(CURRENT_DATE, u.birth_date))::int,
+                   a.status = 'active',
+                   setweight(to_tsvector('russian', COALESCE(a.schedule, '')), 'A') ||
+                   setweight(to_tsvector('russian', COALESCE(u.name, '')), 'B') ||
+                   setweight(to_tsvector('russian', COALESCE(u.city, '')), 'D'),
+                   jsonb_build_object(
+                       'id', a.id, 'action', a.action, 'schedule', a.schedule,
+                       'name', u.name, 'city', u.city,
+                       'age', EXTRACT(YEAR FROM AGE(CURRENT_DATE, u.birth_date))::int,
+                       'avatar_url', u.avatar_url, 'avatar_blurhash', u.avatar_blurhash,
+                       'avatar_color', u.avatar_color, 'user_id', u.id
+                   ),
+                   {{updated_at}}
+            FROM {SCHEMA}.ads a
+            JOIN {SCHEMA}.users u ON a.user_id = u.id
+        """,
+    },
+}
+
+
+def resp(status_code, body):
+    return {
+        'statusCode': status_code,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps(body, ensure_ascii=False, default=str),
+        'isBase64Encoded': False
+    }
+
+
+def get_header(event, name):
+    headers = event.get('headers') or {}
+    for key, value in headers.items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+def is_sync_allowed(event):
+    """Синхронизацию запускает планировщик с X-Cron-Secret = CRON_SECRET или администратор своим токеном"""
+    secret = os.environ.get('CRON_SECRET', '')
+    if secret and hmac.compare_digest(get_header(event, 'X-Cron-Secret') or '', secret):
+        return True
+    auth = get_header(event, 'X-Authorization') or get_header(event, 'Authorization') or ''
+    if not auth.startswith('Bearer '):
+        return False
+    try:
+        payload = pyjwt.decode(auth.replace('Bearer ', ''), os.environ.get('JWT_SECRET', ''), algorithms=['HS256'])
+    except Exception:
+        return False
+    return bool(payload.get('admin_id'))
+
+
+def refresh_ad_ages(cur):
+    """Возраст в объявлении считается от даты рождения и меняется без записи в таблицы —
+    документы, где он устарел, пересчитываются отдельно от водяного знака"""
+    cur.execute(f"""
+        UPDATE {SCHEMA}.search_documents d
+        SET age = x.age, payload = jsonb_set(d.payload, '{{age}}', to_jsonb(x.age)), indexed_at = NOW()
+        FROM (
+            SELECT a.id, EXTRACT(YEAR FROM AGE(CURRENT_DATE, u.birth_date))::int AS age
+            FROM {SCHEMA}.ads a
+            JOIN {SCHEMA}.users u ON a.user_id = u.id
+            WHERE u.birth_date IS NOT NULL
+        ) x
+        WHERE d.doc_type = 'ads' AND d.source_id = x.id AND d.age IS DISTINCT FROM x.age
+    """)
+    return cur.rowcount
+
+
+def sync_documents(cur, full=False):
+    """Переносит изменённые с прошлого прогона строки в search_documents и удаляет исчезнувшие"""
+    stats = {}
+    for doc_type, source in SOURCES.items():
+        watermark = 'epoch'
+        if not full:
+            cur.execute(f"""
+                SELECT COALESCE(MAX(source_updated_at) - %s, 'epoch'::timestamp) AS wm
+                FROM {SCHEMA}.search_documents WHERE doc_type = %s
+            """, (SYNC_OVERLAP, doc_type))
+            watermark = cur.fetchone()['wm']
+
+        select_sql = source['select'].format(updated_at=source['updated_at'])
+        cur.execute(f"""
+            INSERT INTO {SCHEMA}.search_documents
+                (doc_type, source_id, user_id, city, gender, age, is_active, search_vector, payload, source_updated_at)
+            {select_sql}
+            WHERE {source['updated_at']} >= %s
+            ON CONFLICT (doc_type, source_id) DO UPDATE SET
+                user_id = EXCLUDED.user_id, city = EXCLUDED.city, gender = EXCLUDED.gender,
+                age = EXCLUDED.age, is_active = EXCLUDED.is_active,
+                search_vector = EXCLUDED.search_vector, payload = EXCLUDED.payload,
+                source_updated_at = EXCLUDED.source_updated_at, indexed_at = NOW()
+        """, (watermark,))
+        upserted = cur.rowcount
+
+        cur.execute(f"""
+            DELETE FROM {SCHEMA}.search_documents d
+            WHERE d.doc_type = %s
+              AND NOT EXISTS (SELECT 1 FROM {SCHEMA}.{source['table']} src WHERE src.id = d.source_id)
+        """, (doc_type,))
+        stats[doc_type] = {'upserted': upserted, 'deleted': cur.rowcount}
+    stats['ads']['aged'] = refresh_ad_ages(cur)
+    return stats
+
+
+def search(cur, query, doc_type=None, city=None, limit=20, offset=0):
+    """Один ранжированный запрос по всем типам: страница результатов плюс фасеты по типам"""
+    conditions = ["d.is_active", "d.search_vector @@ q.query"]
+    params = [query]
+    if city:
+        conditions.append("LOWER(d.city) = %s")
+        params.append(city.lower())
+
+    cur.execute(f"""
+        WITH matches AS (
+            SELECT d.doc_type, d.payload, d.source_updated_at,
+                   ts_rank_cd(d.search_vector, q.query) AS rank
+            FROM {SCHEMA}.search_documents d, websearch_to_tsquery('russian', %s) AS q(query)
+            WHERE {' AND '.join(conditions)}
+        ),
+        facets AS (
+            SELECT COALESCE(jsonb_object_agg(doc_type, cnt), '{{}}'::jsonb) AS facets
+            FROM (SELECT doc_type, COUNT(*) AS cnt FROM matches GROUP BY doc_type) c
+        )
+        SELECT f.facets, p.doc_type, p.payload, p.rank
+        FROM facets f
+        LEFT JOIN LATERAL (
+            SELECT m.doc_type, m.payload, m.rank
+            FROM matches m
+            WHERE %s::text IS NULL OR m.doc_type = %s
+            ORDER BY m.rank DESC, m.source_updated_at DESC
+            LIMIT %s OFFSET %s
+        ) p ON TRUE
+    """, params + [doc_type, doc_type, limit, offset])
+
+    rows = cur.fetchall()
+    facets = rows[0]['facets'] if rows else {}
+    results = [
+        {**row['payload'], 'type': row['doc_type'], 'rank': round(float(row['rank']), 4)}
+        for row in rows if row['doc_type']
+    ]
+    return results, facets
+
+
+def handler(event: dict, context) -> dict:
+    """Поиск по сайту: GET ?q=&type=&city=&limit=&offset=; POST ?action=sync обновляет индекс
+    (запускается по расписанию с X-Cron-Secret или администратором, &full=1 — полная пересборка)"""
+    method = event.get('httpMethod', 'GET')
+
+    if method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Authorization, X-Cron-Secret'
+            },
+            'body': '',
+            'isBase64Encoded': False
+        }
+
+    params = event.get('queryStringParameters') or {}
+    action = params.get('action', 'search')
+
+    if method == 'POST' and action == 'sync':
+        if not is_sync_allowed(event):
+            return resp(403, {'error': 'Синхронизация доступна только планировщику и администратору'})
+        conn = psycopg2.connect(os.environ['DATABASE_URL'])
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            stats = sync_documents(cur, full=params.get('full') == '1')
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+        return resp(200, {'success': True, 'stats': stats})
+
+    if method != 'GET' or action != 'search':
+        return resp(400, {'error': 'Неверный метод или действие'})
+
+    query = (params.get('q') or '').strip()
+    if not query:
+        return resp(400, {'error': 'Параметр q обязателен'})
+
+    doc_type = params.get('type') or None
+    if doc_type and doc_type not in DOC_TYPES:
+        return resp(400, {'error': f'type: {", ".join(DOC_TYPES)}'})
+
+    try:
+        limit = min(max(int(params.get('limit', 20)), 1), MAX_LIMIT)
+        offset = max(int(params.get('offset', 0)), 0)
+    except ValueError:
+        return resp(400, {'error': 'limit и offset должны быть числами'})
+
+    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        results, facets = search(cur, query, doc_type, (params.get('city') or '').strip() or None, limit, offset)
+    finally:
+        cur.close()
+        conn.close()
+
+    return resp(200, {
+        'query': query,
+        'type': doc_type,
+        'results': results,
+        'facets': facets,
+        'count': len(results)
+    })
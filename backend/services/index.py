@@ -4,7 +4,7 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 import jwt as pyjwt
 import base64
-import boto3
+from storage import get_storage
 # v4: fix schema prefix for INSERT + user lookup
 
 def verify_token(token: str) -> dict | None:
@@ -154,6 +154,7 @@ def handler(event: dict, context) -> dict:
                     }
                 cursor.execute(f'''
                     SELECT u.id as user_id, u.first_name, u.last_name, u.nickname, u.avatar_url,
+                           u.avatar_blurhash, u.avatar_color,
                            u.city, u.bio, u.gender,
                            (SELECT EXTRACT(YEAR FROM AGE(CURRENT_DATE, u.birth_date::date))
                             FROM users WHERE id = u.id AND birth_date IS NOT NULL) as age
@@ -233,7 +234,8 @@ def handler(event: dict, context) -> dict:
             
             query = '''
                 SELECT s.*, sc.name as category_name, ss.name as subcategory_name,
-                       u.name as user_name, u.avatar_url as user_avatar, u.nickname as user_nickname, c.name as city_name
+                       u.name as user_name, u.avatar_url as user_avatar, u.nickname as user_nickname, c.name as city_name,
+                       u.avatar_blurhash as user_avatar_blurhash, u.avatar_color as user_avatar_color
                 FROM services s
                 LEFT JOIN service_categories sc ON s.category_id = sc.id
                 LEFT JOIN service_subcategories ss ON s.subcategory_id = ss.id
@@ -322,18 +324,13 @@ def handler(event: dict, context) -> dict:
             # Handle portfolio images
             portfolio = body.get('portfolio', [])
             if portfolio:
-                s3 = boto3.client('s3',
-                    endpoint_url='https://bucket.poehali.dev',
-                    aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
-                    aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY']
-                )
+                storage = get_storage()
                 
                 for idx, img_data in enumerate(portfolio[:10]):
                     try:
                         img_bytes = base64.b64decode(img_data.split(',')[1] if ',' in img_data else img_data)
                         key = f'services/{service_id}/portfolio_{idx}.jpg'
-                        s3.put_object(Bucket='files', Key=key, Body=img_bytes, ContentType='image/jpeg')
-                        cdn_url = f"https://cdn.poehali.dev/projects/{os.environ['AWS_ACCESS_KEY_ID']}/bucket/{key}"
+                        cdn_url = storage.put(key, img_bytes, 'image/jpeg')
                         cursor.execute(f"INSERT INTO {schema}.service_portfolio (service_id, image_url) VALUES ({escape_sql(service_id)}, {escape_sql(cdn_url)})")
                     except Exception as e:
                         print(f'Error uploading image: {e}')
@@ -420,11 +417,7 @@ def handler(event: dict, context) -> dict:
                 
                 portfolio = body.get('portfolio', [])
                 if portfolio:
-                    s3 = boto3.client('s3',
-                        endpoint_url='https://bucket.poehali.dev',
-                        aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
-                        aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY']
-                    )
+                    storage = get_storage()
                     
                     for idx, img_data in enumerate(portfolio[:10]):
                         try:
@@ -433,8 +426,7 @@ def handler(event: dict, context) -> dict:
                             else:
                                 img_bytes = base64.b64decode(img_data.split(',')[1] if ',' in img_data else img_data)
                                 key = f'services/{service_id}/portfolio_{idx}.jpg'
-                                s3.put_object(Bucket='files', Key=key, Body=img_bytes, ContentType='image/jpeg')
-                                cdn_url = f"https://cdn.poehali.dev/projects/{os.environ['AWS_ACCESS_KEY_ID']}/bucket/{key}"
+                                cdn_url = storage.put(key, img_bytes, 'image/jpeg')
                                 cursor.execute(f"INSERT INTO service_portfolio (service_id, image_url) VALUES ({escape_sql(service_id)}, {escape_sql(cdn_url)})")
                         except Exception as e:
                             print(f'Error uploading image: {e}')
@@ -2,218 +2,17 @@
 
 import json
 import os
-import re
 import asyncio
 import hashlib
+import urllib.request
 import edge_tts
-import boto3
+from normalizer import clean_text_for_tts
+from storage import get_storage
 
 
 VOICE = 'ru-RU-SvetlanaNeural'
-
-EMOJI_RE = re.compile(
-    r'[\U0001F600-\U0001F64F'
-    r'\U0001F300-\U0001F5FF'
-    r'\U0001F680-\U0001F6FF'
-    r'\U0001F1E0-\U0001F1FF'
-    r'\U00002702-\U000027B0'
-    r'\U000024C2-\U0001F251'
-    r'\U0001F900-\U0001F9FF'
-    r'\U0001FA00-\U0001FA6F'
-    r'\U0001FA70-\U0001FAFF'
-    r'\U00002600-\U000026FF'
-    r'\U0000FE00-\U0000FE0F'
-    r'\U0000200D'
-    r'\U00002764\U0000FE0F?'
-    r']+', re.UNICODE
-)
-
-STRESS_DICT = {
-    'звонит': 'звони\u0301т',
-    'звонишь': 'звони\u0301шь',
-    'звонят': 'звоня\u0301т',
-    'красивее': 'краси\u0301вее',
-    'красивей': 'краси\u0301вей',
-    'каталог': 'катало\u0301г',
-    'договор': 'догово\u0301р',
-    'договоры': 'догово\u0301ры',
-    'торты': 'то\u0301рты',
-    'тортов': 'то\u0301ртов',
-    'банты': 'ба\u0301нты',
-    'шарфы': 'ша\u0301рфы',
-    'жалюзи': 'жалюзи\u0301',
-    'квартал': 'кварта\u0301л',
-    'обеспечение': 'обеспе\u0301чение',
-    'творог': 'тво\u0301ро\u0301г',
-    'свекла': 'свёкла',
-    'щавель': 'щаве\u0301ль',
-    'мастерски': 'мастерски\u0301',
-    'облегчить': 'облегчи\u0301ть',
-    'углубить': 'углуби\u0301ть',
-    'включит': 'включи\u0301т',
-    'включишь': 'включи\u0301шь',
-    'балованный': 'бало\u0301ванный',
-    'баловать': 'балова\u0301ть',
-    'досуг': 'досу\u0301г',
-    'феномен': 'фено\u0301мен',
-    'ходатайство': 'хода\u0301тайство',
-    'завидно': 'зави\u0301дно',
-    'средства': 'сре\u0301дства',
-    'километр': 'киломе\u0301тр',
-    'километров': 'киломе\u0301тров',
-    'новорожденный': 'новорождённый',
-    'танцовщица': 'танцо\u0301вщица',
-    'начался': 'начался\u0301',
-    'началась': 'началась\u0301',
-    'понял': 'по\u0301нял',
-    'поняла': 'поняла\u0301',
-    'приняла': 'приняла\u0301',
-    'принял': 'при\u0301нял',
-    'занята': 'занята\u0301',
-    'занят': 'за\u0301нят',
-    'создал': 'со\u0301здал',
-    'создала': 'создала\u0301',
-    'сироты': 'сиро\u0301ты',
-    'мусоропровод': 'мусоропрово\u0301д',
-    'газопровод': 'газопрово\u0301д',
-    'водопровод': 'водопрово\u0301д',
-    'нефтепровод': 'нефтепрово\u0301д',
-    'столяр': 'столя\u0301р',
-    'маркетинг': 'ма\u0301ркетинг',
-    'оптовый': 'опто\u0301вый',
-    'мастерски': 'мастерски\u0301',
-    'иконопись': 'и\u0301конопись',
-    'вероисповедание': 'вероиспове\u0301дание',
-    'некролог': 'некроло\u0301г',
-    'генезис': 'ге\u0301незис',
-    'диспансер': 'диспансе\u0301р',
-    'туфля': 'ту\u0301фля',
-    'бармен': 'ба\u0301рмен',
-    'латте': 'ла\u0301тте',
-    'тирамису': 'тирамису\u0301',
-}
-
-SLANG_DICT = {
-    'лол': 'ха-ха',
-    'лмао': 'ой, смешно',
-    'рофл': 'ха-ха, шутка',
-    'рофлю': 'шучу',
-    'кек': 'ха-ха',
-    'имхо': 'по-моему',
-    'имо': 'по-моему',
-    'чел': 'человек',
-    'чела': 'человека',
-    'пжлст': 'пожалуйста',
-    'пж': 'пожалуйста',
-    'спс': 'спасибо',
-    'пасиб': 'спасибо',
-    'нзч': 'не за что',
-    'ок': 'окей',
-    'норм': 'нормально',
-    'оч': 'очень',
-    'щас': 'сейчас',
-    'ща': 'сейчас',
-    'чё': 'что',
-    'чо': 'что',
-    'шо': 'что',
-    'ваще': 'вообще',
-    'вобще': 'вообще',
-    'канеш': 'конечно',
-    'кнш': 'конечно',
-    'кст': 'кстати',
-    'тк': 'так как',
-    'тп': 'тупой',
-    'хз': 'не знаю',
-    'кд': 'куда',
-    'лан': 'ладно',
-    'ладн': 'ладно',
-    'плз': 'пожалуйста',
-    'плс': 'пожалуйста',
-    'тбх': 'честно говоря',
-    'збс': 'замечательно',
-    'ахах': 'ха-ха-ха',
-    'ахахах': 'ха-ха-ха',
-    'хаха': 'ха-ха',
-    'хахах': 'ха-ха-ха',
-    'ахаха': 'ха-ха-ха',
-    'кринж': 'неловкость',
-    'кринжово': 'неловко',
-    'вайб': 'атмосфера',
-    'вайбы': 'атмосфера',
-    'краш': 'объект обожания',
-    'токс': 'токсичный',
-    'токсик': 'токсичный человек',
-    'зашквар': 'позор',
-    'душнила': 'зануда',
-    'душно': 'занудно',
-    'чилить': 'отдыхать',
-    'чиллю': 'отдыхаю',
-    'чилю': 'отдыхаю',
-    'флексить': 'хвастаться',
-    'флекс': 'хвастовство',
-    'агонь': 'огонь',
-    'изи': 'легко',
-    'рил': 'реально',
-    'рили': 'реально',
-    'фр': 'реально',
-    'бро': 'братишка',
-    'сис': 'сестрёнка',
-    'лс': 'личные сообщения',
-    'дм': 'личные сообщения',
-    'гг': 'молодец',
-    'жиза': 'жизненно',
-    'сорян': 'извини',
-    'сори': 'извини',
-    'сорь': 'извини',
-    'мб': 'может быть',
-    'хейт': 'ненависть',
-    'хейтить': 'ненавидеть',
-    'хейтер': 'ненавистник',
-    'шипперить': 'представлять парой',
-    'стримить': 'вести трансляцию',
-    'донат': 'пожертвование',
-    'донатить': 'жертвовать',
-    'го': 'давай',
-    'гоу': 'давай',
-    'тож': 'тоже',
-    'прост': 'просто',
-    'мож': 'может',
-    'оке': 'окей',
-    'окей': 'океей',
-}
-
-STRESS_RE = re.compile(
-    r'\b(' + '|'.join(re.escape(k) for k in STRESS_DICT) + r')\b',
-    re.IGNORECASE
-)
-
-SLANG_RE = re.compile(
-    r'\b(' + '|'.join(re.escape(k) for k in SLANG_DICT) + r')\b',
-    re.IGNORECASE
-)
-
-def _replace_stress(m: re.Match) -> str:
-    word = m.group(0)
-    key = word.lower()
-    replacement = STRESS_DICT.get(key, word)
-    if word[0].isupper():
-        return replacement[0].upper() + replacement[1:]
-    return replacement
-
-def _replace_slang(m: re.Match) -> str:
-    word = m.group(0)
-    key = word.lower()
-    replacement = SLANG_DICT.get(key, word)
-    if word[0].isupper():
-        return replacement[0].upper() + replacement[1:]
-    return replacement
-
-def clean_text_for_tts(text: str) -> str:
-    text = EMOJI_RE.sub('', text)
-    text = SLANG_RE.sub(_replace_slang, text)
-    text = STRESS_RE.sub(_replace_stress, text)
-    text = re.sub(r'\s{2,}', ' ', text).strip()
-    return text
+# HTTP-заглушка синтеза для бенчмарков (tools/fake_services): POST {url}/synthesize отдаёт MP3
+EDGE_TTS_URL = os.environ.get('EDGE_TTS_URL')
 
 MOOD_PRESETS = {
     'whisper': {
@@ -244,11 +43,25 @@ MOOD_PRESETS = {
 }
 
 
+def fetch_audio(text: str, preset: dict) -> bytes:
+    payload = json.dumps({'text': text, 'voice': VOICE, **preset}).encode()
+    request = urllib.request.Request(
+        f"{EDGE_TTS_URL.rstrip('/')}/synthesize",
+        data=payload,
+        headers={'Content-Type': 'application/json'},
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
 async def generate_audio(text: str, mood: str = 'default') -> bytes:
     text = clean_text_for_tts(text)
     if not text:
         return b''
     preset = MOOD_PRESETS.get(mood, MOOD_PRESETS['default'])
+    if EDGE_TTS_URL:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, fetch_audio, text, preset)
     communicate = edge_tts.Communicate(
         text,
         VOICE,
@@ -263,25 +76,105 @@ async def generate_audio(text: str, mood: str = 'default') -> bytes:
     return audio_data
 
 
-def upload_to_s3(audio_bytes: bytes, filename: str) -> str:
-    s3 = boto3.client(
-        's3',
-        endpoint_url='https://bucket.poehali.dev',
-        aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
-        aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY'],
-    )
-    key = f'voice/{filename}'
-    s3.put_object(
-        Bucket='files',
-        Key=key,
-        Body=audio_bytes,
-        ContentType='audio/mpeg',
+CORS_HEADERS = {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+
+MAX_TEXT_LENGTH = 500
+MAX_BATCH_SEGMENTS = 10
+
+
+def json_response(status: int, body: dict) -> dict:
+    return {
+        'statusCode': status,
+        'headers': CORS_HEADERS,
+        'body': json.dumps(body, ensure_ascii=False),
+    }
+
+
+def upload_audio(audio_bytes: bytes, filename: str) -> str:
+    return get_storage().put(f'voice/{filename}', audio_bytes, 'audio/mpeg')
+
+
+def normalize_segment(text: str, mood: str) -> tuple:
+    """Приводит текст и настроение к виду, по которому строится имя файла"""
+    text = (text or '').strip()
+    mood = (mood or 'default').strip().lower()
+    if mood not in MOOD_PRESETS:
+        mood = 'default'
+    if len(text) > MAX_TEXT_LENGTH:
+        text = text[:MAX_TEXT_LENGTH - 3] + '...'
+    return text, mood
+
+
+def segment_filename(text: str, mood: str) -> str:
+    text_hash = hashlib.md5(f'{mood}:{text}'.encode()).hexdigest()[:12]
+    return f'olesya_{mood}_{text_hash}.mp3'
+
+
+async def synthesize_segment(text: str, mood: str, filename: str) -> dict:
+    audio_bytes = await generate_audio(text, mood)
+    if not audio_bytes:
+        return {'error': 'Failed to generate audio'}
+    loop = asyncio.get_event_loop()
+    audio_url = await loop.run_in_executor(None, upload_audio, audio_bytes, filename)
+    return {
+        'audioUrl': audio_url,
+        'duration': round(len(audio_bytes) / 16000, 1),
+    }
+
+
+async def synthesize_batch(segments: list) -> list:
+    """Озвучивает все уникальные сегменты параллельно в одном event loop"""
+    unique = {}
+    for text, mood, filename in segments:
+        if filename not in unique:
+            unique[filename] = (text, mood)
+
+    filenames = list(unique)
+    results = await asyncio.gather(
+        *(synthesize_segment(*unique[name], name) for name in filenames),
+        return_exceptions=True,
     )
-    return f"https://cdn.poehali.dev/projects/{os.environ['AWS_ACCESS_KEY_ID']}/bucket/{key}"
+
+    by_filename = {}
+    for name, result in zip(filenames, results):
+        if isinstance(result, Exception):
+            print(f'TTS batch error for {name}: {result}')
+            result = {'error': 'Failed to generate audio'}
+        by_filename[name] = result
+
+    return [
+        {'text': text, 'mood': mood, **by_filename[filename]}
+        for text, mood, filename in segments
+    ]
+
+
+def handle_batch(body: dict) -> dict:
+    raw_segments = body.get('segments')
+    if not isinstance(raw_segments, list) or not raw_segments:
+        return json_response(400, {'error': 'segments must be a non-empty list'})
+    if len(raw_segments) > MAX_BATCH_SEGMENTS:
+        return json_response(400, {'error': f'Too many segments (max {MAX_BATCH_SEGMENTS})'})
+
+    segments = []
+    for item in raw_segments:
+        if not isinstance(item, dict):
+            return json_response(400, {'error': 'Each segment must be an object with text and mood'})
+        text, mood = normalize_segment(item.get('text'), item.get('mood'))
+        if len(text) < 2:
+            return json_response(400, {'error': 'Text is required (min 2 chars)'})
+        segments.append((text, mood, segment_filename(text, mood)))
+
+    items = asyncio.get_event_loop().run_until_complete(synthesize_batch(segments))
+
+    if not any(item.get('audioUrl') for item in items):
+        return json_response(500, {'error': 'Failed to generate audio', 'items': items})
+
+    return json_response(200, {'items': items, 'count': len(items)})
 
 
 def handler(event: dict, context) -> dict:
-    """Генерирует аудио из текста нежным женским голосом Олеси с поддержкой настроений"""
+    """Генерирует аудио из текста нежным женским голосом Олеси с поддержкой настроений.
+    ?action=batch принимает список сегментов {text, mood} и возвращает все ссылки одним ответом."""
     method = event.get('httpMethod', 'POST')
 
     if method == 'OPTIONS':
@@ -297,49 +190,30 @@ def handler(event: dict, context) -> dict:
         }
 
     if method != 'POST':
-        return {
-            'statusCode': 405,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Method not allowed'}),
-        }
+        return json_response(405, {'error': 'Method not allowed'})
 
+    params = event.get('queryStringParameters') or {}
     body = json.loads(event.get('body') or '{}')
-    text = (body.get('text') or '').strip()
-    mood = (body.get('mood') or 'default').strip().lower()
 
-    if mood not in MOOD_PRESETS:
-        mood = 'default'
+    if params.get('action') == 'batch' or 'segments' in body:
+        return handle_batch(body)
 
-    if not text or len(text) < 2:
-        return {
-            'statusCode': 400,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Text is required (min 2 chars)'}),
-        }
+    text, mood = normalize_segment(body.get('text'), body.get('mood'))
 
-    if len(text) > 500:
-        text = text[:497] + '...'
+    if not text or len(text) < 2:
+        return json_response(400, {'error': 'Text is required (min 2 chars)'})
 
-    text_hash = hashlib.md5(f'{mood}:{text}'.encode()).hexdigest()[:12]
-    filename = f'olesya_{mood}_{text_hash}.mp3'
+    filename = segment_filename(text, mood)
 
     audio_bytes = asyncio.get_event_loop().run_until_complete(generate_audio(text, mood))
 
     if not audio_bytes:
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Failed to generate audio'}),
-        }
+        return json_response(500, {'error': 'Failed to generate audio'})
 
-    audio_url = upload_to_s3(audio_bytes, filename)
+    audio_url = upload_audio(audio_bytes, filename)
 
-    return {
-        'statusCode': 200,
-        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps({
-            'audioUrl': audio_url,
-            'duration': round(len(audio_bytes) / 16000, 1),
-            'mood': mood,
-        }, ensure_ascii=False),
-    }
\ No newline at end of file
+    return json_response(200, {
+        'audioUrl': audio_url,
+        'duration': round(len(audio_bytes) / 16000, 1),
+        'mood': mood,
+    })
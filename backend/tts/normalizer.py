@@ -0,0 +1,450 @@
+"""Нормализация текста для TTS за один проход: эмодзи, сленг, ударения и числа словами.
+
+Время (19:00), десятичные дроби (2.5), число с единицей (5км, 2,5 кг, 30%) и число перед «год»
+разбираются раньше общего правила для чисел. Перед «год» порядковое числительное только у года:
+четыре цифры или предлог в годовом обороте («в 95 году»); иначе это возраст или срок («3 года»).
+Разряды через пробел (1 000 000) читаются одним числом."""
+
+import re
+
+
+EMOJI_CHARS = (
+    '\U0001F600-\U0001F64F'
+    '\U0001F300-\U0001F5FF'
+    '\U0001F680-\U0001F6FF'
+    '\U0001F1E0-\U0001F1FF'
+    '\U00002702-\U000027B0'
+    '\U000024C2-\U0001F251'
+    '\U0001F900-\U0001F9FF'
+    '\U0001FA00-\U0001FA6F'
+    '\U0001FA70-\U0001FAFF'
+    '\U00002600-\U000026FF'
+    '\U0000FE00-\U0000FE0F'
+    '\U0000200D'
+    '\U00002764'
+)
+
+STRESS_DICT = {
+    'звонит': 'звони\u0301т',
+    'звонишь': 'звони\u0301шь',
+    'звонят': 'звоня\u0301т',
+    'красивее': 'краси\u0301вее',
+    'красивей': 'краси\u0301вей',
+    'каталог': 'катало\u0301г',
+    'договор': 'догово\u0301р',
+    'договоры': 'догово\u0301ры',
+    'торты': 'то\u0301рты',
+    'тортов': 'то\u0301ртов',
+    'банты': 'ба\u0301нты',
+    'шарфы': 'ша\u0301рфы',
+    'жалюзи': 'жалюзи\u0301',
+    'квартал': 'кварта\u0301л',
+    'обеспечение': 'обеспе\u0301чение',
+    'творог': 'тво\u0301ро\u0301г',
+    'свекла': 'свёкла',
+    'щавель': 'щаве\u0301ль',
+    'мастерски': 'мастерски\u0301',
+    'облегчить': 'облегчи\u0301ть',
+    'углубить': 'углуби\u0301ть',
+    'включит': 'включи\u0301т',
+    'включишь': 'включи\u0301шь',
+    'балованный': 'бало\u0301ванный',
+    'баловать': 'балова\u0301ть',
+    'досуг': 'досу\u0301г',
+    'феномен': 'фено\u0301мен',
+    'ходатайство': 'хода\u0301тайство',
+    'завидно': 'зави\u0301дно',
+    'средства': 'сре\u0301дства',
+    'километр': 'киломе\u0301тр',
+    'километров': 'киломе\u0301тров',
+    'новорожденный': 'новорождённый',
+    'танцовщица': 'танцо\u0301вщица',
+    'начался': 'начался\u0301',
+    'началась': 'началась\u0301',
+    'понял': 'по\u0301нял',
+    'поняла': 'поняла\u0301',
+    'приняла': 'приняла\u0301',
+    'принял': 'при\u0301нял',
+    'занята': 'занята\u0301',
+    'занят': 'за\u0301нят',
+    'создал': 'со\u0301здал',
+    'создала': 'создала\u0301',
+    'сироты': 'сиро\u0301ты',
+    'мусоропровод': 'мусоропрово\u0301д',
+    'газопровод': 'газопрово\u0301д',
+    'водопровод': 'водопрово\u0301д',
+    'нефтепровод': 'нефтепрово\u0301д',
+    'столяр': 'столя\u0301р',
+    'маркетинг': 'ма\u0301ркетинг',
+    'оптовый': 'опто\u0301вый',
+    'мастерски': 'мастерски\u0301',
+    'иконопись': 'и\u0301конопись',
+    'вероисповедание': 'вероиспове\u0301дание',
+    'некролог': 'некроло\u0301г',
+    'генезис': 'ге\u0301незис',
+    'диспансер': 'диспансе\u0301р',
+    'туфля': 'ту\u0301фля',
+    'бармен': 'ба\u0301рмен',
+    'латте': 'ла\u0301тте',
+    'тирамису': 'тирамису\u0301',
+}
+
+SLANG_DICT = {
+    'лол': 'ха-ха',
+    'лмао': 'ой, смешно',
+    'рофл': 'ха-ха, шутка',
+    'рофлю': 'шучу',
+    'кек': 'ха-ха',
+    'имхо': 'по-моему',
+    'имо': 'по-моему',
+    'чел': 'человек',
+    'чела': 'человека',
+    'пжлст': 'пожалуйста',
+    'пж': 'пожалуйста',
+    'спс': 'спасибо',
+    'пасиб': 'спасибо',
+    'нзч': 'не за что',
+    'ок': 'окей',
+    'норм': 'нормально',
+    'оч': 'очень',
+    'щас': 'сейчас',
+    'ща': 'сейчас',
+    'чё': 'что',
+    'чо': 'что',
+    'шо': 'что',
+    'ваще': 'вообще',
+    'вобще': 'вообще',
+    'канеш': 'конечно',
+    'кнш': 'конечно',
+    'кст': 'кстати',
+    'тк': 'так как',
+    'тп': 'тупой',
+    'хз': 'не знаю',
+    'кд': 'куда',
+    'лан': 'ладно',
+    'ладн': 'ладно',
+    'плз': 'пожалуйста',
+    'плс': 'пожалуйста',
+    'тбх': 'честно говоря',
+    'збс': 'замечательно',
+    'ахах': 'ха-ха-ха',
+    'ахахах': 'ха-ха-ха',
+    'хаха': 'ха-ха',
+    'хахах': 'ха-ха-ха',
+    'ахаха': 'ха-ха-ха',
+    'кринж': 'неловкость',
+    'кринжово': 'неловко',
+    'вайб': 'атмосфера',
+    'вайбы': 'атмосфера',
+    'краш': 'объект обожания',
+    'токс': 'токсичный',
+    'токсик': 'токсичный человек',
+    'зашквар': 'позор',
+    'душнила': 'зануда',
+    'душно': 'занудно',
+    'чилить': 'отдыхать',
+    'чиллю': 'отдыхаю',
+    'чилю': 'отдыхаю',
+    'флексить': 'хвастаться',
+    'флекс': 'хвастовство',
+    'агонь': 'огонь',
+    'изи': 'легко',
+    'рил': 'реально',
+    'рили': 'реально',
+    'фр': 'реально',
+    'бро': 'братишка',
+    'сис': 'сестрёнка',
+    'лс': 'личные сообщения',
+    'дм': 'личные сообщения',
+    'гг': 'молодец',
+    'жиза': 'жизненно',
+    'сорян': 'извини',
+    'сори': 'извини',
+    'сорь': 'извини',
+    'мб': 'может быть',
+    'хейт': 'ненависть',
+    'хейтить': 'ненавидеть',
+    'хейтер': 'ненавистник',
+    'шипперить': 'представлять парой',
+    'стримить': 'вести трансляцию',
+    'донат': 'пожертвование',
+    'донатить': 'жертвовать',
+    'го': 'давай',
+    'гоу': 'давай',
+    'тож': 'тоже',
+    'прост': 'просто',
+    'мож': 'может',
+    'оке': 'окей',
+    'окей': 'океей',
+}
+
+ONES = ['', 'один', 'два', 'три', 'четыре', 'пять', 'шесть', 'семь', 'восемь', 'девять']
+ONES_FEMININE = ['', 'одна', 'две'] + ONES[3:]
+TEENS = [
+    'десять', 'одиннадцать', 'двенадцать', 'тринадцать', 'четырнадцать',
+    'пятнадцать', 'шестнадцать', 'семнадцать', 'восемнадцать', 'девятнадцать',
+]
+TENS = [
+    '', '', 'двадцать', 'тридцать', 'сорок', 'пятьдесят',
+    'шестьдесят', 'семьдесят', 'восемьдесят', 'девяносто',
+]
+HUNDREDS = [
+    '', 'сто', 'двести', 'триста', 'четыреста', 'пятьсот',
+    'шестьсот', 'семьсот', 'восемьсот', 'девятьсот',
+]
+# (формы для 1, 2-4, 5+; женский род)
+SCALES = [
+    (('', '', ''), False),
+    (('тысяча', 'тысячи', 'тысяч'), True),
+    (('миллион', 'миллиона', 'миллионов'), False),
+    (('миллиард', 'миллиарда', 'миллиардов'), False),
+]
+MAX_SPOKEN_DIGITS = 12
+MAX_FRACTION_DIGITS = 3
+
+WHOLE_FORMS = ('целая', 'целых', 'целых')
+FRACTION_FORMS = [
+    ('десятая', 'десятых', 'десятых'),
+    ('сотая', 'сотых', 'сотых'),
+    ('тысячная', 'тысячных', 'тысячных'),
+]
+DIGIT_NAMES = ['ноль'] + ONES[1:]
+
+# Сокращение -> (формы для 1, 2-4, 5+; женский род). «г» и «с» не входят: год/грамм и предлог
+UNITS = {
+    'км': (('километр', 'километра', 'километров'), False),
+    'м': (('метр', 'метра', 'метров'), False),
+    'см': (('сантиметр', 'сантиметра', 'сантиметров'), False),
+    'мм': (('миллиметр', 'миллиметра', 'миллиметров'), False),
+    'кг': (('килограмм', 'килограмма', 'килограммов'), False),
+    'л': (('литр', 'литра', 'литров'), False),
+    'мл': (('миллилитр', 'миллилитра', 'миллилитров'), False),
+    'ч': (('час', 'часа', 'часов'), False),
+    'мин': (('минута', 'минуты', 'минут'), True),
+    'сек': (('секунда', 'секунды', 'секунд'), True),
+    'руб': (('рубль', 'рубля', 'рублей'), False),
+    'р': (('рубль', 'рубля', 'рублей'), False),
+    '₽': (('рубль', 'рубля', 'рублей'), False),
+    '%': (('процент', 'процента', 'процентов'), False),
+}
+
+# Порядковые числительные в именительном падеже мужского рода: последний разряд года
+ORDINAL_ONES = ['', 'первый', 'второй', 'третий', 'четвёртый', 'пятый', 'шестой', 'седьмой', 'восьмой', 'девятый']
+ORDINAL_TEENS = [
+    'десятый', 'одиннадцатый', 'двенадцатый', 'тринадцатый', 'четырнадцатый',
+    'пятнадцатый', 'шестнадцатый', 'семнадцатый', 'восемнадцатый', 'девятнадцатый',
+]
+ORDINAL_TENS = [
+    '', '', 'двадцатый', 'тридцатый', 'сороковой', 'пятидесятый',
+    'шестидесятый', 'семидесятый', 'восьмидесятый', 'девяностый',
+]
+ORDINAL_HUNDREDS = [
+    '', 'сотый', 'двухсотый', 'трёхсотый', 'четырёхсотый', 'пятисотый',
+    'шестисотый', 'семисотый', 'восьмисотый', 'девятисотый',
+]
+# «двухтысячный»: родительный падеж числа тысяч как приставка
+THOUSANDS_PREFIX = ['', '', 'двух', 'трёх', 'четырёх', 'пяти', 'шести', 'семи', 'восьми', 'девяти']
+# Падеж порядкового числительного по форме слова «год»
+YEAR_CASES = {'год': 'nom', 'года': 'gen', 'году': 'prep', 'годом': 'ins'}
+# Предлог -> формы «год», с которыми он означает год, а не срок: «в 95 году», но «в 3 года»
+YEAR_PREPOSITIONS = {
+    'в': ('году',), 'во': ('году',), 'к': ('году',), 'ко': ('году',),
+    'с': ('года',), 'со': ('года',), 'до': ('года',), 'по': ('год',),
+}
+# «году» после «к» — дательный падеж: «к двухтысячному году»
+DATIVE_PREPOSITIONS = {'к', 'ко'}
+# Количество лет: «1 год», «3 года», «5 лет»
+YEAR_FORMS = ('год', 'года', 'лет')
+
+
+def plural_form(n: int, forms: tuple) -> str:
+    if 11 <= n % 100 <= 19:
+        return forms[2]
+    if n % 10 == 1:
+        return forms[0]
+    if 2 <= n % 10 <= 4:
+        return forms[1]
+    return forms[2]
+
+
+def _triad_to_words(n: int, feminine: bool) -> list:
+    words = [HUNDREDS[n // 100]]
+    rest = n % 100
+    if 10 <= rest <= 19:
+        words.append(TEENS[rest - 10])
+    else:
+        words.append(TENS[rest // 10])
+        words.append((ONES_FEMININE if feminine else ONES)[rest % 10])
+    return [w for w in words if w]
+
+
+def number_to_words(n: int, feminine: bool = False) -> str:
+    """Количественное числительное в именительном падеже: 2025 -> две тысячи двадцать пять;
+    feminine — род последнего разряда («одна минута», «две целых»)"""
+    if n == 0:
+        return 'ноль'
+    words = []
+    for power in range(len(SCALES) - 1, -1, -1):
+        triad = n // 1000 ** power % 1000
+        if not triad:
+            continue
+        forms, scale_feminine = SCALES[power]
+        words.extend(_triad_to_words(triad, scale_feminine or (feminine and not power)))
+        if power:
+            words.append(plural_form(triad, forms))
+    return ' '.join(words)
+
+
+def _ordinal_case(word: str, case: str) -> str:
+    if case == 'nom':
+        return word
+    if word.endswith('ий'):
+        stem, endings = word[:-2] + 'ь', {'gen': 'его', 'dat': 'ему', 'prep': 'ем', 'ins': 'им'}
+    else:
+        stem, endings = word[:-2], {'gen': 'ого', 'dat': 'ому', 'prep': 'ом', 'ins': 'ым'}
+    return stem + endings[case]
+
+
+def ordinal_to_words(n: int, case: str = 'nom') -> str:
+    """Порядковое числительное мужского рода в падеже case (nom, gen, dat, prep, ins):
+    склоняется только последнее слово — 2025, prep -> две тысячи двадцать пятом"""
+    rest = n % 1000
+    if not rest:
+        thousands = n // 1000
+        if not 1 <= thousands <= 9:
+            return number_to_words(n)
+        return _ordinal_case(THOUSANDS_PREFIX[thousands] + 'тысячный', case)
+    # «тысяча девятьсот…», а не «одна тысяча девятьсот…»
+    head = number_to_words(n - rest).removeprefix('одна ') if n >= 1000 else ''
+    words = [HUNDREDS[rest // 100]] if rest % 100 else []
+    tail = rest % 100
+    if not tail:
+        last = ORDINAL_HUNDREDS[rest // 100]
+    elif tail < 10:
+        last = ORDINAL_ONES[tail]
+    elif tail < 20:
+        last = ORDINAL_TEENS[tail - 10]
+    else:
+        if tail % 10:
+            words.append(TENS[tail // 10])
+            last = ORDINAL_ONES[tail % 10]
+        else:
+            last = ORDINAL_TENS[tail // 10]
+    words.append(_ordinal_case(last, case))
+    return ' '.join(w for w in [head] + words if w)
+
+
+def decimal_to_words(whole: str, fraction: str) -> str:
+    """2.5 -> две целых пять десятых; дробная часть длиннее трёх знаков читается по цифрам"""
+    fraction = fraction.rstrip('0')
+    if not fraction:
+        return number_to_words(int(whole))
+    n = int(whole)
+    words = f'{number_to_words(n, feminine=True)} {plural_form(n, WHOLE_FORMS)}'
+    if len(fraction) > MAX_FRACTION_DIGITS:
+        return f'{number_to_words(n)} запятая {" ".join(DIGIT_NAMES[int(d)] for d in fraction)}'
+    m = int(fraction)
+    return f'{words} {number_to_words(m, feminine=True)} {plural_form(m, FRACTION_FORMS[len(fraction) - 1])}'
+
+
+def time_to_words(hours: str, minutes: str) -> str:
+    """19:00 -> девятнадцать ноль-ноль, 9:05 -> девять ноль пять"""
+    m = int(minutes)
+    if not m:
+        return f'{number_to_words(int(hours))} ноль-ноль'
+    spoken = number_to_words(m)
+    return f'{number_to_words(int(hours))} {"ноль " + spoken if m < 10 else spoken}'
+
+
+def _apply_stress(text: str) -> str:
+    return ' '.join(STRESS_DICT.get(w.lower(), w) for w in text.split(' '))
+
+
+# Сленг раскрывается, а результат сразу получает ударения — так словарь
+# применяется за один проход вместо двух последовательных подстановок.
+REPLACEMENTS = {**STRESS_DICT, **{k: _apply_stress(v) for k, v in SLANG_DICT.items()}}
+UNIT_WORDS = {unit: (tuple(_apply_stress(f) for f in forms), feminine) for unit, (forms, feminine) in UNITS.items()}
+
+_UNIT_ALT = '|'.join(re.escape(u) for u in sorted(UNITS, key=len, reverse=True))
+# Число без соседних цифр и разделителей: в 12.05.2025 нет ни дроби, ни времени.
+# Целая часть может быть разбита на разряды пробелом: 1 000 000
+_NUMBER = r'(?<![\d.,:])(?:\d{1,3}(?:[ \u00a0]\d{3})+(?!\d)|\d+)(?:[.,]\d+)?(?![.,:]?\d)'
+_YEAR_PREP_ALT = '|'.join(sorted(YEAR_PREPOSITIONS, key=len, reverse=True))
+
+TOKEN_RE = re.compile(
+    rf'(?P<gap>(?:\s|[{EMOJI_CHARS}])+)'
+    rf'|(?P<time>(?<![\d:])(?:[01]?\d|2[0-3]):[0-5]\d(?![\d:]))'
+    rf'|(?P<unit>{_NUMBER}[ \u00a0]?(?:{_UNIT_ALT})(?!\w))'
+    rf'|(?P<year>(?:(?<!\w)(?:{_YEAR_PREP_ALT})\s+)?(?<![\d.,])\d{{1,4}}\s+год(?:а|у|ом)?(?!\w))'
+    rf'|(?P<decimal>{_NUMBER})'
+    rf'|(?P<num>\d+)|(?P<word>\w+)',
+    re.IGNORECASE,
+)
+NUMBER_PARTS_RE = re.compile(r'(\d+)(?:[.,](\d+))?\s*(.*)', re.DOTALL)
+YEAR_PARTS_RE = re.compile(r'(?:(\w+)(\s+))?(\d+)\s+(\w+)')
+DIGIT_GROUP_RE = re.compile(r'(?<=\d)[ \u00a0](?=\d{3})')
+EMOJI_RE = re.compile(f'[{EMOJI_CHARS}]+')
+
+
+def _spoken_number(whole: str, fraction, feminine: bool = False):
+    """Слова для числа и индекс формы существительного после него; None — слишком длинное"""
+    if len(whole) > MAX_SPOKEN_DIGITS:
+        return None, None
+    if fraction and fraction.rstrip('0'):
+        return decimal_to_words(whole, fraction), 1
+    n = int(whole)
+    return number_to_words(n, feminine), plural_form(n, (0, 1, 2))
+
+
+def _replace_token(m: re.Match) -> str:
+    kind = m.lastgroup
+    token = m.group(kind)
+
+    if kind == 'word':
+        replacement = REPLACEMENTS.get(token.lower())
+        if replacement is None:
+            return token
+        if token[0].isupper():
+            return replacement[0].upper() + replacement[1:]
+        return replacement
+
+    if kind == 'time':
+        hours, minutes = token.split(':')
+        return time_to_words(hours, minutes)
+
+    if kind == 'year':
+        prep, space, whole, rest = YEAR_PARTS_RE.match(token).groups()
+        n = int(whole)
+        lead = f'{prep}{space}' if prep else ''
+        if len(whole) == 4 or (prep and rest.lower() in YEAR_PREPOSITIONS[prep.lower()]):
+            case = YEAR_CASES[rest.lower()]
+            if case == 'prep' and prep and prep.lower() in DATIVE_PREPOSITIONS:
+                case = 'dat'
+            return f'{lead}{ordinal_to_words(n, case)} {rest}'
+        if rest.lower() in YEAR_FORMS:
+            rest = plural_form(n, YEAR_FORMS)
+        return f'{lead}{number_to_words(n)} {rest}'
+
+    if kind in ('unit', 'decimal'):
+        whole, fraction, rest = NUMBER_PARTS_RE.match(DIGIT_GROUP_RE.sub('', token)).groups()
+        forms, feminine = UNIT_WORDS[rest.lower()] if kind == 'unit' else (None, False)
+        spoken, index = _spoken_number(whole, fraction, feminine)
+        if spoken is None:
+            return token
+        return f'{spoken} {forms[index]}' if forms else spoken
+
+    if kind == 'num':
+        if len(token) > MAX_SPOKEN_DIGITS:
+            return token
+        return number_to_words(int(token))
+
+    if len(token) == 1 and token.isspace():
+        return token
+    spaces = EMOJI_RE.sub('', token)
+    if len(spaces) > 1:
+        return ' '
+    return spaces
+
+
+def clean_text_for_tts(text: str) -> str:
+    return TOKEN_RE.sub(_replace_token, text).strip()
@@ -0,0 +1,106 @@
+"""Производные изображений: 64/256/1024 px в WebP и JPEG, без EXIF, JPEG — progressive.
+
+Копия модуля лежит в upload-avatar и photo-gallery: функции деплоятся по отдельности."""
+
+import io
+import sys
+from PIL import Image, ImageOps
+
+SIZES = (64, 256, 1024)
+FORMATS = ('webp', 'jpeg')
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+CONTENT_TYPES = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+FEED_PAGE_SIZE = 50
+
+Image.MAX_IMAGE_PIXELS = 50_000_000
+
+
+def sniff_image_type(head):
+    """MIME по сигнатуре файла, а не по заявленному клиентом Content-Type"""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def load_image(data):
+    """Открывает изображение, поворачивает по EXIF Orientation и приводит к RGB/RGBA"""
+    img = Image.open(io.BytesIO(data))
+    # JPEG декодируется сразу в уменьшенном масштабе (DCT scaling), не меньше самой крупной производной
+    img.draft('RGB', (max(SIZES), max(SIZES)))
+    img = ImageOps.exif_transpose(img)
+    has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+    return img.convert('RGBA' if has_alpha else 'RGB')
+
+
+def encode(img, fmt, icc_profile=None):
+    """Кодирует без EXIF; ICC-профиль сохраняется, чтобы не поплыли цвета"""
+    buf = io.BytesIO()
+    extra = {'icc_profile': icc_profile} if icc_profile else {}
+    if fmt == 'jpeg':
+        if img.mode == 'RGBA':
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel('A'))
+            img = background
+        img.save(buf, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True, **extra)
+    else:
+        img.save(buf, 'WEBP', quality=WEBP_QUALITY, method=4, **extra)
+    return buf.getvalue()
+
+
+def make_derivatives(data):
+    """Список (size, fmt, bytes); каждый размер ужимается из предыдущего, без увеличения"""
+    img = load_image(data)
+    icc_profile = img.info.get('icc_profile')
+    result = []
+    for size in sorted(SIZES, reverse=True):
+        if max(img.size) > size:
+            img = ImageOps.contain(img, (size, size), Image.LANCZOS)
+        for fmt in FORMATS:
+            result.append((size, fmt, encode(img, fmt, icc_profile)))
+    return result
+
+
+def variant_key(key, size, fmt):
+    """photos/user_1_abc.png -> photos/user_1_abc_256.webp"""
+    stem = key.rsplit('.', 1)[0]
+    return f'{stem}_{size}.{EXTENSIONS[fmt]}'
+
+
+def store_derivatives(storage, key, data, cache_control=None):
+    """Загружает производные рядом с оригиналом; возвращает {"64": {"webp": url, "jpeg": url}, ...}"""
+    variants = {}
+    for size, fmt, body in make_derivatives(data):
+        url = storage.put(variant_key(key, size, fmt), body, CONTENT_TYPES[fmt], cache_control)
+        variants.setdefault(str(size), {})[fmt] = url
+    return variants
+
+
+def pick_variant(variants, size, fmt='webp'):
+    """Наименьшая производная не меньше запрошенного размера (или самая крупная из имеющихся)"""
+    if not variants:
+        return None
+    available = sorted(int(s) for s in variants if fmt in variants[s])
+    if not available:
+        return None
+    chosen = next((s for s in available if s >= size), available[-1])
+    return variants[str(chosen)][fmt]
+
+
+if __name__ == '__main__':
+    # Байты на страницу ленты (FEED_PAGE_SIZE карточек): оригиналы против производных.
+    # python images.py photo1.jpg photo2.jpg ...
+    originals = [open(path, 'rb').read() for path in sys.argv[1:]]
+    if not originals:
+        sys.exit('usage: python images.py <image> [<image> ...]')
+    per_card = {'original': sum(len(d) for d in originals) / len(originals)}
+    for size, fmt, body in (item for data in originals for item in make_derivatives(data)):
+        per_card.setdefault(f'{size}px {fmt}', 0)
+        per_card[f'{size}px {fmt}'] += len(body) / len(originals)
+    for name, avg in per_card.items():
+        print(f'{name:>14}: {avg / 1024:8.1f} KB/card  {avg * FEED_PAGE_SIZE / 1024 / 1024:7.2f} MB/page')
@@ -1,12 +1,131 @@
 import json
 import os
 import base64
-import boto3
+import uuid
 import psycopg2
-from datetime import datetime
+from psycopg2.extras import RealDictCursor
+from images import sniff_image_type
+from media import acquire_media, release_media
+from storage import get_storage
+
+SCHEMA = os.environ.get('MAIN_DB_SCHEMA', 't_p19021063_social_connect_platf')
+# Временные объекты presigned-загрузки; после confirm байты переезжают в media/ по хешу
+UPLOAD_PREFIX = 'uploads/avatars/'
+MAX_AVATAR_BYTES = 10 * 1024 * 1024
+UPLOAD_URL_TTL = 600
+IMAGE_EXTENSIONS = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/webp': 'webp'}
+
+HEADERS = {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+
+
+def resp(status_code, body):
+    return {
+        'statusCode': status_code,
+        'headers': HEADERS,
+        'body': json.dumps(body),
+        'isBase64Encoded': False
+    }
+
+
+def create_upload_url(user_id, content_type):
+    """Presigned PUT: клиент заливает файл прямо в хранилище, байты не проходят через функцию"""
+    content_type = (content_type or 'image/jpeg').split(';')[0].strip().lower()
+    if content_type not in IMAGE_EXTENSIONS:
+        return None
+    key = f'{UPLOAD_PREFIX}user_{user_id}_{uuid.uuid4().hex}.{IMAGE_EXTENSIONS[content_type]}'
+    url = get_storage().upload_url(key, content_type, UPLOAD_URL_TTL)
+    return {'uploadUrl': url, 'key': key, 'contentType': content_type, 'expiresIn': UPLOAD_URL_TTL}
+
+
+def load_uploaded_image(storage, key):
+    """Проверяет загруженный объект по размеру (HEAD) и сигнатуре, затем читает его; невалидный удаляется.
+    Возвращает (bytes, None) или (None, ошибка)"""
+    size = storage.size(key)
+    if size is None:
+        return None, 'Файл не загружен'
+
+    data, error = None, None
+    if size > MAX_AVATAR_BYTES:
+        error = f'Файл больше {MAX_AVATAR_BYTES // (1024 * 1024)} МБ'
+    elif size == 0:
+        error = 'Пустой файл'
+    else:
+        data = storage.get(key)
+        if not sniff_image_type(data[:16]):
+            error = 'Файл не является изображением JPEG, PNG или WebP'
+
+    if error:
+        storage.delete(key)
+        return None, error
+    return data, None
+
+
+def store_avatar(user_id, storage, data):
+    """Кладёт аватар по хешу содержимого и переключает на него пользователя; прежний аватар теряет ссылку.
+    Возвращает запись media_objects или None, если файл не удалось разобрать"""
+    conn = psycopg2.connect(os.environ.get('DATABASE_URL'))
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        media = acquire_media(cursor, SCHEMA, storage, data)
+        if not media:
+            conn.rollback()
+            return None
+        
+        cursor.execute(f"SELECT avatar_media FROM {SCHEMA}.users WHERE id = %s FOR UPDATE", (user_id,))
+        row = cursor.fetchone()
+        previous_media = row['avatar_media'] if row else None
+        
+        cursor.execute(f'''
+            UPDATE {SCHEMA}.users 
+            SET avatar_url = %s, avatar_media = %s, avatar_variants = %s,
+                avatar_blurhash = %s, avatar_color = %s, updated_at = NOW()
+            WHERE id = %s
+        ''', (media['url'], media['sha256'], json.dumps(media['variants']) if media['variants'] else None,
+              media['blurhash'], media['color'], user_id))
+        release_media(cursor, SCHEMA, previous_media)
+        
+        # Обновляем аватар во всех диалогах, где этот пользователь является собеседником
+        cursor.execute(f'''
+            UPDATE {SCHEMA}.conversations c
+            SET avatar_url = %s
+            FROM {SCHEMA}.conversation_participants cp
+            WHERE c.id = cp.conversation_id 
+            AND c.type = 'personal'
+            AND cp.user_id = %s
+            AND c.created_by != %s
+        ''', (media['url'], user_id, user_id))
+
+        # И копии аватара у игрока в незавершённых комнатах покера и мафии
+        for players, rooms in (('poker_players', 'poker_rooms'), ('mafia_players', 'mafia_rooms')):
+            cursor.execute(f'''
+                UPDATE {SCHEMA}.{players} gp
+                SET avatar_url = %s, avatar_blurhash = %s, avatar_color = %s
+                FROM {SCHEMA}.{rooms} r
+                WHERE gp.user_id = %s AND r.id = gp.room_id AND r.status != 'finished'
+            ''', (media['url'], media['blurhash'], media['color'], user_id))
+        # Аватара в снимке стола покера нет, но версия игрока растёт — опрос с since перечитает его профиль
+        cursor.execute(f'''
+            UPDATE {SCHEMA}.poker_state s
+            SET version = s.version + 1, updated_at = NOW(),
+                state = jsonb_set(s.state, ARRAY['versions', 'players', %s::text], to_jsonb(s.version + 1))
+            FROM {SCHEMA}.poker_rooms r
+            WHERE r.id = s.room_id AND r.status != 'finished'
+            AND EXISTS (SELECT 1 FROM jsonb_array_elements(s.state->'players') e(p) WHERE e.p->>'user_id' = %s::text)
+        ''', (user_id, user_id))
+
+        conn.commit()
+        return media
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def avatar_body(media):
+    return {'url': media['url'], 'variants': media['variants'], 'blurhash': media['blurhash'], 'color': media['color']}
+
 
 def handler(event: dict, context) -> dict:
-    '''API для загрузки аватара пользователя в S3 и обновления БД'''
+    '''API для загрузки аватара: ?action=upload-url выдаёт presigned PUT, ?action=confirm проверяет файл и ставит аватар; без action — загрузка base64 (устаревший путь)'''
     method = event.get('httpMethod', 'POST')
     
     if method == 'OPTIONS':
@@ -60,8 +179,33 @@ def handler(event: dict, context) -> dict:
             'isBase64Encoded': False
         }
     
+    action = (event.get('queryStringParameters') or {}).get('action')
+    
     try:
-        data = json.loads(event.get('body', '{}'))
+        data = json.loads(event.get('body') or '{}')
+        
+        if action == 'upload-url':
+            upload = create_upload_url(user_id, data.get('content_type'))
+            if not upload:
+                return resp(400, {'error': f'Допустимые типы: {", ".join(IMAGE_EXTENSIONS)}'})
+            return resp(200, upload)
+        
+        if action == 'confirm':
+            key = data.get('key') or ''
+            if not key.startswith(f'{UPLOAD_PREFIX}user_{user_id}_') or '..' in key:
+                return resp(400, {'error': 'Invalid key'})
+            storage = get_storage()
+            image_data, error = load_uploaded_image(storage, key)
+            if error:
+                return resp(400, {'error': error})
+            try:
+                media = store_avatar(user_id, storage, image_data)
+            finally:
+                storage.delete(key)
+            if not media:
+                return resp(400, {'error': 'Не удалось обработать изображение'})
+            return resp(200, avatar_body(media))
+        
         image_base64 = data.get('image')
         
         if not image_base64:
@@ -73,54 +217,17 @@ def handler(event: dict, context) -> dict:
             }
         
         image_data = base64.b64decode(image_base64)
+        if not sniff_image_type(image_data[:16]):
+            return resp(400, {'error': 'Unsupported image format'})
         
-        s3 = boto3.client('s3',
-            endpoint_url='https://bucket.poehali.dev',
-            aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
-            aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY'],
-        )
-        
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'avatars/user_{user_id}_{timestamp}.jpg'
-        
-        s3.put_object(
-            Bucket='files',
-            Key=filename,
-            Body=image_data,
-            ContentType='image/jpeg'
-        )
-        
-        cdn_url = f"https://cdn.poehali.dev/projects/{os.environ['AWS_ACCESS_KEY_ID']}/bucket/{filename}"
-        
-        dsn = os.environ.get('DATABASE_URL')
-        conn = psycopg2.connect(dsn)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE t_p19021063_social_connect_platf.users 
-            SET avatar_url = %s, updated_at = NOW()
-            WHERE id = %s
-        ''', (cdn_url, user_id))
-        
-        # Обновляем аватар во всех диалогах, где этот пользователь является собеседником
-        cursor.execute('''
-            UPDATE t_p19021063_social_connect_platf.conversations c
-            SET avatar_url = %s
-            FROM t_p19021063_social_connect_platf.conversation_participants cp
-            WHERE c.id = cp.conversation_id 
-            AND c.type = 'personal'
-            AND cp.user_id = %s
-            AND c.created_by != %s
-        ''', (cdn_url, user_id, user_id))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        media = store_avatar(user_id, get_storage(), image_data)
+        if not media:
+            return resp(400, {'error': 'Unsupported image format'})
         
         return {
             'statusCode': 200,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'url': cdn_url}),
+            'body': json.dumps(avatar_body(media)),
             'isBase64Encoded': False
         }
         
@@ -0,0 +1,102 @@
+"""Контентно-адресуемое хранение медиа: ключ из SHA-256 содержимого, одинаковые байты хранятся один раз,
+ссылки считаются в media_objects. Объекты неизменяемы, поэтому отдаются с Cache-Control: immutable.
+
+Копия модуля лежит в upload-avatar и photo-gallery: функции деплоятся по отдельности."""
+
+import hashlib
+from psycopg2.extras import Json
+from images import sniff_image_type, store_derivatives, variant_key, SIZES, FORMATS
+from placeholders import compute_placeholder
+from storage import cdn_url
+
+MEDIA_PREFIX = 'media/'
+HASH_KEY_LENGTH = 32
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MEDIA_EXTENSIONS = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/webp': 'webp'}
+
+
+def content_key(digest, content_type):
+    """media/ab/ab12…(32 hex).jpg — первые два символа хеша разносят объекты по «папкам»"""
+    return f'{MEDIA_PREFIX}{digest[:2]}/{digest[:HASH_KEY_LENGTH]}.{MEDIA_EXTENSIONS[content_type]}'
+
+
+def _take_reference(cursor, schema, digest):
+    """Ссылка на уже загруженный объект в транзакции вызывающего; None — такого ещё нет"""
+    cursor.execute(f"""
+        UPDATE {schema}.media_objects
+        SET ref_count = ref_count + 1, released_at = NULL
+        WHERE sha256 = %s AND uploaded_at IS NOT NULL
+        RETURNING sha256, url, variants, blurhash, color
+    """, (digest,))
+    existing = cursor.fetchone()
+    return dict(existing) if existing else None
+
+
+def acquire_media(cursor, schema, storage, data):
+    """Берёт ссылку на медиа с такими байтами: повторная загрузка только увеличивает ref_count,
+    новая — кладётся в хранилище вместе с производными и плейсхолдером.
+    Возвращает строку media_objects (dict) или None, если файл не удалось разобрать как изображение.
+    cursor должен быть RealDictCursor.
+
+    Новые байты грузятся вне транзакции: сначала коммитится строка без ссылок (ref_count 0,
+    released_at = NOW()), затем объекты уходят в хранилище, и только потом берётся ссылка.
+    Если транзакция вызывающего откатится, останется строка без ссылок, которую удалит media-gc,
+    а не объекты без строки. Поэтому функция коммитит соединение cursor — вызывать её нужно
+    до собственных изменений в транзакции."""
+    digest = hashlib.sha256(data).hexdigest()
+    existing = _take_reference(cursor, schema, digest)
+    if existing:
+        return existing
+
+    content_type = sniff_image_type(data[:16])
+    if not content_type:
+        return None
+    try:
+        placeholder = compute_placeholder(data)
+    except Exception as e:
+        print(f'Image decode error for {digest}: {e}')
+        return None
+
+    key = content_key(digest, content_type)
+    object_keys = [key] + [variant_key(key, size, fmt) for size in SIZES for fmt in FORMATS]
+    url = cdn_url(key)
+    # Брошенная строка той же загрузки получает новый период ожидания, чтобы media-gc не удалил
+    # объекты, пока они грузятся
+    cursor.execute(f"""
+        INSERT INTO {schema}.media_objects
+            (sha256, object_key, object_keys, content_type, size_bytes, url, blurhash, color, ref_count, released_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 0, NOW())
+        ON CONFLICT (sha256) DO UPDATE SET released_at = NOW()
+        WHERE media_objects.ref_count <= 0
+    """, (digest, key, object_keys, content_type, len(data), url, placeholder['blurhash'], placeholder['color']))
+    cursor.connection.commit()
+
+    storage.put(key, data, content_type, IMMUTABLE_CACHE_CONTROL)
+    variants = store_derivatives(storage, key, data, IMMUTABLE_CACHE_CONTROL)
+
+    # Строку мог удалить media-gc или параллельная загрузка уже отметила её загруженной — upsert покрывает оба случая
+    cursor.execute(f"""
+        INSERT INTO {schema}.media_objects
+            (sha256, object_key, object_keys, content_type, size_bytes, url, variants, blurhash, color,
+             ref_count, uploaded_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 1, NOW())
+        ON CONFLICT (sha256) DO UPDATE
+        SET ref_count = media_objects.ref_count + 1, released_at = NULL,
+            variants = COALESCE(media_objects.variants, EXCLUDED.variants),
+            uploaded_at = COALESCE(media_objects.uploaded_at, EXCLUDED.uploaded_at)
+        RETURNING sha256, url, variants, blurhash, color
+    """, (digest, key, object_keys, content_type, len(data), url, Json(variants),
+          placeholder['blurhash'], placeholder['color']))
+    return dict(cursor.fetchone())
+
+
+def release_media(cursor, schema, digest):
+    """Снимает одну ссылку; объект без ссылок удалит сборщик media-gc после периода ожидания"""
+    if not digest:
+        return
+    cursor.execute(f"""
+        UPDATE {schema}.media_objects
+        SET ref_count = GREATEST(ref_count - 1, 0),
+            released_at = CASE WHEN ref_count <= 1 THEN NOW() ELSE released_at END
+        WHERE sha256 = %s
+    """, (digest,))
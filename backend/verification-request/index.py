@@ -1,11 +1,11 @@
 import json
 import os
 import base64
-import boto3
 from datetime import datetime
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import jwt as pyjwt
+from storage import get_storage
 
 def verify_token(token: str) -> dict | None:
     if not token:
@@ -96,23 +96,17 @@ def handler(event: dict, context) -> dict:
                     'body': json.dumps({'error': 'You already have a pending verification request'})
                 }
             
-            s3 = boto3.client('s3',
-                endpoint_url='https://bucket.poehali.dev',
-                aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
-                aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY']
-            )
+            storage = get_storage()
             
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             
             selfie_data = base64.b64decode(selfie_base64.split(',')[1] if ',' in selfie_base64 else selfie_base64)
             selfie_key = f'verification/user_{user_id}_selfie_{timestamp}.jpg'
-            s3.put_object(Bucket='files', Key=selfie_key, Body=selfie_data, ContentType='image/jpeg')
-            selfie_url = f"https://cdn.poehali.dev/projects/{os.environ['AWS_ACCESS_KEY_ID']}/bucket/{selfie_key}"
+            selfie_url = storage.put(selfie_key, selfie_data, 'image/jpeg')
             
             document_data = base64.b64decode(document_base64.split(',')[1] if ',' in document_base64 else document_base64)
             document_key = f'verification/user_{user_id}_document_{timestamp}.jpg'
-            s3.put_object(Bucket='files', Key=document_key, Body=document_data, ContentType='image/jpeg')
-            document_url = f"https://cdn.poehali.dev/projects/{os.environ['AWS_ACCESS_KEY_ID']}/bucket/{document_key}"
+            document_url = storage.put(document_key, document_data, 'image/jpeg')
             
             cur.execute(f"""
                 INSERT INTO {schema}.verification_requests 
@@ -0,0 +1,262 @@
+"""Объектное хранилище: один S3-клиент на инстанс функции с пулом keep-alive соединений,
+multipart для крупных объектов и CDN-ссылки. STORAGE_BACKEND=memory или local подменяет S3
+для тестов и бенчмарков (local пишет в каталог STORAGE_LOCAL_DIR).
+
+Функции деплоятся по отдельности, поэтому модуль скопирован в каждую, что работает с хранилищем;
+копии должны совпадать — tools/check_shared_modules.py (и тест test_shared_modules) это проверяет."""
+
+import io
+import os
+import threading
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+BUCKET = os.environ.get('S3_BUCKET', 'files')
+DEFAULT_ENDPOINT_URL = 'https://bucket.poehali.dev'
+POOL_SIZE = 16
+CONNECT_TIMEOUT = 3
+READ_TIMEOUT = 30
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+MULTIPART_CONCURRENCY = 4
+DELETE_BATCH = 1000
+
+
+class ObjectNotFound(KeyError):
+    """Объекта с таким ключом нет в хранилище"""
+
+
+def cdn_url(key):
+    base = os.environ.get('CDN_BASE_URL') or f"https://cdn.poehali.dev/projects/{os.environ.get('AWS_ACCESS_KEY_ID', '')}/bucket"
+    return f"{base.rstrip('/')}/{key}"
+
+
+class S3Storage:
+    """boto3 импортируется и клиент создаётся при первом обращении, дальше переиспользуется
+    тёплым инстансом: TLS-рукопожатие и разбор моделей botocore не повторяются на каждый запрос"""
+
+    def __init__(self, bucket=BUCKET):
+        self.bucket = bucket
+        self._client = None
+        self._transfer_config = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import boto3
+                    from boto3.s3.transfer import TransferConfig
+                    from botocore.config import Config
+                    self._transfer_config = TransferConfig(
+                        multipart_threshold=MULTIPART_THRESHOLD,
+                        multipart_chunksize=MULTIPART_CHUNK_SIZE,
+                        max_concurrency=MULTIPART_CONCURRENCY,
+                    )
+                    self._client = boto3.client(
+                        's3',
+                        endpoint_url=os.environ.get('S3_ENDPOINT_URL') or DEFAULT_ENDPOINT_URL,
+                        aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
+                        aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY'],
+                        config=Config(
+                            max_pool_connections=POOL_SIZE,
+                            connect_timeout=CONNECT_TIMEOUT,
+                            read_timeout=READ_TIMEOUT,
+                            tcp_keepalive=True,
+                            retries={'max_attempts': 3, 'mode': 'standard'},
+                        ),
+                    )
+        return self._client
+
+    def put(self, key, data, content_type, cache_control=None):
+        extra = {'ContentType': content_type}
+        if cache_control:
+            extra['CacheControl'] = cache_control
+        if len(data) >= MULTIPART_THRESHOLD:
+            # Крупные объекты — частями параллельно; при обрыве перезаливается часть, а не весь файл
+            self.client.upload_fileobj(io.BytesIO(data), self.bucket, key, ExtraArgs=extra, Config=self._transfer_config)
+        else:
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=data, **extra)
+        return cdn_url(key)
+
+    def get(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+
+    def open(self, key):
+        """(поток, размер, Content-Type) без чтения тела в память; поток закрывает вызывающий.
+        Нет объекта — ObjectNotFound"""
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.NoSuchKey:
+            raise ObjectNotFound(key)
+        return obj['Body'], obj.get('ContentLength', 0), obj.get('ContentType')
+
+    def size(self, key):
+        """Размер объекта в байтах или None, если объекта нет"""
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)['ContentLength']
+        except Exception:
+            return None
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        for i in range(0, len(keys), DELETE_BATCH):
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in keys[i:i + DELETE_BATCH]], 'Quiet': True}
+            )
+
+    def list(self, prefix):
+        """(key, last_modified) всех объектов с префиксом"""
+        for page in self.client.get_paginator('list_objects_v2').paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                yield obj['Key'], obj['LastModified']
+
+    def upload_url(self, key, content_type, expires_in):
+        """Presigned PUT: клиент заливает файл прямо в хранилище, байты не проходят через функцию"""
+        return self.client.generate_presigned_url(
+            'put_object',
+            Params={'Bucket': self.bucket, 'Key': key, 'ContentType': content_type},
+            ExpiresIn=expires_in,
+        )
+
+    def upload_form(self, key, content_type, max_bytes, expires_in):
+        """Presigned POST-форма {'url', 'fields'}: в отличие от PUT, хранилище само отклонит файл больше max_bytes"""
+        return self.client.generate_presigned_post(
+            self.bucket, key,
+            Fields={'Content-Type': content_type},
+            Conditions=[{'Content-Type': content_type}, ['content-length-range', 1, max_bytes]],
+            ExpiresIn=expires_in,
+        )
+
+
+class MemoryStorage:
+    """Хранилище в памяти процесса: тесты и бенчмарки без сети"""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put(self, key, data, content_type, cache_control=None):
+        self.objects[key] = {
+            'data': bytes(data), 'content_type': content_type,
+            'cache_control': cache_control, 'last_modified': datetime.now(timezone.utc),
+        }
+        return cdn_url(key)
+
+    def get(self, key):
+        if key not in self.objects:
+            raise KeyError(key)
+        return self.objects[key]['data']
+
+    def open(self, key):
+        if key not in self.objects:
+            raise ObjectNotFound(key)
+        obj = self.objects[key]
+        return io.BytesIO(obj['data']), len(obj['data']), obj['content_type']
+
+    def size(self, key):
+        obj = self.objects.get(key)
+        return len(obj['data']) if obj else None
+
+    def delete(self, key):
+        self.objects.pop(key, None)
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.delete(key)
+
+    def list(self, prefix):
+        for key, obj in sorted(self.objects.items()):
+            if key.startswith(prefix):
+                yield key, obj['last_modified']
+
+    def upload_url(self, key, content_type, expires_in):
+        return f'memory://{quote(key)}?content_type={quote(content_type)}&expires_in={expires_in}'
+
+    def upload_form(self, key, content_type, max_bytes, expires_in):
+        return {'url': f'memory://{quote(key)}', 'fields': {'key': key, 'Content-Type': content_type}}
+
+
+class LocalStorage:
+    """Хранилище в каталоге на диске (ключ = относительный путь); Content-Type не сохраняется"""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f'Key outside storage root: {key}')
+        return path
+
+    def put(self, key, data, content_type, cache_control=None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return cdn_url(key)
+
+    def get(self, key):
+        with open(self._path(key), 'rb') as f:
+            return f.read()
+
+    def open(self, key):
+        path = self._path(key)
+        if not os.path.isfile(path):
+            raise ObjectNotFound(key)
+        return open(path, 'rb'), os.path.getsize(path), None
+
+    def size(self, key):
+        path = self._path(key)
+        return os.path.getsize(path) if os.path.isfile(path) else None
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.delete(key)
+
+    def list(self, prefix):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                key = os.path.relpath(path, self.root).replace(os.sep, '/')
+                if key.startswith(prefix):
+                    yield key, datetime.fromtimestamp(os.path.getmtime(path), timezone.utc)
+
+    def upload_url(self, key, content_type, expires_in):
+        return f'file://{quote(self._path(key))}'
+
+    def upload_form(self, key, content_type, max_bytes, expires_in):
+        return {'url': f'file://{quote(self._path(key))}', 'fields': {'key': key, 'Content-Type': content_type}}
+
+
+_storage = None
+
+
+def get_storage():
+    """Хранилище, общее для всех вызовов в инстансе; бэкенд выбирается STORAGE_BACKEND (s3 | memory | local)"""
+    global _storage
+    if _storage is None:
+        backend = os.environ.get('STORAGE_BACKEND', 's3')
+        if backend == 'memory':
+            _storage = MemoryStorage()
+        elif backend == 'local':
+            _storage = LocalStorage(os.environ.get('STORAGE_LOCAL_DIR', '/tmp/storage'))
+        else:
+            _storage = S3Storage()
+    return _storage
+
+
+def set_storage(storage):
+    """Подменяет хранилище (тесты, бенчмарки); None — вернуться к выбору по STORAGE_BACKEND"""
+    global _storage
+    _storage = storage
@@ -115,7 +115,7 @@ def handler(event: dict, context) -> dict:
                 f"""SELECT 
                         vr.id, vr.user_id, vr.status, vr.comment, vr.admin_comment,
                         vr.created_at, vr.updated_at, vr.reviewed_at,
-                        u.first_name, u.last_name, u.name, u.avatar_url, u.email
+                        u.first_name, u.last_name, u.name, u.avatar_url, u.avatar_blurhash, u.avatar_color, u.email
                     FROM {S}verification_requests vr
                     JOIN {S}users u ON vr.user_id = u.id
                     ORDER BY 
@@ -1,148 +1,169 @@
-"""Голосовой и текстовый поиск по сайту: люди, мероприятия, услуги, объявления."""
+"""Голосовой и текстовый поиск по сайту: люди, мероприятия, услуги, объявления.
+Основной путь — ранжированный запрос к единому индексу search_documents, прямые запросы к таблицам остаются запасным вариантом."""
 
 import json
 import os
 import re
-import base64
-import tempfile
+import binascii
+import uuid
+import jwt as pyjwt
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from datetime import datetime
 from openai import OpenAI
+from intent import parse as parse_intent, load_cities
+from storage import get_storage, ObjectNotFound
 
 SCHEMA = os.environ.get('MAIN_DB_SCHEMA', 't_p19021063_social_connect_platf')
 
-PEOPLE_KEYWORDS = [
-    'девуш', 'парн', 'мужчин', 'женщин', 'людей', 'люди', 'человек',
-    'найди', 'знаком', 'профил', 'анкет', 'подруг', 'друз', 'друг',
-    'лет', 'возраст', 'молод', 'взросл'
-]
-EVENTS_KEYWORDS = [
-    'концерт', 'мероприят', 'событи', 'вечеринк', 'выставк', 'фестивал',
-    'спектакл', 'шоу', 'встреч', 'тусовк', 'выходн', 'праздник', 'вечер'
-]
-SERVICES_KEYWORDS = [
-    'услуг', 'фотограф', 'массаж', 'репетитор', 'тренер', 'стилист',
-    'визажист', 'мастер', 'специалист', 'курс', 'занят', 'обучен',
-    'психолог', 'юрист', 'дизайнер', 'программист'
-]
-ADS_KEYWORDS = [
-    'пойти', 'пойд', 'приглаш', 'кино', 'кафе', 'ресторан', 'свидан',
-    'прогул', 'погуля', 'компани', 'вместе', 'совместн', 'объявлен',
-    'лайв', 'live', 'тур', 'путешеств', 'ужин'
-]
-
-GENDER_MAP = {
-    'девуш': 'female', 'женщин': 'female', 'подруг': 'female',
-    'парн': 'male', 'мужчин': 'male', 'друз': 'male', 'друг': 'male'
+AUDIO_UPLOAD_PREFIX = 'voice-uploads/'
+MAX_AUDIO_BYTES = 25 * 1024 * 1024
+UPLOAD_URL_TTL = 300
+# Сколько загрузок выдаётся одному пользователю за окно (секунды)
+UPLOADS_PER_WINDOW = 20
+UPLOAD_WINDOW = 600
+AUDIO_EXTENSIONS = {
+    'audio/webm': 'webm',
+    'audio/ogg': 'ogg',
+    'audio/mp4': 'm4a',
+    'audio/x-m4a': 'm4a',
+    'audio/mpeg': 'mp3',
+    'audio/wav': 'wav',
+    'audio/x-wav': 'wav',
 }
 
+# Слова для to_tsquery: в названии города допустимы цифры, в значимых словах — только буквы
+CITY_WORD_RE = re.compile(r'[а-яёa-z0-9]+')
+TERM_RE = re.compile(r'[а-яёa-z]+')
 
-def transcribe_audio(audio_base64):
-    """Распознаёт речь из base64 аудио через OpenAI Whisper"""
-    api_key = os.environ.get('OPENAI_API_KEY', '')
-    if not api_key:
+
+class AudioTooLarge(Exception):
+    pass
+
+
+def audio_filename(content_type):
+    ext = AUDIO_EXTENSIONS.get((content_type or '').split(';')[0].strip().lower(), 'webm')
+    return f'audio.{ext}'
+
+
+def get_header(event, name):
+    headers = event.get('headers') or {}
+    for key, value in headers.items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+def get_user_id(event):
+    """user_id из JWT в X-Authorization или Authorization; None без токена или с недействительным"""
+    auth = get_header(event, 'X-Authorization') or get_header(event, 'Authorization') or ''
+    if not auth.startswith('Bearer '):
         return None
+    try:
+        payload = pyjwt.decode(auth.replace('Bearer ', ''), os.environ.get('JWT_SECRET', ''), algorithms=['HS256'])
+    except Exception:
+        return None
+    return payload.get('user_id')
+
+
+def is_raw_audio_request(event):
+    if not event.get('isBase64Encoded'):
+        return False
+    content_type = (get_header(event, 'Content-Type') or '').lower()
+    return content_type.startswith('audio/') or content_type.startswith('application/octet-stream')
+
 
-    audio_bytes = base64.b64decode(audio_base64)
+def decode_audio(data):
+    """base64 → bytes без промежуточной копии: base64.b64decode сначала кодирует строку в ASCII-байты,
+    это ещё 4/3 размера записи, a2b_base64 читает буфер строки напрямую"""
+    return binascii.a2b_base64(data)
 
-    with tempfile.NamedTemporaryFile(suffix='.webm', delete=False) as f:
-        f.write(audio_bytes)
-        tmp_path = f.name
+
+def transcribe_audio(audio, content_type='audio/webm'):
+    """Распознаёт речь через OpenAI Whisper.
+    audio — bytes или файлоподобный поток: multipart-тело отдаётся в API по частям,
+    без временного файла и без второй копии записи в памяти."""
+    api_key = os.environ.get('OPENAI_API_KEY', '')
+    if not api_key:
+        return None
 
     try:
         client = OpenAI(api_key=api_key)
-        with open(tmp_path, 'rb') as audio_file:
-            transcript = client.audio.transcriptions.create(
-                model='whisper-1',
-                file=audio_file,
-                language='ru'
-            )
+        transcript = client.audio.transcriptions.create(
+            model='whisper-1',
+            file=(audio_filename(content_type), audio, content_type),
+            language='ru'
+        )
         return transcript.text.strip() if transcript.text else None
     except Exception as e:
         print(f'Whisper error: {e}')
         return None
-    finally:
-        try:
-            os.unlink(tmp_path)
-        except Exception:
-            pass
-
-
-def detect_type(text):
-    lower = text.lower()
-    scores = {'people': 0, 'events': 0, 'services': 0, 'ads': 0}
-
-    for kw in PEOPLE_KEYWORDS:
-        if kw in lower:
-            scores['people'] += 1
-    for kw in EVENTS_KEYWORDS:
-        if kw in lower:
-            scores['events'] += 1
-    for kw in SERVICES_KEYWORDS:
-        if kw in lower:
-            scores['services'] += 1
-    for kw in ADS_KEYWORDS:
-        if kw in lower:
-            scores['ads'] += 1
-
-    best = max(scores, key=scores.get)
-    if scores[best] == 0:
-        return 'people'
-    return best
-
-
-def extract_city(text):
-    lower = text.lower()
-    patterns = [
-        r'(?:из|в|город[еа]?)\s+([А-ЯЁа-яё-]+(?:\s[А-ЯЁа-яё-]+)?)',
-    ]
-    for p in patterns:
-        m = re.search(p, lower)
-        if m:
-            city = m.group(1).strip()
-            if city not in ('кино', 'кафе', 'ресторан', 'тур', 'клуб'):
-                return city.title()
-    return None
 
 
-def extract_gender(text):
-    lower = text.lower()
-    for kw, gender in GENDER_MAP.items():
-        if kw in lower:
-            return gender
-    return None
+def create_audio_upload(cur, user_id, content_type):
+    """Выдаёт presigned POST, чтобы клиент залил запись прямо в хранилище. Ключ записывается
+    за пользователем в voice_uploads, размер больше MAX_AUDIO_BYTES отклонит само хранилище.
+    Возвращает None, если пользователь исчерпал лимит загрузок за окно."""
+    content_type = (content_type or 'audio/webm').split(';')[0].strip().lower()
+    if content_type not in AUDIO_EXTENSIONS:
+        content_type = 'audio/webm'
+    key = f'{AUDIO_UPLOAD_PREFIX}{user_id}/{uuid.uuid4().hex}.{AUDIO_EXTENSIONS[content_type]}'
+    cur.execute(f"""
+        INSERT INTO {SCHEMA}.voice_uploads (object_key, user_id)
+        SELECT %s, %s
+        WHERE (SELECT COUNT(*) FROM {SCHEMA}.voice_uploads
+               WHERE user_id = %s AND created_at > NOW() - make_interval(secs => %s)) < %s
+        RETURNING object_key
+    """, (key, user_id, user_id, UPLOAD_WINDOW, UPLOADS_PER_WINDOW))
+    if not cur.fetchone():
+        return None
+    post = get_storage().upload_form(key, content_type, MAX_AUDIO_BYTES, UPLOAD_URL_TTL)
+    return {'uploadUrl': post['url'], 'fields': post['fields'], 'key': key,
+            'contentType': content_type, 'expiresIn': UPLOAD_URL_TTL}
 
 
-def extract_age_range(text):
-    m = re.search(r'(\d{2})\s*[-–]\s*(\d{2})\s*лет', text)
-    if m:
-        return int(m.group(1)), int(m.group(2))
-    m = re.search(r'от\s*(\d{2})\s*до\s*(\d{2})', text)
-    if m:
-        return int(m.group(1)), int(m.group(2))
-    m = re.search(r'(\d{2})\s*лет', text)
-    if m:
-        age = int(m.group(1))
-        return max(18, age - 3), age + 3
-    return None, None
+def claim_audio_upload(cur, user_id, key):
+    """Помечает загрузку прочитанной, если ключ выдан этому пользователю и ещё не использован"""
+    cur.execute(f"""
+        UPDATE {SCHEMA}.voice_uploads SET claimed_at = NOW()
+        WHERE object_key = %s AND user_id = %s AND claimed_at IS NULL
+        RETURNING object_key
+    """, (key, user_id))
+    return cur.fetchone() is not None
+
+
+def transcribe_uploaded_audio(key):
+    """Стримит загруженную запись из хранилища в Whisper и удаляет её после распознавания.
+    Запись больше MAX_AUDIO_BYTES не читается: AudioTooLarge; ключ выдан, но файл не загружен — ObjectNotFound."""
+    storage = get_storage()
+    body, size, content_type = storage.open(key)
+    try:
+        if size > MAX_AUDIO_BYTES:
+            raise AudioTooLarge(key)
+        return transcribe_audio(body, content_type or 'audio/webm')
+    finally:
+        body.close()
+        try:
+            storage.delete(key)
+        except Exception as e:
+            print(f'Audio cleanup error: {e}')
 
 
-def search_people(text, cur):
+def search_people(intent, cur):
     conditions = []
     params = []
 
-    gender = extract_gender(text)
+    gender = intent['gender']
     if gender:
         conditions.append("dp.gender = %s")
         params.append(gender)
 
-    city = extract_city(text)
+    city = intent['city']
     if city:
         conditions.append("LOWER(dp.city) LIKE %s")
         params.append(f'%{city.lower()}%')
 
-    age_from, age_to = extract_age_range(text)
+    age_from, age_to = intent['age_from'], intent['age_to']
     if age_from is not None:
         conditions.append("dp.age >= %s")
         params.append(age_from)
@@ -164,31 +185,31 @@ def search_people(text, cur):
     return cur.fetchall()
 
 
-def search_events(text, cur):
+def keyword(intent, skip=()):
+    """Первое значимое слово запроса длиннее трёх букв — для LIKE в запасных запросах по таблицам"""
+    return next((w for w in intent['terms'] if len(w) > 3 and not w.startswith(skip)), None)
+
+
+def search_events(intent, cur):
+    filters = intent['filters']
     conditions = ["e.is_active = true"]
     params = []
 
-    city = extract_city(text)
+    city = intent['city']
     if city:
         conditions.append("LOWER(e.city) LIKE %s")
         params.append(f'%{city.lower()}%')
 
-    lower = text.lower()
-    if 'бесплатн' in lower:
+    if filters['free']:
         conditions.append("(e.price = 0 OR e.price IS NULL)")
 
-    if 'выходн' in lower:
+    if filters['weekend']:
         conditions.append("EXTRACT(DOW FROM e.event_date) IN (0, 6)")
 
-    keywords_for_search = []
-    for word in text.split():
-        w = word.lower().strip('.,!?')
-        if len(w) > 3 and w not in ('найди', 'найти', 'покажи', 'хочу', 'город', 'ближайш'):
-            keywords_for_search.append(w)
-
-    if keywords_for_search:
+    word = keyword(intent)
+    if word:
         conditions.append(f"(LOWER(e.title) LIKE %s OR LOWER(e.description) LIKE %s OR LOWER(e.category) LIKE %s)")
-        like_term = f'%{keywords_for_search[0]}%'
+        like_term = f'%{word}%'
         params.extend([like_term, like_term, like_term])
 
     where = " AND ".join(conditions)
@@ -206,28 +227,22 @@ def search_events(text, cur):
     return cur.fetchall()
 
 
-def search_services(text, cur):
+def search_services(intent, cur):
     conditions = ["s.is_active = true"]
     params = []
 
-    city = extract_city(text)
+    city = intent['city']
     if city:
         conditions.append("LOWER(s.city) LIKE %s")
         params.append(f'%{city.lower()}%')
 
-    lower = text.lower()
-    if 'онлайн' in lower:
+    if intent['filters']['online']:
         conditions.append("s.is_online = true")
 
-    keywords_for_search = []
-    for word in text.split():
-        w = word.lower().strip('.,!?')
-        if len(w) > 3 and w not in ('найди', 'найти', 'покажи', 'хочу', 'услуг', 'город'):
-            keywords_for_search.append(w)
-
-    if keywords_for_search:
+    word = keyword(intent, skip=('услуг',))
+    if word:
         conditions.append("(LOWER(s.title) LIKE %s OR LOWER(s.description) LIKE %s OR LOWER(s.service_type) LIKE %s OR LOWER(s.name) LIKE %s)")
-        like_term = f'%{keywords_for_search[0]}%'
+        like_term = f'%{word}%'
         params.extend([like_term, like_term, like_term, like_term])
 
     where = " AND ".join(conditions)
@@ -244,30 +259,24 @@ def search_services(text, cur):
     return cur.fetchall()
 
 
-def search_ads(text, cur):
+def search_ads(intent, cur):
     conditions = ["a.status = 'active'"]
     params = []
 
-    lower = text.lower()
-    if 'приглаш' in lower:
-        conditions.append("a.action = 'invite'")
-    elif any(kw in lower for kw in ['пойти', 'пойд', 'хочу']):
-        conditions.append("a.action = 'go'")
+    ad_action = intent['filters']['ad_action']
+    if ad_action:
+        conditions.append("a.action = %s")
+        params.append(ad_action)
 
-    city = extract_city(text)
+    city = intent['city']
     if city:
         conditions.append("LOWER(u.city) LIKE %s")
         params.append(f'%{city.lower()}%')
 
-    keywords_for_search = []
-    for word in text.split():
-        w = word.lower().strip('.,!?')
-        if len(w) > 3 and w not in ('найди', 'найти', 'покажи', 'хочу', 'пойти', 'город', 'приглаш', 'объявлен'):
-            keywords_for_search.append(w)
-
-    if keywords_for_search:
+    word = keyword(intent, skip=('объявлен',))
+    if word:
         conditions.append("LOWER(a.schedule) LIKE %s")
-        params.append(f'%{keywords_for_search[0]}%')
+        params.append(f'%{word}%')
 
     where = " AND ".join(conditions)
 
@@ -275,7 +284,7 @@ def search_ads(text, cur):
         SELECT a.id, a.action, a.schedule,
                u.name, u.city,
                EXTRACT(YEAR FROM AGE(CURRENT_DATE, u.birth_date))::int as age,
-               u.avatar_url, u.id as user_id
+               u.avatar_url, u.avatar_blurhash, u.avatar_color, u.id as user_id
         FROM {SCHEMA}.ads a
         JOIN {SCHEMA}.users u ON a.user_id = u.id
         WHERE {where}
@@ -286,6 +295,64 @@ def search_ads(text, cur):
     return cur.fetchall()
 
 
+def build_tsquery(intent):
+    """Строит to_tsquery: любое из значимых слов (с префиксным поиском) И все слова города"""
+    city = intent['city']
+    city_words = [w for w in CITY_WORD_RE.findall(city.lower()) if len(w) >= 3] if city else []
+    terms = [f'{w}:*' if len(w) >= 4 else w for w in intent['terms'] if TERM_RE.fullmatch(w)]
+
+    parts = []
+    if terms:
+        parts.append('(' + ' | '.join(dict.fromkeys(terms)) + ')')
+    if city_words:
+        parts.append(' & '.join(f'{w}:*' for w in city_words))
+    return ' & '.join(parts)
+
+
+def search_documents(intent, cur):
+    """Один ранжированный запрос по search_documents сразу по всем типам.
+    Возвращает выбранный тип, его результаты и фасеты (сколько найдено каждого типа)."""
+    tsquery = build_tsquery(intent)
+    if not tsquery:
+        return None, [], {}
+
+    conditions = ["d.is_active", "d.search_vector @@ q.query"]
+    params = [tsquery]
+
+    if intent['gender']:
+        conditions.append("(d.doc_type <> 'people' OR d.gender = %s)")
+        params.append(intent['gender'])
+
+    if intent['age_from'] is not None:
+        conditions.append("(d.doc_type NOT IN ('people', 'ads') OR d.age BETWEEN %s AND %s)")
+        params.extend([intent['age_from'], intent['age_to']])
+
+    cur.execute(f"""
+        SELECT doc_type, payload, rank, type_total
+        FROM (
+            SELECT d.doc_type, d.payload, ts_rank_cd(d.search_vector, q.query) AS rank,
+                   ROW_NUMBER() OVER (PARTITION BY d.doc_type
+                                      ORDER BY ts_rank_cd(d.search_vector, q.query) DESC) AS rn,
+                   COUNT(*) OVER (PARTITION BY d.doc_type) AS type_total
+            FROM {SCHEMA}.search_documents d, to_tsquery('russian', %s) AS q(query)
+            WHERE {' AND '.join(conditions)}
+        ) ranked
+        WHERE rn <= 20
+        ORDER BY rank DESC
+    """, params)
+    rows = cur.fetchall()
+    if not rows:
+        return None, [], {}
+
+    facets = {row['doc_type']: row['type_total'] for row in rows}
+    scores = intent['scores']
+    hinted = [t for t in facets if scores[t] > 0]
+    search_type = max(hinted, key=scores.get) if hinted else rows[0]['doc_type']
+
+    results = [row['payload'] for row in rows if row['doc_type'] == search_type]
+    return search_type, results, facets
+
+
 def generate_explanation(text, search_type, count):
     type_names = {
         'people': 'людей',
@@ -300,7 +367,9 @@ def generate_explanation(text, search_type, count):
 
 
 def handler(event: dict, context) -> dict:
-    """Голосовой и текстовый поиск — распознаёт речь через Whisper и ищет по базе"""
+    """Голосовой и текстовый поиск — распознаёт речь через Whisper и ищет по базе.
+    Аудио принимается base64 в JSON, сырым телом (Content-Type: audio/*) или ключом audio_key
+    после загрузки по форме из ?action=upload-url; загрузка и audio_key требуют авторизации."""
     method = event.get('httpMethod', 'POST')
 
     if method == 'OPTIONS':
@@ -309,7 +378,7 @@ def handler(event: dict, context) -> dict:
             'headers': {
                 'Access-Control-Allow-Origin': '*',
                 'Access-Control-Allow-Methods': 'POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
+                'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Authorization'
             },
             'body': ''
         }
@@ -321,12 +390,101 @@ def handler(event: dict, context) -> dict:
             'body': json.dumps({'error': 'Method not allowed'})
         }
 
-    body = json.loads(event.get('body') or '{}')
-    audio_base64 = body.get('audio')
-    text = (body.get('text') or '').strip()
+    params = event.get('queryStringParameters') or {}
+
+    if params.get('action') == 'upload-url':
+        user_id = get_user_id(event)
+        if not user_id:
+            return {
+                'statusCode': 401,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'Unauthorized'})
+            }
+        conn = psycopg2.connect(os.environ['DATABASE_URL'])
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            upload = create_audio_upload(cur, user_id, params.get('content_type'))
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+        if not upload:
+            return {
+                'statusCode': 429,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'Слишком много записей, попробуйте позже'}, ensure_ascii=False)
+            }
+        return {
+            'statusCode': 200,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps(upload)
+        }
+
+    text = ''
+    audio = None
+    audio_key = None
+    content_type = 'audio/webm'
+
+    if is_raw_audio_request(event):
+        audio = decode_audio(event.get('body') or '')
+        content_type = get_header(event, 'Content-Type')
+        text = (params.get('text') or '').strip()
+    else:
+        body = json.loads(event.get('body') or '{}')
+        text = (body.get('text') or '').strip()
+        audio_key = body.get('audio_key')
+        if body.get('audio') and not text:
+            audio = decode_audio(body['audio'])
+
+    if audio_key:
+        user_id = get_user_id(event)
+        if not user_id:
+            return {
+                'statusCode': 401,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'Unauthorized'})
+            }
+        if not audio_key.startswith(f'{AUDIO_UPLOAD_PREFIX}{user_id}/') or '..' in audio_key:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'Invalid audio_key'})
+            }
+        if not text:
+            conn = psycopg2.connect(os.environ['DATABASE_URL'])
+            cur = conn.cursor()
+            try:
+                claimed = claim_audio_upload(cur, user_id, audio_key)
+                conn.commit()
+            finally:
+                cur.close()
+                conn.close()
+            if not claimed:
+                return {
+                    'statusCode': 403,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Запись не найдена или уже использована'}, ensure_ascii=False)
+                }
+
+    too_large = {
+        'statusCode': 413,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({'error': 'Запись слишком длинная'}, ensure_ascii=False)
+    }
+    if audio is not None and len(audio) > MAX_AUDIO_BYTES:
+        return too_large
 
-    if audio_base64 and not text:
-        text = transcribe_audio(audio_base64)
+    if (audio or audio_key) and not text:
+        try:
+            text = transcribe_audio(audio, content_type) if audio else transcribe_uploaded_audio(audio_key)
+        except AudioTooLarge:
+            return too_large
+        except ObjectNotFound:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'Запись не загружена'}, ensure_ascii=False)
+            }
         if not text:
             return {
                 'statusCode': 400,
@@ -341,19 +499,24 @@ def handler(event: dict, context) -> dict:
             'body': json.dumps({'error': 'Скажите или напишите что вы ищете'}, ensure_ascii=False)
         }
 
-    search_type = detect_type(text)
-
     conn = psycopg2.connect(os.environ['DATABASE_URL'])
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    search_fn = {
-        'people': search_people,
-        'events': search_events,
-        'services': search_services,
-        'ads': search_ads,
-    }
+    load_cities(cur, SCHEMA)
+    intent = parse_intent(text)
+
+    search_type, results, facets = search_documents(intent, cur)
+
+    if not results:
+        search_type = intent['type']
+        search_fn = {
+            'people': search_people,
+            'events': search_events,
+            'services': search_services,
+            'ads': search_ads,
+        }
+        results = search_fn[search_type](intent, cur)
 
-    results = search_fn[search_type](text, cur)
     cur.close()
     conn.close()
 
@@ -379,6 +542,7 @@ def handler(event: dict, context) -> dict:
             'query': text,
             'explanation': explanation,
             'results': items,
+            'facets': facets,
             'count': len(items)
         }, ensure_ascii=False, default=str)
     }
@@ -0,0 +1,287 @@
+"""Разбор голосового запроса за один проход: тип поиска, город, пол, возраст, фильтры и значимые слова.
+
+Словари ключевых слов и газеттир городов компилируются в префиксные деревья один раз
+при импорте; города из таблицы cities добавляются при первом запросе в инстансе."""
+
+import re
+
+PEOPLE_KEYWORDS = [
+    'девуш', 'парн', 'мужчин', 'женщин', 'людей', 'люди', 'человек',
+    'найди', 'знаком', 'профил', 'анкет', 'подруг', 'друз', 'друг',
+    'лет', 'возраст', 'молод', 'взросл'
+]
+EVENTS_KEYWORDS = [
+    'концерт', 'мероприят', 'событи', 'вечеринк', 'выставк', 'фестивал',
+    'спектакл', 'шоу', 'встреч', 'тусовк', 'выходн', 'праздник', 'вечер'
+]
+SERVICES_KEYWORDS = [
+    'услуг', 'фотограф', 'массаж', 'репетитор', 'тренер', 'стилист',
+    'визажист', 'мастер', 'специалист', 'курс', 'занят', 'обучен',
+    'психолог', 'юрист', 'дизайнер', 'программист'
+]
+ADS_KEYWORDS = [
+    'пойти', 'пойд', 'пригла', 'кино', 'кафе', 'ресторан', 'свидан',
+    'прогул', 'погуля', 'компани', 'вместе', 'совместн', 'объявлен',
+    'лайв', 'live', 'тур', 'путешеств', 'ужин'
+]
+
+GENDER_MAP = {
+    'девуш': 'female', 'женщин': 'female', 'подруг': 'female',
+    'парн': 'male', 'мужчин': 'male', 'друз': 'male', 'друг': 'male'
+}
+
+# Фильтры поиска по основам: бесплатно, в выходные, онлайн; у объявлений — приглашают или хотят пойти
+FILTER_KEYWORDS = {
+    'бесплатн': ('free', True),
+    'выходн': ('weekend', True),
+    'онлайн': ('online', True),
+    'пригла': ('ad_action', 'invite'),
+    'пойти': ('ad_action', 'go'),
+    'пойд': ('ad_action', 'go'),
+    'хочу': ('ad_action', 'go'),
+}
+
+STOP_WORDS = {
+    'найди', 'найти', 'покажи', 'хочу', 'ищу', 'нужен', 'нужна', 'нужно',
+    'город', 'городе', 'лет', 'года', 'возраст', 'ближайш',
+}
+# Город ищется только после предлога или слова «город»: иначе «Найди Владимира» — это город Владимир
+CITY_PREPOSITIONS = {'в', 'во', 'из', 'по', 'г', 'город', 'города', 'городе'}
+AGE_WORDS = ('лет', 'год')
+
+DEFAULT_CITIES = [
+    'Москва', 'Санкт-Петербург', 'Новосибирск', 'Екатеринбург', 'Казань',
+    'Нижний Новгород', 'Челябинск', 'Самара', 'Омск', 'Ростов-на-Дону', 'Уфа',
+    'Красноярск', 'Воронеж', 'Пермь', 'Волгоград', 'Краснодар', 'Саратов',
+    'Тюмень', 'Тольятти', 'Ижевск', 'Барнаул', 'Ульяновск', 'Иркутск',
+    'Хабаровск', 'Ярославль', 'Владивосток', 'Махачкала', 'Томск', 'Оренбург',
+    'Кемерово', 'Новокузнецк', 'Рязань', 'Астрахань', 'Набережные Челны',
+    'Пенза', 'Киров', 'Липецк', 'Чебоксары', 'Калининград', 'Тула', 'Курск',
+    'Сочи', 'Ставрополь', 'Улан-Удэ', 'Тверь', 'Магнитогорск', 'Иваново',
+    'Брянск', 'Белгород', 'Сургут', 'Владимир', 'Нижний Тагил', 'Архангельск',
+    'Чита', 'Калуга', 'Смоленск', 'Волжский', 'Якутск', 'Саранск', 'Череповец',
+    'Вологда', 'Владикавказ', 'Мурманск', 'Тамбов', 'Грозный', 'Петрозаводск',
+    'Кострома', 'Нижневартовск', 'Новороссийск', 'Йошкар-Ола',
+    'Комсомольск-на-Амуре',
+]
+
+TOKEN_RE = re.compile(r'(?P<num>\d+)|(?P<dash>[-–—])|(?P<word>[а-яёa-z]+(?:-[а-яёa-z]+)*)', re.IGNORECASE)
+
+_END = '$'
+_SIBILANTS = 'гкхжшчщ'
+
+
+def _declensions(word):
+    """Формы одного слова названия города во всех падежах (с запасом: лишняя форма безвредна)"""
+    forms = {word}
+    if len(word) < 3:
+        return forms
+    if word.endswith(('ий', 'ый', 'ой')):
+        base = word[:-2]
+        forms.update(base + end for end in ('ого', 'ому', 'ым', 'ом', 'его', 'ему', 'им', 'ем'))
+    elif word.endswith('ые'):
+        forms.update(word[:-2] + end for end in ('ых', 'ым', 'ыми'))
+    elif word.endswith('ая'):
+        forms.update(word[:-2] + end for end in ('ой', 'ую'))
+    elif word.endswith(('ово', 'ево', 'ино', 'ыно')):
+        forms.update(word[:-1] + end for end in ('а', 'у', 'е', 'ом'))
+    elif word[-1] == 'а':
+        base = word[:-1]
+        genitive = 'и' if base[-1] in _SIBILANTS else 'ы'
+        forms.update(base + end for end in (genitive, 'е', 'у', 'ой', 'ою'))
+    elif word[-1] == 'я':
+        forms.update(word[:-1] + end for end in ('и', 'е', 'ю', 'ей'))
+    elif word[-1] == 'ь':
+        forms.update(word[:-1] + end for end in ('и', 'ью', 'я', 'ю', 'е', 'ем'))
+    elif word[-1] == 'ы':
+        forms.update(word[:-1] + end for end in ('ах', 'ам', 'ами'))
+    elif word[-1] not in 'аеёиоуыэюя':
+        forms.update(word + end for end in ('а', 'у', 'е', 'ом'))
+    return forms
+
+
+def _token_forms(token):
+    """Формы токена с дефисами: склоняется часть перед «-на-» или последняя часть"""
+    parts = token.split('-')
+    if len(parts) == 1:
+        return _declensions(token)
+    idx = parts.index('на') - 1 if 'на' in parts else len(parts) - 1
+    return {'-'.join(parts[:idx] + [form] + parts[idx + 1:]) for form in _declensions(parts[idx])}
+
+
+def _city_phrases(name):
+    """Все сочетания форм для многословного названия: «нижнем новгороде», «нижнего новгорода»…"""
+    phrases = [()]
+    for token in name.lower().replace('ё', 'е').split():
+        phrases = [phrase + (form,) for phrase in phrases for form in _token_forms(token)]
+    return phrases
+
+
+def build_city_trie(names):
+    trie = {}
+    for name in names:
+        for phrase in _city_phrases(name):
+            node = trie
+            for token in phrase:
+                node = node.setdefault(token, {})
+            node[_END] = name
+    return trie
+
+
+def build_keyword_trie():
+    trie = {}
+    groups = [
+        (PEOPLE_KEYWORDS, 'type', 'people'),
+        (EVENTS_KEYWORDS, 'type', 'events'),
+        (SERVICES_KEYWORDS, 'type', 'services'),
+        (ADS_KEYWORDS, 'type', 'ads'),
+    ]
+    groups += [([stem], 'gender', gender) for stem, gender in GENDER_MAP.items()]
+    groups += [([stem], 'filter', flag) for stem, flag in FILTER_KEYWORDS.items()]
+    for stems, kind, value in groups:
+        for stem in stems:
+            node = trie
+            for ch in stem:
+                node = node.setdefault(ch, {})
+            node.setdefault(_END, []).append((kind, value, stem))
+    return trie
+
+
+KEYWORD_TRIE = build_keyword_trie()
+CITY_TRIE = build_city_trie(DEFAULT_CITIES)
+_cities_loaded = False
+
+
+def load_cities(cur, schema):
+    """Один раз за жизнь инстанса дополняет газеттир городами из таблицы cities"""
+    global CITY_TRIE, _cities_loaded
+    if _cities_loaded:
+        return
+    try:
+        cur.execute(f"SELECT name FROM {schema}.cities")
+        names = [row['name'] for row in cur.fetchall() if row['name']]
+        CITY_TRIE = build_city_trie(sorted(set(DEFAULT_CITIES) | set(names)))
+    except Exception as e:
+        print(f'Cities load error: {e}')
+        cur.connection.rollback()
+    _cities_loaded = True
+
+
+def _keyword_tags(token):
+    """Все ключевые основы, которые являются префиксом токена"""
+    node = KEYWORD_TRIE
+    tags = []
+    for ch in token:
+        node = node.get(ch)
+        if node is None:
+            break
+        tags.extend(node.get(_END, ()))
+    return tags
+
+
+def _match_city(tokens, i):
+    """Самое длинное совпадение названия города, начиная с токена i: (город, число токенов)"""
+    node = CITY_TRIE
+    found = None
+    for j in range(i, len(tokens)):
+        kind, token, _ = tokens[j]
+        if kind != 'word':
+            break
+        node = node.get(token)
+        if node is None:
+            break
+        if _END in node:
+            found = (node[_END], j - i + 1)
+    return found
+
+
+def _is_age_word(tokens, i):
+    return i < len(tokens) and tokens[i][0] == 'word' and tokens[i][1].startswith(AGE_WORDS)
+
+
+def _is_age(tokens, i):
+    return i < len(tokens) and tokens[i][0] == 'num' and len(tokens[i][1]) == 2
+
+
+def parse(text):
+    """Разбирает запрос за один линейный проход по токенам"""
+    tokens = [
+        (m.lastgroup, m.group().lower().replace('ё', 'е'), m.group())
+        for m in TOKEN_RE.finditer(text)
+    ]
+    scores = {'people': 0, 'events': 0, 'services': 0, 'ads': 0}
+    seen_stems = set()
+    city = None
+    fallback_city = None
+    gender = None
+    age_from = age_to = None
+    filters = {'free': False, 'weekend': False, 'online': False, 'ad_action': None}
+    terms = []
+
+    i = 0
+    while i < len(tokens):
+        kind, token, _ = tokens[i]
+
+        if kind == 'num':
+            if age_from is None and _is_age(tokens, i):
+                prev = tokens[i - 1][1] if i else ''
+                if prev == 'от' and i + 2 < len(tokens) and tokens[i + 1][1] == 'до' and _is_age(tokens, i + 2):
+                    age_from, age_to = int(token), int(tokens[i + 2][1])
+                    i += 3
+                    continue
+                if (i + 3 < len(tokens) and tokens[i + 1][0] == 'dash'
+                        and _is_age(tokens, i + 2) and _is_age_word(tokens, i + 3)):
+                    age_from, age_to = int(token), int(tokens[i + 2][1])
+                    i += 4
+                    continue
+                if _is_age_word(tokens, i + 1):
+                    age = int(token)
+                    age_from, age_to = max(18, age - 3), age + 3
+                    i += 2
+                    continue
+            i += 1
+            continue
+
+        if kind != 'word':
+            i += 1
+            continue
+
+        if city is None and i and tokens[i - 1][1] in CITY_PREPOSITIONS:
+            match = _match_city(tokens, i)
+            if match:
+                city, length = match
+                i += length
+                continue
+            if fallback_city is None and tokens[i][2][:1].isupper():
+                fallback_city = tokens[i][2]
+
+        tags = _keyword_tags(token)
+        for tag_kind, value, stem in tags:
+            if tag_kind == 'type':
+                if stem not in seen_stems:
+                    scores[value] += 1
+                    seen_stems.add(stem)
+            elif tag_kind == 'filter':
+                name, flag = value
+                if filters[name] != 'invite':
+                    filters[name] = flag
+            elif gender is None:
+                gender = value
+
+        is_tag_word = any(tag[0] in ('gender', 'filter') for tag in tags)
+        if len(token) >= 3 and token not in STOP_WORDS and not is_tag_word:
+            terms.append(token)
+        i += 1
+
+    best = max(scores, key=scores.get)
+    return {
+        'text': text,
+        'type': best if scores[best] else 'people',
+        'scores': scores,
+        'city': city or fallback_city,
+        'gender': gender,
+        'age_from': age_from,
+        'age_to': age_to,
+        'filters': filters,
+        'terms': terms,
+    }
@@ -0,0 +1,23 @@
+-- Единый полнотекстовый индекс по анкетам, мероприятиям, услугам и объявлениям.
+-- Наполняется функцией search (?action=sync) из исходных таблиц по updated_at.
+CREATE TABLE IF NOT EXISTS t_p19021063_social_connect_platf.search_documents (
+    doc_type VARCHAR(20) NOT NULL CHECK (doc_type IN ('people', 'events', 'services', 'ads')),
+    source_id INTEGER NOT NULL,
+    user_id INTEGER,
+    city VARCHAR(255),
+    gender VARCHAR(20),
+    age INTEGER,
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    search_vector TSVECTOR NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    source_updated_at TIMESTAMP,
+    indexed_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (doc_type, source_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_search_documents_vector
+    ON t_p19021063_social_connect_platf.search_documents USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_search_documents_type_city
+    ON t_p19021063_social_connect_platf.search_documents (doc_type, LOWER(city)) WHERE is_active;
+CREATE INDEX IF NOT EXISTS idx_search_documents_watermark
+    ON t_p19021063_social_connect_platf.search_documents (doc_type, source_updated_at DESC);
@@ -0,0 +1,6 @@
+-- Производные изображений (64/256/1024 px, WebP и JPEG): {"64": {"webp": url, "jpeg": url}, ...}
+ALTER TABLE t_p19021063_social_connect_platf.users
+    ADD COLUMN IF NOT EXISTS avatar_variants JSONB;
+
+ALTER TABLE t_p19021063_social_connect_platf.user_photos
+    ADD COLUMN IF NOT EXISTS variants JSONB;
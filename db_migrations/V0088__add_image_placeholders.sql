@@ -0,0 +1,12 @@
+-- Плейсхолдеры изображений: BlurHash (4×3 компоненты) и доминантный цвет #rrggbb
+ALTER TABLE t_p19021063_social_connect_platf.users
+    ADD COLUMN IF NOT EXISTS avatar_blurhash VARCHAR(64),
+    ADD COLUMN IF NOT EXISTS avatar_color VARCHAR(7);
+
+ALTER TABLE t_p19021063_social_connect_platf.user_photos
+    ADD COLUMN IF NOT EXISTS blurhash VARCHAR(64),
+    ADD COLUMN IF NOT EXISTS color VARCHAR(7);
+
+-- По элементу на каждое фото из ads.photos: {"blurhash": ..., "color": ...} или null
+ALTER TABLE t_p19021063_social_connect_platf.ads
+    ADD COLUMN IF NOT EXISTS photo_placeholders JSONB;
@@ -0,0 +1,26 @@
+-- Контентно-адресуемые медиа: один объект на уникальный SHA-256 содержимого, ссылки считаются в ref_count
+CREATE TABLE IF NOT EXISTS t_p19021063_social_connect_platf.media_objects (
+    sha256 CHAR(64) PRIMARY KEY,
+    object_key VARCHAR(255) NOT NULL,
+    object_keys TEXT[] NOT NULL,
+    content_type VARCHAR(50) NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    variants JSONB,
+    blurhash VARCHAR(64),
+    color VARCHAR(7),
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT NOW(),
+    released_at TIMESTAMP
+);
+
+-- Очередь сборщика media-gc: только объекты без ссылок
+CREATE INDEX IF NOT EXISTS idx_media_objects_released
+    ON t_p19021063_social_connect_platf.media_objects (released_at)
+    WHERE ref_count <= 0;
+
+ALTER TABLE t_p19021063_social_connect_platf.users
+    ADD COLUMN IF NOT EXISTS avatar_media CHAR(64);
+
+ALTER TABLE t_p19021063_social_connect_platf.user_photos
+    ADD COLUMN IF NOT EXISTS media_sha256 CHAR(64);
@@ -0,0 +1,16 @@
+-- Счётчик лайков хранится в строке фото и меняется в той же транзакции, что и photo_likes
+ALTER TABLE t_p19021063_social_connect_platf.user_photos
+    ADD COLUMN IF NOT EXISTS likes_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE t_p19021063_social_connect_platf.user_photos p
+SET likes_count = l.cnt
+FROM (
+    SELECT photo_id, COUNT(*) AS cnt
+    FROM t_p19021063_social_connect_platf.photo_likes
+    GROUP BY photo_id
+) l
+WHERE l.photo_id = p.id;
+
+-- Keyset-пагинация галереи: WHERE user_id = ? AND (position, id) > (?, ?) ORDER BY position, id
+CREATE INDEX IF NOT EXISTS idx_user_photos_user_position_id
+    ON t_p19021063_social_connect_platf.user_photos (user_id, position, id);
@@ -0,0 +1,26 @@
+-- Асинхронные задания D-ID: функция не ждёт рендер, состояние обновляют webhook, sweep и status
+CREATE TABLE IF NOT EXISTS t_p19021063_social_connect_platf.animation_jobs (
+    id VARCHAR(32) PRIMARY KEY,
+    input_hash CHAR(64) NOT NULL,
+    talk_id VARCHAR(100),
+    status VARCHAR(20) NOT NULL DEFAULT 'processing',
+    image_url TEXT NOT NULL,
+    text TEXT NOT NULL,
+    voice VARCHAR(100),
+    driver VARCHAR(255),
+    result_url TEXT,
+    error TEXT,
+    checks INTEGER NOT NULL DEFAULT 0,
+    next_check_at TIMESTAMP DEFAULT NOW(),
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW(),
+    completed_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_animation_jobs_input_hash
+    ON t_p19021063_social_connect_platf.animation_jobs (input_hash, created_at DESC);
+
+-- Очередь sweep: только незавершённые задания
+CREATE INDEX IF NOT EXISTS idx_animation_jobs_due
+    ON t_p19021063_social_connect_platf.animation_jobs (next_check_at)
+    WHERE status = 'processing';
@@ -0,0 +1,7 @@
+-- Общий для всех инстансов функции music кеш ответов Jamendo по ключу action:query:limit:offset
+CREATE TABLE IF NOT EXISTS t_p19021063_social_connect_platf.jamendo_cache (
+    cache_key VARCHAR(255) PRIMARY KEY,
+    payload JSONB NOT NULL,
+    fetched_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    refreshing_until TIMESTAMP
+);
@@ -0,0 +1,30 @@
+-- Горячее состояние покерного стола одним JSONB-снимком: ход читает одну строку и пишет её
+-- через UPDATE ... WHERE version = n; poker_players и текущая раздача в poker_games догоняются
+-- фоновой синхронизацией (action=sync) до synced_version
+CREATE TABLE IF NOT EXISTS t_p19021063_social_connect_platf.poker_state (
+    room_id INTEGER PRIMARY KEY REFERENCES t_p19021063_social_connect_platf.poker_rooms(id),
+    version INTEGER NOT NULL DEFAULT 0,
+    synced_version INTEGER NOT NULL DEFAULT 0,
+    state JSONB NOT NULL,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Очередь синхронизации: только столы, чей снимок новее реляционных таблиц
+CREATE INDEX IF NOT EXISTS idx_poker_state_unsynced
+    ON t_p19021063_social_connect_platf.poker_state (updated_at)
+    WHERE synced_version < version;
+
+-- Номер раздачи в комнате: снимок знает раздачу до того, как у неё появится строка в poker_games
+ALTER TABLE t_p19021063_social_connect_platf.poker_games
+    ADD COLUMN IF NOT EXISTS hand_no INTEGER;
+
+UPDATE t_p19021063_social_connect_platf.poker_games g
+SET hand_no = n.hand_no
+FROM (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY room_id ORDER BY id) AS hand_no
+    FROM t_p19021063_social_connect_platf.poker_games
+) n
+WHERE n.id = g.id AND g.hand_no IS NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_poker_games_room_hand
+    ON t_p19021063_social_connect_platf.poker_games (room_id, hand_no);
@@ -0,0 +1,6 @@
+-- Версия стола, в которой записано сообщение: опрос с since забирает только новые
+ALTER TABLE t_p19021063_social_connect_platf.poker_messages
+    ADD COLUMN IF NOT EXISTS state_version INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_poker_messages_room_version
+    ON t_p19021063_social_connect_platf.poker_messages (room_id, state_version);
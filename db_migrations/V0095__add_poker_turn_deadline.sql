@@ -0,0 +1,14 @@
+-- Срок текущего хода (UTC) рядом со снимком: sweep по расписанию ходит за игроков, у которых он истёк
+ALTER TABLE t_p19021063_social_connect_platf.poker_state
+    ADD COLUMN IF NOT EXISTS turn_deadline TIMESTAMP;
+
+UPDATE t_p19021063_social_connect_platf.poker_state
+SET turn_deadline = (state->'hand'->>'turn_end_at')::timestamp
+WHERE state->>'status' = 'playing'
+  AND state->'hand' IS NOT NULL AND state->'hand' <> 'null'::jsonb
+  AND (state->'hand'->>'finished')::boolean IS NOT TRUE;
+
+-- Очередь sweep: только столы, где кто-то должен ходить
+CREATE INDEX IF NOT EXISTS idx_poker_state_turn_deadline
+    ON t_p19021063_social_connect_platf.poker_state (turn_deadline)
+    WHERE turn_deadline IS NOT NULL;
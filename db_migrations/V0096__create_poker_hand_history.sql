@@ -0,0 +1,14 @@
+-- Журнал завершённых раздач: одна неизменяемая двоичная запись (~40–120 байт) на раздачу,
+-- формат — backend/poker/history.py. Пишется вместе со снимком, читается replay и export
+CREATE TABLE IF NOT EXISTS t_p19021063_social_connect_platf.poker_hand_history (
+    room_id INTEGER NOT NULL,
+    hand_no INTEGER NOT NULL,
+    record BYTEA NOT NULL,
+    finished_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (room_id, hand_no)
+);
+
+-- Колода завершённой раздачи не нужна ни игре, ни истории
+UPDATE t_p19021063_social_connect_platf.poker_games
+SET deck = ''
+WHERE finished_at IS NOT NULL AND deck <> '';
@@ -0,0 +1,25 @@
+-- Имя и аватар игрока копируются в строку игрока при входе в комнату: состояние стола и системные
+-- сообщения больше не ходят в users; при смене профиля копии в незавершённых комнатах обновляются
+ALTER TABLE t_p19021063_social_connect_platf.poker_players
+    ADD COLUMN IF NOT EXISTS display_name VARCHAR(255),
+    ADD COLUMN IF NOT EXISTS avatar_url TEXT,
+    ADD COLUMN IF NOT EXISTS avatar_blurhash VARCHAR(64),
+    ADD COLUMN IF NOT EXISTS avatar_color VARCHAR(7);
+
+ALTER TABLE t_p19021063_social_connect_platf.mafia_players
+    ADD COLUMN IF NOT EXISTS display_name VARCHAR(255),
+    ADD COLUMN IF NOT EXISTS avatar_url TEXT,
+    ADD COLUMN IF NOT EXISTS avatar_blurhash VARCHAR(64),
+    ADD COLUMN IF NOT EXISTS avatar_color VARCHAR(7);
+
+UPDATE t_p19021063_social_connect_platf.poker_players pp
+SET display_name = COALESCE(NULLIF(u.first_name, ''), u.nickname, 'Игрок'),
+    avatar_url = u.avatar_url, avatar_blurhash = u.avatar_blurhash, avatar_color = u.avatar_color
+FROM t_p19021063_social_connect_platf.users u
+WHERE u.id = pp.user_id AND pp.display_name IS NULL;
+
+UPDATE t_p19021063_social_connect_platf.mafia_players mp
+SET display_name = COALESCE(NULLIF(u.first_name, ''), u.nickname, 'Игрок'),
+    avatar_url = u.avatar_url, avatar_blurhash = u.avatar_blurhash, avatar_color = u.avatar_color
+FROM t_p19021063_social_connect_platf.users u
+WHERE u.id = mp.user_id AND mp.display_name IS NULL;
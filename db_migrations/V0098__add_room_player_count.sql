@@ -0,0 +1,36 @@
+-- Число игроков хранится в строке комнаты и меняется в той же транзакции, что вход и выход:
+-- лобби больше не считает игроков подзапросом для каждой комнаты
+ALTER TABLE t_p19021063_social_connect_platf.poker_rooms
+    ADD COLUMN IF NOT EXISTS player_count INTEGER NOT NULL DEFAULT 0;
+
+ALTER TABLE t_p19021063_social_connect_platf.mafia_rooms
+    ADD COLUMN IF NOT EXISTS player_count INTEGER NOT NULL DEFAULT 0;
+
+-- В покере считаются игроки за столом (is_active) по снимку, если он есть — poker_players может
+-- отставать от него до синхронизации; в мафии — все строки игроков, как и раньше
+UPDATE t_p19021063_social_connect_platf.poker_rooms r
+SET player_count = COALESCE(
+    (SELECT COUNT(*) FILTER (WHERE (p->>'is_active')::boolean)
+     FROM t_p19021063_social_connect_platf.poker_state s, jsonb_array_elements(s.state->'players') p
+     WHERE s.room_id = r.id
+     HAVING COUNT(*) > 0),
+    (SELECT COUNT(*) FROM t_p19021063_social_connect_platf.poker_players pp
+     WHERE pp.room_id = r.id AND pp.is_active = TRUE)
+)
+WHERE r.status IN ('waiting', 'playing');
+
+UPDATE t_p19021063_social_connect_platf.mafia_rooms r
+SET player_count = (
+    SELECT COUNT(*) FROM t_p19021063_social_connect_platf.mafia_players mp
+    WHERE mp.room_id = r.id
+)
+WHERE r.status IN ('waiting', 'playing');
+
+-- Лобби читает только открытые комнаты, новые сверху; завершённые в индекс не попадают
+CREATE INDEX IF NOT EXISTS idx_poker_rooms_open
+    ON t_p19021063_social_connect_platf.poker_rooms (created_at DESC)
+    WHERE status IN ('waiting', 'playing');
+
+CREATE INDEX IF NOT EXISTS idx_mafia_rooms_open
+    ON t_p19021063_social_connect_platf.mafia_rooms (created_at DESC)
+    WHERE status IN ('waiting', 'playing');
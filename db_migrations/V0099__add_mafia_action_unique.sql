@@ -0,0 +1,9 @@
+-- Один ход каждого типа у игрока за фазу: повторный ход заменяет цель через ON CONFLICT,
+-- а не SELECT + UPDATE/INSERT. Дубликаты, оставшиеся от гонок, схлопываются до последнего хода
+DELETE FROM t_p19021063_social_connect_platf.mafia_actions a
+USING t_p19021063_social_connect_platf.mafia_actions b
+WHERE a.room_id = b.room_id AND a.day_number = b.day_number AND a.phase = b.phase
+  AND a.actor_id = b.actor_id AND a.action_type = b.action_type AND a.id < b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mafia_actions_turn
+    ON t_p19021063_social_connect_platf.mafia_actions (room_id, day_number, phase, actor_id, action_type);
@@ -0,0 +1,12 @@
+-- Выданные голосовому поиску presigned-загрузки: ключ записан за пользователем и читается
+-- только им и только один раз (claimed_at), по created_at считается лимит выдачи.
+-- Строки и брошенные объекты voice-uploads/ удаляет media-gc
+CREATE TABLE IF NOT EXISTS t_p19021063_social_connect_platf.voice_uploads (
+    object_key VARCHAR(255) PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    claimed_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_voice_uploads_user_created
+    ON t_p19021063_social_connect_platf.voice_uploads (user_id, created_at);
@@ -0,0 +1,35 @@
+-- updated_at для инкрементальной синхронизации search_documents ставит триггер, а не каждое
+-- место записи: участники мероприятия, поднятие анкеты (переписывает только created_at) и любые
+-- будущие UPDATE попадают в индекс. clock_timestamp(), а не NOW(): время ближе к коммиту,
+-- окно перекрытия водяного знака (SYNC_OVERLAP в search) закрывает остальное
+CREATE OR REPLACE FUNCTION t_p19021063_social_connect_platf.search_touch() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS search_touch ON t_p19021063_social_connect_platf.dating_profiles;
+CREATE TRIGGER search_touch BEFORE UPDATE ON t_p19021063_social_connect_platf.dating_profiles
+    FOR EACH ROW EXECUTE FUNCTION t_p19021063_social_connect_platf.search_touch();
+
+DROP TRIGGER IF EXISTS search_touch ON t_p19021063_social_connect_platf.events;
+CREATE TRIGGER search_touch BEFORE UPDATE ON t_p19021063_social_connect_platf.events
+    FOR EACH ROW EXECUTE FUNCTION t_p19021063_social_connect_platf.search_touch();
+
+DROP TRIGGER IF EXISTS search_touch ON t_p19021063_social_connect_platf.services;
+CREATE TRIGGER search_touch BEFORE UPDATE ON t_p19021063_social_connect_platf.services
+    FOR EACH ROW EXECUTE FUNCTION t_p19021063_social_connect_platf.search_touch();
+
+DROP TRIGGER IF EXISTS search_touch ON t_p19021063_social_connect_platf.ads;
+CREATE TRIGGER search_touch BEFORE UPDATE ON t_p19021063_social_connect_platf.ads
+    FOR EACH ROW EXECUTE FUNCTION t_p19021063_social_connect_platf.search_touch();
+
+-- У пользователя — только поля, которые попадают в документ объявления: last_seen и прочие
+-- частые обновления не должны переиндексировать его объявления
+DROP TRIGGER IF EXISTS search_touch ON t_p19021063_social_connect_platf.users;
+CREATE TRIGGER search_touch BEFORE UPDATE ON t_p19021063_social_connect_platf.users
+    FOR EACH ROW
+    WHEN ((OLD.name, OLD.city, OLD.birth_date, OLD.avatar_url, OLD.avatar_blurhash, OLD.avatar_color)
+          IS DISTINCT FROM (NEW.name, NEW.city, NEW.birth_date, NEW.avatar_url, NEW.avatar_blurhash, NEW.avatar_color))
+    EXECUTE FUNCTION t_p19021063_social_connect_platf.search_touch();
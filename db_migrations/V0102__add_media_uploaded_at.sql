@@ -0,0 +1,8 @@
+-- Строка media_objects появляется до загрузки объектов (ref_count 0) и отмечается uploaded_at после неё:
+-- ссылку можно брать только на загруженные. Существующие строки загружены
+ALTER TABLE t_p19021063_social_connect_platf.media_objects
+    ADD COLUMN IF NOT EXISTS uploaded_at TIMESTAMP;
+
+UPDATE t_p19021063_social_connect_platf.media_objects
+SET uploaded_at = COALESCE(created_at, NOW())
+WHERE uploaded_at IS NULL;
@@ -0,0 +1,5 @@
+-- fetched_at пишется через TO_TIMESTAMP и читается через EXTRACT(EPOCH): с TIMESTAMP без зоны
+-- эпоха сдвигалась на смещение сессии. Значения были приведены в зоне сессии — в ней же и переводятся
+ALTER TABLE t_p19021063_social_connect_platf.jamendo_cache
+    ALTER COLUMN fetched_at TYPE TIMESTAMPTZ,
+    ALTER COLUMN refreshing_until TYPE TIMESTAMPTZ;
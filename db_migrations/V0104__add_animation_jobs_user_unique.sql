@@ -0,0 +1,16 @@
+-- Задание D-ID принадлежит пользователю (0 — анонимный запрос); пара (user_id, input_hash) уникальна,
+-- чтобы повторный submit занимал её через ON CONFLICT, а не проверкой перед INSERT
+ALTER TABLE t_p19021063_social_connect_platf.animation_jobs
+    ADD COLUMN IF NOT EXISTS user_id INTEGER NOT NULL DEFAULT 0;
+
+-- Из старых дублей по входным данным остаётся самое свежее задание
+DELETE FROM t_p19021063_social_connect_platf.animation_jobs j
+USING t_p19021063_social_connect_platf.animation_jobs newer
+WHERE newer.user_id = j.user_id
+  AND newer.input_hash = j.input_hash
+  AND (newer.created_at, newer.id) > (j.created_at, j.id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_animation_jobs_user_input
+    ON t_p19021063_social_connect_platf.animation_jobs (user_id, input_hash);
+
+DROP INDEX IF EXISTS t_p19021063_social_connect_platf.idx_animation_jobs_input_hash;
@@ -0,0 +1,4 @@
+-- Просроченные записи jamendo_cache удаляются при каждой записи в кеш: индекс по fetched_at для этого DELETE.
+-- Ключи теперь хеш запроса (action:sha256); старые ключи с текстом запроса просто истекут
+CREATE INDEX IF NOT EXISTS idx_jamendo_cache_fetched_at
+    ON t_p19021063_social_connect_platf.jamendo_cache (fetched_at);
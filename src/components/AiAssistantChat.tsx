@@ -1,4 +1,5 @@
 import { useState, useRef, useEffect, useCallback } from 'react';
+import { animatePhoto } from '@/utils/animatePhoto';
 import {
   OLESYA_AVATAR,
   AI_URL,
@@ -74,23 +75,21 @@ const AiAssistantChat = () => {
     setTalkingVideoUrl(null);
 
     try {
-      const response = await fetch(ANIMATE_URL, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
+      const videoUrl = await animatePhoto(
+        {
           imageUrl: OLESYA_AVATAR,
           text: shortText,
           voice: 'ru-RU-SvetlanaNeural'
-        }),
-        signal: controller.signal
-      });
+        },
+        controller.signal,
+        ANIMATE_URL
+      );
 
-      if (!response.ok) throw new Error('Failed');
+      if (!videoUrl) throw new Error('Failed');
 
-      const data = await response.json();
-      if (data.videoUrl && !controller.signal.aborted) {
-        setCachedVideo(shortText, data.videoUrl);
-        setTalkingVideoUrl(data.videoUrl);
+      if (!controller.signal.aborted) {
+        setCachedVideo(shortText, videoUrl);
+        setTalkingVideoUrl(videoUrl);
       }
     } catch (e) {
       if ((e as Error).name !== 'AbortError') {
@@ -1,4 +1,5 @@
 import { useState, useRef, useEffect, useCallback } from 'react';
+import { animatePhoto } from '@/utils/animatePhoto';
 import {
   DIMA_AVATAR,
   DIMA_AI_URL,
@@ -171,17 +172,15 @@ const DimaChat = () => {
     setIsGeneratingVideo(true);
     setTalkingVideoUrl(null);
     try {
-      const response = await fetch(ANIMATE_URL, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ imageUrl: DIMA_AVATAR, text: shortText, voice: 'ru-RU-DmitryNeural' }),
-        signal: controller.signal
-      });
-      if (!response.ok) throw new Error('Failed');
-      const data = await response.json();
-      if (data.videoUrl && !controller.signal.aborted) {
-        setCachedVideo(shortText, data.videoUrl);
-        setTalkingVideoUrl(data.videoUrl);
+      const videoUrl = await animatePhoto(
+        { imageUrl: DIMA_AVATAR, text: shortText, voice: 'ru-RU-DmitryNeural' },
+        controller.signal,
+        ANIMATE_URL
+      );
+      if (!videoUrl) throw new Error('Failed');
+      if (!controller.signal.aborted) {
+        setCachedVideo(shortText, videoUrl);
+        setTalkingVideoUrl(videoUrl);
       }
     } catch (e) {
       if ((e as Error).name !== 'AbortError') console.log('D-ID animation unavailable');
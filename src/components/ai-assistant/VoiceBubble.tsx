@@ -1,8 +1,15 @@
 import { useState, useRef, useEffect } from 'react';
 import Icon from '@/components/ui/icon';
-import { OLESYA_AVATAR, TTS_URL, MOOD_LABELS, MOOD_COLORS, type VoiceMood } from './constants';
+import { OLESYA_AVATAR, MOOD_LABELS, MOOD_COLORS, loadVoiceBatch, type VoiceMood, type VoiceSegment } from './constants';
 
-const VoiceBubble = ({ text, mood = 'default' }: { text: string; mood?: VoiceMood }) => {
+interface VoiceBubbleProps {
+  text: string;
+  mood?: VoiceMood;
+  segments?: VoiceSegment[];
+  index?: number;
+}
+
+const VoiceBubble = ({ text, mood = 'default', segments, index = 0 }: VoiceBubbleProps) => {
   const [isPlaying, setIsPlaying] = useState(false);
   const [isLoading, setIsLoading] = useState(false);
   const [progress, setProgress] = useState(0);
@@ -28,15 +35,10 @@ const VoiceBubble = ({ text, mood = 'default' }: { text: string; mood?: VoiceMoo
     if (audioRef.current && audioUrlRef.current) return audioRef.current;
 
     setIsLoading(true);
-    const res = await fetch(TTS_URL, {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ text, mood }),
-    });
-
-    if (!res.ok) throw new Error('TTS failed');
-    const data = await res.json();
+    const items = await loadVoiceBatch(segments || [{ text, mood }]);
+    const data = items[segments ? index : 0];
 
+    if (!data?.audioUrl) throw new Error('TTS failed');
     if (data.duration) setDuration(data.duration);
 
     const audio = new Audio(data.audioUrl);
@@ -134,6 +134,43 @@ export function setCachedVideo(text: string, url: string) {
   }
 }
 
+export const MAX_VOICE_BATCH = 10;
+
+export type VoiceSegment = { text: string; mood: VoiceMood };
+export type VoiceAudio = { audioUrl?: string; duration?: number; error?: string };
+
+const voiceBatches = new Map<string, Promise<VoiceAudio[]>>();
+
+// Все голосовые сегменты сообщения озвучиваются одним запросом ?action=batch;
+// пузыри одного сообщения получают общий промис, а не ходят в TTS каждый сам
+export function loadVoiceBatch(segments: VoiceSegment[]): Promise<VoiceAudio[]> {
+  const key = JSON.stringify(segments);
+  let batch = voiceBatches.get(key);
+  if (!batch) {
+    const chunks: VoiceSegment[][] = [];
+    for (let i = 0; i < segments.length; i += MAX_VOICE_BATCH) {
+      chunks.push(segments.slice(i, i + MAX_VOICE_BATCH));
+    }
+    batch = Promise.all(chunks.map(async chunk => {
+      const res = await fetch(`${TTS_URL}?action=batch`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ segments: chunk }),
+      });
+      const data = await res.json().catch(() => ({}));
+      if (!res.ok || !Array.isArray(data.items)) throw new Error('TTS failed');
+      return data.items as VoiceAudio[];
+    })).then(parts => parts.flat());
+    // неудачный батч не кешируется: следующее нажатие запросит его заново
+    batch.then(
+      items => { if (items.some(item => !item.audioUrl)) voiceBatches.delete(key); },
+      () => voiceBatches.delete(key),
+    );
+    voiceBatches.set(key, batch);
+  }
+  return batch;
+}
+
 const VALID_MOODS = ['whisper', 'tender', 'playful', 'passionate', 'default'];
 
 export function parseMessageContent(content: string): MessagePart[] {
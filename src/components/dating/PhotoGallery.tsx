@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { Card } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
 import { Input } from '@/components/ui/input';
@@ -41,12 +41,15 @@ const PhotoGallery = ({ photos, userId, editable = false, onAddPhoto, canLike =
   const [accessKey, setAccessKey] = useState('');
   const [unlockedAlbums, setUnlockedAlbums] = useState<Set<number>>(new Set());
   const [keyError, setKeyError] = useState('');
+  // Подписанный сервером список доступных альбомов: следующие запросы не проверяют права заново
+  const albumAccessToken = useRef<string | null>(null);
 
   useEffect(() => {
     setLocalPhotos(photos);
   }, [photos]);
 
   useEffect(() => {
+    albumAccessToken.current = null;
     loadAlbums();
   }, [userId]);
 
@@ -89,9 +92,11 @@ const PhotoGallery = ({ photos, userId, editable = false, onAddPhoto, canLike =
       const headers: Record<string, string> = {};
       if (token) headers['Authorization'] = `Bearer ${token}`;
 
-      const res = await fetch(`${GALLERY_URL}?action=list&user_id=${userId}&album_id=${albumId}`, { headers });
+      const accessParam = albumAccessToken.current ? `&access_token=${encodeURIComponent(albumAccessToken.current)}` : '';
+      const res = await fetch(`${GALLERY_URL}?action=list&user_id=${userId}&album_id=${albumId}${accessParam}`, { headers });
       if (res.ok) {
         const data = await res.json();
+        if (data.access_token) albumAccessToken.current = data.access_token;
         if (data.locked) {
           setAlbumPhotos([]);
         } else {
@@ -115,12 +120,13 @@ const PhotoGallery = ({ photos, userId, editable = false, onAddPhoto, canLike =
       const res = await fetch(`${GALLERY_URL}?action=verify-key`, {
         method: 'POST',
         headers,
-        body: JSON.stringify({ album_id: activeAlbumId, key: accessKey.trim() })
+        body: JSON.stringify({ album_id: activeAlbumId, key: accessKey.trim(), access_token: albumAccessToken.current })
       });
 
       if (res.ok) {
         const data = await res.json();
         if (data.access) {
+          albumAccessToken.current = data.access_token || null;
           setUnlockedAlbums(prev => new Set([...prev, activeAlbumId]));
           setShowKeyInput(false);
           setAccessKey('');
@@ -1,5 +1,6 @@
 import { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
+import { animatePhoto } from '@/utils/animatePhoto';
 
 const normalizeImageUrl = (url: string) => {
   if (!url) return url;
@@ -174,19 +175,14 @@ const ProfileCard = ({
                       const animationVoice = localStorage.getItem('animationVoice') || 'en-US-JennyNeural';
                       const animationDriver = localStorage.getItem('animationDriver') || 'bank://lively';
                       
-                      const response = await fetch('https://functions.poehali.dev/d79fde84-e2a9-4f7a-b135-37b4570e1e0b', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({ 
-                          imageUrl: profile.image,
-                          text: animationText,
-                          voice: animationVoice,
-                          driver: animationDriver
-                        })
+                      const videoUrl = await animatePhoto({
+                        imageUrl: profile.image,
+                        text: animationText,
+                        voice: animationVoice,
+                        driver: animationDriver
                       });
-                      const data = await response.json();
-                      if (data.videoUrl) {
-                        setAnimatedVideo(data.videoUrl);
+                      if (videoUrl) {
+                        setAnimatedVideo(videoUrl);
                       }
                     } catch (error) {
                       console.error('Failed to animate photo:', error);
@@ -1,5 +1,5 @@
 import { useState } from 'react';
-import { STICKERS, PHOTOS, parseMessageContent } from './constants';
+import { STICKERS, PHOTOS, parseMessageContent, type VoiceSegment } from './constants';
 import VoiceBubble from './VoiceBubble';
 import Icon from '@/components/ui/icon';
 
@@ -53,6 +53,10 @@ export const renderMessageContent = (content: string) => {
   const hasOnlySticker = parts.length === 1 && parts[0].type === 'sticker';
   const hasOnlyVoice = parts.length === 1 && parts[0].type === 'voice';
   const hasOnlyPhoto = parts.length === 1 && parts[0].type === 'photo';
+  const voiceSegments: VoiceSegment[] = parts.flatMap(part =>
+    part.type === 'voice' ? [{ text: part.text, mood: part.mood }] : []
+  );
+  let voiceIndex = 0;
 
   return (
     <div className={hasOnlySticker || hasOnlyVoice || hasOnlyPhoto ? 'flex flex-col' : ''}>
@@ -70,7 +74,15 @@ export const renderMessageContent = (content: string) => {
           );
         }
         if (part.type === 'voice') {
-          return <VoiceBubble key={idx} text={part.text} mood={part.mood} />;
+          return (
+            <VoiceBubble
+              key={idx}
+              text={part.text}
+              mood={part.mood}
+              segments={voiceSegments}
+              index={voiceIndex++}
+            />
+          );
         }
         if (part.type === 'photo') {
           return <PhotoBubble key={idx} id={part.id} />;
@@ -1,4 +1,5 @@
 import { useState } from 'react';
+import { animatePhoto } from '@/utils/animatePhoto';
 import { Button } from '@/components/ui/button';
 import Icon from '@/components/ui/icon';
 import { useToast } from '@/hooks/use-toast';
@@ -119,25 +120,16 @@ const ProfileAvatar = ({ user, editMode, onAvatarUpdate }: ProfileAvatarProps) =
                 const animationVoice = localStorage.getItem('animationVoice') || 'en-US-JennyNeural';
                 const animationDriver = localStorage.getItem('animationDriver') || 'bank://lively';
                 
-                const response = await fetch('https://functions.poehali.dev/d79fde84-e2a9-4f7a-b135-37b4570e1e0b', {
-                  method: 'POST',
-                  headers: { 'Content-Type': 'application/json' },
-                  body: JSON.stringify({ 
-                    imageUrl: user.avatar_url,
-                    text: animationText,
-                    voice: animationVoice,
-                    driver: animationDriver
-                  })
+                const videoUrl = await animatePhoto({
+                  imageUrl: user.avatar_url,
+                  text: animationText,
+                  voice: animationVoice,
+                  driver: animationDriver
                 });
-                if (!response.ok) {
-                  setAnimateFailed(true);
+                if (videoUrl) {
+                  setAnimatedVideo(videoUrl);
                 } else {
-                  const data = await response.json();
-                  if (data.videoUrl) {
-                    setAnimatedVideo(data.videoUrl);
-                  } else {
-                    setAnimateFailed(true);
-                  }
+                  setAnimateFailed(true);
                 }
               } catch (error) {
                 setAnimateFailed(true);
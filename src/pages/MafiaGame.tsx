@@ -12,10 +12,8 @@ const API = 'https://functions.poehali.dev/00d5a8b9-0718-48c5-aa0b-0150135c0dd1'
 
 interface Player {
   user_id: number;
-  first_name: string;
-  last_name: string;
+  display_name: string;
   avatar_url: string | null;
-  nickname: string;
   role: string | null;
   is_alive: boolean;
   is_ready: boolean;
@@ -285,7 +283,7 @@ const MafiaGame = () => {
             <Card className="bg-blue-900/40 border-blue-500/30 animate-pulse">
               <CardContent className="p-3 text-center">
                 <p className="text-sm text-blue-200">
-                  {players.find(p => p.user_id === detectiveResult.target_id)?.first_name}:
+                  {players.find(p => p.user_id === detectiveResult.target_id)?.display_name}:
                   {detectiveResult.is_mafia
                     ? <span className="text-red-400 font-bold ml-1">Мафия!</span>
                     : <span className="text-green-400 font-bold ml-1">Не мафия</span>
@@ -328,12 +326,12 @@ const MafiaGame = () => {
                   >
                     <Avatar className="w-8 h-8 border border-purple-500/30">
                       {p.avatar_url ? <AvatarImage src={p.avatar_url} /> : (
-                        <AvatarFallback className="bg-purple-600 text-white text-xs">{p.first_name?.charAt(0)}</AvatarFallback>
+                        <AvatarFallback className="bg-purple-600 text-white text-xs">{p.display_name?.charAt(0)}</AvatarFallback>
                       )}
                     </Avatar>
                     <div className="flex-1 min-w-0">
                       <p className={`text-sm font-medium truncate ${isMe ? 'text-yellow-300' : 'text-white'}`}>
-                        {p.first_name} {isMe && '(вы)'}
+                        {p.display_name} {isMe && '(вы)'}
                       </p>
                       {isWaiting && (
                         <p className={`text-xs ${p.is_ready ? 'text-green-400' : 'text-gray-500'}`}>
@@ -357,11 +355,11 @@ const MafiaGame = () => {
                     <div key={p.user_id} className="flex items-center gap-2 p-2 rounded-xl bg-slate-900/30 opacity-50">
                       <Avatar className="w-8 h-8 grayscale">
                         {p.avatar_url ? <AvatarImage src={p.avatar_url} /> : (
-                          <AvatarFallback className="bg-gray-700 text-gray-400 text-xs">{p.first_name?.charAt(0)}</AvatarFallback>
+                          <AvatarFallback className="bg-gray-700 text-gray-400 text-xs">{p.display_name?.charAt(0)}</AvatarFallback>
                         )}
                       </Avatar>
                       <div className="flex-1 min-w-0">
-                        <p className="text-sm text-gray-500 line-through truncate">{p.first_name}</p>
+                        <p className="text-sm text-gray-500 line-through truncate">{p.display_name}</p>
                         {(isFinished || !p.is_alive) && p.role && (
                           <p className="text-xs text-gray-600">{ROLE_INFO[p.role]?.emoji} {ROLE_INFO[p.role]?.label}</p>
                         )}
@@ -19,10 +19,8 @@ const RANK_DISPLAY: Record<string, string> = {
 
 interface Player {
   user_id: number;
-  first_name: string;
-  last_name: string;
+  display_name: string;
   avatar_url: string | null;
-  nickname: string;
   seat: number;
   chips: number;
   is_ready: boolean;
@@ -33,7 +31,7 @@ interface Player {
 }
 
 interface GameState {
-  id: number;
+  hand_no: number;
   dealer_seat: number;
   current_turn_seat: number | null;
   phase: string;
@@ -43,7 +41,14 @@ interface GameState {
   turn_end_at: string | null;
   winner_id: number | null;
   winner_hand: string | null;
-  finished_at: string | null;
+  finished: boolean;
+}
+
+interface Equity {
+  hand_no: number;
+  street: string;
+  mode: 'hidden' | 'showdown';
+  players: { seat: number; user_id: number; win: number; tie: number; equity: number }[];
 }
 
 interface Room {
@@ -100,11 +105,14 @@ const PokerGame = () => {
   const [chatMsg, setChatMsg] = useState('');
   const [raiseAmount, setRaiseAmount] = useState(0);
   const [timeLeft, setTimeLeft] = useState(0);
+  const [equity, setEquity] = useState<Equity | null>(null);
   const chatEndRef = useRef<HTMLDivElement>(null);
   const token = localStorage.getItem('access_token');
   const pollRef = useRef<ReturnType<typeof setInterval>>();
+  const versionRef = useRef<number | null>(null);
 
   useEffect(() => {
+    versionRef.current = null;
     loadRoom();
     pollRef.current = setInterval(loadRoom, 2500);
     return () => { if (pollRef.current) clearInterval(pollRef.current); };
@@ -131,18 +139,57 @@ const PokerGame = () => {
     }
   }, [game?.current_bet, room?.big_blind]);
 
+  const inHandCount = players.filter(p => p.is_active && !p.is_folded).length;
+
+  useEffect(() => {
+    if (!game || room?.status !== 'playing' || !myPlayer?.hole_cards || myPlayer.is_folded) { setEquity(null); return; }
+    let cancelled = false;
+    fetch(`${API}?action=equity&room_id=${roomId}`, { headers: { 'Authorization': `Bearer ${token}` } })
+      .then(res => res.ok ? res.json() : null)
+      .then(data => { if (!cancelled) setEquity(data); })
+      .catch(() => { if (!cancelled) setEquity(null); });
+    return () => { cancelled = true; };
+  }, [game?.hand_no, game?.phase, inHandCount, myPlayer?.is_folded, room?.status]);
+
   const loadRoom = async () => {
     try {
-      const res = await fetch(`${API}?action=room&room_id=${roomId}`, {
+      const since = versionRef.current;
+      const res = await fetch(`${API}?action=room&room_id=${roomId}${since !== null ? `&since=${since}` : ''}`, {
         headers: { 'Authorization': `Bearer ${token}` },
       });
+      if (res.status === 304) return;
       if (!res.ok) { navigate('/game/poker'); return; }
       const data = await res.json();
-      setRoom(data.room);
-      setPlayers(data.players);
-      setMyPlayer(data.my_player);
-      setGame(data.game);
-      setMessages(data.messages);
+      // пока шёл запрос, другой опрос уже применил более новую версию
+      if (data.delta && versionRef.current !== since) return;
+      versionRef.current = data.state_version ?? null;
+      if (!data.delta) {
+        setRoom(data.room);
+        setPlayers(data.players);
+        setMyPlayer(data.my_player);
+        setGame(data.game);
+        setMessages(data.messages);
+        return;
+      }
+      // дельта: сливаем изменившихся игроков по user_id, поля раздачи и новые сообщения
+      if (data.room) setRoom(prev => prev ? { ...prev, ...data.room } : prev);
+      if (data.players.length) {
+        setPlayers(prev => {
+          const byId = new Map(prev.map(p => [p.user_id, p]));
+          for (const p of data.players as Player[]) byId.set(p.user_id, { ...byId.get(p.user_id), ...p });
+          return Array.from(byId.values()).sort((a, b) => a.seat - b.seat);
+        });
+      }
+      if (data.my_player) setMyPlayer(prev => ({ ...prev, ...data.my_player }));
+      if ('game' in data) {
+        setGame(prev => !data.game ? null : prev && prev.hand_no === data.game.hand_no ? { ...prev, ...data.game } : data.game);
+      }
+      if (data.messages.length) {
+        setMessages(prev => {
+          const seen = new Set(prev.map(m => m.id));
+          return [...prev, ...(data.messages as Message[]).filter(m => !seen.has(m.id))].slice(-100);
+        });
+      }
     } catch (e) {
       console.error(e);
     } finally {
@@ -220,6 +267,7 @@ const PokerGame = () => {
   const communityCards = game?.community_cards ? game.community_cards.split(',').filter(Boolean) : [];
   const canCall = isMyTurn && myPlayer && game && myPlayer.current_bet < game.current_bet;
   const canCheck = isMyTurn && myPlayer && game && myPlayer.current_bet >= game.current_bet;
+  const myEquity = equity?.hand_no === game?.hand_no ? equity?.players.find(p => p.user_id === myPlayer?.user_id) : undefined;
 
   return (
     <div className="min-h-screen bg-background flex flex-col">
@@ -270,6 +318,11 @@ const PokerGame = () => {
                 {myPlayer && (
                   <p className="text-sm text-yellow-300 mt-2">Фишки: {myPlayer.chips}</p>
                 )}
+                {myEquity && (
+                  <p className="text-xs text-emerald-300/70 mt-1">
+                    Шанс: {Math.round(myEquity.win * 100)}%{myEquity.tie > 0.005 && ` · ничья ${Math.round(myEquity.tie * 100)}%`}
+                  </p>
+                )}
               </CardContent>
             </Card>
           )}
@@ -295,13 +348,13 @@ const PokerGame = () => {
                   >
                     <Avatar className="w-8 h-8 border border-emerald-500/30">
                       {p.avatar_url ? <AvatarImage src={p.avatar_url} /> : (
-                        <AvatarFallback className="bg-emerald-600 text-white text-xs">{p.first_name?.charAt(0)}</AvatarFallback>
+                        <AvatarFallback className="bg-emerald-600 text-white text-xs">{p.display_name?.charAt(0)}</AvatarFallback>
                       )}
                     </Avatar>
                     <div className="flex-1 min-w-0">
                       <div className="flex items-center gap-1">
                         <p className={`text-sm font-medium truncate ${isMe ? 'text-yellow-300' : 'text-white'}`}>
-                          {p.first_name} {isMe && '(вы)'}
+                          {p.display_name} {isMe && '(вы)'}
                         </p>
                         {isDealer && <span className="text-[10px] bg-yellow-500/30 text-yellow-300 px-1 rounded">D</span>}
                       </div>
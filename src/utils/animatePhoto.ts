@@ -0,0 +1,53 @@
+export const ANIMATE_PHOTO_URL = 'https://functions.poehali.dev/d79fde84-e2a9-4f7a-b135-37b4570e1e0b';
+
+const POLL_INTERVAL_MS = 1500;
+const MAX_POLL_INTERVAL_MS = 5000;
+const POLL_TIMEOUT_MS = 5 * 60 * 1000;
+
+export interface AnimatePhotoParams {
+  imageUrl: string;
+  text?: string;
+  voice?: string;
+  driver?: string;
+}
+
+const wait = (ms: number, signal?: AbortSignal) =>
+  new Promise<void>((resolve, reject) => {
+    const timer = setTimeout(resolve, ms);
+    signal?.addEventListener('abort', () => {
+      clearTimeout(timer);
+      reject(new DOMException('Aborted', 'AbortError'));
+    }, { once: true });
+  });
+
+// Ставит задание на оживление фото и опрашивает его статус; возвращает ссылку на видео или null
+export const animatePhoto = async (
+  params: AnimatePhotoParams,
+  signal?: AbortSignal,
+  url: string = ANIMATE_PHOTO_URL
+): Promise<string | null> => {
+  // С токеном задание привязано к пользователю: одинаковые запросы одного пользователя не дублируются
+  const token = localStorage.getItem('access_token');
+  const response = await fetch(`${url}?action=submit`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      ...(token ? { 'Authorization': `Bearer ${token}` } : {})
+    },
+    body: JSON.stringify(params),
+    signal
+  });
+  if (!response.ok) return null;
+
+  let data = await response.json();
+  const deadline = Date.now() + POLL_TIMEOUT_MS;
+  let interval = POLL_INTERVAL_MS;
+  while (data.status === 'processing' && data.jobId && Date.now() < deadline) {
+    await wait(interval, signal);
+    interval = Math.min(interval * 1.5, MAX_POLL_INTERVAL_MS);
+    const statusResponse = await fetch(`${url}?action=status&id=${encodeURIComponent(data.jobId)}`, { signal });
+    if (!statusResponse.ok) return null;
+    data = await statusResponse.json();
+  }
+  return data.videoUrl || null;
+};
@@ -0,0 +1,69 @@
+"""Проверка копий общих модулей функций:
+
+    python tools/check_shared_modules.py          # код 1 и список расходящихся копий
+    python tools/check_shared_modules.py --write  # разложить эталон по остальным копиям
+
+Функции деплоятся по отдельности и не видят чужих каталогов, поэтому общий код лежит копией
+в каждой. Эталон — первая функция в списке; правки вносятся в него и раскладываются --write."""
+
+import argparse
+import os
+import sys
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+
+# модуль → функции с его копией; первая — эталон
+SHARED_MODULES = {
+    'storage.py': ['tts', 'upload-avatar', 'photo-gallery', 'media-gc',
+                   'voice-assistant', 'verification-request', 'admin', 'services'],
+    'placeholders.py': ['upload-avatar', 'photo-gallery', 'ads'],
+    'images.py': ['upload-avatar', 'photo-gallery'],
+    'media.py': ['upload-avatar', 'photo-gallery'],
+}
+
+
+def read(function_dir, module):
+    path = os.path.join(BACKEND, function_dir, module)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def mismatches():
+    """[(модуль, эталон, функция)] для каждой отсутствующей или отличающейся копии"""
+    found = []
+    for module, functions in SHARED_MODULES.items():
+        reference = read(functions[0], module)
+        for function_dir in functions[1:]:
+            if read(function_dir, module) != reference:
+                found.append((module, functions[0], function_dir))
+    return found
+
+
+def write_copies():
+    for module, functions in SHARED_MODULES.items():
+        reference = read(functions[0], module)
+        for function_dir in functions[1:]:
+            if read(function_dir, module) != reference:
+                with open(os.path.join(BACKEND, function_dir, module), 'wb') as f:
+                    f.write(reference)
+                print(f'{function_dir}/{module} <- {functions[0]}/{module}')
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='check_shared_modules')
+    parser.add_argument('--write', action='store_true')
+    args = parser.parse_args()
+
+    if args.write:
+        write_copies()
+        return 0
+    found = mismatches()
+    for module, reference, function_dir in found:
+        print(f'backend/{function_dir}/{module} differs from backend/{reference}/{module}')
+    return 1 if found else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
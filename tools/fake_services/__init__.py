@@ -0,0 +1,54 @@
+"""Офлайн-заглушки внешних сервисов (OpenRouter, Whisper, edge-tts, Jamendo, S3, D-ID) для бенчмарков
+и локальной отладки функций без сети. Только стандартная библиотека.
+
+Все сервисы живут на одном порту под своими префиксами; функции переключаются на них переменными
+окружения (см. service_env). Задержку, пропускную способность и долю ошибок можно задать на запуске
+или менять на лету через POST /_config."""
+
+from .core import FakeServices, DEFAULT_FAULTS, serve
+from .llm import OpenRouter, Whisper
+from .media import EdgeTTS, Jamendo, DID
+from .s3 import S3
+
+# префикс → (сервис, {переменная окружения: путь относительно корня заглушек})
+SERVICES = {
+    'openrouter': (OpenRouter, {'OPENROUTER_API_URL': '/openrouter/api/v1', 'OPENROUTER_API_KEY': None}),
+    'openai': (Whisper, {'OPENAI_BASE_URL': '/openai/v1', 'OPENAI_API_KEY': None}),
+    'edge-tts': (EdgeTTS, {'EDGE_TTS_URL': '/edge-tts'}),
+    'jamendo': (Jamendo, {'JAMENDO_API_URL': '/jamendo/v3.0', 'JAMENDO_CLIENT_ID': None}),
+    's3': (S3, {'S3_ENDPOINT_URL': '/s3', 'CDN_BASE_URL': '/s3/files',
+                'AWS_ACCESS_KEY_ID': None, 'AWS_SECRET_ACCESS_KEY': None}),
+    'd-id': (DID, {'DID_API_URL': '/d-id', 'DID_API_KEY': None}),
+}
+FAKE_SECRET = 'fake'
+
+
+def build_registry():
+    registry = FakeServices()
+    for prefix, (service_class, _) in SERVICES.items():
+        registry.register(prefix, service_class())
+    return registry
+
+
+def service_env(base_url):
+    """Переменные окружения, направляющие функции на заглушки; ключи API — любые непустые"""
+    base_url = base_url.rstrip('/')
+    env = {}
+    for _, variables in SERVICES.values():
+        for name, path in variables.items():
+            env[name] = f'{base_url}{path}' if path else FAKE_SECRET
+    return env
+
+
+def start(host='127.0.0.1', port=0, faults=None):
+    """Поднимает заглушки в фоновом потоке; возвращает (server, registry, base_url). port=0 — свободный порт"""
+    import threading
+    registry = build_registry()
+    for prefix, settings in (faults or {}).items():
+        registry.configure(prefix, **settings)
+    server = serve(registry, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, registry, f'http://{host}:{server.server_address[1]}'
+
+
+__all__ = ['FakeServices', 'DEFAULT_FAULTS', 'SERVICES', 'build_registry', 'service_env', 'serve', 'start']
@@ -0,0 +1,60 @@
+"""python -m fake_services [--port 8900] [--latency openrouter=800] [--error-rate '*=0.05'] …
+
+Печатает export-строки для переменных окружения и обслуживает запросы до Ctrl+C.
+Имя сервиса в опциях — префикс (openrouter, openai, edge-tts, jamendo, s3, d-id) или * для всех."""
+
+import argparse
+
+from . import SERVICES, build_registry, serve, service_env
+
+FAULT_OPTIONS = {
+    'latency': ('latency_ms', float),
+    'jitter': ('jitter_ms', float),
+    'throughput': ('throughput_kbps', float),
+    'error_rate': ('error_rate', float),
+    'hang_rate': ('hang_rate', float),
+    'hang_seconds': ('hang_seconds', float),
+}
+
+
+def parse_setting(value):
+    service, sep, number = value.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f'expected SERVICE=VALUE, got {value!r}')
+    if service != '*' and service not in SERVICES:
+        raise argparse.ArgumentTypeError(f'unknown service {service!r}, expected one of: *, {", ".join(SERVICES)}')
+    return service, number
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='fake_services', description='Офлайн-заглушки внешних сервисов')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency', action='append', type=parse_setting, default=[], metavar='SERVICE=MS')
+    parser.add_argument('--jitter', action='append', type=parse_setting, default=[], metavar='SERVICE=MS')
+    parser.add_argument('--throughput', action='append', type=parse_setting, default=[], metavar='SERVICE=KBPS')
+    parser.add_argument('--error-rate', action='append', type=parse_setting, default=[], metavar='SERVICE=FRACTION')
+    parser.add_argument('--hang-rate', action='append', type=parse_setting, default=[], metavar='SERVICE=FRACTION')
+    parser.add_argument('--hang-seconds', action='append', type=parse_setting, default=[], metavar='SERVICE=SECONDS')
+    args = parser.parse_args()
+
+    registry = build_registry()
+    for option, (setting, cast) in FAULT_OPTIONS.items():
+        for service, value in getattr(args, option):
+            registry.configure(service, **{setting: cast(value)})
+
+    server = serve(registry, args.host, args.port)
+    base_url = f'http://{args.host}:{server.server_address[1]}'
+    for name, value in service_env(base_url).items():
+        print(f'export {name}={value}')
+    print(f'# fault settings: GET/POST {base_url}/_config', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""HTTP-сервер заглушек: маршрутизация по префиксу сервиса и инъекция задержек, пропускной способности и ошибок."""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+DEFAULT_FAULTS = {
+    'latency_ms': 0,        # задержка перед ответом
+    'jitter_ms': 0,         # ± случайная добавка к задержке
+    'throughput_kbps': 0,   # скорость отдачи тела, 0 — без ограничения
+    'error_rate': 0.0,      # доля ответов 5xx
+    'hang_rate': 0.0,       # доля запросов, на которые сервис «зависает»
+    'hang_seconds': 60,
+}
+CHUNK_SIZE = 4096
+
+
+class Request:
+    def __init__(self, method, path, query, headers, body, base_url):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+        self.base_url = base_url
+
+    def json(self):
+        return json.loads(self.body or b'{}')
+
+    def arg(self, name, default=None):
+        values = self.query.get(name)
+        return values[0] if values else default
+
+
+def json_response(status, body, headers=None):
+    return status, {'Content-Type': 'application/json', **(headers or {})}, json.dumps(body, ensure_ascii=False).encode()
+
+
+class FakeServices:
+    """Реестр сервисов: префикс пути → объект с методом handle(request) и error_response(status)"""
+
+    def __init__(self):
+        self.services = {}
+        self.faults = {}
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def register(self, prefix, service):
+        self.services[prefix] = service
+        self.faults[prefix] = dict(DEFAULT_FAULTS)
+        self.stats[prefix] = {'requests': 0, 'errors': 0, 'hangs': 0}
+
+    def configure(self, prefix, **faults):
+        targets = self.services if prefix == '*' else [prefix]
+        for name in targets:
+            if name not in self.faults:
+                raise KeyError(f'Unknown service: {name}')
+            unknown = set(faults) - set(DEFAULT_FAULTS)
+            if unknown:
+                raise KeyError(f'Unknown fault settings: {", ".join(sorted(unknown))}')
+            self.faults[name].update(faults)
+
+    def match(self, path):
+        for prefix in self.services:
+            if path == f'/{prefix}' or path.startswith(f'/{prefix}/'):
+                return prefix, path[len(prefix) + 1:] or '/'
+        return None, path
+
+    def count(self, prefix, key):
+        with self._lock:
+            self.stats[prefix][key] += 1
+
+
+def make_handler(registry):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _read_body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                return self.rfile.read(length)
+            if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+                chunks = []
+                while True:
+                    size = int(self.rfile.readline().strip() or b'0', 16)
+                    if not size:
+                        self.rfile.readline()
+                        return b''.join(chunks)
+                    chunks.append(self.rfile.read(size))
+                    self.rfile.readline()
+            return b''
+
+        def _send(self, status, headers, body, throughput_kbps=0):
+            chunks = [body] if isinstance(body, bytes) else list(body)
+            payload = b''.join(chunks)
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            if self.command == 'HEAD':
+                return
+            try:
+                if not throughput_kbps:
+                    self.wfile.write(payload)
+                    return
+                # Тело отдаётся кусками с паузами: клиент видит заданную пропускную способность
+                delay = CHUNK_SIZE / (throughput_kbps * 1024 / 8)
+                for i in range(0, len(payload), CHUNK_SIZE):
+                    self.wfile.write(payload[i:i + CHUNK_SIZE])
+                    self.wfile.flush()
+                    time.sleep(delay)
+            except ConnectionError:
+                # клиент закрыл соединение, не дочитав тело (например, отказался от слишком большого объекта)
+                self.close_connection = True
+
+        def _control(self, body):
+            if self.command == 'POST':
+                config = json.loads(body or b'{}')
+                try:
+                    for prefix, faults in config.items():
+                        registry.configure(prefix, **faults)
+                except KeyError as e:
+                    return self._send(*json_response(400, {'error': e.args[0]}))
+            self._send(*json_response(200, {'faults': registry.faults, 'stats': registry.stats}))
+
+        def _dispatch(self):
+            url = urlsplit(self.path)
+            body = self._read_body()
+            if url.path == '/_config':
+                return self._control(body)
+
+            prefix, path = registry.match(url.path)
+            if prefix is None:
+                return self._send(*json_response(404, {'error': f'No fake service at {url.path}'}))
+
+            service = registry.services[prefix]
+            faults = registry.faults[prefix]
+            registry.count(prefix, 'requests')
+
+            delay = faults['latency_ms'] + random.uniform(-1, 1) * faults['jitter_ms']
+            if delay > 0:
+                time.sleep(delay / 1000)
+            if random.random() < faults['hang_rate']:
+                registry.count(prefix, 'hangs')
+                time.sleep(faults['hang_seconds'])
+                self.close_connection = True
+                return
+            if random.random() < faults['error_rate']:
+                registry.count(prefix, 'errors')
+                return self._send(*service.error_response(random.choice((500, 502, 503))))
+
+            host = self.headers.get('Host') or f'{self.server.server_address[0]}:{self.server.server_address[1]}'
+            request = Request(self.command, path, parse_qs(url.query, keep_blank_values=True),
+                              self.headers, body, f'http://{host}/{prefix}')
+            status, headers, payload = service.handle(request)
+            self._send(status, headers, payload, faults['throughput_kbps'])
+
+        do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = _dispatch
+
+    return Handler
+
+
+def serve(registry, host='127.0.0.1', port=8900):
+    server = ThreadingHTTPServer((host, port), make_handler(registry))
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,74 @@
+"""Заглушки OpenRouter (chat completions) и OpenAI Whisper (audio/transcriptions)."""
+
+import json
+import re
+import time
+import uuid
+
+from .core import json_response
+
+TEMPLATE_FIELD = re.compile(r'"(\w+)"\s*:\s*(")?')
+DEFAULT_REPLY = 'Привет! Это ответ тестовой заглушки OpenRouter.'
+
+
+def fill_json_template(prompt):
+    """Промпт с шаблоном {"поле": "…", "число": …} → JSON той же формы: строки и числа-заглушки"""
+    start, end = prompt.find('{'), prompt.rfind('}')
+    if start < 0 or end < start:
+        return {'content': DEFAULT_REPLY}
+    result = {}
+    for name, quoted in TEMPLATE_FIELD.findall(prompt[start:end + 1]):
+        result[name] = f'Тестовое значение {name}' if quoted else 7
+    return result or {'content': DEFAULT_REPLY}
+
+
+class OpenRouter:
+    """OpenAI-совместимый /chat/completions: если промпт просит JSON, отвечает JSON по шаблону из промпта"""
+
+    def error_response(self, status):
+        return json_response(status, {'error': {'message': 'Fake upstream error', 'code': status}})
+
+    def handle(self, request):
+        if request.method != 'POST' or not request.path.rstrip('/').endswith('/chat/completions'):
+            return json_response(404, {'error': {'message': f'Unknown path {request.path}'}})
+        body = request.json()
+        messages = body.get('messages') or []
+        prompt = '\n'.join(str(m.get('content') or '') for m in messages)
+        if 'JSON' in prompt:
+            content = json.dumps(fill_json_template(prompt), ensure_ascii=False)
+        else:
+            content = DEFAULT_REPLY
+        prompt_tokens = len(prompt.split())
+        completion_tokens = len(content.split())
+        return json_response(200, {
+            'id': f'gen-{uuid.uuid4().hex}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model') or 'fake/model',
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            },
+        })
+
+
+class Whisper:
+    """POST /audio/transcriptions (multipart) → {"text": …}; тело запроса читается целиком, как у настоящего API"""
+
+    text = 'Привет, это тестовая расшифровка.'
+
+    def error_response(self, status):
+        return json_response(status, {'error': {'message': 'Fake upstream error', 'type': 'server_error'}})
+
+    def handle(self, request):
+        if request.method != 'POST' or not request.path.rstrip('/').endswith('/audio/transcriptions'):
+            return json_response(404, {'error': {'message': f'Unknown path {request.path}'}})
+        if not request.body:
+            return json_response(400, {'error': {'message': 'No audio file'}})
+        return json_response(200, {'text': self.text})
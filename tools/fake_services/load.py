@@ -0,0 +1,100 @@
+"""Нагрузочный прогон функции против заглушек:
+
+    python -m fake_services.load backend/music '{"httpMethod": "GET", "queryStringParameters": {"action": "popular"}}' \\
+        -n 500 -c 20 --latency jamendo=300
+
+Поднимает заглушки в этом же процессе, выставляет переменные окружения, импортирует handler из
+<каталог функции>/index.py и вызывает его из пула потоков. Функции, которым нужна БД, требуют DATABASE_URL."""
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import start, service_env
+from .__main__ import FAULT_OPTIONS, parse_setting
+
+
+def load_handler(function_dir):
+    function_dir = os.path.abspath(function_dir)
+    sys.path.insert(0, function_dir)
+    spec = importlib.util.spec_from_file_location('index', os.path.join(function_dir, 'index.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['index'] = module
+    spec.loader.exec_module(module)
+    return module.handler
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def run(handler, event, requests, concurrency):
+    def call(_):
+        started = time.perf_counter()
+        try:
+            status = handler(dict(event), None).get('statusCode')
+        except Exception as e:
+            status = type(e).__name__
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(requests)))
+    return results, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='fake_services.load')
+    parser.add_argument('function_dir')
+    parser.add_argument('event', help='JSON события облачной функции')
+    parser.add_argument('-n', '--requests', type=int, default=100)
+    parser.add_argument('-c', '--concurrency', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=1, help='вызовы до замера (холодный старт не учитывается)')
+    for option, _ in FAULT_OPTIONS.items():
+        parser.add_argument(f"--{option.replace('_', '-')}", action='append', type=parse_setting, default=[], metavar='SERVICE=VALUE')
+    args = parser.parse_args()
+
+    faults = {}
+    for option, (setting, cast) in FAULT_OPTIONS.items():
+        for service, value in getattr(args, option):
+            faults.setdefault(service, {})[setting] = cast(value)
+    server, registry, base_url = start()
+    for service, settings in faults.items():
+        registry.configure(service, **settings)
+    for name, value in service_env(base_url).items():
+        os.environ.setdefault(name, value)
+
+    handler = load_handler(args.function_dir)
+    event = json.loads(args.event)
+    run(handler, event, args.warmup, 1)
+    results, elapsed = run(handler, event, args.requests, args.concurrency)
+    server.shutdown()
+
+    latencies = [latency * 1000 for latency, _ in results]
+    statuses = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    print(json.dumps({
+        'requests': len(results),
+        'concurrency': args.concurrency,
+        'throughput_rps': round(len(results) / elapsed, 1),
+        'latency_ms': {
+            'mean': round(statistics.mean(latencies), 1),
+            'p50': round(percentile(latencies, 0.50), 1),
+            'p95': round(percentile(latencies, 0.95), 1),
+            'p99': round(percentile(latencies, 0.99), 1),
+            'max': round(max(latencies), 1),
+        },
+        'statuses': statuses,
+        'upstream': registry.stats,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
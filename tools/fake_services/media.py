@@ -0,0 +1,123 @@
+"""Заглушки edge-tts (HTTP-синтез), Jamendo (поиск треков) и D-ID (ролики talks)."""
+
+import hashlib
+import json
+import threading
+import time
+import urllib.request
+import uuid
+
+from .core import json_response
+
+# Тишина MPEG-1 Layer III 128 кбит/с 44.1 кГц: 417 байт ≈ 26 мс, т. е. ~16000 байт на секунду звука
+MP3_FRAME = b'\xff\xfb\x90\x64' + b'\x00' * 413
+FRAMES_PER_SECOND = 38
+CHARS_PER_SECOND = 15
+
+
+class EdgeTTS:
+    """POST /synthesize {text, voice, rate, pitch, volume} → audio/mpeg длиной пропорционально тексту"""
+
+    def error_response(self, status):
+        return status, {'Content-Type': 'text/plain'}, b'Fake upstream error'
+
+    def handle(self, request):
+        if request.method != 'POST' or request.path.rstrip('/') != '/synthesize':
+            return json_response(404, {'error': f'Unknown path {request.path}'})
+        text = request.json().get('text') or ''
+        if not text.strip():
+            return json_response(400, {'error': 'text is required'})
+        seconds = max(len(text) / CHARS_PER_SECOND, 0.5)
+        return 200, {'Content-Type': 'audio/mpeg'}, MP3_FRAME * int(seconds * FRAMES_PER_SECOND)
+
+
+class Jamendo:
+    """GET /tracks/ с limit/offset/search/order; каталог детерминирован, чтобы ответы кешировались одинаково"""
+
+    catalog_size = 1000
+
+    def error_response(self, status):
+        return json_response(status, {'headers': {'status': 'failed', 'code': status, 'error_message': 'Fake upstream error'}})
+
+    def track(self, seed, n):
+        track_id = int(hashlib.sha1(f'{seed}:{n}'.encode()).hexdigest()[:8], 16) % 10_000_000
+        return {
+            'id': str(track_id),
+            'name': f'Track {n + 1} ({seed})',
+            'artist_name': f'Artist {track_id % 97}',
+            'album_name': f'Album {track_id % 53}',
+            'duration': 120 + track_id % 180,
+            'album_image': f'https://example.invalid/covers/{track_id}.jpg',
+            'audio': f'https://example.invalid/tracks/{track_id}.mp3',
+            'audiodownload': '',
+        }
+
+    def handle(self, request):
+        if request.method != 'GET' or not request.path.rstrip('/').endswith('/tracks'):
+            return json_response(404, {'headers': {'status': 'failed', 'error_message': f'Unknown path {request.path}'}})
+        if not request.arg('client_id'):
+            return json_response(200, {'headers': {'status': 'failed', 'code': 5, 'error_message': 'client_id is required'}, 'results': []})
+        limit = min(int(request.arg('limit', 10)), 200)
+        offset = int(request.arg('offset', 0))
+        seed = request.arg('search') or request.arg('order') or 'all'
+        results = [self.track(seed, n) for n in range(offset, min(offset + limit, self.catalog_size))]
+        headers = {'status': 'success', 'code': 0, 'results_count': len(results)}
+        if request.arg('fullcount') == 'true':
+            headers['results_fullcount'] = self.catalog_size
+        return json_response(200, {'headers': headers, 'results': results})
+
+
+class DID:
+    """POST /talks → 201 {id}; GET /talks/{id} отдаёт started, через render_seconds — done с result_url.
+    Если в запросе был webhook, по готовности он вызывается POST-ом с тем же телом, что у GET."""
+
+    render_seconds = 5
+
+    def __init__(self):
+        self.talks = {}
+        self._lock = threading.Lock()
+
+    def error_response(self, status):
+        return json_response(status, {'kind': 'InternalServerError', 'description': 'Fake upstream error'})
+
+    def talk_body(self, talk_id, talk, base_url):
+        done = time.time() >= talk['ready_at']
+        body = {'id': talk_id, 'status': 'done' if done else 'started', 'created_at': talk['created_at']}
+        if done:
+            body['result_url'] = f'{base_url}/results/{talk_id}.mp4'
+            body['duration'] = 3.0
+        return body
+
+    def notify(self, talk_id, webhook, base_url):
+        talk = self.talks[talk_id]
+        time.sleep(max(talk['ready_at'] - time.time(), 0))
+        data = json.dumps(self.talk_body(talk_id, talk, base_url)).encode()
+        request = urllib.request.Request(webhook, data=data, headers={'Content-Type': 'application/json'})
+        try:
+            urllib.request.urlopen(request, timeout=10).close()
+        except Exception as e:
+            print(f'D-ID fake webhook error for {talk_id}: {e}')
+
+    def handle(self, request):
+        parts = [p for p in request.path.split('/') if p]
+        if request.method == 'POST' and parts == ['talks']:
+            body = request.json()
+            if not body.get('source_url'):
+                return json_response(400, {'kind': 'ValidationError', 'description': 'source_url is required'})
+            talk_id = f'tlk_{uuid.uuid4().hex[:20]}'
+            with self._lock:
+                self.talks[talk_id] = {
+                    'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                    'ready_at': time.time() + self.render_seconds,
+                }
+            if body.get('webhook'):
+                threading.Thread(target=self.notify, args=(talk_id, body['webhook'], request.base_url), daemon=True).start()
+            return json_response(201, {'id': talk_id, 'status': 'created'})
+        if request.method == 'GET' and len(parts) == 2 and parts[0] == 'talks':
+            talk = self.talks.get(parts[1])
+            if not talk:
+                return json_response(404, {'kind': 'NotFoundError', 'description': 'talk not found'})
+            return json_response(200, self.talk_body(parts[1], talk, request.base_url))
+        if request.method == 'GET' and len(parts) == 2 and parts[0] == 'results':
+            return 200, {'Content-Type': 'video/mp4'}, b'\x00\x00\x00\x18ftypmp42' + b'\x00' * 1024
+        return json_response(404, {'kind': 'NotFoundError', 'description': f'Unknown path {request.path}'})
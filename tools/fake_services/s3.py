@@ -0,0 +1,210 @@
+"""Заглушка S3 в памяти: path-style адресация /{bucket}/{key}, подписи не проверяются.
+
+Поддержано то, чем пользуется storage.py и boto3: Put/Get/Head/Delete, DeleteObjects, ListObjectsV2,
+multipart (upload_fileobj), presigned PUT и presigned POST (загрузка формой: поле policy проверяется
+на content-length-range, подпись — нет). GET /{bucket}/{key} заодно служит CDN (CDN_BASE_URL=…/s3/files)."""
+
+import base64
+import hashlib
+import json
+import re
+import threading
+import uuid
+from datetime import datetime, timezone
+from email.utils import formatdate
+from urllib.parse import unquote
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+XML_NS = 'http://s3.amazonaws.com/doc/2006-03-01/'
+LIST_MAX_KEYS = 1000
+
+
+def xml_response(status, body):
+    payload = f'<?xml version="1.0" encoding="UTF-8"?>\n{body}'.encode()
+    return status, {'Content-Type': 'application/xml'}, payload
+
+
+def error_xml(status, code, message, key=''):
+    return xml_response(status, f'<Error><Code>{code}</Code><Message>{escape(message)}</Message>'
+                                f'<Key>{escape(key)}</Key></Error>')
+
+
+def decode_aws_chunked(body):
+    """Тело с Content-Encoding: aws-chunked — «hex-размер[;chunk-signature=…]\\r\\nданные\\r\\n…0\\r\\nтрейлеры»"""
+    out, pos = [], 0
+    while True:
+        line_end = body.index(b'\r\n', pos)
+        size = int(body[pos:line_end].split(b';')[0], 16)
+        if not size:
+            return b''.join(out)
+        start = line_end + 2
+        out.append(body[start:start + size])
+        pos = start + size + 2
+
+
+def local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+class S3:
+    def __init__(self):
+        self.buckets = {}
+        self.uploads = {}
+        self._lock = threading.Lock()
+
+    def error_response(self, status):
+        return error_xml(status, 'InternalError' if status == 500 else 'ServiceUnavailable', 'Fake upstream error')
+
+    def object_headers(self, obj):
+        headers = {
+            'Content-Type': obj['content_type'],
+            'ETag': obj['etag'],
+            'Last-Modified': formatdate(obj['last_modified'].timestamp(), usegmt=True),
+        }
+        if obj.get('cache_control'):
+            headers['Cache-Control'] = obj['cache_control']
+        return headers
+
+    def read_body(self, request):
+        body = request.body
+        encoding = request.headers.get('Content-Encoding') or ''
+        if 'aws-chunked' in encoding or (request.headers.get('x-amz-content-sha256') or '').startswith('STREAMING-'):
+            body = decode_aws_chunked(body)
+        return body
+
+    def store(self, bucket, key, data, headers):
+        obj = {
+            'data': data,
+            'content_type': headers.get('Content-Type') or 'binary/octet-stream',
+            'cache_control': headers.get('Cache-Control'),
+            'etag': f'"{hashlib.md5(data).hexdigest()}"',
+            'last_modified': datetime.now(timezone.utc),
+        }
+        with self._lock:
+            self.buckets.setdefault(bucket, {})[key] = obj
+        return obj
+
+    def handle(self, request):
+        bucket, _, key = request.path.lstrip('/').partition('/')
+        key = unquote(key)
+        if not bucket:
+            return error_xml(400, 'InvalidBucketName', 'Bucket is required')
+        query = request.query
+        method = request.method
+
+        if not key:
+            if method == 'PUT':
+                self.buckets.setdefault(bucket, {})
+                return 200, {}, b''
+            if method == 'POST' and 'delete' in query:
+                return self.delete_objects(bucket, request)
+            if method == 'POST':
+                return self.post_object(bucket, request)
+            if method == 'GET':
+                return self.list_objects(bucket, request)
+            return error_xml(405, 'MethodNotAllowed', f'{method} on bucket')
+
+        if 'uploadId' in query:
+            return self.multipart(bucket, key, request)
+        if method == 'POST' and 'uploads' in query:
+            upload_id = uuid.uuid4().hex
+            with self._lock:
+                self.uploads[upload_id] = {'bucket': bucket, 'key': key, 'parts': {}, 'request': request}
+            return xml_response(200, f'<InitiateMultipartUploadResult xmlns="{XML_NS}"><Bucket>{escape(bucket)}</Bucket>'
+                                     f'<Key>{escape(key)}</Key><UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>')
+        if method == 'PUT':
+            obj = self.store(bucket, key, self.read_body(request), request.headers)
+            return 200, {'ETag': obj['etag']}, b''
+        if method in ('GET', 'HEAD'):
+            obj = self.buckets.get(bucket, {}).get(key)
+            if not obj:
+                if method == 'HEAD':
+                    return 404, {}, b''
+                return error_xml(404, 'NoSuchKey', 'The specified key does not exist.', key)
+            return 200, self.object_headers(obj), obj['data']
+        if method == 'DELETE':
+            with self._lock:
+                self.buckets.get(bucket, {}).pop(key, None)
+            return 204, {}, b''
+        return error_xml(405, 'MethodNotAllowed', f'{method} on object')
+
+    def multipart(self, bucket, key, request):
+        upload_id = request.arg('uploadId')
+        upload = self.uploads.get(upload_id)
+        if not upload:
+            return error_xml(404, 'NoSuchUpload', 'The specified upload does not exist.', key)
+        if request.method == 'PUT':
+            data = self.read_body(request)
+            etag = f'"{hashlib.md5(data).hexdigest()}"'
+            upload['parts'][int(request.arg('partNumber'))] = (data, etag)
+            return 200, {'ETag': etag}, b''
+        if request.method == 'DELETE':
+            self.uploads.pop(upload_id, None)
+            return 204, {}, b''
+        if request.method == 'POST':
+            numbers = [int(el.text) for el in ElementTree.fromstring(request.body).iter() if local_name(el.tag) == 'PartNumber']
+            data = b''.join(upload['parts'][n][0] for n in sorted(numbers))
+            obj = self.store(bucket, key, data, upload['request'].headers)
+            self.uploads.pop(upload_id, None)
+            return xml_response(200, f'<CompleteMultipartUploadResult xmlns="{XML_NS}"><Bucket>{escape(bucket)}</Bucket>'
+                                     f'<Key>{escape(key)}</Key><ETag>{escape(obj["etag"])}</ETag></CompleteMultipartUploadResult>')
+        return error_xml(405, 'MethodNotAllowed', f'{request.method} on upload')
+
+    def post_object(self, bucket, request):
+        """Загрузка формой multipart/form-data: поля key, Content-Type, policy…, файл последним полем file"""
+        match = re.search(r'boundary="?([^";]+)"?', request.headers.get('Content-Type') or '')
+        if not match:
+            return error_xml(400, 'MalformedPOSTRequest', 'Expected multipart/form-data')
+        fields, data = {}, None
+        for part in request.body.split(b'--' + match.group(1).encode())[1:-1]:
+            head, _, value = part[2:-2].partition(b'\r\n\r\n')
+            name = re.search(rb'name="([^"]*)"', head).group(1).decode()
+            if name == 'file':
+                data = value
+            else:
+                fields[name] = value.decode()
+        if data is None or 'key' not in fields:
+            return error_xml(400, 'MalformedPOSTRequest', 'key and file are required')
+        policy = json.loads(base64.b64decode(fields.get('policy') or 'e30='))
+        for condition in policy.get('conditions', []):
+            if isinstance(condition, list) and condition[0] == 'content-length-range':
+                if len(data) > condition[2]:
+                    return error_xml(400, 'EntityTooLarge', 'Your proposed upload exceeds the maximum allowed size', fields['key'])
+                if len(data) < condition[1]:
+                    return error_xml(400, 'EntityTooSmall', 'Your proposed upload is smaller than the minimum allowed size', fields['key'])
+        obj = self.store(bucket, fields['key'], data, fields)
+        return 204, {'ETag': obj['etag']}, b''
+
+    def delete_objects(self, bucket, request):
+        root = ElementTree.fromstring(request.body)
+        keys = [el.text for el in root.iter() if local_name(el.tag) == 'Key']
+        with self._lock:
+            objects = self.buckets.get(bucket, {})
+            for key in keys:
+                objects.pop(key, None)
+        quiet = any(local_name(el.tag) == 'Quiet' and el.text == 'true' for el in root.iter())
+        deleted = '' if quiet else ''.join(f'<Deleted><Key>{escape(k)}</Key></Deleted>' for k in keys)
+        return xml_response(200, f'<DeleteResult xmlns="{XML_NS}">{deleted}</DeleteResult>')
+
+    def list_objects(self, bucket, request):
+        prefix = request.arg('prefix', '')
+        start_after = request.arg('continuation-token') or request.arg('start-after') or ''
+        max_keys = min(int(request.arg('max-keys', LIST_MAX_KEYS)), LIST_MAX_KEYS)
+        with self._lock:
+            keys = sorted(k for k in self.buckets.get(bucket, {}) if k.startswith(prefix) and k > start_after)
+            objects = self.buckets.get(bucket, {})
+            page = [(k, objects[k]) for k in keys[:max_keys]]
+        truncated = len(keys) > max_keys
+        contents = ''.join(
+            f'<Contents><Key>{escape(k)}</Key>'
+            f'<LastModified>{obj["last_modified"].strftime("%Y-%m-%dT%H:%M:%S.000Z")}</LastModified>'
+            f'<ETag>{escape(obj["etag"])}</ETag><Size>{len(obj["data"])}</Size>'
+            f'<StorageClass>STANDARD</StorageClass></Contents>'
+            for k, obj in page
+        )
+        token = f'<NextContinuationToken>{escape(page[-1][0])}</NextContinuationToken>' if truncated else ''
+        return xml_response(200, f'<ListBucketResult xmlns="{XML_NS}"><Name>{escape(bucket)}</Name>'
+                                 f'<Prefix>{escape(prefix)}</Prefix><KeyCount>{len(page)}</KeyCount>'
+                                 f'<MaxKeys>{max_keys}</MaxKeys><IsTruncated>{"true" if truncated else "false"}</IsTruncated>'
+                                 f'{token}{contents}</ListBucketResult>')
@@ -0,0 +1,141 @@
+"""Симуляция Мафии без БД и сети: боты играют партии в MafiaEngine.
+
+    python tools/mafia_sim.py [--games 20000] [--players 8] [--seed 1]
+
+Сначала по 2000 партий на каждое число игроков (4–10) с проверками: роли розданы по ROLES_CONFIG,
+за фазу умирает не больше одного игрока, мёртвые не оживают, партия кончается не позже чем за
+2 × игроков фаз, победитель совпадает с MafiaEngine.winner, одинаковое зерно даёт одинаковые партии.
+Печатается доля побед мафии — по ней видно, как правка правил сдвигает баланс. Затем games партий
+на players игроков без проверок: партии/с и фазы/с. Те же проверки на меньшем числе партий
+гоняет tools/tests/test_mafia_sim.py."""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend', 'mafia'))
+
+from engine import MafiaEngine, RoomState, PlayerState, ROLES_CONFIG, NIGHT_ACTIONS  # noqa: E402
+
+CHECKED_GAMES = 2000
+
+
+def rate(count, seconds):
+    return f'{count / seconds:,.0f}/s'
+
+
+def new_room(players):
+    return RoomState(1, 1, 'waiting', [PlayerState(i + 1, is_ready=True, name=f'Bot {i + 1}') for i in range(players)])
+
+
+def night_moves(engine, rng, room, known):
+    """Мафия бьёт случайного мирного, доктор лечит случайного живого, детектив проверяет непроверенного"""
+    alive = [p for p in room.players if p.is_alive]
+    for p in alive:
+        action = NIGHT_ACTIONS.get(p.role)
+        if action == 'kill':
+            targets = [t for t in alive if t.role != 'mafia']
+        elif action == 'heal':
+            targets = alive
+        elif action == 'check':
+            targets = [t for t in alive if t is not p and t.user_id not in known] or [t for t in alive if t is not p]
+        else:
+            continue
+        engine.act(room, p.user_id, action, rng.choice(targets).user_id)
+
+
+def day_moves(engine, rng, room, known):
+    """Мафия голосует против мирных, детектив — против найденной мафии, остальные — наугад; иногда воздерживаются"""
+    alive = [p for p in room.players if p.is_alive]
+    exposed = [p for p in alive if known.get(p.user_id)]
+    for p in alive:
+        if rng.random() < 0.1:
+            engine.act(room, p.user_id, 'vote', None)
+            continue
+        if p.role == 'mafia':
+            targets = [t for t in alive if t.role != 'mafia']
+        elif p.role == 'detective' and exposed:
+            targets = exposed
+        else:
+            targets = [t for t in alive if t is not p]
+        engine.act(room, p.user_id, 'vote', rng.choice(targets).user_id)
+
+
+def play(engine, rng, players, check):
+    """Одна партия → (победитель, число фаз, след партии для сверки детерминизма)"""
+    room = new_room(players)
+    engine.start(room, 1)
+    if check:
+        dealt = {}
+        for p in room.players:
+            dealt[p.role] = dealt.get(p.role, 0) + 1
+        expected = {role: count for role, count in ROLES_CONFIG[players].items() if count}
+        assert dealt == expected, f'roles {dealt} != {expected}'
+    known = {}
+    trace = []
+    phases = 0
+    while room.status == 'playing':
+        alive_before = {p.user_id for p in room.players if p.is_alive}
+        if room.phase == 'night':
+            night_moves(engine, rng, room, known)
+        else:
+            day_moves(engine, rng, room, known)
+        changes = engine.next_phase(room)
+        phases += 1
+        checked = changes.result.get('detective_result')
+        if checked:
+            known[checked['target_id']] = checked['is_mafia']
+        if check:
+            alive_after = {p.user_id for p in room.players if p.is_alive}
+            assert alive_after <= alive_before, 'a dead player came back'
+            assert len(alive_before - alive_after) <= 1, 'more than one death in a phase'
+            assert phases <= 2 * players, 'game does not end'
+            trace.append(tuple(sorted(alive_before - alive_after)))
+    if check:
+        assert room.winner == engine.winner(room), 'winner does not match the alive players'
+    return room.winner, phases, trace
+
+
+def run_checked(seed, players, games=CHECKED_GAMES):
+    """games партий с проверками → (побед мафии, всего фаз, хеш всех партий для сверки детерминизма)"""
+    engine = MafiaEngine(random.Random(seed))
+    rng = random.Random(seed)
+    digest = hashlib.sha1()
+    mafia_wins = phases = 0
+    for _ in range(games):
+        winner, n, trace = play(engine, rng, players, check=True)
+        mafia_wins += winner == 'mafia'
+        phases += n
+        digest.update(repr((winner, trace)).encode())
+    return mafia_wins, phases, digest.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='mafia_sim')
+    parser.add_argument('--games', type=int, default=20000)
+    parser.add_argument('--players', type=int, default=8, choices=sorted(ROLES_CONFIG))
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    for players in sorted(ROLES_CONFIG):
+        mafia_wins, phases, digest = run_checked(args.seed, players)
+        assert run_checked(args.seed, players)[2] == digest, 'same seed gave different games'
+        print(f'{players:2d} players: mafia wins {mafia_wins / CHECKED_GAMES:6.1%}, '
+              f'{phases / CHECKED_GAMES:4.1f} phases/game, deterministic')
+
+    engine = MafiaEngine(random.Random(args.seed + 1))
+    rng = random.Random(args.seed + 1)
+    started = time.perf_counter()
+    phases = 0
+    for _ in range(args.games):
+        phases += play(engine, rng, args.players, check=False)[1]
+    elapsed = time.perf_counter() - started
+    print(f'{args.games} games x {args.players} players, {phases} phases: '
+          f'{rate(args.games, elapsed)} games, {rate(phases, elapsed)} phases')
+
+
+if __name__ == '__main__':
+    main()
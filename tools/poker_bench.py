@@ -0,0 +1,319 @@
+"""Бенчмарки покерной функции без БД и сети:
+
+    python tools/poker_bench.py evaluator [-n 1000000]
+    python tools/poker_bench.py equity [--players 6] [--samples 20000]
+    python tools/poker_bench.py engine [--hands 50000] [--players 6]
+    python tools/poker_bench.py poll [--actions 2000] [--players 6]
+    python tools/poker_bench.py history [--hands 20000] [--players 6]
+
+evaluator — сверяет табличный оценщик с прежним перебором 21 пятёрки на случайных руках
+и меряет руки/с: поштучно (evaluate) и пакетом NumPy (evaluate_batch).
+equity — время расчёта шансов по улицам: открытые карты всех игроков и одна рука против неизвестных.
+engine — боты со случайной стратегией играют турниры в PokerEngine без БД; проверяется, что фишки
+не появляются и не исчезают, и меряются раздачи/с.
+poll — байты и запросы к БД на опрос комнаты после каждого хода: полное состояние (как до since)
+против дельты с since; ответ без изменений — 304 без тела и один запрос.
+history — размер записи истории на раздачу, скорость encode/replay; каждая раздача переигрывается
+из записи и сверяется с живой (банк, борд, победитель, комбинация)."""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from itertools import combinations
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend', 'poker'))
+
+import evaluator  # noqa: E402
+import equity  # noqa: E402
+from engine import PokerEngine, TableState, PlayerState  # noqa: E402
+import index  # noqa: E402
+import history  # noqa: E402
+
+RANK_VALUES = {r: i for i, r in enumerate(evaluator.RANKS)}
+
+
+def reference_eval_five(cards):
+    """Прежний оценщик пятёрки из backend/poker/index.py — эталон для сверки"""
+    ranks = sorted([RANK_VALUES[c[0]] for c in cards], reverse=True)
+    is_flush = len(set(c[1] for c in cards)) == 1
+    is_straight = False
+    straight_high = 0
+    unique_ranks = sorted(set(ranks), reverse=True)
+    if len(unique_ranks) == 5:
+        if unique_ranks[0] - unique_ranks[4] == 4:
+            is_straight = True
+            straight_high = unique_ranks[0]
+        if unique_ranks == [12, 3, 2, 1, 0]:
+            is_straight = True
+            straight_high = 3
+    counts = {}
+    for r in ranks:
+        counts[r] = counts.get(r, 0) + 1
+    groups = sorted(counts.items(), key=lambda x: (x[1], x[0]), reverse=True)
+    if is_flush and is_straight:
+        return ('Royal Flush', (9, 12)) if straight_high == 12 else ('Straight Flush', (8, straight_high))
+    if groups[0][1] == 4:
+        return ('Four of a Kind', (7, groups[0][0], groups[1][0]))
+    if groups[0][1] == 3 and groups[1][1] == 2:
+        return ('Full House', (6, groups[0][0], groups[1][0]))
+    if is_flush:
+        return ('Flush', (5,) + tuple(ranks))
+    if is_straight:
+        return ('Straight', (4, straight_high))
+    if groups[0][1] == 3:
+        return ('Three of a Kind', (3, groups[0][0]) + tuple(sorted([g[0] for g in groups[1:]], reverse=True)))
+    if groups[0][1] == 2 and groups[1][1] == 2:
+        pairs = sorted([groups[0][0], groups[1][0]], reverse=True)
+        kicker = [g[0] for g in groups if g[1] == 1]
+        return ('Two Pair', (2, pairs[0], pairs[1], kicker[0] if kicker else 0))
+    if groups[0][1] == 2:
+        return ('One Pair', (1, groups[0][0]) + tuple(sorted([g[0] for g in groups[1:]], reverse=True)))
+    return ('High Card', (0,) + tuple(ranks))
+
+
+def reference_evaluate(cards):
+    return max((reference_eval_five(list(c)) for c in combinations(cards, 5)), key=lambda r: r[1])
+
+
+def rate(count, seconds):
+    return f'{count / seconds:,.0f}/s'
+
+
+def bench_evaluator(args):
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    evaluator.tables()
+    print(f'tables built in {time.perf_counter() - started:.2f}s')
+
+    checked = []
+    for size in (5, 6, 7) * (args.check // 3):
+        hand = rng.sample(range(52), size)
+        name, score = reference_evaluate([evaluator.int_to_card(c) for c in hand])
+        value = evaluator.evaluate(hand)
+        assert evaluator.hand_name(value) == name and evaluator.pack(*score) == value, (hand, name, score)
+        checked.append((score, value))
+    for _ in range(args.check * 4):
+        (a, va), (b, vb) = rng.choice(checked), rng.choice(checked)
+        assert (a > b) == (va > vb) and (a == b) == (va == vb)
+    print(f'{len(checked)} hands match the reference evaluator')
+
+    hands = [rng.sample(range(52), 7) for _ in range(min(args.n, 200_000))]
+    started = time.perf_counter()
+    for hand in hands[:20_000]:
+        reference_evaluate([evaluator.int_to_card(c) for c in hand])
+    print(f'reference (21 combinations): {rate(20_000, time.perf_counter() - started)}')
+
+    started = time.perf_counter()
+    for hand in hands:
+        evaluator.evaluate(hand)
+    print(f'evaluate (scalar):           {rate(len(hands), time.perf_counter() - started)}')
+
+    import numpy as np
+    batch = np.array([rng.sample(range(52), 7) for _ in range(10_000)], dtype=np.int64)
+    batch = batch[np.random.default_rng(args.seed).integers(0, len(batch), args.n)]
+    evaluator.evaluate_batch(batch[:10])
+    started = time.perf_counter()
+    evaluator.evaluate_batch(batch)
+    print(f'evaluate_batch (NumPy):      {rate(len(batch), time.perf_counter() - started)}')
+
+
+def bench_equity(args):
+    import numpy as np
+    rng = random.Random(args.seed)
+    np_rng = np.random.default_rng(args.seed)
+    evaluator.evaluate_batch([[0, 1, 2, 3, 4]])
+    for board_size, street in ((0, 'preflop'), (3, 'flop'), (4, 'turn'), (5, 'river')):
+        cards = rng.sample(range(52), 2 * args.players + board_size)
+        holes = [cards[2 * i:2 * i + 2] for i in range(args.players)]
+        board = cards[2 * args.players:]
+        started = time.perf_counter()
+        odds, exact = equity.showdown_equity(holes, board, args.samples, np_rng)
+        shown = time.perf_counter() - started
+        started = time.perf_counter()
+        equity.hidden_equity(holes[0], board, args.players - 1, args.samples, np_rng)
+        hidden = time.perf_counter() - started
+        print(f'{street:8} showdown {"exact " if exact else "sample"} {shown * 1000:7.1f} ms   '
+              f'hidden vs {args.players - 1} {hidden * 1000:7.1f} ms   '
+              f'equity {" ".join(f"{share:.2f}" for _, _, share in odds)}')
+
+
+def bot_action(rng, player, hand):
+    """Случайная, но правдоподобная стратегия: чаще чек/колл, иногда рейз, редко ва-банк и фолд"""
+    roll = rng.random()
+    if player.current_bet >= hand.current_bet:
+        return ('check', 0) if roll < 0.75 else ('raise', hand.current_bet * 2 + 20) if roll < 0.97 else ('allin', 0)
+    return ('call', 0) if roll < 0.7 else ('fold', 0) if roll < 0.9 else ('raise', hand.current_bet * 2) if roll < 0.98 else ('allin', 0)
+
+
+def play(engine, rng, players, hands, check):
+    """Играет турниры до hands раздач; возвращает (раздачи, действия)"""
+    played = actions = 0
+    while played < hands:
+        table = TableState(1, 1, 'waiting', 10, 20, [PlayerState(i + 1, i, 1000, name=f'Bot {i + 1}') for i in range(players)])
+        total = 1000 * players
+        engine.start(table, 1)
+        by_seat = {p.seat: p for p in table.players}
+        while table.status == 'playing' and played < hands:
+            hand = table.hand
+            player = by_seat[hand.current_turn_seat]
+            action, amount = bot_action(rng, player, hand)
+            engine.act(table, player.user_id, action, amount)
+            actions += 1
+            if table.hand is not hand:
+                played += 1
+            if check and table.status == 'playing':
+                in_pot = 0 if table.hand.finished else table.hand.pot
+                assert sum(p.chips for p in table.players) + in_pot == total, 'chips are not conserved'
+    return played, actions
+
+
+def bench_engine(args):
+    evaluator.tables()
+    play(PokerEngine(random.Random(args.seed)), random.Random(args.seed), args.players, 2000, check=True)
+    print('2000 checked hands: chips conserved')
+    rng = random.Random(args.seed + 1)
+    started = time.perf_counter()
+    hands, actions = play(PokerEngine(random.Random(args.seed + 1)), rng, args.players, args.hands, check=False)
+    elapsed = time.perf_counter() - started
+    print(f'{hands} hands, {actions} actions: {rate(hands, elapsed)} hands, {rate(actions, elapsed)} actions')
+
+
+def fake_profile(user_id):
+    return {
+        'id': user_id, 'room_id': 1, 'user_id': user_id, 'love_invested': 100, 'joined_at': '2026-01-01 12:00:00',
+        'display_name': f'Игрок {user_id}', 'avatar_url': f'https://cdn.example.invalid/avatars/{user_id}.jpg',
+        'avatar_blurhash': 'LEHV6nWB2yk8pyo0adR*.7kCMdnj', 'avatar_color': '#3b6e8f',
+    }
+
+
+def bench_poll(args):
+    rng = random.Random(args.seed)
+    engine = PokerEngine(random.Random(args.seed))
+    table = TableState(1, 1, 'waiting', 10, 20, [PlayerState(i + 1, i, 1000, name=f'Игрок {i + 1}') for i in range(args.players)])
+    profiles = {str(p.user_id): fake_profile(p.user_id) for p in table.players}
+    room = {'id': 1, 'code': 'ABC123', 'name': 'Покер', 'host_id': 1, 'host_name': 'Игрок 1 Тестовый', 'max_players': 8,
+            'small_blind': 10, 'big_blind': 20, 'start_chips': 1000, 'buy_in': 1000, 'status': 'playing',
+            'created_at': '2026-01-01 12:00:00', 'updated_at': '2026-01-01 12:00:00'}
+    history = []
+    version = 0
+    viewer = 2
+    full_bytes = delta_bytes = full_queries = delta_queries = polls = 0
+
+    def apply(run):
+        nonlocal version
+        before = table.to_dict()
+        changes = run()
+        index.stamp_turn(table)
+        version += 1
+        index.stamp_versions(before, table, version)
+        for user_id, text in changes.messages:
+            history.append({
+                'id': len(history) + 1, 'room_id': 1, 'user_id': user_id, 'message': text, 'is_system': True,
+                'created_at': '2026-01-01 12:00:00', 'state_version': version, 'author_name': None,
+                'author_avatar': None, 'author_avatar_blurhash': None, 'author_avatar_color': None,
+            })
+
+    while polls < args.actions:
+        if table.status != 'playing':
+            for p in table.players:
+                p.chips, p.is_active = 1000, True
+            table.status = 'waiting'
+            apply(lambda: engine.start(table, 1))
+        since = version
+        hand = table.hand
+        player = next(p for p in table.players if p.seat == hand.current_turn_seat)
+        action, amount = bot_action(rng, player, hand)
+        apply(lambda: engine.act(table, player.user_id, action, amount))
+
+        full = index.room_payload(room, table, version, profiles, history[-100:], viewer)
+        full_bytes += len(json.dumps(full, default=str))
+        full_queries += 4  # прежний handle_room: комната, игроки, раздача, сообщения
+
+        changed = [p for p in table.players if table.versions['players'].get(str(p.user_id), 0) > since]
+        new_messages = [m for m in history if m['state_version'] > since]
+        delta = index.delta_payload(table, version, since, {k: profiles[k] for k in (str(p.user_id) for p in changed)},
+                                    new_messages, viewer)
+        delta_bytes += len(json.dumps(delta, default=str))
+        delta_queries += 2 + (1 if changed else 0)  # снимок, сообщения, профили изменившихся
+        polls += 1
+
+    print(f'{polls} polls after an action, {args.players} players')
+    print(f'full state:   {full_bytes / polls:8.0f} bytes/poll   {full_queries / polls:.1f} queries/poll')
+    print(f'since delta:  {delta_bytes / polls:8.0f} bytes/poll   {delta_queries / polls:.1f} queries/poll')
+    print('no changes:          0 bytes/poll   1.0 queries/poll (304)')
+
+
+def bench_history(args):
+    rng = random.Random(args.seed)
+    engine = PokerEngine(random.Random(args.seed))
+    evaluator.tables()
+    finished = []
+    while len(finished) < args.hands:
+        table = TableState(1, 1, 'waiting', 10, 20, [PlayerState(i + 1, i, 1000) for i in range(args.players)])
+        engine.start(table, 1)
+        while table.status == 'playing' and len(finished) < args.hands:
+            hand = table.hand
+            player = next(p for p in table.players if p.seat == hand.current_turn_seat)
+            if player.is_folded or rng.random() < 0.02:
+                changes = engine.timeout(table)
+            elif rng.random() < 0.005:
+                changes = engine.leave(table, rng.choice(table.players).user_id)
+            else:
+                action, amount = bot_action(rng, player, hand)
+                changes = engine.act(table, player.user_id, action, amount)
+            finished += [h for h in changes.hands if h.finished]
+
+    started = time.perf_counter()
+    records = [history.encode(10, 20, h) for h in finished]
+    encoded = time.perf_counter() - started
+    started = time.perf_counter()
+    for record, hand in zip(records, finished):
+        r = history.replay(record)
+        assert (r['winner_id'], r['pot'], r['winner_hand']) == (hand.winner_id, hand.pot, hand.winner_hand), hand.no
+        assert r['board'] == [evaluator.int_to_card(c) for c in hand.community], hand.no
+    replayed = time.perf_counter() - started
+
+    sizes = sorted(len(r) for r in records)
+    print(f'{len(records)} hands replayed from records and matched the live engine')
+    print(f'record size: mean {sum(sizes) / len(sizes):.1f} B, p50 {sizes[len(sizes) // 2]} B, max {sizes[-1]} B '
+          f'(~{sum(sizes) / len(sizes) * 1e6 / 2**20:.0f} MiB per million hands before row overhead)')
+    print(f'encode {rate(len(records), encoded)}, replay {rate(len(records), replayed)}')
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='poker_bench')
+    sub = parser.add_subparsers(dest='bench', required=True)
+    p = sub.add_parser('evaluator')
+    p.add_argument('-n', type=int, default=1_000_000)
+    p.add_argument('--check', type=int, default=3000)
+    p.add_argument('--seed', type=int, default=1)
+    p.set_defaults(run=bench_evaluator)
+    p = sub.add_parser('equity')
+    p.add_argument('--players', type=int, default=6)
+    p.add_argument('--samples', type=int, default=equity.DEFAULT_SAMPLES)
+    p.add_argument('--seed', type=int, default=1)
+    p.set_defaults(run=bench_equity)
+    p = sub.add_parser('engine')
+    p.add_argument('--hands', type=int, default=50_000)
+    p.add_argument('--players', type=int, default=6)
+    p.add_argument('--seed', type=int, default=1)
+    p.set_defaults(run=bench_engine)
+    p = sub.add_parser('poll')
+    p.add_argument('--actions', type=int, default=2000)
+    p.add_argument('--players', type=int, default=6)
+    p.add_argument('--seed', type=int, default=1)
+    p.set_defaults(run=bench_poll)
+    p = sub.add_parser('history')
+    p.add_argument('--hands', type=int, default=20_000)
+    p.add_argument('--players', type=int, default=6)
+    p.add_argument('--seed', type=int, default=1)
+    p.set_defaults(run=bench_history)
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""Проверки функций без БД и сети: python -m unittest discover -s tools/tests -t tools
+
+Функции деплоятся по отдельности и у многих одинаковые имена модулей (index, engine, storage),
+поэтому каждая загружается по пути своим экземпляром — см. load_function."""
+
+import importlib.util
+import os
+import sys
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'backend')
+
+
+def load_function(function_dir, module='index'):
+    """Модуль module из backend/<function_dir> с его соседями по каталогу; одноимённые модули
+    других функций на время загрузки убираются из sys.modules и затем возвращаются"""
+    path = os.path.abspath(os.path.join(BACKEND, function_dir))
+    names = {f[:-3] for f in os.listdir(path) if f.endswith('.py')}
+    saved = {name: sys.modules.pop(name) for name in names if name in sys.modules}
+    sys.path.insert(0, path)
+    try:
+        spec = importlib.util.spec_from_file_location(module, os.path.join(path, module + '.py'))
+        loaded = importlib.util.module_from_spec(spec)
+        sys.modules[module] = loaded
+        spec.loader.exec_module(loaded)
+    finally:
+        sys.path.remove(path)
+        for name in names:
+            sys.modules.pop(name, None)
+        sys.modules.update(saved)
+    return loaded
@@ -0,0 +1,100 @@
+"""Задания animate-photo: запросы к D-ID идут только после коммита забранных строк, занятый submit в D-ID не ходит"""
+
+import os
+import unittest
+
+import fake_services
+
+from . import load_function
+
+
+class RecordingConnection:
+    def __init__(self, log):
+        self.log = log
+
+    def commit(self):
+        self.log.append('commit')
+
+
+class ScriptedCursor:
+    """Пишет в журнал первое слово запроса и отдаёт заранее заданные ответы по порядку"""
+
+    def __init__(self, log, results):
+        self.log = log
+        self.connection = RecordingConnection(log)
+        self.results = list(results)
+        self.result = None
+
+    def execute(self, sql, params=None):
+        self.log.append(sql.split()[0])
+        self.result = self.results.pop(0) if self.results else None
+
+    def fetchone(self):
+        return self.result
+
+    def fetchall(self):
+        return self.result or []
+
+
+def job(job_id, status='processing', talk_id=None):
+    return {'id': job_id, 'status': status, 'talk_id': talk_id, 'result_url': None, 'error': None}
+
+
+class AnimateJobsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.registry, base_url = fake_services.start()
+        env = fake_services.service_env(base_url)
+        cls.saved_env = {name: os.environ.get(name) for name in env}
+        os.environ.update(env)
+        cls.animate = load_function('animate-photo')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        for name, value in cls.saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    def did_requests(self):
+        return self.registry.stats['d-id']['requests']
+
+    def test_sweep_commits_claim_before_calling_did(self):
+        log = []
+        original = self.animate.fetch_talk
+        self.animate.fetch_talk = lambda j: (log.append('d-id'), original(j))[1]
+        try:
+            claimed = [job('a', talk_id='tlk_missing'), job('b', talk_id='tlk_missing')]
+            cur = ScriptedCursor(log, [None, claimed, job('a'), job('b')])
+            self.assertEqual(self.animate.sweep(cur), (2, 0))
+        finally:
+            self.animate.fetch_talk = original
+
+        self.assertEqual(log, ['UPDATE', 'UPDATE', 'commit', 'd-id', 'UPDATE', 'commit',
+                               'commit', 'd-id', 'UPDATE', 'commit'])
+
+    def test_submit_of_a_live_job_does_not_call_did(self):
+        log = []
+        before = self.did_requests()
+        cur = ScriptedCursor(log, [None, job('live', status='submitting')])
+
+        result = self.animate.submit(cur, 7, {'imageUrl': 'https://example.com/a.jpg'})
+
+        self.assertEqual(result['statusCode'], 202)
+        self.assertIn('"status": "processing"', result['body'])
+        self.assertEqual(log, ['INSERT', 'SELECT'])
+        self.assertEqual(self.did_requests(), before)
+
+    def test_claimed_submit_commits_before_creating_talk(self):
+        log = []
+        before = self.did_requests()
+        cur = ScriptedCursor(log, [job('new', status='submitting'), job('new', talk_id='tlk_1')])
+
+        result = self.animate.submit(cur, 7, {'imageUrl': 'https://example.com/a.jpg'})
+
+        self.assertEqual(result['statusCode'], 202)
+        self.assertEqual(log, ['INSERT', 'commit', 'UPDATE'])
+        self.assertEqual(self.did_requests(), before + 1)
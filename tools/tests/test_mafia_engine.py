@@ -0,0 +1,116 @@
+"""Правила Мафии без БД: итог ночи, спасение доктором, подсчёт голосов и конец партии"""
+
+import random
+import unittest
+
+from . import load_function
+
+mafia = load_function('mafia', 'engine')
+
+ROLES = {1: 'mafia', 2: 'doctor', 3: 'detective', 4: 'civilian', 5: 'civilian'}
+
+
+def night_room(roles=ROLES):
+    """Партия на пятерых в первую ночь с заданными ролями"""
+    players = [mafia.PlayerState(uid, role=role, name=f'Игрок {uid}') for uid, role in roles.items()]
+    return mafia.RoomState(1, 1, 'playing', players, phase='night', day_number=1)
+
+
+def alive(room):
+    return {p.user_id for p in room.players if p.is_alive}
+
+
+class NightTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = mafia.MafiaEngine(random.Random(1))
+
+    def test_kill_and_detective_check(self):
+        room = night_room()
+        self.engine.act(room, 1, 'kill', 4)
+        self.engine.act(room, 2, 'heal', 5)
+        self.engine.act(room, 3, 'check', 1)
+
+        changes = self.engine.next_phase(room)
+
+        self.assertEqual(alive(room), {1, 2, 3, 5})
+        self.assertEqual(changes.players, {4})
+        self.assertEqual(changes.result['detective_result'], {'target_id': 1, 'is_mafia': True})
+        self.assertEqual((room.phase, room.day_number, room.actions), ('day', 1, []))
+
+    def test_doctor_saves_the_target(self):
+        room = night_room()
+        self.engine.act(room, 1, 'kill', 4)
+        self.engine.act(room, 2, 'heal', 4)
+
+        changes = self.engine.next_phase(room)
+
+        self.assertEqual(alive(room), set(ROLES))
+        self.assertEqual(changes.players, set())
+        self.assertIn('Доктор спас жителя этой ночью!', [text for text, _ in changes.messages])
+
+    def test_repeated_action_replaces_the_target(self):
+        room = night_room()
+        self.engine.act(room, 1, 'kill', 4)
+        self.engine.act(room, 1, 'kill', 5)
+        self.assertEqual(room.actions, [(1, 'kill', 5)])
+
+    def test_wrong_role_action_is_rejected(self):
+        room = night_room()
+        with self.assertRaises(mafia.ActionError):
+            self.engine.act(room, 4, 'kill', 5)
+
+
+class DayTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = mafia.MafiaEngine(random.Random(1))
+        self.room = night_room()
+        self.engine.next_phase(self.room)
+
+    def test_majority_is_voted_out(self):
+        for voter, target in ((1, 4), (2, 1), (3, 1), (4, 1), (5, 4)):
+            self.engine.act(self.room, voter, 'vote', target)
+
+        changes = self.engine.next_phase(self.room)
+
+        self.assertNotIn(1, alive(self.room))
+        self.assertEqual(changes.result['winner'], 'town')
+        self.assertEqual((self.room.status, self.room.winner), ('finished', 'town'))
+
+    def test_tie_goes_to_the_target_voted_first(self):
+        for voter, target in ((1, 4), (2, 5), (3, 4), (4, 5)):
+            self.engine.act(self.room, voter, 'vote', target)
+
+        self.engine.next_phase(self.room)
+
+        self.assertEqual(alive(self.room), {1, 2, 3, 5})
+        self.assertEqual((self.room.phase, self.room.day_number), ('night', 2))
+
+    def test_no_votes_executes_nobody(self):
+        self.engine.act(self.room, 1, 'vote', None)
+        changes = self.engine.next_phase(self.room)
+        self.assertEqual(alive(self.room), set(ROLES))
+        self.assertIn('Город не пришёл к решению. Никто не казнён.', [text for text, _ in changes.messages])
+
+    def test_votes_of_dead_players_do_not_count(self):
+        self.engine.act(self.room, 4, 'vote', 3)
+        self.engine.act(self.room, 5, 'vote', 3)
+        self.engine.act(self.room, 1, 'vote', 2)
+        self.room.player(4).is_alive = False
+        self.room.player(5).is_alive = False
+        self.engine.next_phase(self.room)
+        self.assertNotIn(2, alive(self.room))
+        self.assertIn(3, alive(self.room))
+
+
+class EndTest(unittest.TestCase):
+    def test_mafia_wins_at_parity(self):
+        engine = mafia.MafiaEngine(random.Random(1))
+        room = night_room({1: 'mafia', 2: 'doctor', 3: 'civilian'})
+        engine.act(room, 1, 'kill', 3)
+        changes = engine.next_phase(room)
+        self.assertEqual(changes.result['winner'], 'mafia')
+        self.assertEqual(room.status, 'finished')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+"""Инварианты партий Мафии из tools/mafia_sim.py: роли по ROLES_CONFIG, не больше одной смерти за фазу,
+мёртвые не оживают, партия конечна, победитель верный, одинаковое зерно — одинаковые партии"""
+
+import sys
+import unittest
+
+# mafia_sim импортирует engine из backend/mafia; одноимённый модуль других функций не должен ему попасться
+_saved_engine = sys.modules.pop('engine', None)
+import mafia_sim  # noqa: E402
+sys.modules.pop('engine', None)
+if _saved_engine is not None:
+    sys.modules['engine'] = _saved_engine
+
+GAMES = 300
+
+
+class MafiaSimTest(unittest.TestCase):
+    def test_invariants_for_every_table_size(self):
+        for players in sorted(mafia_sim.ROLES_CONFIG):
+            with self.subTest(players=players):
+                mafia_wins, phases, _ = mafia_sim.run_checked(1, players, GAMES)
+                self.assertLessEqual(phases, GAMES * 2 * players)
+                self.assertTrue(0 < mafia_wins < GAMES, 'one side never wins')
+
+    def test_same_seed_gives_same_games(self):
+        for players in (5, 8):
+            with self.subTest(players=players):
+                first = mafia_sim.run_checked(7, players, GAMES)
+                second = mafia_sim.run_checked(7, players, GAMES)
+                self.assertEqual(first, second)
+                self.assertNotEqual(first[2], mafia_sim.run_checked(8, players, GAMES)[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
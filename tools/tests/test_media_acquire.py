@@ -0,0 +1,73 @@
+"""Порядок в acquire_media: строка без ссылок коммитится до загрузки объектов, ссылка берётся после"""
+
+import io
+import unittest
+
+from PIL import Image
+
+from . import load_function
+
+media = load_function('upload-avatar', 'media')
+storage_module = load_function('upload-avatar', 'storage')
+
+
+class RecordingConnection:
+    def __init__(self, log):
+        self.log = log
+
+    def commit(self):
+        self.log.append('commit')
+
+
+class RecordingCursor:
+    """Пишет в журнал первое слово каждого запроса; UPDATE по загруженным строкам ничего не находит"""
+
+    def __init__(self, log):
+        self.log = log
+        self.connection = RecordingConnection(log)
+        self.row = None
+
+    def execute(self, sql, params):
+        words = sql.split()
+        self.log.append(words[0])
+        self.row = None
+        if words[0] == 'INSERT' and 'RETURNING' in words:
+            self.row = {'sha256': params[0], 'url': params[5], 'variants': params[6].adapted,
+                        'blurhash': params[7], 'color': params[8]}
+
+    def fetchone(self):
+        return self.row
+
+
+class RecordingStorage(storage_module.MemoryStorage):
+    def __init__(self, log):
+        super().__init__()
+        self.log = log
+
+    def put(self, key, data, content_type, cache_control=None):
+        self.log.append('put')
+        return super().put(key, data, content_type, cache_control)
+
+
+def jpeg():
+    buf = io.BytesIO()
+    Image.new('RGB', (96, 64), (200, 80, 40)).save(buf, 'JPEG')
+    return buf.getvalue()
+
+
+class AcquireMediaTest(unittest.TestCase):
+    def test_row_is_committed_before_upload(self):
+        log = []
+        result = media.acquire_media(RecordingCursor(log), 'schema', RecordingStorage(log), jpeg())
+
+        self.assertIsNotNone(result)
+        first_put = log.index('put')
+        self.assertEqual(log[:3], ['UPDATE', 'INSERT', 'commit'])
+        self.assertLess(log.index('commit'), first_put)
+        self.assertEqual(log[-1], 'INSERT')
+        self.assertNotIn('commit', log[first_put:])
+
+    def test_undecodable_bytes_touch_nothing(self):
+        log = []
+        self.assertIsNone(media.acquire_media(RecordingCursor(log), 'schema', RecordingStorage(log), b'not an image'))
+        self.assertEqual(log, ['UPDATE'])
@@ -0,0 +1,102 @@
+"""Кеш ответов Jamendo: устаревшая запись в памяти сверяется с БД, устаревший ответ обновляет один запрос.
+
+Jamendo — заглушка из fake_services, общий кеш в БД — словарь вместо таблицы jamendo_cache."""
+
+import os
+import time
+import unittest
+
+import fake_services
+
+from . import load_function
+
+
+class MemoryCacheTable:
+    def __init__(self):
+        self.rows = {}
+        self.locked = set()
+
+    def get(self, key):
+        return self.rows.get(key)
+
+    def put(self, key, payload, fetched_at):
+        self.rows[key] = (payload, fetched_at)
+        self.locked.discard(key)
+
+    def claim(self, key):
+        if key not in self.rows:
+            return True
+        if key in self.locked:
+            return False
+        self.locked.add(key)
+        return True
+
+
+class MusicCacheTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.registry, base_url = fake_services.start()
+        env = fake_services.service_env(base_url)
+        cls.saved_env = {name: os.environ.get(name) for name in env}
+        os.environ.update(env)
+        cls.music = load_function('music')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        for name, value in cls.saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    def setUp(self):
+        self.table = MemoryCacheTable()
+        self.music._lru.clear()
+        self.music.db_get = self.table.get
+        self.music.db_put = self.table.put
+        self.music.claim_refresh = self.table.claim
+
+    def jamendo_requests(self):
+        return self.registry.stats['jamendo']['requests']
+
+    def get(self):
+        return self.music.get_tracks('client', 'popular', '', 5, 0)
+
+    def test_stale_memory_entry_is_replaced_by_fresh_db_row(self):
+        key = self.music.cache_key('popular', '', 5, 0)
+        self.music.lru_put(key, ({'tracks': ['old']}, time.time() - 7200))
+        self.table.put(key, {'tracks': ['new']}, time.time() - 60)
+        before = self.jamendo_requests()
+
+        payload, age = self.get()
+
+        self.assertEqual(payload, {'tracks': ['new']})
+        self.assertLess(age, 120)
+        self.assertEqual(self.jamendo_requests(), before)
+
+    def test_stale_row_is_refreshed_by_the_claiming_request_only(self):
+        key = self.music.cache_key('popular', '', 5, 0)
+        self.table.put(key, {'tracks': ['old']}, time.time() - 7200)
+        before = self.jamendo_requests()
+
+        self.table.locked.add(key)
+        payload, _ = self.get()
+        self.assertEqual(payload, {'tracks': ['old']})
+        self.assertEqual(self.jamendo_requests(), before)
+
+        self.table.locked.discard(key)
+        self.music._lru.clear()
+        payload, age = self.get()
+        self.assertEqual(age, 0)
+        self.assertNotEqual(payload, {'tracks': ['old']})
+        self.assertEqual(self.jamendo_requests(), before + 1)
+        self.assertEqual(self.table.rows[key][0], payload)
+
+    def test_key_length_does_not_depend_on_query(self):
+        short = self.music.cache_key('search', 'jazz', 20, 0)
+        long = self.music.cache_key('search', 'jazz ' * 500, 20, 0)
+        self.assertEqual(len(short), len(long))
+        self.assertLessEqual(len(long), 255)
+        self.assertNotEqual(short, long)
@@ -0,0 +1,209 @@
+"""Покер без БД: правила PokerEngine, дельты опроса, запись снимка по версии и sweep просроченных ходов"""
+
+import random
+import unittest
+
+from . import load_function
+
+poker = load_function('poker')
+engine_module = load_function('poker', 'engine')
+
+
+def heads_up(seed=7):
+    """Стол на двоих после первой раздачи: дилер и большой блайнд — место 0, первым ходит место 1"""
+    engine = poker.PokerEngine(random.Random(seed))
+    table = poker.TableState(1, 1, 'waiting', 10, 20, [
+        poker.PlayerState(1, 0, 1000, name='Аня'),
+        poker.PlayerState(2, 1, 1000, name='Борис'),
+    ])
+    engine.start(table, 1)
+    return engine, table
+
+
+def play_to_showdown(engine, table):
+    """Малый блайнд уравнивает, дальше оба чекают до вскрытия"""
+    hand = table.hand
+    engine.act(table, 2, 'call')
+    while not hand.finished:
+        seat = table.hand.current_turn_seat
+        engine.act(table, next(p.user_id for p in table.players if p.seat == seat), 'check')
+    return hand
+
+
+class SnapshotCursor:
+    """Отвечает на запросы снимка: чтения poker_state — по очереди из loads, записи (WITH …) — из saves,
+    выборка sweep — из due; всё выполненное копится в sql"""
+
+    def __init__(self, loads=(), saves=(), due=()):
+        self.loads = list(loads)
+        self.saves = list(saves)
+        self.due = list(due)
+        self.sql = []
+        self.result = None
+
+    def execute(self, sql, params=None):
+        self.sql.append(sql)
+        text = ' '.join(sql.split())
+        if text.startswith('SELECT version, state FROM'):
+            self.result = self.loads.pop(0)
+        elif text.startswith('WITH'):
+            self.result = self.saves.pop(0)
+        elif text.startswith('SELECT room_id, version, state'):
+            self.result = self.due
+        else:
+            self.result = None
+
+    def fetchone(self):
+        return self.result
+
+    def fetchall(self):
+        return self.result or []
+
+
+class EngineTest(unittest.TestCase):
+    def test_blinds_and_first_turn(self):
+        _, table = heads_up()
+        hand = table.hand
+        self.assertEqual(hand.pot, 30)
+        self.assertEqual(hand.current_turn_seat, 1)
+        self.assertEqual([p.chips for p in table.players], [980, 990])
+        self.assertTrue(all(len(p.hole_cards) == 2 for p in table.players))
+
+    def test_hand_won_by_fold(self):
+        engine, table = heads_up()
+        hand = table.hand
+        changes = engine.act(table, 2, 'fold')
+
+        self.assertTrue(hand.finished)
+        self.assertEqual(hand.winner_id, 1)
+        self.assertIsNone(hand.winner_hand)
+        self.assertIn(hand, changes.hands)
+        self.assertFalse(any(text.startswith('Вскрытие') for _, text in changes.messages))
+        # следующая раздача уже идёт, фишки сохранились
+        self.assertEqual(table.hand.no, 2)
+        self.assertEqual(sum(p.chips for p in table.players) + table.hand.pot, 2000)
+
+    def test_hand_played_to_showdown(self):
+        engine, table = heads_up()
+        hand = play_to_showdown(engine, table)
+
+        self.assertEqual(hand.phase, 'river')
+        self.assertEqual(len(hand.community), 5)
+        self.assertEqual(hand.pot, 40)
+        self.assertIn(hand.winner_id, (1, 2))
+        self.assertIsNotNone(hand.winner_hand)
+        self.assertEqual(sum(p.chips for p in table.players) + table.hand.pot, 2000)
+
+    def test_same_seed_deals_same_cards(self):
+        _, first = heads_up(seed=3)
+        _, second = heads_up(seed=3)
+        self.assertEqual([p.hole_cards for p in first.players], [p.hole_cards for p in second.players])
+
+    def test_out_of_turn_action_is_rejected(self):
+        engine, table = heads_up()
+        with self.assertRaises(poker.ActionError):
+            engine.act(table, 1, 'check')
+
+
+class HistoryRoundTripTest(unittest.TestCase):
+    history = load_function('poker', 'history')
+
+    def test_encode_decode_replay(self):
+        engine, table = heads_up()
+        hand = table.hand
+        engine.act(table, 2, 'raise', 60)
+        engine.act(table, 1, 'call')
+        engine.act(table, 1, 'check')
+        engine.act(table, 1, 'raise', 100)
+        engine.act(table, 2, 'fold')
+        self.assertTrue(hand.finished)
+
+        record = self.history.encode(10, 20, hand)
+        decoded = self.history.decode(record)
+        self.assertEqual([p['user_id'] for p in decoded['players']], [1, 2])
+        self.assertEqual([a[1] for a in decoded['actions']], ['raise', 'call', 'check', 'raise', 'fold'])
+
+        result = self.history.replay(record)
+        self.assertEqual(result['pot'], hand.pot)
+        self.assertEqual(result['winner_id'], hand.winner_id)
+        self.assertEqual(result['board'], [poker.format_cards([c]) for c in hand.community])
+        self.assertEqual([s['action'] for s in result['steps']], ['deal', 'raise', 'call', 'check', 'raise', 'fold'])
+        self.assertEqual(result['steps'][0]['pot'], 30)
+        self.assertEqual(result['steps'][-1]['pot'], hand.pot)
+
+
+class DeltaTest(unittest.TestCase):
+    def test_delta_after_one_action_has_only_what_changed(self):
+        engine, table = heads_up()
+        version = 5
+        poker.stamp_versions(poker.TableState(1, 1, 'waiting', 10, 20, []).to_dict(), table, version)
+
+        before = table.to_dict()
+        engine.act(table, 2, 'raise', 60)
+        poker.stamp_versions(before, table, version + 1)
+        payload = poker.delta_payload(table, version + 1, version, {}, [], 2)
+
+        self.assertTrue(payload['delta'])
+        self.assertNotIn('room', payload)
+        self.assertEqual([p['user_id'] for p in payload['players']], [2])
+        self.assertEqual(payload['my_player']['chips'], 940)
+        self.assertEqual(set(payload['game']) - {'hand_no'}, {'pot', 'current_bet', 'current_turn_seat'})
+
+    def test_nothing_changed_since_current_version(self):
+        _, table = heads_up()
+        poker.stamp_versions(poker.TableState(1, 1, 'waiting', 10, 20, []).to_dict(), table, 3)
+        payload = poker.delta_payload(table, 3, 3, {}, [], 1)
+        self.assertEqual(payload['players'], [])
+        self.assertNotIn('game', payload)
+
+
+class CompareAndSwapTest(unittest.TestCase):
+    def test_conflict_rereads_and_reapplies(self):
+        _, table = heads_up()
+        state = table.to_dict()
+        cur = SnapshotCursor(loads=[{'version': 3, 'state': state}, {'version': 4, 'state': state}],
+                             saves=[None, {'version': 5}])
+        calls = []
+
+        def apply(t):
+            calls.append(t)
+            return engine_module.Changes()
+
+        _, _, version = poker.update_table(cur, 1, apply)
+
+        self.assertEqual(version, 5)
+        self.assertEqual(len(calls), 2)
+        self.assertIsNot(calls[0], calls[1])
+        saves = [sql for sql in cur.sql if sql.startswith('WITH')]
+        self.assertIn('version = 3', saves[0])
+        self.assertIn('version = 4', saves[1])
+
+    def test_gives_up_after_cas_attempts(self):
+        _, table = heads_up()
+        attempts = poker.CAS_ATTEMPTS
+        cur = SnapshotCursor(loads=[{'version': v, 'state': table.to_dict()} for v in range(attempts)],
+                             saves=[None] * attempts)
+        with self.assertRaises(poker.ActionError) as caught:
+            poker.update_table(cur, 1, lambda t: engine_module.Changes())
+        self.assertEqual(caught.exception.status, 409)
+
+
+class SweepTest(unittest.TestCase):
+    def test_expired_turn_is_played_and_idle_table_is_dequeued(self):
+        _, table = heads_up()
+        idle = poker.TableState(2, 1, 'waiting', 10, 20, [poker.PlayerState(3, 0, 1000)])
+        cur = SnapshotCursor(saves=[{'version': 8}], due=[
+            {'room_id': 1, 'version': 7, 'state': table.to_dict()},
+            {'room_id': 2, 'version': 2, 'state': idle.to_dict()},
+        ])
+
+        self.assertEqual(poker.sweep_turns(cur), (2, 1))
+
+        save = next(sql for sql in cur.sql if sql.startswith('WITH'))
+        self.assertIn('version = 7', save)
+        self.assertIn('время хода вышло', save)
+        self.assertTrue(any('turn_deadline = NULL' in sql and 'room_id = 2' in sql for sql in cur.sql))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Кто и когда видит чужие карты в action=equity"""
+
+import unittest
+
+from . import load_function
+
+poker = load_function('poker')
+
+
+def table_with(players, hand, status='playing'):
+    return poker.TableState(1, 1, status, 10, 20, players, hand)
+
+
+class EquityRevealTest(unittest.TestCase):
+    def setUp(self):
+        poker._equity_cache.clear()
+
+    def allin_table(self):
+        """A пошёл ва-банк на 500, B ещё должен решить, уравнивать ли"""
+        a = poker.PlayerState(1, 0, 0, current_bet=500, hole_cards=[0, 13])
+        b = poker.PlayerState(2, 1, 480, current_bet=20, hole_cards=[5, 6])
+        hand = poker.HandState(no=3, current_turn_seat=1, pot=520, current_bet=500,
+                               start=[0, 1, 500, 0, 13, 1, 2, 500, 5, 6])
+        return table_with([a, b], hand)
+
+    def test_caller_facing_allin_does_not_see_cards(self):
+        status, body = poker.equity_view(self.allin_table(), 2)
+        self.assertEqual(status, 200)
+        self.assertEqual(body['mode'], 'hidden')
+        self.assertEqual([p['user_id'] for p in body['players']], [2])
+        self.assertNotIn('hole_cards', body['players'][0])
+
+    def test_allin_player_does_not_see_cards_either(self):
+        status, body = poker.equity_view(self.allin_table(), 1)
+        self.assertEqual(body['mode'], 'hidden')
+        self.assertEqual([p['user_id'] for p in body['players']], [1])
+
+    def test_outsider_is_rejected(self):
+        status, body = poker.equity_view(self.allin_table(), 99)
+        self.assertEqual(status, 403)
+
+    def test_cards_open_once_betting_is_closed(self):
+        table = self.allin_table()
+        b = table.player(2)
+        b.chips, b.current_bet = 0, 500
+        status, body = poker.equity_view(table, 2)
+        self.assertEqual(body['mode'], 'showdown')
+        self.assertEqual({p['user_id'] for p in body['players']}, {1, 2})
+
+    def test_last_player_with_chips_who_matched_sees_cards(self):
+        table = self.allin_table()
+        table.player(2).current_bet = 500
+        status, body = poker.equity_view(table, 2)
+        self.assertEqual(body['mode'], 'showdown')
+
+    def test_fold_win_is_never_revealed(self):
+        winner = poker.PlayerState(1, 0, 1000, hole_cards=[0, 13])
+        loser = poker.PlayerState(2, 1, 0, is_folded=True, is_active=False, hole_cards=[5, 6])
+        hand = poker.HandState(no=4, pot=40, current_bet=20, finished=True, winner_id=1,
+                               start=[0, 1, 980, 0, 13, 1, 2, 20, 5, 6])
+        status, body = poker.equity_view(table_with([winner, loser], hand, 'finished'), 2)
+        self.assertNotEqual(body.get('mode'), 'showdown')
+        self.assertNotIn('hole_cards', str(body))
+
+
+if __name__ == '__main__':
+    unittest.main()
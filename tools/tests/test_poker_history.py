@@ -0,0 +1,53 @@
+"""Запись раздачи в poker_hand_history и её повтор: чьи карты открывает replay"""
+
+import random
+import unittest
+
+from . import load_function
+
+poker = load_function('poker')
+history = load_function('poker', 'history')
+
+
+def heads_up(seed=7):
+    """Стол на двоих после первой раздачи: дилер и большой блайнд — место 0, первым ходит место 1"""
+    engine = poker.PokerEngine(random.Random(seed))
+    table = poker.TableState(1, 1, 'waiting', 10, 20, [
+        poker.PlayerState(1, 0, 1000, name='Аня'),
+        poker.PlayerState(2, 1, 1000, name='Борис'),
+    ])
+    engine.start(table, 1)
+    return engine, table
+
+
+class ReplayShowdownTest(unittest.TestCase):
+    def test_fold_win_shows_no_cards(self):
+        engine, table = heads_up()
+        hand = table.hand
+        engine.act(table, 2, 'fold')
+        self.assertTrue(hand.finished)
+        self.assertIsNone(hand.winner_hand)
+
+        result = history.replay(history.encode(10, 20, hand))
+
+        self.assertEqual(result['winner_id'], 1)
+        self.assertIsNone(result['winner_hand'])
+        self.assertEqual([p['showdown'] for p in result['players']], [False, False])
+
+    def test_showdown_shows_both_hands(self):
+        engine, table = heads_up()
+        hand = table.hand
+        engine.act(table, 2, 'call')
+        while not hand.finished:
+            engine.act(table, table.hand.current_turn_seat + 1, 'check')
+        self.assertTrue(hand.finished)
+        self.assertIsNotNone(hand.winner_hand)
+
+        result = history.replay(history.encode(10, 20, hand))
+
+        self.assertEqual(result['winner_hand'], hand.winner_hand)
+        self.assertEqual([p['showdown'] for p in result['players']], [True, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
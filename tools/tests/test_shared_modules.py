@@ -0,0 +1,14 @@
+"""Копии общих модулей (storage, placeholders, images, media) во всех функциях совпадают с эталоном"""
+
+import unittest
+
+import check_shared_modules
+
+
+class SharedModulesTest(unittest.TestCase):
+    def test_copies_match_reference(self):
+        found = check_shared_modules.mismatches()
+        self.assertEqual(found, [], '\n'.join(
+            f'backend/{function_dir}/{module} differs from backend/{reference}/{module}; '
+            f'edit the reference and run python tools/check_shared_modules.py --write'
+            for module, reference, function_dir in found))
@@ -0,0 +1,54 @@
+"""Числа в тексте для TTS: время, дроби, единицы измерения и год в падеже"""
+
+import unittest
+
+from . import load_function
+
+normalizer = load_function('tts', 'normalizer')
+clean = normalizer.clean_text_for_tts
+
+
+class NormalizerTest(unittest.TestCase):
+    def test_time(self):
+        self.assertEqual(clean('Встречаемся в 19:00'), 'Встречаемся в девятнадцать ноль-ноль')
+        self.assertEqual(clean('с 9:05 до 21:30'), 'с девять ноль пять до двадцать один тридцать')
+
+    def test_decimal(self):
+        self.assertEqual(clean('рейтинг 2.5'), 'рейтинг две целых пять десятых')
+        self.assertEqual(clean('1,25'), 'одна целая двадцать пять сотых')
+        self.assertEqual(clean('2,0'), 'два')
+
+    def test_digit_with_unit(self):
+        self.assertEqual(clean('пробежал 5км'), 'пробежал пять киломе́тров')
+        self.assertEqual(clean('1 мин'), 'одна минута')
+        self.assertEqual(clean('22 мин'), 'двадцать две минуты')
+        self.assertEqual(clean('2,5 кг'), 'две целых пять десятых килограмма')
+        self.assertEqual(clean('скидка 30%'), 'скидка тридцать процентов')
+        self.assertEqual(clean('21 руб'), 'двадцать один рубль')
+
+    def test_year_case(self):
+        self.assertEqual(clean('в 2025 году'), 'в две тысячи двадцать пятом году')
+        self.assertEqual(clean('с 1999 года'), 'с тысяча девятьсот девяносто девятого года')
+        self.assertEqual(clean('2000 год'), 'двухтысячный год')
+        self.assertEqual(clean('2023 годом'), 'две тысячи двадцать третьим годом')
+
+    def test_year_after_preposition(self):
+        self.assertEqual(clean('в 95 году'), 'в девяносто пятом году')
+        self.assertEqual(clean('к 2030 году'), 'к две тысячи тридцатому году')
+
+    def test_age_and_duration_stay_cardinal(self):
+        self.assertEqual(clean('Мне 3 года'), 'Мне три года')
+        self.assertEqual(clean('Ему 21 год'), 'Ему двадцать один год')
+        self.assertEqual(clean('через 2 года'), 'через два года')
+        self.assertEqual(clean('1 год назад'), 'один год назад')
+        self.assertEqual(clean('в 3 года пошёл в сад'), 'в три года пошёл в сад')
+
+    def test_spaced_thousands(self):
+        self.assertEqual(clean('1 000 000 рублей'), 'один миллион рублей')
+        self.assertEqual(clean('12 000 человек'), 'двенадцать тысяч человек')
+        self.assertEqual(clean('2 500 км'), 'две тысячи пятьсот киломе́тров')
+
+    def test_numbers_next_to_separators_stay_cardinal(self):
+        self.assertEqual(clean('1,2,3'), 'один,два,три')
+        self.assertEqual(clean('через 5 минут'), 'через пять минут')
+        self.assertEqual(clean('5 мая'), 'пять мая')
@@ -0,0 +1,39 @@
+"""Разбор голосового запроса на размеченном наборе voice_intent_cases.json и построение tsquery"""
+
+import json
+import os
+import unittest
+
+from . import load_function
+
+CASES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'voice_intent_cases.json')
+FIELDS = ('type', 'city', 'gender', 'age_from', 'age_to', 'filters')
+
+intent = load_function('voice-assistant', 'intent')
+voice = load_function('voice-assistant')
+
+
+def load_cases():
+    with open(CASES, encoding='utf-8') as f:
+        return json.load(f)
+
+
+class IntentTest(unittest.TestCase):
+    def test_labelled_cases(self):
+        for case in load_cases():
+            parsed = intent.parse(case['text'])
+            with self.subTest(case['text']):
+                self.assertEqual({k: parsed[k] for k in FIELDS}, {k: case[k] for k in FIELDS})
+
+    def test_person_name_is_not_a_city(self):
+        self.assertIsNone(intent.parse('Найди Владимира')['city'])
+        self.assertIsNone(intent.parse('Владимир, 30 лет')['city'])
+        self.assertEqual(intent.parse('Найди Владимира во Владимире')['city'], 'Владимир')
+
+    def test_filter_words_are_not_search_terms(self):
+        parsed = intent.parse('бесплатные концерты онлайн в выходные')
+        self.assertEqual(parsed['terms'], ['концерты'])
+
+    def test_tsquery(self):
+        query = voice.build_tsquery(intent.parse('бесплатные концерты джаза в Нижнем Новгороде'))
+        self.assertEqual(query, '(концерты:* | джаза:*) & нижний:* & новгород:*')
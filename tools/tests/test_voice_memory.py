@@ -0,0 +1,111 @@
+"""Пиковая память голосового поиска на 10 МБ записи: base64 в теле и загрузка формой в хранилище.
+
+Заглушки сервисов работают отдельным процессом, чтобы tracemalloc считал только память функции."""
+
+import base64
+import os
+import subprocess
+import sys
+import tracemalloc
+import unittest
+
+import requests
+
+from . import load_function
+
+TOOLS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+RECORDING_BYTES = 10 * 1024 * 1024
+
+voice = load_function('voice-assistant')
+
+
+class StubCursor:
+    """Курсор для create_audio_upload: INSERT в voice_uploads всегда проходит лимит"""
+
+    def execute(self, sql, params):
+        self.key = params[0]
+
+    def fetchone(self):
+        return {'object_key': self.key}
+
+
+def peak_while(fn, *args):
+    tracemalloc.start()
+    try:
+        result = fn(*args)
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class VoiceMemoryTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.services = subprocess.Popen([sys.executable, '-m', 'fake_services', '--port', '0'],
+                                        cwd=TOOLS, stdout=subprocess.PIPE, text=True)
+        env = {}
+        for line in cls.services.stdout:
+            if line.startswith('#'):
+                break
+            name, _, value = line.removeprefix('export ').strip().partition('=')
+            env[name] = value
+        cls.saved_env = {name: os.environ.get(name) for name in env}
+        os.environ.update(env)
+        cls.recording = os.urandom(RECORDING_BYTES)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.services.terminate()
+        cls.services.wait()
+        cls.services.stdout.close()
+        for name, value in cls.saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    def upload(self, data, content_type='audio/webm'):
+        upload = voice.create_audio_upload(StubCursor(), 7, content_type)
+        response = requests.post(upload['uploadUrl'], data=upload['fields'],
+                                 files={'file': ('audio.webm', data, content_type)})
+        return upload['key'], response
+
+    def test_base64_recording_holds_one_decoded_copy(self):
+        body = base64.b64encode(self.recording).decode()
+
+        def decode_and_transcribe():
+            return voice.transcribe_audio(voice.decode_audio(body))
+
+        text, peak = peak_while(decode_and_transcribe)
+        self.assertTrue(text)
+        self.assertLess(peak, 1.75 * RECORDING_BYTES)
+
+    def test_uploaded_recording_is_streamed(self):
+        key, response = self.upload(self.recording)
+        self.assertEqual(response.status_code, 204)
+        self.assertTrue(key.startswith(f'{voice.AUDIO_UPLOAD_PREFIX}7/'))
+
+        text, peak = peak_while(voice.transcribe_uploaded_audio, key)
+        self.assertTrue(text)
+        self.assertLess(peak, RECORDING_BYTES // 4)
+        self.assertIsNone(voice.get_storage().size(key))
+
+    def test_oversized_upload_is_refused(self):
+        limit = voice.MAX_AUDIO_BYTES
+        voice.MAX_AUDIO_BYTES = RECORDING_BYTES // 2
+        try:
+            _, response = self.upload(self.recording)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(b'EntityTooLarge', response.content)
+
+            key = f'{voice.AUDIO_UPLOAD_PREFIX}7/oversized.webm'
+            voice.get_storage().put(key, self.recording, 'audio/webm')
+            with self.assertRaises(voice.AudioTooLarge):
+                voice.transcribe_uploaded_audio(key)
+        finally:
+            voice.MAX_AUDIO_BYTES = limit
+
+    def test_claimed_but_never_uploaded_key_is_not_found(self):
+        key = f'{voice.AUDIO_UPLOAD_PREFIX}7/never-uploaded.webm'
+        with self.assertRaises(voice.ObjectNotFound):
+            voice.transcribe_uploaded_audio(key)
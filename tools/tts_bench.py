@@ -0,0 +1,54 @@
+"""Микробенчмарк нормализатора текста для TTS без сети:
+
+    python tools/tts_bench.py [-n 20000]
+
+Прогоняет clean_text_for_tts по наборам сообщений — обычный чат, сленг с эмодзи, текст
+с числами (время, дроби, единицы, годы) — и печатает сообщения/с и символы/с для каждого."""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend', 'tts'))
+
+from normalizer import clean_text_for_tts  # noqa: E402
+
+CORPORA = {
+    'chat': [
+        'Привет! Как дела? Давно не виделись, может встретимся на выходных?',
+        'Я сегодня весь день работал, договор наконец подписали, завтра отдыхаю.',
+        'Смотрела вчера новый фильм, очень понравился, особенно финал.',
+    ],
+    'slang': [
+        'лол, ну это кринж конечно 😂😂 имхо норм вайб был',
+        'спс бро, щас чилю, го вечером в кино? 🔥',
+        'ахахах рил жиза, сорян что не ответил 🙏',
+    ],
+    'numbers': [
+        'Встреча в 19:00, до парка 2.5 км, это минут 15 пешком.',
+        'В 2025 году пробежал 42 км за 3 ч 58 мин, скидка на кроссовки 30%.',
+        'Билет стоит 1500 руб, начало в 18:30, мест осталось 12.',
+    ],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='tts_bench')
+    parser.add_argument('-n', type=int, default=20000)
+    args = parser.parse_args()
+
+    for name, messages in CORPORA.items():
+        chars = 0
+        started = time.perf_counter()
+        for i in range(args.n):
+            text = messages[i % len(messages)]
+            clean_text_for_tts(text)
+            chars += len(text)
+        elapsed = time.perf_counter() - started
+        print(f'{name:8s} {args.n / elapsed:10,.0f} messages/s {chars / elapsed / 1e6:6.2f} M chars/s')
+    print(f'example: {clean_text_for_tts(CORPORA["numbers"][1])}')
+
+
+if __name__ == '__main__':
+    main()
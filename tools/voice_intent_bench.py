@@ -0,0 +1,64 @@
+"""Точность и скорость разбора голосового запроса без БД и сети:
+
+    python tools/voice_intent_bench.py [-n 200000]
+
+Точность — по полям на размеченном наборе tools/tests/voice_intent_cases.json (тот же набор
+проверяет tools/tests/test_voice_intent.py); расхождения печатаются. Скорость — запросы/с
+для intent.parse и для parse + build_tsquery, как их вызывает обработчик."""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS, '..', 'backend', 'voice-assistant'))
+
+import intent  # noqa: E402
+from index import build_tsquery  # noqa: E402
+
+CASES = os.path.join(TOOLS, 'tests', 'voice_intent_cases.json')
+FIELDS = ('type', 'city', 'gender', 'age_from', 'age_to', 'filters')
+
+
+def rate(count, seconds):
+    return f'{count / seconds:,.0f}/s'
+
+
+def accuracy(cases):
+    correct = dict.fromkeys(FIELDS, 0)
+    whole = 0
+    for case in cases:
+        parsed = intent.parse(case['text'])
+        wrong = [field for field in FIELDS if parsed[field] != case[field]]
+        for field in FIELDS:
+            correct[field] += field not in wrong
+        whole += not wrong
+        for field in wrong:
+            print(f'  {case["text"]!r}: {field} = {parsed[field]!r}, expected {case[field]!r}')
+    total = len(cases)
+    print(f'{whole}/{total} queries fully correct; ' + ', '.join(f'{f} {correct[f]}/{total}' for f in FIELDS))
+
+
+def throughput(texts, n):
+    for name, fn in (('parse', intent.parse), ('parse + tsquery', lambda t: build_tsquery(intent.parse(t)))):
+        started = time.perf_counter()
+        for i in range(n):
+            fn(texts[i % len(texts)])
+        print(f'{name:16s} {rate(n, time.perf_counter() - started)}')
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='voice_intent_bench')
+    parser.add_argument('-n', type=int, default=200000)
+    args = parser.parse_args()
+
+    with open(CASES, encoding='utf-8') as f:
+        cases = json.load(f)
+    accuracy(cases)
+    throughput([case['text'] for case in cases], args.n)
+
+
+if __name__ == '__main__':
+    main()